@@ -1,5 +1,6 @@
 """FastAPI Application Entry Point for Cognitio Flow."""
 
+import asyncio
 import logging
 import os
 
@@ -19,6 +20,8 @@ from app.routes import ai_tutor, assessment, pages, files_content, admin_courses
 # Import authentication and CSRF middleware
 from app.middleware import AuthMiddleware, CSRFMiddleware
 from app.services.auth_service import get_auth_config
+from app.services.material_cache_warmer import CACHE_WARMER_ENABLED, run_material_cache_warmer
+from app.services.text_cache_service import flush_pending_writes, run_access_stats_flusher
 
 # Load environment variables
 load_dotenv()
@@ -176,6 +179,13 @@ async def startup_event():
     else:
         print("✅ Anthropic API key loaded")
 
+    # Periodically write back buffered text cache access stats and file hashes
+    app.state.access_stats_flusher = asyncio.create_task(run_access_stats_flusher())
+
+    # Pre-extract the current and next week's materials ahead of peak hours
+    if CACHE_WARMER_ENABLED:
+        app.state.material_cache_warmer = asyncio.create_task(run_material_cache_warmer())
+
     print("✅ Application ready!")
 
 
@@ -185,6 +195,15 @@ async def shutdown_event():
     """Run on application shutdown."""
     print("👋 Cognitio Flow shutting down...")
 
+    for task_name in ("access_stats_flusher", "material_cache_warmer"):
+        task = getattr(app.state, task_name, None)
+        if task is not None:
+            task.cancel()
+    try:
+        await asyncio.to_thread(flush_pending_writes)
+    except Exception as e:
+        logger.warning("Failed to flush text cache access stats and file hashes: %s", e)
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -336,6 +336,11 @@ class CourseMaterial(BaseModel):
     textLength: int = 0
     extractionError: Optional[str] = None
 
+    # Derived artifacts (computed once at upload/extraction, see material_artifacts)
+    contentHash: Optional[str] = None  # MD5 of file bytes (text cache fingerprint)
+    pageSpans: Optional[List[Dict[str, int]]] = None  # {pageNumber, start, charCount, tokens} into extractedText
+    tokenEstimate: int = 0  # Estimated tokens for extractedText
+
     # AI Summary
     summary: Optional[str] = None  # LLM-generated summary
     summaryGenerated: bool = False
@@ -433,6 +438,9 @@ class Course(BaseModel):
     # Material linking (maps to subjects in file_ids.json)
     materialSubjects: List[str] = []
 
+    # Teaching calendar: start of week 1 (drives the material cache warmer)
+    startDate: Optional[datetime] = None
+
     # Abbreviations dictionary
     abbreviations: Dict[str, str] = {}
 
@@ -471,6 +479,7 @@ class CourseCreate(BaseModel):
     passingThreshold: Optional[int] = None
     components: List[CourseComponent] = []
     materialSubjects: List[str] = []
+    startDate: Optional[datetime] = None
     abbreviations: Dict[str, str] = {}
 
 
@@ -485,6 +494,7 @@ class CourseUpdate(BaseModel):
     passingThreshold: Optional[int] = None
     components: Optional[List[CourseComponent]] = None
     materialSubjects: Optional[List[str]] = None
+    startDate: Optional[datetime] = None
     abbreviations: Optional[Dict[str, str]] = None
     materials: Optional[MaterialsRegistry] = None
     active: Optional[bool] = None
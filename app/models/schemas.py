@@ -126,6 +126,10 @@ class GenerateEssayQuestionRequest(BaseModel):
         description="Specific topic for the question"
     )
     week_number: Optional[int] = Field(None, ge=1, le=52, description="Week number filter")
+    allow_duplicate: bool = Field(
+        False,
+        description="Generate a new question even if one was generated with the same parameters"
+    )
 
 
 class EssayQuestion(BaseModel):
@@ -17,12 +17,24 @@ class TextCacheEntry(BaseModel):
     file_hash: str = Field(..., description="MD5 hash of file content for change detection")
     file_size: int = Field(..., description="File size in bytes")
     file_modified: datetime = Field(..., description="File modification timestamp")
+    file_mtime_ns: Optional[int] = Field(None, description="st_mtime_ns for stat fingerprint validation")
+    file_inode: Optional[int] = Field(None, description="st_ino for stat fingerprint validation")
     
     # Extraction results
     file_type: str = Field(..., description="Detected file type (pdf, docx, image, etc.)")
-    text: str = Field(..., description="Extracted text content")
+    text: str = Field(..., description="Extracted text content ('' until loaded for chunked entries)")
     text_length: int = Field(..., description="Character count of extracted text")
+    token_count: Optional[int] = Field(None, description="Estimated tokens of extracted text")
     page_count: Optional[int] = Field(None, description="Number of pages (if applicable)")
+
+    # Storage layout (manifest for chunked entries)
+    storage: str = Field(
+        default="inline",
+        description="'blob' (pointer to material_text_blobs/{file_hash}), or legacy 'inline'/'chunked'",
+    )
+    chunk_count: int = Field(default=0, description="Number of compressed chunk documents")
+    compressed_size: Optional[int] = Field(None, description="Total compressed bytes across chunks")
+    text_sha256: Optional[str] = Field(None, description="SHA-256 of the UTF-8 text for verification")
     
     # Metadata
     metadata: Dict[str, Any] = Field(default_factory=dict)
@@ -96,6 +108,7 @@ class CachePopulateResponse(BaseModel):
     total_files: int = Field(..., description="Total files found")
     cached: int = Field(..., description="Files successfully cached")
     skipped: int = Field(..., description="Files skipped (already cached)")
+    deduplicated: int = Field(default=0, description="Files linked to cached text of identical content")
     failed: int = Field(..., description="Files that failed extraction")
     errors: List[Dict[str, str]] = Field(default_factory=list)
 
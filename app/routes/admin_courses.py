@@ -4,6 +4,7 @@ Provides CRUD endpoints for managing courses, weeks, and legal skills.
 These endpoints require @mgms.eu domain authentication.
 """
 
+import asyncio
 import logging
 import pathlib
 import re
@@ -49,8 +50,8 @@ from app.services.materials_scanner import (
     ScanResult,
 )
 from app.services.syllabus_parser import validate_path_within_base
+from app.services.file_sniffer import sniff_file
 from app.services.slide_archive import (
-    get_file_type,
     extract_slide_archive,
     get_slide_image,
     get_all_text,
@@ -1611,7 +1612,8 @@ async def preview_material(file_path: str):
 
     # Return file for inline preview (not download)
     # Check if this is a slide archive (ZIP with manifest.json)
-    file_type = get_file_type(full_path)
+    descriptor = sniff_file(full_path)
+    file_type = descriptor.file_type if descriptor else 'unknown'
 
     if file_type == 'slide_archive':
         # Return metadata about the slide archive so frontend can use the slide viewer
@@ -1721,16 +1723,18 @@ async def get_material_info(
     # Validate and resolve path (prevents path traversal)
     full_path = validate_materials_path(file_path)
 
-    if not full_path.exists():
+    # One stat and (for .pdf) one header read; a slide archive stays open for the listing below
+    descriptor = sniff_file(full_path)
+    if descriptor is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
 
-    file_type = get_file_type(full_path)
+    file_type = descriptor.file_type
 
     result = {
         "file_path": file_path,
         "file_name": full_path.name,
         "file_type": file_type,
-        "size_bytes": full_path.stat().st_size
+        "size_bytes": descriptor.size
     }
 
     if file_type == 'slide_archive':
@@ -1791,7 +1795,8 @@ async def extract_material_text(
         "text": result.text,
         "text_length": len(result.text),
         "metadata": result.metadata,
-        "pages": result.pages
+        # Page views are sliced from result.text on demand
+        "pages": list(result.pages) if result.pages is not None else None
     }
 
 
@@ -1816,7 +1821,8 @@ async def extract_batch_text(
             detail=f"Folder not found: {folder}"
         )
 
-    results = extract_all_from_folder(folder_path, recursive=recursive)
+    # Extraction runs on the process pool; keep the event loop free meanwhile
+    results = await asyncio.to_thread(extract_all_from_folder, folder_path, recursive=recursive)
     summary = get_extraction_summary(results)
 
     # Include abbreviated results (text truncated for response size)
@@ -2344,7 +2350,7 @@ async def extract_material_text(
     """Extract text from a specific material."""
     try:
         from app.services.course_materials_service import get_course_materials_service
-        from app.services.text_extractor import extract_text
+        from app.services.material_artifacts import derive_material_artifacts
 
         service = get_course_materials_service()
         material = service.get_material(course_id, material_id)
@@ -2363,15 +2369,16 @@ async def extract_material_text(
                 detail=f"File not found: {material.storagePath}"
             )
 
-        # Extract text
-        result = extract_text(file_path)
+        # Extract text and derive the artifacts generation reads
+        result, artifacts = derive_material_artifacts(file_path)
 
         if result.success:
             updated = service.update_text_extraction(
                 course_id=course_id,
                 material_id=material_id,
                 extracted_text=result.text,
-                text_length=len(result.text)
+                text_length=len(result.text),
+                artifacts=artifacts
             )
             return {
                 "success": True,
@@ -2479,7 +2486,7 @@ async def batch_process_materials(
     """Batch process materials for text extraction and summary generation."""
     try:
         from app.services.course_materials_service import get_course_materials_service
-        from app.services.text_extractor import extract_text
+        from app.services.material_artifacts import derive_material_artifacts
         from app.services.document_upload_service import generate_document_summary
 
         service = get_course_materials_service()
@@ -2530,13 +2537,14 @@ async def batch_process_materials(
                     file_path = validate_materials_path(storage_path)
                     logger.debug(f"Full file path: {file_path}")
                     if file_path.exists():
-                        extraction = extract_text(file_path)
+                        extraction, artifacts = derive_material_artifacts(file_path)
                         if extraction.success:
                             service.update_text_extraction(
                                 course_id=course_id,
                                 material_id=material.id,
                                 extracted_text=extraction.text,
-                                text_length=len(extraction.text)
+                                text_length=len(extraction.text),
+                                artifacts=artifacts
                             )
                             result["text_extracted"] = True
                             result["text_length"] = len(extraction.text)
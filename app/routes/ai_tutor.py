@@ -7,13 +7,14 @@ Supports both legacy mode (hardcoded topics) and course-aware mode
 Features:
 - Course-aware mode with actual materials from FilesAPIService
 - Response caching to reduce API costs
-- Week/topic filtering for relevant materials
+- Streaming responses over Server-Sent Events (/chat/stream)
+- Week filtering and BM25 ranking of relevant material passages
 """
 
 import hashlib
 import logging
 from datetime import datetime, timezone
-from typing import Optional
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 
@@ -21,7 +22,8 @@ from app.dependencies.auth import get_optional_user
 from app.models.auth_models import User
 from app.models.schemas import ChatRequest, ChatResponse, ErrorResponse
 from app.models.usage_models import UserContext
-from app.services.anthropic_client import get_ai_tutor_response
+from app.routes.sse import event_stream_response
+from app.services.anthropic_client import get_ai_tutor_response, stream_ai_tutor_response
 from app.services.gcp_service import get_firestore_client
 
 logger = logging.getLogger(__name__)
@@ -29,6 +31,7 @@ logger = logging.getLogger(__name__)
 # Cache settings
 CACHE_COLLECTION = "tutor_response_cache"
 CACHE_TTL_HOURS = 24  # Cache responses for 24 hours
+CACHE_REPLAY_CHUNK_CHARS = 200  # Cached answers are streamed in chunks of this size
 
 
 def _generate_cache_key(course_id: str, context: str, message: str, week: Optional[int]) -> str:
@@ -102,6 +105,96 @@ def _cache_response(cache_key: str, response: str, course_id: str, context: str)
         logger.warning("Error caching response: %s", e)
 
 
+def _chat_history(request: ChatRequest) -> Optional[List[Dict[str, str]]]:
+    """Convert the request's conversation history to dicts for the service."""
+    if not request.conversation_history:
+        return None
+    return [
+        {"role": msg.role, "content": msg.content}
+        for msg in request.conversation_history
+    ]
+
+
+def _chat_cache_key(
+    request: ChatRequest,
+    course_id: Optional[str],
+    history: Optional[List[Dict[str, str]]],
+) -> Optional[str]:
+    """Cache key for a chat request, or None if the answer is not cacheable.
+
+    Only course-aware single-turn queries are cached; conversations with
+    history are unique.
+    """
+    if not course_id or history:
+        return None
+    return _generate_cache_key(course_id, request.context, request.message, request.week_number)
+
+
+async def _load_course_passages(
+    request: ChatRequest,
+    course_id: Optional[str],
+) -> Tuple[str, Optional[List[Dict[str, str]]]]:
+    """Load the course passages that best match the question.
+
+    Returns:
+        (context string for the tutor, passages or None)
+    """
+    if not course_id:
+        return request.context, None
+
+    week_number = request.week_number
+    materials_content = None
+    enhanced_context = request.context
+    try:
+        from app.services.files_api_service import get_files_api_service
+        service = get_files_api_service()
+
+        # Only the passages that best match the question (BM25 over the course)
+        passages = await service.search_course_passages(
+            course_id=course_id,
+            query=request.message,
+            week_number=week_number
+        )
+
+        if passages:
+            materials_content = passages
+            logger.info(
+                "Loaded passages from %d materials for tutor context (course=%s, week=%s)",
+                len(materials_content), course_id, week_number
+            )
+
+        # Enhance context string
+        enhanced_context = f"{request.context} (Course: {course_id})"
+        if week_number:
+            enhanced_context += f", Week {week_number}"
+
+    except Exception as e:
+        logger.warning(
+            "Could not load materials for course %s: %s",
+            course_id, str(e)
+        )
+        # Continue without materials
+
+    return enhanced_context, materials_content
+
+
+def _tutor_user_context(user: Optional[User], course_id: Optional[str]) -> Optional[UserContext]:
+    """Build user context for usage tracking."""
+    if not user:
+        return None
+    return UserContext(
+        email=user.email,
+        user_id=user.user_id,
+        course_id=course_id,
+    )
+
+
+def _replay_chunks(text: str) -> Iterator[str]:
+    """Split a cached answer into chunks for replay over the stream."""
+    for start in range(0, len(text), CACHE_REPLAY_CHUNK_CHARS):
+        yield text[start:start + CACHE_REPLAY_CHUNK_CHARS]
+
+
 router = APIRouter(
     prefix="/api/tutor",
     tags=["AI Tutor"],
@@ -203,22 +296,11 @@ async def chat_with_tutor(
             request.context, effective_course_id or "default", week_number, len(request.message)
         )
 
-        # Convert Pydantic models to dict for service
-        history = None
-        if request.conversation_history:
-            history = [
-                {"role": msg.role, "content": msg.content}
-                for msg in request.conversation_history
-            ]
+        history = _chat_history(request)
 
         # Check cache first (only for course-aware single-turn queries)
-        # Conversations with history are unique and should not be cached
-        materials_content = None
-        cache_key = None
-        if effective_course_id and not history:
-            cache_key = _generate_cache_key(
-                effective_course_id, request.context, request.message, week_number
-            )
+        cache_key = _chat_cache_key(request, effective_course_id, history)
+        if cache_key:
             cached_response = _get_cached_response(cache_key)
             if cached_response:
                 return ChatResponse(
@@ -227,50 +309,10 @@ async def chat_with_tutor(
                     course_id=effective_course_id
                 )
 
-        # Load course materials if course_id provided
-        enhanced_context = request.context
-        if effective_course_id:
-            try:
-                from app.services.files_api_service import get_files_api_service
-                service = get_files_api_service()
-
-                # Get materials with text content
-                materials_with_text = await service.get_course_materials_with_text(
-                    course_id=effective_course_id,
-                    week_number=week_number,
-                    limit=3  # Limit to 3 materials to manage context size
-                )
-
-                if materials_with_text:
-                    materials_content = [
-                        {"title": mat.title or mat.filename, "text": text}
-                        for mat, text in materials_with_text
-                    ]
-                    logger.info(
-                        "Loaded %d materials for tutor context (course=%s, week=%s)",
-                        len(materials_content), effective_course_id, week_number
-                    )
-
-                # Enhance context string
-                enhanced_context = f"{request.context} (Course: {effective_course_id})"
-                if week_number:
-                    enhanced_context += f", Week {week_number}"
-
-            except Exception as e:
-                logger.warning(
-                    "Could not load materials for course %s: %s",
-                    effective_course_id, str(e)
-                )
-                # Continue without materials
-
-        # Build user context for usage tracking
-        user_context = None
-        if user:
-            user_context = UserContext(
-                email=user.email,
-                user_id=user.user_id,
-                course_id=effective_course_id,
-            )
+        enhanced_context, materials_content = await _load_course_passages(
+            request, effective_course_id
+        )
+        user_context = _tutor_user_context(user, effective_course_id)
 
         # Get AI response
         response_content = await get_ai_tutor_response(
@@ -312,6 +354,72 @@ async def chat_with_tutor(
         ) from e
 
 
+@router.post("/chat/stream")
+async def stream_chat_with_tutor(
+    request: ChatRequest,
+    course_id: Optional[str] = Query(
+        None,
+        description="Course ID for course-specific context (e.g., 'LLS-2025-2026')"
+    ),
+    user: Optional[User] = Depends(get_optional_user),
+):
+    """
+    Send a message to the AI tutor and stream the response as Server-Sent Events.
+
+    Takes the same request as `/chat`. Events:
+    - `start`: `{"cached": bool}`
+    - `delta`: `{"text": "..."}` for each chunk of the answer
+    - `result`: the same body as `/chat`, once the answer is complete
+    - `error`: `{"detail": "..."}` if generation fails mid-stream
+
+    Cached answers are replayed through the same events, so clients have a
+    single code path. New course-aware single-turn answers are cached once
+    the stream completes.
+    """
+    effective_course_id = request.course_id or course_id
+    logger.info(
+        "AI Tutor stream request - Context: %s, Course: %s, Week: %s, Message length: %d",
+        request.context, effective_course_id or "default", request.week_number, len(request.message)
+    )
+
+    history = _chat_history(request)
+    cache_key = _chat_cache_key(request, effective_course_id, history)
+    cached_response = _get_cached_response(cache_key) if cache_key else None
+
+    async def events() -> AsyncIterator[Dict]:
+        yield {"event": "start", "data": {"cached": cached_response is not None}}
+
+        if cached_response is not None:
+            for chunk in _replay_chunks(cached_response):
+                yield {"event": "delta", "data": {"text": chunk}}
+            content = cached_response
+        else:
+            enhanced_context, materials_content = await _load_course_passages(
+                request, effective_course_id
+            )
+            parts = []
+            async for text in stream_ai_tutor_response(
+                message=request.message,
+                context=enhanced_context,
+                conversation_history=history,
+                materials_content=materials_content,
+                user_context=_tutor_user_context(user, effective_course_id),
+            ):
+                parts.append(text)
+                yield {"event": "delta", "data": {"text": text}}
+            content = "".join(parts)
+
+            if cache_key:
+                _cache_response(cache_key, content, effective_course_id, request.context)
+
+        chat_response = ChatResponse(content=content, status="success", course_id=effective_course_id)
+        yield {"event": "result", "data": chat_response.model_dump(mode="json")}
+
+    return await event_stream_response(
+        events(), error_message="Failed to generate AI response. Please try again."
+    )
+
+
 @router.get("/topics")
 async def get_topics(
     course_id: Optional[str] = Query(
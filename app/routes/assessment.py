@@ -7,6 +7,7 @@ Provides endpoints for:
 - Assessment history and retakes
 """
 
+import asyncio
 import logging
 import re
 import uuid
@@ -30,10 +31,13 @@ from app.models.schemas import (
 from app.models.usage_models import UserContext
 from app.services.anthropic_client import (
     get_assessment_response,
+    ESSAY_QUESTION_PROMPT_VERSION,
     generate_essay_question,
     evaluate_essay_answer,
 )
 from app.services.assessment_persistence_service import get_assessment_persistence_service
+from app.services.files_api_service import get_files_api_service
+from app.services.generation_index import KIND_ESSAY, generation_key
 
 logger = logging.getLogger(__name__)
 
@@ -340,10 +344,43 @@ async def generate_essay_assessment(
     The question is saved to the database and can be answered later.
 
     Questions are designed to require 3-7 paragraph answers.
+
+    Unless allow_duplicate is True, a question the same user already
+    generated for the same course, week and topic (with unchanged course
+    materials and prompt) is returned without calling the AI.
     """
     try:
         user_id = get_or_create_user_id(x_user_id)
         topic = request.topic or "Law & Legal Skills"
+        persistence = get_assessment_persistence_service()
+
+        # Essay assessments are private, so the key is per user
+        week_numbers = [request.week_number] if request.week_number else None
+        key = generation_key(
+            KIND_ESSAY,
+            request.course_id,
+            week_numbers=week_numbers,
+            topic=topic,
+            material_fingerprint=await asyncio.to_thread(
+                get_files_api_service().course_materials_fingerprint, request.course_id, week_numbers
+            ),
+            user_id=user_id,
+            prompt_version=ESSAY_QUESTION_PROMPT_VERSION,
+        )
+        if not request.allow_duplicate:
+            stored = await persistence.find_by_generation_key(request.course_id, key, user_id=user_id)
+            if stored:
+                logger.info("Returning essay question %s generated with the same parameters", stored.get("id"))
+                return {
+                    "assessment_id": stored.get("id"),
+                    "question": stored.get("question"),
+                    "topic": stored.get("topic", topic),
+                    "expected_paragraphs": stored.get("expectedParagraphs", "3-7"),
+                    "key_concepts": stored.get("keyConcepts", []),
+                    "guidance": stored.get("guidance"),
+                    "is_new": False,
+                    "status": "success"
+                }
 
         # Build user context for usage tracking
         user_context = None
@@ -363,7 +400,6 @@ async def generate_essay_assessment(
         question_data = await generate_essay_question(topic=topic, user_context=user_context)
 
         # Save assessment to database
-        persistence = get_assessment_persistence_service()
         assessment = await persistence.save_assessment(
             course_id=request.course_id,
             user_id=user_id,
@@ -371,7 +407,9 @@ async def generate_essay_assessment(
             topic=question_data.get("topic", topic),
             week_number=request.week_number,
             expected_paragraphs="3-7",
-            key_concepts=question_data.get("key_concepts", [])
+            key_concepts=question_data.get("key_concepts", []),
+            guidance=question_data.get("guidance"),
+            generation_key=key
         )
 
         return {
@@ -381,6 +419,7 @@ async def generate_essay_assessment(
             "expected_paragraphs": "3-7",
             "key_concepts": question_data.get("key_concepts", []),
             "guidance": question_data.get("guidance"),
+            "is_new": True,
             "status": "success"
         }
 
@@ -7,8 +7,9 @@ This enables non-admin users (e.g., @gmail.com) to view the course catalog
 and course details after OAuth login.
 """
 
+import asyncio
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
 from pydantic import BaseModel
@@ -22,6 +23,7 @@ from app.services.course_service import (
     FirestoreOperationError,
 )
 from app.services.course_materials_service import get_course_materials_service
+from app.services.material_search_service import MaterialSearchError, get_material_search_index
 
 logger = logging.getLogger(__name__)
 
@@ -234,3 +236,108 @@ async def get_material_counts_by_week(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to get material counts."
         )
+
+
+class MaterialSearchHit(BaseModel):
+    """A passage of a course material matching a search."""
+    material_id: str
+    title: str
+    week_number: Optional[int] = None
+    tier: str
+    page_number: Optional[int] = None
+    snippet: str  # HTML-escaped, matches wrapped in <mark>
+    score: float
+
+
+class MaterialSearchResponse(BaseModel):
+    """Response for a course material search."""
+    course_id: str
+    query: str
+    hits: List[MaterialSearchHit]
+    total: int
+    indexing: bool = False  # The course's index is still being built; hits may be incomplete
+
+
+@router.get(
+    "/{course_id}/search",
+    response_model=MaterialSearchResponse,
+    summary="Search course materials",
+    description="Full-text search over the extracted text of a course's readers and slides. "
+                "Returns ranked passages with highlighted snippets and page numbers."
+)
+async def search_course_materials(
+    course_id: str = Path(
+        ...,
+        min_length=1,
+        max_length=100,
+        pattern=r"^[A-Za-z0-9_-]+$",
+        description="Course identifier"
+    ),
+    user: User = Depends(require_authenticated),
+    q: str = Query(..., min_length=2, max_length=200, description="Search terms"),
+    week: Optional[int] = Query(None, ge=1, le=52, description="Only search this week's materials"),
+    tier: Optional[str] = Query(None, max_length=50, description="Only search materials in this tier"),
+    limit: int = Query(20, ge=1, le=50, description="Maximum passages to return")
+) -> MaterialSearchResponse:
+    """
+    Search a course's materials without an LLM call.
+
+    The local full-text index is brought up to date with the course's
+    materials first; only materials whose text changed are re-indexed. A
+    course searched for the first time is indexed in the background and
+    the response is marked `indexing` until the build finishes.
+
+    **Parameters:**
+    - `course_id`: The course identifier
+    - `q`: Search terms (all terms are matched first, then any term)
+    - `week`: Optional week filter
+    - `tier`: Optional tier filter (e.g. "course_materials")
+    - `limit`: Maximum passages to return (1-50, default: 20)
+    """
+    try:
+        course_service = get_course_service()
+        course = course_service.get_course(course_id, include_weeks=False)
+
+        if course is None or not course.active:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course not found"
+            )
+
+        index = get_material_search_index()
+        indexing = False
+        try:
+            indexing = await asyncio.to_thread(index.refresh, course_id)
+        except Exception as e:
+            # Serve what is already indexed
+            logger.warning("Search index sync failed for course %s: %s", course_id, e)
+
+        hits = await asyncio.to_thread(index.search, course_id, q, week, tier, limit)
+
+        logger.info(
+            "User %s searched course %s (week=%s, tier=%s): %d hits",
+            user.email, course_id, week, tier, len(hits)
+        )
+
+        return MaterialSearchResponse(
+            course_id=course_id,
+            query=q,
+            hits=[MaterialSearchHit(**vars(hit)) for hit in hits],
+            total=len(hits),
+            indexing=indexing
+        )
+
+    except HTTPException:
+        raise
+    except MaterialSearchError as e:
+        logger.error("Search index error for course %s: %s", course_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Search temporarily unavailable. Please try again."
+        )
+    except Exception as e:
+        logger.error("Error searching materials for %s: %s", course_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to search course materials."
+        )
@@ -8,6 +8,12 @@ Supports two modes:
 2. **Course-aware mode**: Uses course_id to get materials from Firestore
 
 The course-aware mode is activated by providing a course_id parameter.
+
+The /quiz/stream, /study-guide/stream and /flashcards/stream variants send
+the response as Server-Sent Events while it is generated (course-aware mode
+only): "start", "delta" events with text as it arrives ("flashcard" events
+with each complete card for flashcards), and a final "result" event with the
+same body as the non-streaming route.
 """
 
 import logging
@@ -16,6 +22,7 @@ from typing import List, Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field, validator
 
+from app.routes.sse import event_stream_response
 from app.services.files_api_service import FilesAPIService, get_files_api_service
 
 logger = logging.getLogger(__name__)
@@ -311,6 +318,41 @@ async def generate_quiz_from_files(request: FilesQuizRequest):
         raise HTTPException(500, detail=str(e)) from e
 
 
+@router.post("/quiz/stream")
+async def stream_quiz_from_files(request: FilesQuizRequest):
+    """
+    Stream quiz generation as Server-Sent Events.
+
+    Takes the same body as `/quiz`. The final `result` event carries the
+    same response body; `delta` events carry the raw JSON as it is written.
+    """
+    if not request.course_id:
+        raise HTTPException(400, detail="course_id is required for streaming generation")
+
+    service = get_files_api_service()
+    logger.info(
+        "Streaming quiz: course=%s, week=%s, questions=%d",
+        request.course_id, request.week, request.num_questions
+    )
+    events = service.stream_quiz_from_course(
+        course_id=request.course_id,
+        topic=request.topic or "Course Materials",
+        num_questions=request.num_questions,
+        difficulty=request.difficulty,
+        week_number=request.week
+    )
+
+    async def on_result(data: dict) -> dict:
+        return {
+            "quiz": data["quiz"],
+            "course_id": request.course_id,
+            "week": request.week,
+            "cached": True
+        }
+
+    return await event_stream_response(events, on_result=on_result)
+
+
 @router.post("/study-guide")
 async def generate_study_guide(request: FilesStudyGuideRequest):
     """
@@ -400,12 +442,46 @@ async def generate_study_guide(request: FilesStudyGuideRequest):
         raise HTTPException(500, detail=str(e)) from e
 
 
+@router.post("/study-guide/stream")
+async def stream_study_guide(request: FilesStudyGuideRequest):
+    """
+    Stream study guide generation as Server-Sent Events.
+
+    Takes the same body as `/study-guide`. `delta` events carry the Markdown
+    as it is written; the final `result` event carries the same response body.
+    """
+    if not request.course_id:
+        raise HTTPException(
+            400,
+            detail="course_id is required. Please provide a valid course ID."
+        )
+
+    if request.weeks:
+        topic_description = f"Course '{request.course_id}' - Weeks {request.weeks}"
+    else:
+        topic_description = f"Course '{request.course_id}' - All Materials"
+
+    service = get_files_api_service()
+    events = service.stream_study_guide_from_course(
+        course_id=request.course_id,
+        topic=topic_description,
+        week_numbers=request.weeks
+    )
+
+    async def on_result(data: dict) -> dict:
+        response = {"guide": data["guide"], "topic": topic_description}
+        return _add_course_context(response, course_id=request.course_id, weeks=request.weeks)
+
+    return await event_stream_response(events, on_result=on_result)
+
+
 @router.post("/explain-article")
 async def explain_article(request: ArticleExplainRequest):
     """
     Explain legal article using course materials.
 
-    Uses LLS Reader and other course materials to provide:
+    Grounded in the course material passages that cite the article
+    (from the citation index) to provide:
     - Full article text
     - Purpose and context
     - Key elements
@@ -427,7 +503,8 @@ async def explain_article(request: ArticleExplainRequest):
         explanation = await service.explain_article(
             article=request.article,
             code=request.code,
-            use_reader=True
+            use_reader=True,
+            course_id=request.course_id
         )
 
         return {
@@ -579,6 +656,43 @@ async def generate_flashcards(request: FlashcardsRequest):
         raise HTTPException(500, detail=str(e)) from e
 
 
+@router.post("/flashcards/stream")
+async def stream_flashcards(request: FlashcardsRequest):
+    """
+    Stream flashcard generation as Server-Sent Events.
+
+    Takes the same body as `/flashcards` (course-aware mode only). Each card
+    is sent as a `flashcard` event (`{"front": ..., "back": ...}`) as soon as
+    it has been generated, so a study session can start after the first few
+    cards; the final `result` event carries the same response body.
+    """
+    if not request.course_id:
+        raise HTTPException(400, detail="course_id is required for streaming generation")
+
+    topic = request.topic or "Course Materials"
+    service = get_files_api_service()
+    logger.info(
+        "Streaming flashcards: course=%s, week=%s, cards=%d",
+        request.course_id, request.week, request.num_cards
+    )
+    events = service.stream_flashcards_from_course(
+        course_id=request.course_id,
+        topic=topic,
+        num_cards=request.num_cards,
+        week_number=request.week
+    )
+
+    async def on_result(data: dict) -> dict:
+        response = {
+            "flashcards": data["flashcards"],
+            "count": len(data["flashcards"]),
+            "topic": topic
+        }
+        return _add_course_context(response, course_id=request.course_id, week=request.week)
+
+    return await event_stream_response(events, on_result=on_result)
+
+
 @router.get("/available-files")
 async def list_available_files():
     """
@@ -606,38 +720,60 @@ async def list_available_files():
 
 
 @router.get("/topic-files/{topic}")
-async def get_topic_files(topic: str):
+async def get_topic_files(
+    topic: str,
+    course_id: Optional[str] = None,
+    week: Optional[int] = None
+):
     """
     Get recommended files for a specific topic.
 
     Returns which uploaded files are relevant for generating
-    content about this topic.
+    content about this topic. With `course_id` the topic is looked up
+    in the course's file index (optionally within one `week`).
+
+    **Example:**
+    ```
+    GET /api/files-content/topic-files/Criminal Law
+    GET /api/files-content/topic-files/mens rea?course_id=LLS-2025-2026&week=3
+    ```
     """
+    _validate_week_parameter(week)
     try:
         service = get_files_api_service()
-        file_keys = service.get_topic_files(topic)
-
-        # Get file details
-        files_info = []
-        for key in file_keys:
-            try:
-                file_id = service.get_file_id(key)
-                files_info.append({
-                    "key": key,
-                    "file_id": file_id,
-                    "filename": service.file_ids[key].get("filename", "")
-                })
-            except (KeyError, ValueError):
-                # Skip files that don't exist in file_ids.json
-                logger.warning("File key '%s' not found in file_ids.json", key)
-                pass
+        if course_id:
+            file_keys = service.get_topic_files(topic, course_id=course_id, week_number=week)
+            files_info = service.get_course_file_details(course_id, file_keys)
+        else:
+            file_keys = service.get_topic_files(topic)
+
+            # Get file details
+            files_info = []
+            for key in file_keys:
+                try:
+                    file_id = service.get_file_id(key)
+                    files_info.append({
+                        "key": key,
+                        "file_id": file_id,
+                        "filename": service.file_ids[key].get("filename", "")
+                    })
+                except (KeyError, ValueError):
+                    # Skip files that don't exist in file_ids.json
+                    logger.warning("File key '%s' not found in file_ids.json", key)
 
-        return {
+        response = {
             "topic": topic,
             "file_keys": file_keys,
             "files": files_info
         }
+        if course_id:
+            response["course_id"] = course_id
+
+        return response
 
+    except ValueError as e:
+        logger.warning("Course not found: %s", course_id)
+        raise HTTPException(404, detail=str(e)) from e
     except Exception as e:
         logger.error("Error getting topic files: %s", e)
         raise HTTPException(500, detail=str(e)) from e
@@ -651,8 +787,8 @@ async def get_course_files(
     """
     Get files for a specific course from Firestore.
 
-    Returns which uploaded files are relevant for the course,
-    optionally filtered by week number.
+    Returns the course's materials (key = material ID, filename, title,
+    tier, week), optionally filtered by week number.
 
     **Example:**
     ```
@@ -663,21 +799,7 @@ async def get_course_files(
     try:
         service = get_files_api_service()
         file_keys = service.get_files_for_course(course_id, week_number=week)
-
-        # Get file details - use .get() to avoid KeyError
-        files_info = []
-        for key in file_keys:
-            try:
-                file_id = service.get_file_id(key)
-                file_info = service.file_ids.get(key, {})
-                files_info.append({
-                    "key": key,
-                    "file_id": file_id,
-                    "filename": file_info.get("filename", ""),
-                    "tier": file_info.get("tier", "unknown")
-                })
-            except (KeyError, ValueError):
-                logger.warning("File key '%s' not found in file_ids.json", key)
+        files_info = service.get_course_file_details(course_id, file_keys)
 
         response = {
             "course_id": course_id,
@@ -10,6 +10,7 @@ Provides endpoints for:
 Uses simulated user IDs until authentication is implemented.
 """
 
+import asyncio
 import logging
 import uuid
 from typing import Optional
@@ -29,6 +30,8 @@ from app.models.schemas import (
 from app.models.usage_models import UserContext
 from app.services.quiz_persistence_service import get_quiz_persistence_service
 from app.services.files_api_service import get_files_api_service
+from app.services.generation_index import KIND_QUIZ, generation_key
+from app.services.single_flight import get_generation_single_flight
 
 logger = logging.getLogger(__name__)
 
@@ -124,6 +127,91 @@ async def get_quiz(course_id: str, quiz_id: str):
         raise HTTPException(500, detail=str(e)) from e
 
 
+async def _generate_and_save_quiz(
+    course_id: str,
+    request: CreateQuizRequest,
+    topic: str,
+    key: str,
+    user_context: Optional[UserContext],
+) -> dict:
+    """Return the quiz stored under the generation key, or generate and save one."""
+    persistence = get_quiz_persistence_service()
+
+    if not request.allow_duplicate:
+        stored = await persistence.find_by_generation_key(course_id, key)
+        if stored:
+            logger.info("Returning quiz %s generated with the same parameters", stored.get("id"))
+            return {
+                "quiz": stored,
+                "is_new": False,
+                "message": "Existing quiz returned (generated with the same parameters)"
+            }
+
+    # Generate quiz
+    logger.info(
+        "Generating quiz for course %s: %d questions, %s difficulty",
+        course_id, request.num_questions, request.difficulty
+    )
+
+    quiz_data = await get_files_api_service().generate_quiz_from_course(
+        course_id=course_id,
+        topic=topic,
+        num_questions=request.num_questions,
+        difficulty=request.difficulty,
+        week_number=request.week,
+        user_context=user_context,
+    )
+
+    questions = quiz_data.get("questions", [])
+    if not questions:
+        # Log details to help debug quiz generation failures
+        logger.error(
+            "Quiz generation failed for course %s (topic=%s, difficulty=%s, week=%s): "
+            "No questions were generated. This may indicate missing course materials, "
+            "API issues, or content that could not be processed.",
+            course_id, topic, request.difficulty, request.week
+        )
+        raise HTTPException(
+            status_code=400,
+            detail=f"No questions could be generated for course '{course_id}'. "
+                   f"Please ensure course materials are available and try again."
+        )
+
+    # Check for duplicates
+    if not request.allow_duplicate:
+        duplicate = await persistence.find_duplicate_quiz(
+            course_id=course_id,
+            topic=topic,
+            difficulty=request.difficulty,
+            questions=questions,
+            week_number=request.week
+        )
+        if duplicate:
+            logger.info("Returning existing quiz %s", duplicate.get("id"))
+            return {
+                "quiz": duplicate,
+                "is_new": False,
+                "message": "Existing quiz returned (duplicate detected)"
+            }
+
+    # Save new quiz
+    saved_quiz = await persistence.save_quiz(
+        course_id=course_id,
+        topic=topic,
+        difficulty=request.difficulty,
+        questions=questions,
+        week_number=request.week,
+        title=request.title,
+        generation_key=key
+    )
+
+    return {
+        "quiz": saved_quiz,
+        "is_new": True,
+        "message": "New quiz generated and saved"
+    }
+
+
 @router.post("/courses/{course_id}")
 async def create_quiz(
     course_id: str,
@@ -135,11 +223,12 @@ async def create_quiz(
     Generates a quiz using AI from course materials, checks for duplicates,
     and saves to Firestore for future use.
 
-    If a duplicate is detected and allow_duplicate is False, the existing
-    quiz is returned instead of generating a new one.
+    Unless allow_duplicate is True, a quiz already generated with the same
+    parameters from the same materials is returned without calling the AI,
+    and a generated quiz that duplicates a stored one is not saved again.
+    Identical concurrent requests share one lookup, generation and save.
     """
     try:
-        persistence = get_quiz_persistence_service()
         files_service = get_files_api_service()
 
         topic = request.topic or "Course Materials"
@@ -153,69 +242,26 @@ async def create_quiz(
                 course_id=course_id,
             )
 
-        # Generate quiz
-        logger.info(
-            "Generating quiz for course %s: %d questions, %s difficulty",
-            course_id, request.num_questions, request.difficulty
-        )
-
-        quiz_data = await files_service.generate_quiz_from_course(
-            course_id=course_id,
+        key = generation_key(
+            KIND_QUIZ,
+            course_id,
+            week_numbers=[request.week] if request.week else None,
             topic=topic,
-            num_questions=request.num_questions,
             difficulty=request.difficulty,
-            week_number=request.week,
-            user_context=user_context,
+            count=request.num_questions,
+            material_fingerprint=await asyncio.to_thread(
+                files_service.course_materials_fingerprint, course_id, [request.week] if request.week else None
+            ),
         )
 
-        questions = quiz_data.get("questions", [])
-        if not questions:
-            # Log details to help debug quiz generation failures
-            logger.error(
-                "Quiz generation failed for course %s (topic=%s, difficulty=%s, week=%s): "
-                "No questions were generated. This may indicate missing course materials, "
-                "API issues, or content that could not be processed.",
-                course_id, topic, request.difficulty, request.week
-            )
-            raise HTTPException(
-                status_code=400,
-                detail=f"No questions could be generated for course '{course_id}'. "
-                       f"Please ensure course materials are available and try again."
-            )
-
-        # Check for duplicates
-        if not request.allow_duplicate:
-            duplicate = await persistence.find_duplicate_quiz(
-                course_id=course_id,
-                topic=topic,
-                difficulty=request.difficulty,
-                questions=questions,
-                week_number=request.week
-            )
-            if duplicate:
-                logger.info("Returning existing quiz %s", duplicate.get("id"))
-                return {
-                    "quiz": duplicate,
-                    "is_new": False,
-                    "message": "Existing quiz returned (duplicate detected)"
-                }
-
-        # Save new quiz
-        saved_quiz = await persistence.save_quiz(
-            course_id=course_id,
-            topic=topic,
-            difficulty=request.difficulty,
-            questions=questions,
-            week_number=request.week,
-            title=request.title
+        # Requests for a fresh quiz coalesce only with each other
+        flight_key = f"{KIND_QUIZ}:{key}:{'fresh' if request.allow_duplicate else 'stored'}"
+        return await get_generation_single_flight().do(
+            flight_key,
+            lambda: _generate_and_save_quiz(course_id, request, topic, key, user_context),
+            label="quiz_save",
         )
 
-        return {
-            "quiz": saved_quiz,
-            "is_new": True,
-            "message": "New quiz generated and saved"
-        }
-
     except ValueError as e:
         logger.warning("Invalid request: %s", e)
         raise HTTPException(400, detail=str(e)) from e
@@ -0,0 +1,71 @@
+"""Server-Sent Events helpers for streaming generation routes.
+
+Generation services yield {"event": ..., "data": ...} dicts (see
+FilesAPIService._stream_generation); these helpers send them to the browser
+as a text/event-stream response.
+"""
+
+import json
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable proxy buffering so events arrive as sent
+}
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def event_stream_response(
+    events: AsyncIterator[Dict[str, Any]],
+    on_result: Optional[Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = None,
+    error_message: Optional[str] = None,
+) -> StreamingResponse:
+    """Send generation events as an SSE response.
+
+    The first event is awaited before the response starts, so request errors
+    (no materials, invalid parameters) still return HTTP 400. Errors after
+    that are sent as an "error" event, since the status line is already out.
+
+    Args:
+        events: Generation events
+        on_result: Transforms the final "result" payload before it is sent
+            (e.g. to persist it)
+        error_message: Detail sent in "error" events instead of the exception text
+
+    Returns:
+        StreamingResponse with media type text/event-stream
+    """
+    try:
+        first = await anext(events)
+    except ValueError as e:
+        logger.warning("Invalid streaming generation request: %s", e)
+        raise HTTPException(400, detail=str(e)) from e
+    except StopAsyncIteration as e:
+        raise HTTPException(500, detail="Generation produced no events") from e
+
+    async def render(event: Dict[str, Any]) -> str:
+        data = event["data"]
+        if event["event"] == "result" and on_result is not None:
+            data = await on_result(data)
+        return format_sse(event["event"], data)
+
+    async def body() -> AsyncIterator[str]:
+        try:
+            yield await render(first)
+            async for event in events:
+                yield await render(event)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Error during streaming generation: %s", e)
+            yield format_sse("error", {"detail": error_message or str(e)})
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -3,12 +3,13 @@
 Provides endpoints for:
 - Listing saved study guides for a course
 - Getting a specific study guide
-- Creating/generating a new study guide with persistence
+- Creating/generating a new study guide with persistence (optionally streamed)
 - Deleting study guides
 """
 
+import asyncio
 import logging
-from typing import Optional, List
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
@@ -20,8 +21,12 @@ from app.models.schemas import (
     StoredStudyGuideSummary,
 )
 from app.models.usage_models import UserContext
+from app.routes.sse import event_stream_response
 from app.services.study_guide_persistence_service import get_study_guide_persistence_service
 from app.services.files_api_service import get_files_api_service
+from app.services.generation_index import KIND_STUDY_GUIDE, generation_key
+from app.services.single_flight import get_generation_single_flight
+from app.services.text_extractor import CHARS_PER_TOKEN
 
 logger = logging.getLogger(__name__)
 
@@ -78,6 +83,116 @@ async def get_study_guide(course_id: str, guide_id: str):
         raise HTTPException(500, detail=str(e)) from e
 
 
+def _study_guide_topic(course_id: str, weeks: Optional[List[int]]) -> str:
+    """Topic description for a study guide based on its weeks."""
+    if weeks and len(weeks) > 0:
+        if len(weeks) == 1:
+            return f"Course '{course_id}' - Week {weeks[0]}"
+        return f"Course '{course_id}' - Weeks {', '.join(map(str, weeks))}"
+    return f"Course '{course_id}' - All Materials"
+
+
+def _user_context(user: Optional[User], course_id: str) -> Optional[UserContext]:
+    """Build user context for usage tracking."""
+    if not user:
+        return None
+    return UserContext(
+        email=user.email,
+        user_id=user.user_id,
+        course_id=course_id,
+    )
+
+
+async def _study_guide_key(course_id: str, request: CreateStudyGuideRequest) -> str:
+    """Generation key of a study guide request."""
+    return generation_key(
+        KIND_STUDY_GUIDE,
+        course_id,
+        week_numbers=request.weeks,
+        topic=_study_guide_topic(course_id, request.weeks),
+        material_fingerprint=await asyncio.to_thread(
+            get_files_api_service().course_materials_fingerprint, course_id, request.weeks
+        ),
+    )
+
+
+async def _stored_guide(course_id: str, request: CreateStudyGuideRequest, key: str) -> Optional[dict]:
+    """Response for the guide stored under a generation key (None if a fresh one is requested)."""
+    if request.allow_duplicate:
+        return None
+
+    stored = await get_study_guide_persistence_service().find_by_generation_key(course_id, key)
+    if not stored:
+        return None
+
+    logger.info("Returning study guide %s generated with the same parameters", stored.get("id"))
+    return {
+        "guide": stored,
+        "is_duplicate": True,
+        "message": "Returning existing study guide generated with the same parameters"
+    }
+
+
+async def _find_stored_guide(
+    course_id: str,
+    request: CreateStudyGuideRequest,
+) -> Tuple[str, Optional[dict]]:
+    """Generation key of the request, and the guide stored under it (unless a fresh one is requested)."""
+    key = await _study_guide_key(course_id, request)
+    return key, await _stored_guide(course_id, request, key)
+
+
+async def _stored_guide_events(body: dict) -> AsyncIterator[Dict[str, Any]]:
+    """Events of a streamed request answered from the stored guide."""
+    yield {"event": "start", "data": {"stored": True}}
+    yield {"event": "result", "data": body}
+
+
+async def _save_generated_guide(
+    course_id: str,
+    request: CreateStudyGuideRequest,
+    content: str,
+    key: Optional[str] = None,
+) -> dict:
+    """Save generated content, or return the existing guide with the same content."""
+    persistence_service = get_study_guide_persistence_service()
+
+    # Another request may have saved a guide under the key while this one generated
+    if key:
+        stored = await _stored_guide(course_id, request, key)
+        if stored:
+            return stored
+
+    # Check for duplicates unless explicitly allowed
+    if not request.allow_duplicate:
+        existing = await persistence_service.find_duplicate_guide(
+            course_id=course_id,
+            content=content
+        )
+        if existing:
+            logger.info("Found duplicate study guide: %s", existing.get("id"))
+            return {
+                "guide": existing,
+                "is_duplicate": True,
+                "message": "Returning existing study guide with same content"
+            }
+
+    # Save the new study guide
+    guide_data = await persistence_service.save_study_guide(
+        course_id=course_id,
+        content=content,
+        week_numbers=request.weeks,
+        title=request.title,
+        generation_key=key
+    )
+
+    return {
+        "guide": guide_data,
+        "is_duplicate": False,
+        "message": "Study guide generated and saved successfully"
+    }
+
+
 @router.post("/courses/{course_id}")
 async def create_study_guide(
     course_id: str,
@@ -87,72 +202,75 @@ async def create_study_guide(
     """Generate and save a new study guide.
 
     Generates a comprehensive study guide using course materials
-    and saves it to Firestore for future retrieval.
+    and saves it to Firestore for future retrieval. Unless allow_duplicate
+    is True, a guide already generated for the same weeks from the same
+    materials is returned without calling the AI. Identical concurrent
+    requests share one lookup, generation and save.
     """
     try:
-        persistence_service = get_study_guide_persistence_service()
-        files_service = get_files_api_service()
+        key = await _study_guide_key(course_id, request)
 
-        # Generate topic description based on weeks
-        if request.weeks and len(request.weeks) > 0:
-            if len(request.weeks) == 1:
-                topic = f"Course '{course_id}' - Week {request.weeks[0]}"
-            else:
-                topic = f"Course '{course_id}' - Weeks {', '.join(map(str, request.weeks))}"
-        else:
-            topic = f"Course '{course_id}' - All Materials"
-
-        # Build user context for usage tracking
-        user_context = None
-        if user:
-            user_context = UserContext(
-                email=user.email,
-                user_id=user.user_id,
-                course_id=course_id,
-            )
-
-        # Generate the study guide content
-        logger.info("Generating study guide for %s, weeks=%s", course_id, request.weeks)
-        content = await files_service.generate_study_guide_from_course(
-            course_id=course_id,
-            topic=topic,
-            week_numbers=request.weeks,
-            user_context=user_context,
-        )
+        async def generate_and_save() -> dict:
+            stored = await _stored_guide(course_id, request, key)
+            if stored:
+                return stored
 
-        # Check for duplicates unless explicitly allowed
-        if not request.allow_duplicate:
-            existing = await persistence_service.find_duplicate_guide(
+            # Generate the study guide content
+            logger.info("Generating study guide for %s, weeks=%s", course_id, request.weeks)
+            content = await get_files_api_service().generate_study_guide_from_course(
                 course_id=course_id,
-                content=content
+                topic=_study_guide_topic(course_id, request.weeks),
+                week_numbers=request.weeks,
+                user_context=_user_context(user, course_id),
             )
-            if existing:
-                logger.info("Found duplicate study guide: %s", existing.get("id"))
-                return {
-                    "guide": existing,
-                    "is_duplicate": True,
-                    "message": "Returning existing study guide with same content"
-                }
-
-        # Save the new study guide
-        guide_data = await persistence_service.save_study_guide(
-            course_id=course_id,
-            content=content,
-            week_numbers=request.weeks,
-            title=request.title
-        )
+            return await _save_generated_guide(course_id, request, content, key)
 
-        return {
-            "guide": guide_data,
-            "is_duplicate": False,
-            "message": "Study guide generated and saved successfully"
-        }
+        # Identical concurrent requests share one lookup, generation and save;
+        # requests for a fresh guide coalesce only with each other
+        flight_key = f"{KIND_STUDY_GUIDE}:{key}:{'fresh' if request.allow_duplicate else 'stored'}"
+        return await get_generation_single_flight().do(flight_key, generate_and_save, label="study_guide_save")
 
     except Exception as e:
         logger.error("Error creating study guide: %s", e)
         raise HTTPException(500, detail=str(e)) from e
 
 
+@router.post("/courses/{course_id}/stream")
+async def stream_study_guide(
+    course_id: str,
+    request: CreateStudyGuideRequest,
+    user: Optional[User] = Depends(get_optional_user),
+):
+    """Generate and save a new study guide, streamed as Server-Sent Events.
+
+    `delta` events carry the Markdown as it is written. Once generation
+    finishes the guide is saved (or matched to a duplicate) and the final
+    `result` event carries the same body as the non-streaming route.
+    A stored guide generated with the same parameters is sent right away
+    (`start` carries `"stored": true`, no deltas).
+    """
+    try:
+        key, stored = await _find_stored_guide(course_id, request)
+    except Exception as e:
+        logger.error("Error looking up stored study guide: %s", e)
+        raise HTTPException(500, detail=str(e)) from e
+    if stored:
+        return await event_stream_response(_stored_guide_events(stored))
+
+    logger.info("Streaming study guide for %s, weeks=%s", course_id, request.weeks)
+    events = get_files_api_service().stream_study_guide_from_course(
+        course_id=course_id,
+        topic=_study_guide_topic(course_id, request.weeks),
+        week_numbers=request.weeks,
+        user_context=_user_context(user, course_id),
+    )
+
+    async def on_result(data: dict) -> dict:
+        return await _save_generated_guide(course_id, request, data["guide"], key)
+
+    return await event_stream_response(events, on_result=on_result)
+
+
 @router.delete("/courses/{course_id}/{guide_id}")
 async def delete_study_guide(course_id: str, guide_id: str):
     """Delete a study guide."""
@@ -185,33 +303,33 @@ async def estimate_tokens(
     try:
         files_service = get_files_api_service()
 
-        # Get materials that would be included (same logic as generate)
-        materials_with_text = []
+        # Token counts of the materials that would be included (same logic as
+        # generate), summed from counts stored at extraction time
+        material_tokens = []
 
         if weeks and len(weeks) > 0:
             for week_num in weeks:
-                week_materials = await files_service.get_course_materials_with_text(
+                week_materials = await files_service.estimate_materials_tokens(
                     course_id=course_id,
                     week_number=week_num,
                     limit=3  # Same limit as generate
                 )
-                materials_with_text.extend(week_materials)
+                material_tokens.extend(week_materials)
         else:
-            materials_with_text = await files_service.get_course_materials_with_text(
+            material_tokens = await files_service.estimate_materials_tokens(
                 course_id=course_id,
                 week_number=None,
                 limit=5  # Same limit as generate
             )
 
-        # Calculate character counts and estimate tokens
-        # Rough estimation: ~4 characters per token for English text
         total_chars = 0
+        total_material_tokens = 0
         material_details = []
 
-        for material, text in materials_with_text:
-            char_count = len(text)
-            token_estimate = char_count // 4
+        for material, token_estimate in material_tokens:
+            char_count = token_estimate * CHARS_PER_TOKEN
             total_chars += char_count
+            total_material_tokens += token_estimate
             material_details.append({
                 "title": material.title or material.filename,
                 "week": material.weekNumber,  # camelCase to match Pydantic model
@@ -222,7 +340,7 @@ async def estimate_tokens(
         # Add system prompt (~500 tokens) and user prompt (~800 tokens)
         system_prompt_tokens = 500
         user_prompt_tokens = 800
-        total_estimated_tokens = (total_chars // 4) + system_prompt_tokens + user_prompt_tokens
+        total_estimated_tokens = total_material_tokens + system_prompt_tokens + user_prompt_tokens
 
         # Rate limit info
         rate_limit = 10000  # tokens per minute
@@ -231,7 +349,7 @@ async def estimate_tokens(
         return {
             "course_id": course_id,
             "weeks": weeks,
-            "material_count": len(materials_with_text),
+            "material_count": len(material_tokens),
             "materials": material_details,
             "total_characters": total_chars,
             "estimated_input_tokens": total_estimated_tokens,
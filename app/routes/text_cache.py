@@ -1,14 +1,18 @@
 """API Routes for Text Cache Management.
 
 Provides endpoints for managing the Firestore text cache:
-- Cache statistics
-- Bulk population
+- Cache statistics (Firestore and tiered generation-path cache)
+- Bulk population (parallel extraction with progress reporting)
+- Calendar-driven warming of the current and next week's materials
+- Coalescing counters for identical in-flight generation requests
 - Cache invalidation
 - Single file cache operations
 """
 
+import asyncio
 import logging
 import pathlib
+from typing import List, Optional
 
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
@@ -25,7 +29,11 @@ from app.services.text_cache_service import (
     extract_text_cached,
     populate_cache_for_folder,
 )
+from app.services.extraction_pool import get_extraction_progress
 from app.services.gcp_service import is_firestore_available
+from app.services.material_cache_warmer import get_material_cache_warmer
+from app.services.single_flight import get_generation_single_flight
+from app.services.tiered_text_cache import get_tiered_text_cache
 
 logger = logging.getLogger(__name__)
 
@@ -79,6 +87,18 @@ async def cache_health():
     }
 
 
+@router.get("/tiers")
+async def get_tier_stats():
+    """Get hit/miss counters for the generation-path tiered text cache."""
+    return get_tiered_text_cache().stats()
+
+
+@router.get("/generation")
+async def get_generation_stats():
+    """Get how many generation requests ran vs. were coalesced onto an identical in-flight one."""
+    return get_generation_single_flight().stats()
+
+
 # ============================================================================
 # Cache Population
 # ============================================================================
@@ -106,7 +126,9 @@ async def populate_cache(request: CachePopulateRequest):
         # Use empty string to represent the base Materials folder, matching existing semantics.
         relative_folder = ""
 
-    result = populate_cache_for_folder(
+    # Run in a worker thread so the event loop stays free for progress polling
+    result = await asyncio.to_thread(
+        populate_cache_for_folder,
         folder_path=relative_folder, recursive=request.recursive,
         force_refresh=request.force_refresh,
     )
@@ -120,13 +142,44 @@ async def populate_all_cache(request: PopulateAllRequest):
     if not is_firestore_available():
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Firestore not available")
 
-    result = populate_cache_for_folder(
+    result = await asyncio.to_thread(
+        populate_cache_for_folder,
         folder_path="", recursive=True, force_refresh=request.force_refresh,
     )
 
     return result
 
 
+@router.get("/populate/progress")
+async def get_populate_progress():
+    """Get progress of the current (or most recent) bulk extraction job."""
+    progress = get_extraction_progress()
+    if progress is None:
+        return {"running": False, "progress": None}
+    return {"running": progress["finished_at"] is None, "progress": progress}
+
+
+# ============================================================================
+# Cache Warming
+# ============================================================================
+
+
+class WarmRequest(BaseModel):
+    """Request to warm the current and next week's materials."""
+    dry_run: bool = False
+    course_ids: Optional[List[str]] = None
+
+
+@router.post("/warm")
+async def warm_cache(request: WarmRequest):
+    """Pre-extract (or with dry_run, report on) materials for each course's current and next week."""
+    if not is_firestore_available():
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Firestore not available")
+
+    report = await get_material_cache_warmer().run(dry_run=request.dry_run, course_ids=request.course_ids)
+    return report.to_dict()
+
+
 # ============================================================================
 # Cache Invalidation
 # ============================================================================
@@ -165,8 +218,9 @@ async def clear_all_cache():
 
     cache = get_text_cache_service()
     count = cache.invalidate_folder("")
+    blobs = cache.delete_orphan_blobs(min_age_seconds=0)
 
-    return {"cleared": count, "message": f"Cleared {count} cache entries"}
+    return {"cleared": count, "blobs_deleted": blobs, "message": f"Cleared {count} cache entries"}
 
 
 # ============================================================================
@@ -218,7 +272,7 @@ async def refresh_file_cache(file_path: str):
     cache = get_text_cache_service()
     cache.invalidate(file_path)
 
-    result = extract_text_cached(full_path, use_cache=True)
+    result = extract_text_cached(full_path, use_cache=True, force_refresh=True)
 
     return {
         "file_path": file_path, "refreshed": result.success, "file_type": result.file_type,
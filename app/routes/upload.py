@@ -32,7 +32,8 @@ import secrets
 import hashlib
 from datetime import datetime, timedelta, timezone
 
-from app.services.text_extractor import extract_text
+from app.services.text_extractor import ExtractionResult, extract_text
+from app.services.material_artifacts import build_material_artifacts, has_artifacts
 from app.services.files_api_service import get_files_api_service
 from app.services.course_materials_service import CourseMaterialsService, generate_material_id
 from app.services.rate_limiter import check_upload_rate_limit
@@ -641,9 +642,19 @@ async def analyze_uploaded_file(
         logger.error(f"Failed to locate file: {e}", exc_info=True)
         raise HTTPException(500, "Failed to locate file. Please try again later.")
 
-    # Extract text using existing service
+    # Reuse the artifacts derived at upload time; parse only if there are none yet
+    artifacts = None
     try:
-        result = extract_text(file_path)
+        if has_artifacts(material):
+            result = ExtractionResult(
+                file_path=str(file_path),
+                file_type=material.fileType or "unknown",
+                text=material.extractedText or "",
+                success=True,
+            )
+        else:
+            result = extract_text(file_path)
+            artifacts = build_material_artifacts(file_path, result)
 
         if not result.success:
             logger.error(f"Extraction failed: {result.error}")
@@ -789,14 +800,16 @@ Return JSON with this exact structure:
 
     # FIRESTORE: Update material with extraction and analysis results
     try:
-        # Update text extraction
-        materials_service.update_text_extraction(
-            course_id=course_id,
-            material_id=material_id,
-            extracted_text=result.text,
-            text_length=len(result.text),
-            error=None
-        )
+        # Update text extraction (unchanged if the artifacts were already stored)
+        if artifacts is not None:
+            materials_service.update_text_extraction(
+                course_id=course_id,
+                material_id=material_id,
+                extracted_text=result.text,
+                text_length=len(result.text),
+                error=None,
+                artifacts=artifacts
+            )
 
         # Update summary if available
         if analysis.get("summary"):
@@ -938,8 +951,9 @@ async def process_extraction_task(
         # Define extraction function with retry logic
         async def extract_and_update():
             """Extract text and update Firestore with retry logic."""
-            # Extract text (synchronous operation)
+            # Extract text and derive the artifacts generation reads (synchronous operation)
             result = extract_text(file_path)
+            artifacts = build_material_artifacts(file_path, result)
 
             # Update Firestore with results (with retry for transient failures)
             if result.success:
@@ -965,7 +979,8 @@ async def process_extraction_task(
                         course_id=course_id,
                         material_id=material_id,
                         extracted_text=result.text,
-                        text_length=len(result.text)
+                        text_length=len(result.text),
+                        artifacts=artifacts
                     )
 
                 await retry_with_backoff(update_firestore, config=retry_config)
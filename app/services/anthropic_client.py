@@ -1,7 +1,8 @@
 """Anthropic API Client Service for the LLS Study Portal."""
 
+import hashlib
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from anthropic import AsyncAnthropic
 
@@ -13,6 +14,7 @@ logger = logging.getLogger(__name__)
 
 # Default model
 DEFAULT_MODEL = "claude-sonnet-4-20250514"
+TUTOR_MAX_TOKENS = 2048
 
 
 async def _track_llm_usage(
@@ -170,6 +172,11 @@ FORMAT YOUR RESPONSE AS JSON:
 
 Make questions challenging but fair - typical of university law examinations."""
 
+# Changes whenever the essay question prompt or model changes (see generation_index)
+ESSAY_QUESTION_PROMPT_VERSION = hashlib.sha256(
+    f"{DEFAULT_MODEL}\n{ESSAY_QUESTION_SYSTEM_PROMPT}".encode()
+).hexdigest()[:16]
+
 
 ESSAY_EVALUATION_SYSTEM_PROMPT = """You are an expert Law & Legal Skills professor \
 evaluating essay answers for the University of Groningen LLS course.
@@ -208,6 +215,54 @@ Be constructive, specific, and educational. Help the student understand both wha
 they did well and how to improve."""
 
 
+def _tutor_request(
+    message: str,
+    context: str,
+    conversation_history: Optional[List[Dict[str, str]]],
+    materials_content: Optional[List[Dict[str, str]]],
+) -> Tuple[str, List[Dict[str, str]]]:
+    """Build the system prompt and messages for a tutor request."""
+    # Build conversation history
+    messages = []
+
+    if conversation_history:
+        # Add previous messages (limit to last 10)
+        messages.extend(conversation_history[-10:])
+
+    # Build user message content
+    user_content = ""
+
+    # If materials provided, include them as context
+    if materials_content:
+        user_content += "Use the following course materials to inform your response:\n\n"
+        for mat in materials_content[:5]:  # Limit to 5 materials
+            user_content += f"=== DOCUMENT: {mat['title']} ===\n"
+            # Truncate text to avoid token limits, ensuring we don't cut mid-word
+            text = mat['text']
+            if len(text) > 8000:
+                text = text[:8000].rsplit(' ', 1)[0] + '...'
+            user_content += f"{text}\n"
+            user_content += f"=== END OF {mat['title']} ===\n\n"
+        user_content += "---\n\n"
+        user_content += f"Student Question: {message}"
+    else:
+        user_content = message
+
+    # Add current message
+    messages.append({
+        "role": "user",
+        "content": user_content
+    })
+
+    # Add context to system prompt
+    system_prompt = TUTOR_SYSTEM_PROMPT + "\n\nCurrent topic context: " + context
+    if materials_content:
+        system_prompt += "\n\nIMPORTANT: Use the provided course materials to answer. "
+        system_prompt += "Cite specific documents when relevant."
+
+    return system_prompt, messages
+
+
 async def get_ai_tutor_response(
     message: str,
     context: str = "Law & Legal Skills",
@@ -230,48 +285,14 @@ async def get_ai_tutor_response(
         AI-generated response text
     """
     try:
-        # Build conversation history
-        messages = []
-
-        if conversation_history:
-            # Add previous messages (limit to last 10)
-            messages.extend(conversation_history[-10:])
-
-        # Build user message content
-        user_content = ""
-
-        # If materials provided, include them as context
-        if materials_content:
-            user_content += "Use the following course materials to inform your response:\n\n"
-            for mat in materials_content[:5]:  # Limit to 5 materials
-                user_content += f"=== DOCUMENT: {mat['title']} ===\n"
-                # Truncate text to avoid token limits, ensuring we don't cut mid-word
-                text = mat['text']
-                if len(text) > 8000:
-                    text = text[:8000].rsplit(' ', 1)[0] + '...'
-                user_content += f"{text}\n"
-                user_content += f"=== END OF {mat['title']} ===\n\n"
-            user_content += "---\n\n"
-            user_content += f"Student Question: {message}"
-        else:
-            user_content = message
-
-        # Add current message
-        messages.append({
-            "role": "user",
-            "content": user_content
-        })
-
-        # Add context to system prompt
-        system_prompt = TUTOR_SYSTEM_PROMPT + "\n\nCurrent topic context: " + context
-        if materials_content:
-            system_prompt += "\n\nIMPORTANT: Use the provided course materials to answer. "
-            system_prompt += "Cite specific documents when relevant."
+        system_prompt, messages = _tutor_request(
+            message, context, conversation_history, materials_content
+        )
 
         # Call Anthropic API
         response = await client.messages.create(
             model=DEFAULT_MODEL,
-            max_tokens=2048,
+            max_tokens=TUTOR_MAX_TOKENS,
             system=system_prompt,
             messages=messages
         )
@@ -301,6 +322,52 @@ async def get_ai_tutor_response(
         raise
 
 
+async def stream_ai_tutor_response(
+    message: str,
+    context: str = "Law & Legal Skills",
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    materials_content: Optional[List[Dict[str, str]]] = None,
+    user_context: Optional[UserContext] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream an AI tutor response as it is generated.
+
+    Takes the same arguments as get_ai_tutor_response. Usage is tracked
+    from the final message once the stream completes.
+
+    Yields:
+        Chunks of response text
+    """
+    try:
+        system_prompt, messages = _tutor_request(
+            message, context, conversation_history, materials_content
+        )
+
+        async with client.messages.stream(
+            model=DEFAULT_MODEL,
+            max_tokens=TUTOR_MAX_TOKENS,
+            system=system_prompt,
+            messages=messages
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+            response = await stream.get_final_message()
+
+        await _track_llm_usage(
+            response=response,
+            user_context=user_context,
+            model=DEFAULT_MODEL,
+            operation_type="tutor",
+            request_metadata={"context": context, "streamed": True},
+        )
+
+        logger.info("AI Tutor response streamed for context: %s", context)
+
+    except Exception as e:
+        logger.error("Error streaming AI tutor response: %s", str(e))
+        raise
+
+
 async def get_assessment_response(
     topic: str,
     question: Optional[str],
@@ -433,7 +500,7 @@ async def generate_essay_question(
             user_message += f"\n\nRelevant course material:\n{course_context[:5000]}"
 
         response = await client.messages.create(
-            model="claude-sonnet-4-20250514",
+            model=DEFAULT_MODEL,
             max_tokens=1500,
             system=ESSAY_QUESTION_SYSTEM_PROMPT,
             messages=[{
@@ -446,7 +513,7 @@ async def generate_essay_question(
         await _track_llm_usage(
             response=response,
             user_context=user_context,
-            model="claude-sonnet-4-20250514",
+            model=DEFAULT_MODEL,
             operation_type="essay_question",
             request_metadata={"topic": topic},
         )
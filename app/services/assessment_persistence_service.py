@@ -1,7 +1,8 @@
 """Assessment Persistence Service for storing and retrieving essay assessments.
 
 This service manages:
-1. Storing generated essay questions in Firestore
+1. Storing generated essay questions in Firestore, and finding questions
+   generated with the same parameters (see generation_index)
 2. Storing user essay attempts and evaluations
 3. Retrieving assessment history for users
 4. Supporting retakes of assessments
@@ -72,7 +73,9 @@ class AssessmentPersistenceService:
         week_number: Optional[int] = None,
         expected_paragraphs: str = "3-7",
         key_concepts: Optional[List[str]] = None,
-        title: Optional[str] = None
+        title: Optional[str] = None,
+        guidance: Optional[str] = None,
+        generation_key: Optional[str] = None
     ) -> Dict:
         """Save a generated essay assessment to Firestore."""
         if not self._firestore:
@@ -95,7 +98,9 @@ class AssessmentPersistenceService:
             "weekNumber": week_number,
             "expectedParagraphs": expected_paragraphs,
             "keyConcepts": key_concepts or [],
+            "guidance": guidance,
             "contentHash": content_hash,
+            "generationKey": generation_key,
             "createdAt": now,
             "title": title
         }
@@ -107,6 +112,26 @@ class AssessmentPersistenceService:
         logger.info("Saved assessment %s for course %s", assessment_id, course_id)
         return assessment_data
 
+    async def find_by_generation_key(
+        self, course_id: str, generation_key: str, user_id: Optional[str] = None
+    ) -> Optional[Dict]:
+        """Find an assessment generated with the same parameters (see generation_index).
+
+        Assessments are private, so pass user_id to only match the user's own.
+        """
+        if not self._firestore:
+            return None
+        assessments_ref = self._firestore.collection("courses").document(course_id) \
+            .collection("assessments")
+        query = assessments_ref.where("generationKey", "==", generation_key)
+        if user_id is not None:
+            query = query.where("userId", "==", user_id)
+        docs = query.limit(1).stream()
+        for doc in docs:
+            logger.info("Found assessment %s generated with the same parameters", doc.id)
+            return doc.to_dict()
+        return None
+
     async def get_assessment(self, course_id: str, assessment_id: str) -> Optional[Dict]:
         """Get a specific assessment by ID."""
         if not self._firestore:
@@ -0,0 +1,264 @@
+"""Per-Course BM25 Chunk Index for AI Tutor Retrieval.
+
+Splits each material's extracted text into overlapping passages and ranks
+them against a question with BM25, so the tutor sends only the few passages
+that matter instead of whole (truncated) documents.
+
+Indexes are built in memory from the text the tiered text cache serves and
+kept per course with the content fingerprints of the materials they cover.
+An index is rebuilt when the text cache entry of one of those fingerprints has
+changed since it was built (``TieredTextCache.changed_since``), when its
+course's materials change (``invalidate``), or after CHUNK_INDEX_TTL_SECONDS,
+which also picks up materials added or removed on other instances. Extractions
+for other materials and courses leave it alone.
+"""
+
+import asyncio
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+# Chunking
+CHUNK_CHARS = int(os.getenv("CHUNK_INDEX_CHUNK_CHARS", "1200"))
+CHUNK_OVERLAP_CHARS = int(os.getenv("CHUNK_INDEX_OVERLAP_CHARS", "200"))
+
+# Index lifetime
+CHUNK_INDEX_TTL_SECONDS = int(os.getenv("CHUNK_INDEX_TTL_SECONDS", "600"))
+CHUNK_INDEX_MAX_COURSES = int(os.getenv("CHUNK_INDEX_MAX_COURSES", "32"))
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Article references like "6:74" or "3:40" stay one term; otherwise word characters
+_TOKEN_RE = re.compile(r"\d+(?::\d+)+[a-z]?|\w+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it its me my "
+    "of on or that the this to was what when where which who why will with "
+    "you your de het een en van".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase terms of a text, without stopwords and single characters."""
+    return [
+        term for term in _TOKEN_RE.findall(text.lower())
+        if len(term) > 1 and term not in STOPWORDS
+    ]
+
+
+def split_chunks(
+    text: str, size: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP_CHARS
+) -> Iterator[Tuple[int, str]]:
+    """Split text into overlapping passages, cutting at whitespace where possible.
+
+    Yields:
+        (start offset, passage text)
+    """
+    length = len(text)
+    start = 0
+    while start < length:
+        end = min(start + size, length)
+        if end < length:
+            cut = text.rfind(" ", start + size // 2, end)
+            newline = text.rfind("\n", start + size // 2, end)
+            cut = max(cut, newline)
+            if cut != -1:
+                end = cut
+        passage = text[start:end].strip()
+        if passage:
+            yield start, passage
+        if end >= length:
+            break
+        next_start = max(end - overlap, start + 1)
+        # Start the overlap on a word boundary
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+
+
+@dataclass(slots=True)
+class Chunk:
+    """A passage of one material's text."""
+    material_id: str
+    title: str
+    week_number: Optional[int]
+    start: int
+    text: str
+
+
+class CourseChunkIndex:
+    """BM25 index over the passages of one course's materials."""
+
+    def __init__(self, chunks: List[Chunk]):
+        """Build the inverted index for a list of chunks."""
+        self.chunks = chunks
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+
+        for position, chunk in enumerate(chunks):
+            terms = Counter(tokenize(chunk.text))
+            self._lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, []).append((position, frequency))
+
+        total = len(chunks)
+        self._avg_length = (sum(self._lengths) / total) if total else 0.0
+        # BM25 idf (Lucene variant, always positive)
+        self._idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    @classmethod
+    def from_materials(cls, materials_with_text: List[Tuple[object, str]]) -> "CourseChunkIndex":
+        """Build an index from (CourseMaterial, extracted_text) pairs."""
+        chunks = [
+            Chunk(
+                material_id=material.id,
+                title=material.title or material.filename,
+                week_number=material.weekNumber,
+                start=start,
+                text=passage,
+            )
+            for material, text in materials_with_text
+            for start, passage in split_chunks(text)
+        ]
+        return cls(chunks)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def search(
+        self, query: str, top_k: int = 5, week_number: Optional[int] = None
+    ) -> List[Tuple[Chunk, float]]:
+        """Rank passages against a query.
+
+        Args:
+            query: The student's question
+            top_k: Maximum passages to return
+            week_number: Prefer passages from this week's materials; the rest of
+                the course is searched only if the week has no match
+
+        Returns:
+            (Chunk, score) pairs, best first
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for position, frequency in postings:
+                norm = 1 - BM25_B + BM25_B * self._lengths[position] / (self._avg_length or 1)
+                scores[position] = scores.get(position, 0.0) + idf * (
+                    frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+                )
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if week_number is not None:
+            in_week = [item for item in ranked if self.chunks[item[0]].week_number == week_number]
+            if in_week:
+                ranked = in_week
+            elif not ranked:
+                # Nothing matched the question: use the start of the week's materials
+                return self._leading_chunks(week_number, top_k)
+
+        return [(self.chunks[position], score) for position, score in ranked[:top_k]]
+
+    def _leading_chunks(self, week_number: int, top_k: int) -> List[Tuple[Chunk, float]]:
+        """First passage of each of a week's materials."""
+        seen = set()
+        leading = []
+        for chunk in self.chunks:
+            if chunk.week_number == week_number and chunk.material_id not in seen:
+                seen.add(chunk.material_id)
+                leading.append((chunk, 0.0))
+                if len(leading) == top_k:
+                    break
+        return leading
+
+
+class ChunkIndexRegistry:
+    """Per-course indexes, rebuilt when their materials' text changes or they expire."""
+
+    def __init__(self, ttl_seconds: int = CHUNK_INDEX_TTL_SECONDS, max_courses: int = CHUNK_INDEX_MAX_COURSES):
+        """Initialize an empty registry."""
+        self.ttl_seconds = ttl_seconds
+        self.max_courses = max_courses
+        # course_id -> (index, material fingerprints, text cache version, built_at monotonic)
+        self._entries: Dict[str, Tuple[CourseChunkIndex, FrozenSet[str], int, float]] = {}
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, asyncio.Lock] = {}
+
+    def get(
+        self, course_id: str, changed_since: Callable[[int, Iterable[str]], bool]
+    ) -> Optional[CourseChunkIndex]:
+        """Get a course's index if it is still current.
+
+        Args:
+            course_id: Course ID
+            changed_since: Whether any of the fingerprints changed after a text
+                cache version (TieredTextCache.changed_since)
+        """
+        with self._lock:
+            entry = self._entries.get(course_id)
+        if entry is None:
+            return None
+        index, fingerprints, version, built_at = entry
+        if time.monotonic() - built_at > self.ttl_seconds or changed_since(version, fingerprints):
+            return None
+        return index
+
+    def put(
+        self, course_id: str, index: CourseChunkIndex, fingerprints: Iterable[str], cache_version: int
+    ) -> None:
+        """Store a freshly built index, evicting the oldest course if full.
+
+        Args:
+            course_id: Course ID
+            index: The index
+            fingerprints: Content fingerprints of the materials it was built from
+            cache_version: Text cache version when the build finished
+        """
+        with self._lock:
+            self._entries.pop(course_id, None)
+            self._entries[course_id] = (index, frozenset(fingerprints), cache_version, time.monotonic())
+            while len(self._entries) > self.max_courses:
+                self._entries.pop(next(iter(self._entries)))
+
+    def invalidate(self, course_id: Optional[str] = None) -> None:
+        """Drop one course's index, or all of them."""
+        with self._lock:
+            if course_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(course_id, None)
+
+    def build_lock(self, course_id: str) -> asyncio.Lock:
+        """Lock so concurrent requests for one course build its index once."""
+        with self._lock:
+            lock = self._build_locks.get(course_id)
+            if lock is None:
+                lock = self._build_locks[course_id] = asyncio.Lock()
+            return lock
+
+
+# Singleton
+_chunk_index_registry: Optional[ChunkIndexRegistry] = None  # pylint: disable=invalid-name
+_singleton_lock = threading.Lock()
+
+
+def get_chunk_index_registry() -> ChunkIndexRegistry:
+    """Get or create the chunk index registry singleton."""
+    global _chunk_index_registry  # pylint: disable=global-statement
+    if _chunk_index_registry is None:
+        with _singleton_lock:
+            if _chunk_index_registry is None:
+                _chunk_index_registry = ChunkIndexRegistry()
+    return _chunk_index_registry
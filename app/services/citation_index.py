@@ -0,0 +1,96 @@
+"""Legal Article Citation Parsing.
+
+Finds article references in extracted material text and normalizes them to
+a canonical key, ``"<CODE> <number>"`` (e.g. ``"DCC 6:74"``, ``"ECHR 8"``),
+so every spelling of the same provision maps to one entry of the citation
+index kept by the material search index.
+
+Recognized codes and their aliases:
+- DCC: Dutch Civil Code, BW (Burgerlijk Wetboek)
+- CCP: Code of Civil Procedure, Rv
+- GALA: General Administrative Law Act, Awb
+- ECHR: European Convention on Human Rights, EVRM
+- Constitution: Dutch Constitution, Grondwet, Gw
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# Canonical code -> spellings used in course materials (matched case-insensitively)
+CODE_ALIASES: Dict[str, List[str]] = {
+    "DCC": ["DCC", "Dutch Civil Code", "Civil Code", "BW", "Burgerlijk Wetboek"],
+    "CCP": ["CCP", "Code of Civil Procedure", "DCCP", "Rv"],
+    "GALA": ["GALA", "General Administrative Law Act", "Awb"],
+    "ECHR": ["ECHR", "European Convention on Human Rights", "EVRM"],
+    "Constitution": ["Dutch Constitution", "Constitution", "Grondwet", "Gw"],
+}
+
+_ALIAS_TO_CODE = {
+    alias.lower(): code for code, aliases in CODE_ALIASES.items() for alias in aliases
+}
+
+# "6:74", "6:162a", "94"; a paragraph like "(2)" or "para. 2" is dropped
+_NUMBER = r"\d+(?::\d+)?[a-z]?"
+_PARAGRAPH = r"(?:\s*\(\d+\)|\s*para(?:graph)?\.?\s*\d+)?"
+_NUMBER_LIST = rf"{_NUMBER}{_PARAGRAPH}(?:\s*(?:,|and|en|&|or)\s*{_NUMBER}{_PARAGRAPH})*"
+_ALIASES = "|".join(
+    re.escape(alias) for alias in sorted(_ALIAS_TO_CODE, key=len, reverse=True)
+)
+
+CITATION_RE = re.compile(
+    rf"\b(?:art(?:icles?|s)?\.?|artikel(?:en)?)\s+(?P<numbers>{_NUMBER_LIST})"
+    rf"\s+(?:of\s+the\s+|van\s+het\s+|van\s+de\s+)?(?P<code>{_ALIASES})\b",
+    re.IGNORECASE,
+)
+_NUMBER_RE = re.compile(_NUMBER, re.IGNORECASE)
+_PARAGRAPH_RE = re.compile(r"\(\d+\)|para(?:graph)?\.?\s*\d+", re.IGNORECASE)
+
+
+@dataclass(slots=True)
+class Citation:
+    """One article reference found in a text."""
+    article: str  # Canonical key, e.g. "DCC 6:74"
+    start: int    # Offset of the reference in the text
+
+
+def normalize_code(code: str) -> Optional[str]:
+    """Map a code spelling (e.g. "BW", "awb") to its canonical name."""
+    return _ALIAS_TO_CODE.get(code.strip().lower())
+
+
+def article_key(article: str, code: str = "DCC") -> Optional[str]:
+    """Canonical index key for an article number and code.
+
+    Args:
+        article: Article number, optionally prefixed ("Art. 6:74", "6:162(2)")
+        code: Code name or alias
+
+    Returns:
+        Key like "DCC 6:74", or None if the article or code isn't recognized
+    """
+    canonical = normalize_code(code)
+    number = _NUMBER_RE.search(_PARAGRAPH_RE.sub("", article))
+    if canonical is None or number is None:
+        return None
+    return f"{canonical} {number.group(0).lower()}"
+
+
+def extract_citations(text: str) -> List[Citation]:
+    """Find all article references in a text.
+
+    "Articles 6:74 and 6:75 DCC" yields one citation per article, all at the
+    offset of the reference.
+    """
+    citations = []
+    for match in CITATION_RE.finditer(text):
+        code = normalize_code(match.group("code"))
+        numbers = _PARAGRAPH_RE.sub("", match.group("numbers"))
+        for number in _NUMBER_RE.findall(numbers):
+            citations.append(Citation(article=f"{code} {number.lower()}", start=match.start()))
+    return citations
+
+
+def extract_article_keys(text: str) -> List[str]:
+    """Distinct article keys referenced in a text, in order of appearance."""
+    return list(dict.fromkeys(citation.article for citation in extract_citations(text)))
@@ -10,10 +10,17 @@ import hashlib
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import TYPE_CHECKING, List, Optional, Dict, Any
 
 from app.models.course_models import CourseMaterial
 from app.services.gcp_service import get_firestore_client
+from app.services.chunk_index import get_chunk_index_registry
+from app.services.material_search_service import get_material_search_index
+from app.services.materials_catalog import EVENT_DELETED, EVENT_MODIFIED, ChangeEvent
+from app.services.topic_file_index import get_course_file_index_registry
+
+if TYPE_CHECKING:
+    from app.services.material_artifacts import MaterialArtifacts
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +42,13 @@ def generate_material_id(storage_path: str) -> str:
     return hashlib.sha256(storage_path.encode()).hexdigest()[:32]
 
 
+def _materials_changed(course_id: str) -> None:
+    """Mark a course's derived indexes stale after its materials changed."""
+    get_material_search_index().mark_stale(course_id)
+    get_chunk_index_registry().invalidate(course_id)
+    get_course_file_index_registry().invalidate(course_id)
+
+
 class CourseMaterialsService:
     """Service for managing unified course materials."""
 
@@ -98,6 +112,7 @@ class CourseMaterialsService:
         material.updatedAt = datetime.now(timezone.utc)
         doc_ref = self._get_collection(course_id).document(material.id)
         doc_ref.set(material.model_dump(mode="json"))
+        _materials_changed(course_id)
         logger.info("Upserted material %s in course %s", material.id, course_id)
         return material
 
@@ -108,6 +123,7 @@ class CourseMaterialsService:
         if not doc.exists:
             return False
         doc_ref.delete()
+        _materials_changed(course_id)
         logger.info("Deleted material %s from course %s", material_id, course_id)
         return True
 
@@ -117,23 +133,36 @@ class CourseMaterialsService:
         material_id: str,
         extracted_text: str,
         text_length: int,
-        error: Optional[str] = None
+        error: Optional[str] = None,
+        artifacts: Optional["MaterialArtifacts"] = None
     ) -> Optional[CourseMaterial]:
-        """Update text extraction results for a material."""
+        """Update text extraction results for a material.
+
+        When derived artifacts are given they replace extracted_text/text_length
+        and also store the content hash, page spans and token estimate.
+        """
         doc_ref = self._get_collection(course_id).document(material_id)
         doc = doc_ref.get()
         if not doc.exists:
             return None
 
-        update_data = {
-            "textExtracted": error is None,
-            "extractedText": extracted_text if error is None else None,
-            "textLength": text_length if error is None else 0,
-            "extractionError": error,
-            "updatedAt": datetime.now(timezone.utc).isoformat()
-        }
+        if artifacts is not None and error is None:
+            update_data = artifacts.to_firestore()
+        else:
+            update_data = {
+                "textExtracted": error is None,
+                "extractedText": extracted_text if error is None else None,
+                "textLength": text_length if error is None else 0,
+                "extractionError": error,
+                # Artifacts from an earlier extraction no longer describe this text
+                "contentHash": None,
+                "pageSpans": None,
+                "tokenEstimate": 0,
+            }
+        update_data["updatedAt"] = datetime.now(timezone.utc).isoformat()
         doc_ref.update(update_data)
-        
+        _materials_changed(course_id)
+
         return self.get_material(course_id, material_id)
 
     def update_summary(
@@ -287,9 +316,62 @@ class CourseMaterialsService:
         if count % FIRESTORE_BATCH_LIMIT != 0:
             batch.commit()
 
+        _materials_changed(course_id)
         logger.info("Bulk upserted %d materials in course %s", count, course_id)
         return count
 
+    def apply_catalog_changes(self, course_id: str, events: List[ChangeEvent]) -> Dict[str, int]:
+        """Apply materials catalog change events to a course's registered materials.
+
+        Materials are matched by the ID derived from their storage path, so
+        events for files the course doesn't register are ignored. Modified
+        files lose their extracted text (it no longer matches the file) and
+        deleted files are removed. Added files are left to the caller, which
+        knows the tier, week and title to register them with.
+
+        Returns:
+            Counts of "modified" and "deleted" materials
+        """
+        counts = {"modified": 0, "deleted": 0}
+        batch = self.db.batch()
+        writes = 0
+
+        for event in events:
+            if event.kind not in (EVENT_MODIFIED, EVENT_DELETED):
+                continue
+            doc_ref = self._get_collection(course_id).document(generate_material_id(event.path))
+            if not doc_ref.get().exists:
+                continue
+            if event.kind == EVENT_DELETED:
+                batch.delete(doc_ref)
+            else:
+                batch.update(doc_ref, {
+                    "fileSize": event.size,
+                    "fileType": event.file_type,
+                    "textExtracted": False,
+                    "extractedText": None,
+                    "textLength": 0,
+                    "contentHash": None,
+                    "pageSpans": None,
+                    "tokenEstimate": 0,
+                    "updatedAt": datetime.now(timezone.utc).isoformat(),
+                })
+            counts[event.kind] += 1
+            writes += 1
+            if writes % FIRESTORE_BATCH_LIMIT == 0:
+                batch.commit()
+                batch = self.db.batch()
+
+        if writes % FIRESTORE_BATCH_LIMIT != 0:
+            batch.commit()
+        if writes:
+            _materials_changed(course_id)
+            logger.info(
+                "Applied catalog changes to course %s: %d modified, %d deleted",
+                course_id, counts["modified"], counts["deleted"],
+            )
+        return counts
+
 
 # Singleton instance
 _service_instance: Optional[CourseMaterialsService] = None
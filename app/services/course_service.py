@@ -337,6 +337,7 @@ class CourseService:
                 passingThreshold=data.get("passingThreshold"),
                 components=data.get("components", []),
                 materialSubjects=data.get("materialSubjects", []),
+                startDate=data.get("startDate"),
                 abbreviations=data.get("abbreviations", {}),
                 externalResources=data.get("externalResources"),
                 materials=data.get("materials"),
@@ -3,7 +3,7 @@
 Handles file uploads for course materials:
 - File validation (type, size)
 - Storage in Materials folder structure
-- Text extraction using TextExtractor
+- Text extraction and derived artifacts (see material_artifacts)
 - Metadata storage in Firestore
 """
 
@@ -15,7 +15,8 @@ from pathlib import Path
 from typing import Optional, List, Dict, Any, Tuple
 
 from app.models.course_models import UploadedMaterial
-from app.services.text_extractor import extract_text, detect_file_type
+from app.services.material_artifacts import MaterialArtifacts, derive_material_artifacts
+from app.services.text_extractor import detect_file_type
 from app.services.gcp_service import get_firestore_client
 
 logger = logging.getLogger(__name__)
@@ -196,26 +197,29 @@ async def save_file(
         raise StorageError(f"Failed to save file: {str(e)}")
 
 
-def extract_text_from_file(file_path: Path) -> Tuple[bool, Optional[str], Optional[str]]:
-    """Extract text from uploaded file.
-    
+def extract_text_from_file(file_path: Path) -> Tuple[Optional[MaterialArtifacts], Optional[str]]:
+    """Extract text from uploaded file and derive its artifacts.
+
+    This is the only time an uploaded file is parsed; generation reads the
+    stored artifacts (text, page spans, token estimates, content hash).
+
     Args:
         file_path: Path to file
-    
+
     Returns:
-        Tuple of (success, extracted_text, error_message)
+        Tuple of (artifacts, error_message)
     """
     try:
-        result = extract_text(file_path)
-        
-        if result.success:
-            return True, result.text, None
+        result, artifacts = derive_material_artifacts(file_path)
+
+        if artifacts is not None:
+            return artifacts, None
         else:
-            return False, None, result.error
-    
+            return None, result.error
+
     except Exception as e:
         logger.error(f"Text extraction failed for {file_path}: {e}")
-        return False, None, str(e)
+        return None, str(e)
 
 
 # Summary generation settings
@@ -372,13 +376,14 @@ async def upload_document(
     extracted_text = None
     text_length = None
     extraction_error = None
+    artifacts = None
 
     if extract_text_flag:
-        success, text, error = extract_text_from_file(storage_path)
-        text_extracted = success
-        extracted_text = text
-        text_length = len(text) if text else None
-        extraction_error = error
+        artifacts, extraction_error = extract_text_from_file(storage_path)
+        if artifacts is not None:
+            text_extracted = True
+            extracted_text = artifacts.text
+            text_length = len(artifacts.text) or None
 
     # Generate AI summary if text was extracted and summary requested
     summary = None
@@ -453,6 +458,9 @@ async def upload_document(
             extractedText=extracted_text,
             textLength=text_length or 0,
             extractionError=extraction_error,
+            contentHash=artifacts.content_hash if artifacts else None,
+            pageSpans=artifacts.page_spans if artifacts else None,
+            tokenEstimate=artifacts.token_estimate if artifacts else 0,
             summary=summary,
             summaryGenerated=summary_generated,
             createdAt=now,
@@ -0,0 +1,272 @@
+"""Multi-core Extraction Engine for bulk text extraction.
+
+Runs ``extract_text`` across a bounded pool of worker processes so bulk jobs
+(cache population, batch extraction) use every core instead of one thread.
+
+Features:
+- Bounded workers (EXTRACTION_MAX_WORKERS) with at most one file in flight per worker
+- Per-file timeout (EXTRACTION_TIMEOUT_SECONDS); a hung file is failed and its
+  worker is killed without losing the other in-flight files
+- Crash isolation: if a corrupt PDF takes down a worker, the files that were in
+  flight are retried one at a time so only the offending file is reported failed
+- Progress reporting via callback and a pollable snapshot of the current job
+
+Results are always returned in the same order as the input paths.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from app.services.text_extractor import ExtractionResult, extract_text
+
+logger = logging.getLogger(__name__)
+
+# Engine Configuration
+EXTRACTION_MAX_WORKERS = int(os.getenv("EXTRACTION_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "120"))
+# "spawn" avoids forking a process that holds gRPC (Firestore) threads
+EXTRACTION_START_METHOD = os.getenv("EXTRACTION_START_METHOD", "spawn")
+PROGRESS_LOG_INTERVAL = 25  # Log progress every N files
+
+
+@dataclass
+class ExtractionProgress:
+    """Progress snapshot for a bulk extraction job."""
+    total: int
+    completed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    crashed: int = 0
+    workers: int = 1
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job has completed every file."""
+        return self.finished_at is not None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable snapshot."""
+        end = self.finished_at or datetime.now(timezone.utc)
+        return {
+            "total": self.total,
+            "completed": self.completed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "crashed": self.crashed,
+            "workers": self.workers,
+            "percent": round(100 * self.completed / self.total, 1) if self.total else 100.0,
+            "elapsed_seconds": round((end - self.started_at).total_seconds(), 2),
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+ProgressCallback = Callable[[ExtractionProgress, ExtractionResult], None]
+
+# Latest job progress (pollable by admin endpoints while a job runs)
+_current_progress: Optional[ExtractionProgress] = None  # pylint: disable=invalid-name
+_progress_lock = threading.Lock()
+
+
+def get_extraction_progress() -> Optional[Dict[str, Any]]:
+    """Get a snapshot of the current (or most recent) bulk extraction job."""
+    with _progress_lock:
+        return _current_progress.as_dict() if _current_progress else None
+
+
+def _extract_worker(path_str: str, skip_validation: bool) -> ExtractionResult:
+    """Worker entry point (module-level so it can be pickled)."""
+    return extract_text(Path(path_str), _skip_path_validation=skip_validation)
+
+
+def _failure(file_path: Path, error: str) -> ExtractionResult:
+    return ExtractionResult(
+        file_path=str(file_path), file_type="unknown", text="", success=False, error=error,
+    )
+
+
+def _kill_executor(executor: ProcessPoolExecutor) -> None:
+    """Shut down an executor, terminating workers that may be hung."""
+    # ProcessPoolExecutor has no public API to kill a running task, so hung
+    # workers are terminated directly before shutting the pool down.
+    for process in list(getattr(executor, "_processes", {}).values()):
+        try:
+            process.terminate()
+        except Exception:  # pylint: disable=broad-except
+            pass
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_many(
+    file_paths: Iterable[Path],
+    *,
+    max_workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    _skip_path_validation: bool = False,
+) -> List[ExtractionResult]:
+    """Extract text from many files in parallel worker processes.
+
+    Args:
+        file_paths: Files to extract (absolute or relative to project root)
+        max_workers: Worker processes to use (default: EXTRACTION_MAX_WORKERS)
+        timeout: Per-file timeout in seconds (default: EXTRACTION_TIMEOUT_SECONDS)
+        progress_callback: Called in the calling thread after each file completes
+        _skip_path_validation: Internal flag for testing only. DO NOT use in production code.
+
+    Returns:
+        List of ExtractionResult in the same order as file_paths
+    """
+    global _current_progress  # pylint: disable=global-statement
+
+    paths = [Path(p) for p in file_paths]
+    workers = max(1, min(max_workers or EXTRACTION_MAX_WORKERS, len(paths) or 1))
+    timeout = timeout or EXTRACTION_TIMEOUT_SECONDS
+
+    progress = ExtractionProgress(total=len(paths), workers=workers)
+    with _progress_lock:
+        _current_progress = progress
+
+    results: List[Optional[ExtractionResult]] = [None] * len(paths)
+
+    def record(index: int, result: ExtractionResult) -> None:
+        results[index] = result
+        progress.completed += 1
+        if result.success:
+            progress.succeeded += 1
+        else:
+            progress.failed += 1
+        if progress.completed % PROGRESS_LOG_INTERVAL == 0:
+            logger.info("Extraction progress: %d/%d files", progress.completed, progress.total)
+        if progress_callback:
+            try:
+                progress_callback(progress, result)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning("Extraction progress callback failed: %s", e)
+
+    if workers == 1 or len(paths) < 2:
+        # Not worth spinning up processes for a single file
+        for index, path in enumerate(paths):
+            try:
+                record(index, extract_text(path, _skip_path_validation=_skip_path_validation))
+            except Exception as e:  # pylint: disable=broad-except
+                record(index, _failure(path, f"Extraction failed: {e}"))
+    else:
+        _run_pool(paths, workers, timeout, record, progress, _skip_path_validation)
+
+    progress.finished_at = datetime.now(timezone.utc)
+    logger.info(
+        "Extraction complete: %d files, %d succeeded, %d failed (%d timed out, %d crashed) in %.1fs using %d workers",
+        progress.total, progress.succeeded, progress.failed, progress.timed_out,
+        progress.crashed, (progress.finished_at - progress.started_at).total_seconds(), workers,
+    )
+    return [r for r in results if r is not None]
+
+
+def _run_pool(
+    paths: List[Path],
+    workers: int,
+    timeout: float,
+    record: Callable[[int, ExtractionResult], None],
+    progress: ExtractionProgress,
+    skip_validation: bool,
+) -> None:
+    """Schedule paths over a process pool with timeout and crash handling."""
+    context = multiprocessing.get_context(EXTRACTION_START_METHOD)
+
+    def new_executor() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+    pending: Deque[int] = deque(range(len(paths)))
+    # Files that were in flight when a worker crashed; retried one at a time
+    isolated: Deque[int] = deque()
+    isolated_set = set()
+    # future -> (path index, start time)
+    in_flight: Dict[Future, Tuple[int, float]] = {}
+
+    executor = new_executor()
+    try:
+        while pending or isolated or in_flight:
+            broken = False
+
+            # Keep at most one file per worker in flight so the timeout measures run time
+            try:
+                while len(in_flight) < workers and pending:
+                    future = executor.submit(_extract_worker, str(paths[pending[0]]), skip_validation)
+                    in_flight[future] = (pending.popleft(), time.monotonic())
+                if not in_flight and isolated:
+                    future = executor.submit(_extract_worker, str(paths[isolated[0]]), skip_validation)
+                    in_flight[future] = (isolated.popleft(), time.monotonic())
+            except BrokenProcessPool:
+                broken = True
+
+            if not broken:
+                nearest_deadline = min(start for _, start in in_flight.values()) + timeout
+                done, _ = wait(
+                    list(in_flight),
+                    timeout=max(0.0, nearest_deadline - time.monotonic()),
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    index, _ = in_flight[future]
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        continue
+                    except Exception as e:  # pylint: disable=broad-except
+                        result = _failure(paths[index], f"Extraction worker error: {e}")
+                    del in_flight[future]
+                    record(index, result)
+
+            if broken:
+                # Every in-flight file is a suspect; retry each alone to find the culprit
+                for index, _ in in_flight.values():
+                    if index in isolated_set:
+                        logger.error("Extraction worker crashed on %s", paths[index])
+                        progress.crashed += 1
+                        record(index, _failure(paths[index], "Extraction worker crashed"))
+                    else:
+                        isolated_set.add(index)
+                        isolated.append(index)
+                in_flight.clear()
+                _kill_executor(executor)
+                executor = new_executor()
+                continue
+
+            now = time.monotonic()
+            expired = [f for f, (_, start) in in_flight.items() if now - start >= timeout]
+            if expired:
+                for future in expired:
+                    index, _ = in_flight.pop(future)
+                    logger.error("Extraction timed out after %.0fs: %s", timeout, paths[index])
+                    progress.timed_out += 1
+                    record(index, _failure(paths[index], f"Extraction timed out after {timeout:.0f}s"))
+                # Innocent files lose their worker too; requeue them at the front
+                for index, _ in in_flight.values():
+                    if index in isolated_set:
+                        isolated.appendleft(index)
+                    else:
+                        pending.appendleft(index)
+                in_flight.clear()
+                _kill_executor(executor)
+                executor = new_executor()
+    finally:
+        if in_flight:
+            _kill_executor(executor)
+        else:
+            executor.shutdown(wait=True)
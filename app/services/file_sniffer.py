@@ -0,0 +1,116 @@
+"""Single-pass file sniffing with cached file descriptors.
+
+``sniff_file`` stats a file once and, for ``.pdf`` files, reads the header
+once (a slide archive's open handle is handed to the slide archive pool, so
+the extraction that follows never reopens it). The result is a
+``FileDescriptor`` carrying the detected type, the stat result and the
+content hash when it is already known.
+
+Descriptors are cached per path and revalidated by stat fingerprint, so
+repeat detection for an unchanged file costs one stat() and no reads.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sniffer Configuration
+SNIFF_CACHE_MAX_ENTRIES = int(os.getenv("FILE_SNIFF_CACHE_MAX_ENTRIES", "4096"))
+
+# File types decided by extension alone ('.pdf' is sniffed by content)
+EXTENSION_TYPES = {
+    'png': 'image', 'jpg': 'image', 'jpeg': 'image', 'gif': 'image',
+    'bmp': 'image', 'tiff': 'image', 'webp': 'image',
+    'docx': 'docx',
+    'pptx': 'pptx',
+    'md': 'markdown',
+    'txt': 'text',
+    'html': 'html', 'htm': 'html',
+    'json': 'json',
+}
+
+
+@dataclass(frozen=True, slots=True)
+class FileDescriptor:
+    """What is known about a file from a single stat and header read."""
+    path: Path
+    file_type: str
+    stat: os.stat_result
+    file_hash: Optional[str] = None  # MD5 of the content, if already indexed
+
+    @property
+    def size(self) -> int:
+        """File size in bytes."""
+        return self.stat.st_size
+
+    @property
+    def modified(self) -> datetime:
+        """File modification time (UTC)."""
+        return datetime.fromtimestamp(self.stat.st_mtime, tz=timezone.utc)
+
+    @property
+    def fingerprint(self) -> Tuple[int, int, int]:
+        """Change-detection fingerprint: (size, mtime_ns, inode)."""
+        return self.stat.st_size, self.stat.st_mtime_ns, self.stat.st_ino
+
+
+_descriptors: "OrderedDict[str, FileDescriptor]" = OrderedDict()
+_descriptors_lock = threading.Lock()
+
+
+def _sniff_type(file_path: Path) -> str:
+    ext = file_path.suffix.lower().lstrip('.')
+    if ext != 'pdf':
+        return EXTENSION_TYPES.get(ext, 'unknown')
+
+    # Slide archives are ZIPs disguised as PDFs; get_file_type validates the
+    # path and reads the header (and manifest) from one open
+    from app.services.slide_archive import get_file_type
+    return get_file_type(file_path)
+
+
+def sniff_file(file_path: Path, hash_index=None) -> Optional[FileDescriptor]:
+    """Get the descriptor for a file, sniffing it only if it changed.
+
+    Args:
+        file_path: Path to the file
+        hash_index: Optional FileHashIndex used to fill in an already-known hash
+            (never computes one)
+
+    Returns:
+        FileDescriptor, or None if the file does not exist
+    """
+    try:
+        stat = file_path.stat()
+    except OSError:
+        return None
+
+    key = str(file_path)
+    with _descriptors_lock:
+        descriptor = _descriptors.get(key)
+    if descriptor is None or descriptor.fingerprint != (stat.st_size, stat.st_mtime_ns, stat.st_ino):
+        descriptor = FileDescriptor(path=file_path, file_type=_sniff_type(file_path), stat=stat)
+    if descriptor.file_hash is None and hash_index is not None:
+        known = hash_index.known_hash(file_path, stat)
+        if known:
+            descriptor = replace(descriptor, file_hash=known)
+
+    with _descriptors_lock:
+        _descriptors[key] = descriptor
+        _descriptors.move_to_end(key)
+        while len(_descriptors) > SNIFF_CACHE_MAX_ENTRIES:
+            _descriptors.popitem(last=False)
+    return descriptor
+
+
+def clear_descriptor_cache() -> None:
+    """Drop all cached descriptors."""
+    with _descriptors_lock:
+        _descriptors.clear()
@@ -17,19 +17,31 @@ This approach is more robust than the Files API because it:
 """
 
 import asyncio
+import hashlib
 import json
 import logging
+import os
 import re
+import time
 import unicodedata
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
 from anthropic import AsyncAnthropic, RateLimitError
 
 from app.models.course_models import CourseMaterial
 from app.models.usage_models import UserContext
+from app.services.chunk_index import CourseChunkIndex, get_chunk_index_registry
+from app.services.citation_index import article_key, extract_article_keys
 from app.services.gcp_service import get_anthropic_api_key, get_firestore_client
-from app.services.text_extractor import extract_text, detect_file_type, ExtractionResult
+from app.services.json_stream_parser import ArrayItemParser
+from app.services.material_artifacts import has_artifacts, load_material_text
+from app.services.material_search_service import CitationPassage, get_material_search_index
+from app.services.single_flight import get_generation_single_flight
+from app.services.text_extractor import estimate_tokens
+from app.services.tiered_text_cache import get_tiered_text_cache
+from app.services.topic_file_index import CourseFileIndex, FileCatalogIndex, get_course_file_index_registry
 from app.services.usage_tracking_service import track_llm_usage_from_response
 
 logger = logging.getLogger(__name__)
@@ -39,6 +51,21 @@ DEFAULT_FALLBACK_COUNT = 5  # Number of files to return when no specific files f
 MATERIALS_ROOT = Path("Materials")
 MAX_TEXT_LENGTH = 100000  # Maximum characters per document to avoid context overflow
 MAX_MATERIALS_PER_GENERATION = 10  # Limit materials to avoid context overflow in AI generation
+MAX_MATERIAL_TOKENS = estimate_tokens(MAX_TEXT_LENGTH)  # Per-document tokens after truncation
+# Token budget for the documents sent in one generation request
+MAX_CONTEXT_TOKENS = int(os.getenv("MAX_CONTEXT_TOKENS", "150000"))
+# Materials extracted concurrently per request (extraction runs on executor threads)
+MATERIAL_EXTRACTION_CONCURRENCY = int(os.getenv("MATERIAL_EXTRACTION_CONCURRENCY", "4"))
+# Materials indexed per course for tutor passage retrieval
+CHUNK_INDEX_MAX_MATERIALS = int(os.getenv("CHUNK_INDEX_MAX_MATERIALS", "50"))
+TUTOR_TOP_K_PASSAGES = 6  # Passages sent with each tutor question
+MAX_ARTICLE_PASSAGES = 5  # Passages per cited article (explain_article, tutor)
+MAX_QUESTION_ARTICLES = 3  # Articles looked up per tutor question
+TUTOR_ARTICLE_PASSAGES = 2  # Passages per article cited in a tutor question
+MATERIAL_FINGERPRINT_LIMIT = 200  # Materials per week read for a course materials fingerprint
+COURSE_FILE_INDEX_MAX_MATERIALS = 500  # Materials per course in its topic/week file index
+STUDY_GUIDE_MAX_RETRIES = 5  # Attempts per study guide when rate limited
+RATE_LIMIT_BASE_DELAY = 60  # Seconds before the first retry (rate limit is per minute)
 
 # Validation constants
 MIN_FLASHCARDS = 5  # Minimum number of flashcards to generate
@@ -94,6 +121,52 @@ PROMPT_INJECTION_PATTERNS = [
 ]
 
 
+@dataclass
+class GenerationRequest:
+    """A prepared content generation call, shared by blocking and streaming variants."""
+    params: Dict[str, Any]  # Keyword arguments for messages.create / messages.stream
+    operation_type: str  # Usage tracking operation type
+    materials_count: int
+    request_metadata: Dict[str, Any] = field(default_factory=dict)
+    course_id: str = ""
+    material_fingerprint: str = ""  # See material_fingerprint()
+
+    def key(self) -> str:
+        """Identity of the generation: normalized parameters plus material fingerprint.
+
+        Requests with equal keys send equivalent prompts (topic case and
+        whitespace and week order are ignored), so they can share a result.
+        """
+        parameters = {name: _normalize_parameter(value) for name, value in self.request_metadata.items()}
+        payload = json.dumps(
+            [self.operation_type, self.course_id, self.params["model"], parameters, self.material_fingerprint],
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _normalize_parameter(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, (list, tuple)):
+        return sorted(value)
+    return value
+
+
+def material_fingerprint(materials_with_text: List[Tuple[CourseMaterial, str]]) -> str:
+    """Fingerprint of the materials (and exact text) a generation is based on."""
+    digests = sorted(
+        f"{material.id}:{hashlib.md5(text.encode()).hexdigest()}"
+        for material, text in materials_with_text
+    )
+    return hashlib.sha256("\n".join(digests).encode()).hexdigest()
+
+
+def _is_flashcard(card: Dict[str, Any]) -> bool:
+    """Whether a parsed item has the front and back of a flashcard."""
+    return isinstance(card.get("front"), str) and isinstance(card.get("back"), str)
+
+
 class FilesAPIService:
     """Service for generating content using course materials with text extraction.
 
@@ -115,15 +188,57 @@ class FilesAPIService:
         self._firestore = None
 
         # Legacy file_ids dict - kept for backwards compatibility with methods
-        # that haven't been migrated to text extraction yet (explain_article,
-        # analyze_case, get_topic_files, etc). These methods will return empty
+        # that haven't been migrated to text extraction yet (analyze_case,
+        # get_topic_files, etc). These methods will return empty
         # results until they are refactored.
         # TODO: Remove once all methods are migrated to text extraction
         self.file_ids: Dict[str, Dict[str, Any]] = {}
+        # Topic lookups over file_ids, built on first use
+        self._catalog_index: Optional[FileCatalogIndex] = None
 
         # Beta header for Files API (used by legacy methods)
         self.beta_header = "pdfs-2024-09-25"
 
+    def _file_catalog_index(self) -> FileCatalogIndex:
+        """Inverted indexes over the file catalog, rebuilt when file_ids is replaced."""
+        if self._catalog_index is None or self._catalog_index.file_ids is not self.file_ids:
+            self._catalog_index = FileCatalogIndex(self.file_ids)
+        return self._catalog_index
+
+    def _course_file_index(self, course_id: str) -> CourseFileIndex:
+        """Get a course's file index, rebuilding it if the course changed.
+
+        The index is built from the course's materials collection and weeks.
+        Week and topic changes bump the course's updatedAt and material
+        writes invalidate the course's entry, so a current index costs one
+        course document read.
+
+        Raises:
+            ValueError: If course not found
+        """
+        course_service = self._get_course_service()
+
+        course = course_service.get_course(course_id, include_weeks=False)
+        if course is None:
+            raise ValueError(f"Course not found: {course_id}")
+
+        registry = get_course_file_index_registry()
+        index = registry.get(course_id, course.updatedAt)
+        if index is not None:
+            return index
+
+        course = course_service.get_course(course_id, include_weeks=True)
+        if course is None:
+            raise ValueError(f"Course not found: {course_id}")
+
+        materials = self.get_course_materials(course_id, limit=COURSE_FILE_INDEX_MAX_MATERIALS)
+        index = CourseFileIndex(materials, course.weeks or [])
+        registry.put(course_id, index, course.updatedAt)
+        logger.info(
+            "Built file index for course %s: %d materials", course_id, len(index.all_files)
+        )
+        return index
+
     def get_file_id(self, key: str) -> str:
         """Get file_id for a course material (legacy method).
 
@@ -257,6 +372,11 @@ class FilesAPIService:
         """Extract text content from a material file.
 
         Handles all file types including slide archives (ZIP files disguised as PDFs).
+        Materials with artifacts derived at upload time are read from those and
+        never parsed here. Others are served from the tiered text cache (memory ->
+        disk -> Firestore) so repeat generation for the same material never
+        re-parses the file. On a miss, pages are streamed and parsing stops once
+        MAX_TEXT_LENGTH is exceeded.
 
         Args:
             material: The course material
@@ -266,35 +386,16 @@ class FilesAPIService:
         """
         file_path = self._get_local_file_path(material)
 
-        logger.info(
-            "Extracting text from material: filename=%s, storagePath=%s, file_path=%s, absolute_path=%s, exists=%s",
-            material.filename,
-            material.storagePath,
-            file_path,
-            file_path.resolve(),
-            file_path.exists()
-        )
-
-        if not file_path.exists():
-            logger.error("File not found: %s (storagePath: %s)", file_path, material.storagePath)
-            return None
-
-        # Detect file type and extract text
-        file_type = detect_file_type(file_path)
-        logger.info("Extracting text from %s (type: %s)", material.filename, file_type)
-
-        result = extract_text(file_path)
-
-        if not result.success:
-            logger.warning(
-                "Failed to extract text from %s: %s",
-                material.filename,
-                result.error
-            )
-            return None
+        # Stream only as much as the truncation below can use (+1 char to detect overflow)
+        text = load_material_text(material, file_path, max_chars=MAX_TEXT_LENGTH + 1)
+        if text is not None:
+            file_type = material.fileType
+        else:
+            text, file_type = self._extract_text_from_file(material, file_path)
+            if text is None:
+                return None
 
         # Truncate if too long to avoid context overflow
-        text = result.text
         if len(text) > MAX_TEXT_LENGTH:
             logger.info(
                 "Truncating text from %s: %d -> %d chars",
@@ -320,23 +421,223 @@ class FilesAPIService:
         )
         return text
 
+    def material_cache_status(self, material: CourseMaterial) -> str:
+        """How a material's text would be loaded for generation right now.
+
+        Returns:
+            "stored" (upload-time artifacts), "cached" (tiered text cache hit),
+            "cold" (parsed on first use) or "missing" (no local file)
+        """
+        file_path = self._get_local_file_path(material)
+        if load_material_text(material, file_path, max_chars=1) is not None:
+            return "stored"
+        if not file_path.exists():
+            return "missing"
+        if get_tiered_text_cache().is_cached(file_path, max_chars=MAX_TEXT_LENGTH + 1):
+            return "cached"
+        return "cold"
+
+    def warm_material(self, material: CourseMaterial) -> bool:
+        """Load a material's text into the tiered text cache ahead of first use.
+
+        Returns:
+            Whether the text could be extracted
+        """
+        return self._extract_text_from_material(material) is not None
+
+    def _extract_text_from_file(
+        self, material: CourseMaterial, file_path: Path
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Extract text from a material's local file via the tiered text cache.
+
+        Used for materials without stored artifacts (scanned files, or uploads
+        made before artifacts were derived at upload time).
+
+        Args:
+            material: The course material
+            file_path: Absolute path to the local file
+
+        Returns:
+            (text, file_type), or (None, None) if extraction failed
+        """
+        logger.info(
+            "Extracting text from material: filename=%s, storagePath=%s, file_path=%s, absolute_path=%s, exists=%s",
+            material.filename,
+            material.storagePath,
+            file_path,
+            file_path.resolve(),
+            file_path.exists()
+        )
+
+        if not file_path.exists():
+            logger.error("File not found: %s (storagePath: %s)", file_path, material.storagePath)
+            return None, None
+
+        result = get_tiered_text_cache().get_or_extract(file_path, max_chars=MAX_TEXT_LENGTH + 1)
+
+        if not result.success:
+            logger.warning(
+                "Failed to extract text from %s: %s",
+                material.filename,
+                result.error
+            )
+            return None, None
+
+        return result.text, result.file_type
+
+    def _stored_token_count(self, material: CourseMaterial) -> Optional[int]:
+        """Token estimate stored on the material at upload/extraction time (no I/O)."""
+        if not has_artifacts(material):
+            return None
+        tokens = material.tokenEstimate or estimate_tokens(material.textLength)
+        return min(tokens, MAX_MATERIAL_TOKENS)
+
+    def _material_token_count(self, material: CourseMaterial) -> Optional[int]:
+        """Token estimate from the material or its cached text, without parsing.
+
+        Returns:
+            Estimated tokens after truncation, or None if nothing is stored yet
+        """
+        tokens = self._stored_token_count(material)
+        if tokens is None:
+            tokens = get_tiered_text_cache().token_count(self._get_local_file_path(material))
+        return min(tokens, MAX_MATERIAL_TOKENS) if tokens is not None else None
+
+    @staticmethod
+    def _fit_token_budget(items: List[Any], token_count, budget: int) -> List[Any]:
+        """Keep items, in order, while their token counts fit within the budget.
+
+        Args:
+            items: Items in priority order
+            token_count: Callable returning an item's tokens (None if unknown; kept)
+            budget: Maximum total tokens
+
+        Returns:
+            The items that fit
+        """
+        kept = []
+        used = 0
+        for item in items:
+            tokens = token_count(item)
+            if tokens is not None:
+                if used + tokens > budget:
+                    logger.info("Skipping material over token budget: %d + %d > %d", used, tokens, budget)
+                    continue
+                used += tokens
+            kept.append(item)
+        return kept
+
+    async def estimate_materials_tokens(
+        self,
+        course_id: str,
+        week_number: Optional[int] = None,
+        limit: int = 10
+    ) -> List[Tuple[CourseMaterial, int]]:
+        """Estimate input tokens for the materials a generation request would use.
+
+        Sums token counts stored with the material or its cached text, so no
+        text is read. Only materials that were never extracted are extracted
+        (once; the result is cached for later estimates).
+
+        Args:
+            course_id: Course ID
+            week_number: Optional week filter
+            limit: Maximum materials to include
+
+        Returns:
+            List of (CourseMaterial, estimated_tokens) tuples
+        """
+        materials = self.get_course_materials(
+            course_id=course_id,
+            week_number=week_number,
+            limit=limit
+        )
+
+        def count_all() -> List[Optional[int]]:
+            counts = []
+            for material in materials:
+                try:
+                    counts.append(self._material_token_count(material))
+                except Exception as e:
+                    logger.warning("Token lookup failed for %s: %s", material.filename, e)
+                    counts.append(None)
+            return counts
+
+        counts = await asyncio.to_thread(count_all)
+
+        results = []
+        for material, tokens in zip(materials, counts):
+            if tokens is None:
+                text = await asyncio.to_thread(self._extract_text_from_material, material)
+                tokens = estimate_tokens(len(text)) if text else None
+            if tokens:
+                results.append((material, tokens))
+        return results
+
+    def course_materials_fingerprint(
+        self,
+        course_id: str,
+        week_numbers: Optional[List[int]] = None
+    ) -> str:
+        """Fingerprint of a course's materials (or those of some weeks) from stored metadata.
+
+        Changes when a material is added or removed or its file content
+        changes, without extracting any text. Materials without a stored
+        contentHash are fingerprinted by the hash index (re-read only when
+        the file's stat changed). Used in generation_index keys. Reads
+        Firestore and files; call it off the event loop.
+
+        Args:
+            course_id: Course ID
+            week_numbers: Optional week filter (None: all materials)
+
+        Returns:
+            SHA-256 hex digest
+        """
+        from app.services.text_cache_service import get_hash_index
+
+        hash_index = get_hash_index()
+        entries = []
+        for week_number in sorted(set(week_numbers)) if week_numbers else [None]:
+            materials = self.get_course_materials(
+                course_id=course_id,
+                week_number=week_number,
+                limit=MATERIAL_FINGERPRINT_LIMIT
+            )
+            for material in materials:
+                content_hash = material.contentHash or hash_index.file_hash(self._get_local_file_path(material))
+                entries.append(f"{material.id}:{content_hash}")
+        return hashlib.sha256("\n".join(sorted(entries)).encode()).hexdigest()
+
     async def get_course_materials_with_text(
         self,
         course_id: str,
         week_number: Optional[int] = None,
         tier: Optional[str] = None,
-        limit: int = 10
+        limit: int = 10,
+        token_budget: Optional[int] = MAX_CONTEXT_TOKENS
     ) -> List[Tuple[CourseMaterial, str]]:
         """Get course materials with their extracted text content.
 
         This method extracts text from local files, supporting all file types
         including slide archives (ZIP files with JPEG slides + text).
 
+        Extraction is synchronous (PyMuPDF, zipfile, OCR), so each material is
+        extracted on an executor thread with at most MATERIAL_EXTRACTION_CONCURRENCY
+        running at once. The event loop stays free to serve other requests and
+        the results keep the order returned by Firestore. Cached text for all
+        materials is prefetched with a single batched Firestore read first.
+
+        Materials are packed into token_budget in order. Stored token counts
+        drop materials that can't fit before their text is loaded; the rest
+        are checked against their (truncated) text length afterwards.
+
         Args:
             course_id: Course ID
             week_number: Optional week filter
             tier: Optional tier filter
             limit: Maximum materials to return
+            token_budget: Maximum estimated tokens across all returned texts (None: no limit)
 
         Returns:
             List of (CourseMaterial, extracted_text) tuples
@@ -360,30 +661,167 @@ class FilesAPIService:
             logger.warning("No materials found for course %s", course_id)
             return []
 
-        results = []
+        if token_budget is not None:
+            materials = self._fit_token_budget(materials, self._stored_token_count, token_budget)
 
-        for material in materials:
-            try:
-                text = self._extract_text_from_material(material)
-                if text:
-                    results.append((material, text))
-                else:
-                    logger.warning("No text extracted from %s", material.filename)
-            except Exception as e:
-                logger.error(
-                    "Failed to extract text from %s: %s",
+        batch_start = time.perf_counter()
+
+        # One multi-document Firestore read instead of one RPC per material
+        # (materials with upload-time artifacts already carry their text)
+        try:
+            await asyncio.to_thread(
+                get_tiered_text_cache().prefetch,
+                [
+                    self._get_local_file_path(material)
+                    for material in materials
+                    if not has_artifacts(material)
+                ],
+            )
+        except Exception as e:
+            logger.warning("Text cache prefetch failed: %s", e)
+
+        semaphore = asyncio.Semaphore(MATERIAL_EXTRACTION_CONCURRENCY)
+
+        async def extract_one(material: CourseMaterial) -> Optional[str]:
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    text = await asyncio.to_thread(self._extract_text_from_material, material)
+                except Exception as e:
+                    logger.error(
+                        "Failed to extract text from %s: %s",
+                        material.filename,
+                        str(e)
+                    )
+                    # Continue with other materials
+                    text = None
+                logger.info(
+                    "Material extraction latency: %s took %.1f ms (%d chars)",
                     material.filename,
-                    str(e)
+                    (time.perf_counter() - start) * 1000,
+                    len(text) if text else 0
                 )
-                # Continue with other materials
+                return text
+
+        texts = await asyncio.gather(*(extract_one(material) for material in materials))
+
+        results = []
+        for material, text in zip(materials, texts):
+            if text:
+                results.append((material, text))
+            else:
+                logger.warning("No text extracted from %s", material.filename)
+
+        if token_budget is not None:
+            results = self._fit_token_budget(
+                results, lambda pair: estimate_tokens(len(pair[1])), token_budget
+            )
 
         logger.info(
-            "Got %d materials with text for course %s",
+            "Got %d materials with text for course %s in %.1f ms",
             len(results),
-            course_id
+            course_id,
+            (time.perf_counter() - batch_start) * 1000
         )
         return results
 
+    def _material_text_fingerprints(self, materials: List[CourseMaterial]) -> List[str]:
+        """Text cache fingerprints of materials (stored content hashes for uploads with artifacts)."""
+        from app.services.text_cache_service import get_hash_index
+
+        hash_index = get_hash_index()
+        fingerprints = []
+        for material in materials:
+            if has_artifacts(material) and material.contentHash:
+                fingerprints.append(material.contentHash)
+                continue
+            fingerprint = hash_index.file_hash(self._get_local_file_path(material))
+            if fingerprint:
+                fingerprints.append(fingerprint)
+        return fingerprints
+
+    async def search_course_passages(
+        self,
+        course_id: str,
+        query: str,
+        week_number: Optional[int] = None,
+        top_k: int = TUTOR_TOP_K_PASSAGES
+    ) -> List[Dict[str, str]]:
+        """Get the course passages most relevant to a question.
+
+        Ranks chunks of the course's extracted text with the course's BM25
+        index, built on first use and rebuilt once the text cache changes.
+        Passages are grouped per material, in order of their best match.
+        Articles named in the question (e.g. "Art. 6:74 DCC") are looked up in
+        the citation index and the passages citing them come first.
+
+        Args:
+            course_id: Course ID
+            query: Question to rank passages against
+            week_number: Prefer passages from this week's materials
+            top_k: Maximum passages to return
+
+        Returns:
+            List of dicts with 'title' and 'text' (the material's passages)
+        """
+        tiered = get_tiered_text_cache()
+        registry = get_chunk_index_registry()
+
+        index = registry.get(course_id, tiered.changed_since)
+        if index is None:
+            async with registry.build_lock(course_id):
+                index = registry.get(course_id, tiered.changed_since)
+                if index is None:
+                    start = time.perf_counter()
+                    materials_with_text = await self.get_course_materials_with_text(
+                        course_id=course_id,
+                        limit=CHUNK_INDEX_MAX_MATERIALS,
+                        token_budget=None
+                    )
+                    index = await asyncio.to_thread(
+                        CourseChunkIndex.from_materials, materials_with_text
+                    )
+                    fingerprints = await asyncio.to_thread(
+                        self._material_text_fingerprints,
+                        [material for material, _ in materials_with_text]
+                    )
+                    registry.put(course_id, index, fingerprints, tiered.version)
+                    logger.info(
+                        "Built chunk index for course %s: %d chunks from %d materials in %.1f ms",
+                        course_id,
+                        len(index),
+                        len(materials_with_text),
+                        (time.perf_counter() - start) * 1000
+                    )
+
+        # Passages citing the articles the question names come first
+        cited = []
+        for key in extract_article_keys(query)[:MAX_QUESTION_ARTICLES]:
+            code, number = key.split(" ", 1)
+            for passage in await self.get_article_passages(
+                number, code, course_id=course_id, limit=TUTOR_ARTICLE_PASSAGES
+            ):
+                title = passage.title
+                if passage.page_number:
+                    title += f" (page {passage.page_number})"
+                cited.append({"title": title, "text": passage.passage})
+
+        grouped: Dict[str, Dict[str, Any]] = {}
+        for chunk, _score in index.search(query, top_k=top_k, week_number=week_number):
+            entry = grouped.setdefault(chunk.material_id, {"title": chunk.title, "chunks": []})
+            entry["chunks"].append(chunk)
+
+        return cited + [
+            {
+                "title": entry["title"],
+                # Reading order within a material
+                "text": "\n...\n".join(
+                    chunk.text for chunk in sorted(entry["chunks"], key=lambda c: c.start)
+                ),
+            }
+            for entry in grouped.values()
+        ]
+
     async def generate_quiz_from_files(
         self,
         file_keys: List[str],
@@ -525,6 +963,64 @@ Return ONLY valid JSON:
         Returns:
             Dictionary with quiz questions
 
+        Raises:
+            ValueError: If no materials found
+        """
+        request = await self._quiz_request(course_id, topic, num_questions, difficulty, week_number)
+
+        async def generate() -> Dict:
+            # Call API (no Files API beta header needed)
+            client = self._get_anthropic_client()
+            response = await client.messages.create(**request.params)
+            await self._track_generation(response, request, user_context)
+            return self._parse_json(self._response_text(response))
+
+        # Identical concurrent requests share one generation
+        quiz_data = await get_generation_single_flight().do(
+            request.key(), generate, label=request.operation_type
+        )
+
+        logger.info(
+            "Generated %d questions from %d materials",
+            len(quiz_data.get('questions', [])),
+            request.materials_count
+        )
+        return quiz_data
+
+    async def stream_quiz_from_course(
+        self,
+        course_id: str,
+        topic: str,
+        num_questions: int = 10,
+        difficulty: str = "medium",
+        week_number: Optional[int] = None,
+        user_context: Optional[UserContext] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming variant of generate_quiz_from_course.
+
+        Yields the events described in _stream_generation; the final
+        "result" event carries {"quiz": <quiz data>}.
+
+        Raises:
+            ValueError: If no materials found (before the first event)
+        """
+        request = await self._quiz_request(course_id, topic, num_questions, difficulty, week_number)
+        async for event in self._stream_generation(
+            request, user_context,
+            finish=lambda message: {"quiz": self._parse_json(self._response_text(message))},
+        ):
+            yield event
+
+    async def _quiz_request(
+        self,
+        course_id: str,
+        topic: str,
+        num_questions: int,
+        difficulty: str,
+        week_number: Optional[int],
+    ) -> GenerationRequest:
+        """Build the quiz generation request from a course's materials.
+
         Raises:
             ValueError: If no materials found
         """
@@ -597,23 +1093,19 @@ Return ONLY valid JSON:
             len(materials_with_text)
         )
 
-        # Call API (no Files API beta header needed)
-        client = self._get_anthropic_client()
-        response = await client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4000,
-            messages=[{
-                "role": "user",
-                "content": content_blocks
-            }]
-        )
-
-        # Track usage if user context provided
-        await track_llm_usage_from_response(
-            response=response,
-            user_context=user_context,
+        return GenerationRequest(
+            params={
+                "model": "claude-sonnet-4-20250514",
+                "max_tokens": 4000,
+                "messages": [{
+                    "role": "user",
+                    "content": content_blocks
+                }],
+            },
             operation_type="quiz",
-            model="claude-sonnet-4-20250514",
+            materials_count=len(materials_with_text),
+            course_id=course_id,
+            material_fingerprint=material_fingerprint(materials_with_text),
             request_metadata={
                 "topic": topic,
                 "num_questions": num_questions,
@@ -622,17 +1114,6 @@ Return ONLY valid JSON:
             },
         )
 
-        # Parse response
-        text = response.content[0].text
-        quiz_data = self._parse_json(text)
-
-        logger.info(
-            "Generated %d questions from %d materials",
-            len(quiz_data.get('questions', [])),
-            len(materials_with_text)
-        )
-        return quiz_data
-
     async def generate_study_guide_from_course(
         self,
         course_id: str,
@@ -654,6 +1135,81 @@ Return ONLY valid JSON:
         Returns:
             Formatted study guide in Markdown
 
+        Raises:
+            ValueError: If no materials found
+        """
+        request = await self._study_guide_request(course_id, topic, week_numbers)
+
+        async def generate() -> str:
+            # Retry logic for rate limits with exponential backoff
+            for attempt in range(STUDY_GUIDE_MAX_RETRIES):
+                try:
+                    client = self._get_anthropic_client()
+                    response = await client.messages.create(**request.params)
+                    break  # Success, exit retry loop
+                except RateLimitError:
+                    if attempt < STUDY_GUIDE_MAX_RETRIES - 1:
+                        # Exponential backoff: 60s, 120s, 240s, 480s
+                        delay = RATE_LIMIT_BASE_DELAY * (2 ** attempt)
+                        logger.warning(
+                            "⏳ Rate limit hit (attempt %d/%d). Waiting %d seconds before retry...",
+                            attempt + 1, STUDY_GUIDE_MAX_RETRIES, delay
+                        )
+                        await asyncio.sleep(delay)
+                    else:
+                        logger.error("❌ Rate limit exceeded after %d attempts", STUDY_GUIDE_MAX_RETRIES)
+                        raise
+
+            self._log_prompt_cache_usage(response)
+            await self._track_generation(response, request, user_context)
+
+            # With extended thinking, response has thinking blocks and text blocks
+            # Extract just the text content (not the thinking)
+            return self._response_text(response)
+
+        # Identical concurrent requests share one generation
+        guide = await get_generation_single_flight().do(
+            request.key(), generate, label=request.operation_type
+        )
+
+        logger.info(
+            "Generated study guide: %d characters from %d materials",
+            len(guide), request.materials_count
+        )
+        return guide
+
+    async def stream_study_guide_from_course(
+        self,
+        course_id: str,
+        topic: str,
+        week_numbers: Optional[List[int]] = None,
+        user_context: Optional[UserContext] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming variant of generate_study_guide_from_course.
+
+        Yields the events described in _stream_generation; "delta" events
+        carry Markdown as it is written (thinking is not streamed) and the
+        final "result" event carries {"guide": <full Markdown>}.
+
+        Raises:
+            ValueError: If no materials found (before the first event)
+        """
+        request = await self._study_guide_request(course_id, topic, week_numbers)
+        async for event in self._stream_generation(
+            request, user_context,
+            finish=lambda message: {"guide": self._response_text(message)},
+            max_retries=STUDY_GUIDE_MAX_RETRIES,
+        ):
+            yield event
+
+    async def _study_guide_request(
+        self,
+        course_id: str,
+        topic: str,
+        week_numbers: Optional[List[int]],
+    ) -> GenerationRequest:
+        """Build the study guide generation request from a course's materials.
+
         Raises:
             ValueError: If no materials found
         """
@@ -809,70 +1365,21 @@ OUTPUT QUALITY:
         # - Document content: cached (same documents reused across requests)
         # - Cache TTL: 5 minutes, refreshed on each use
         # - Cost reduction: ~90% cheaper for cached tokens on cache hits
-        #
-        # Retry logic for rate limits with exponential backoff
-        max_retries = 5
-        base_delay = 60  # Start with 60 seconds (rate limit is per minute)
-
-        for attempt in range(max_retries):
-            try:
-                client = self._get_anthropic_client()
-                response = await client.messages.create(
-                    model="claude-sonnet-4-20250514",
-                    max_tokens=16000,  # Increased to accommodate thinking + output
-                    thinking={
-                        "type": "enabled",
-                        "budget_tokens": 5000  # Allow up to 5000 tokens for reasoning
-                    },
-                    system=system_blocks,
-                    messages=[{"role": "user", "content": content_blocks}]
-                )
-                break  # Success, exit retry loop
-            except RateLimitError as e:
-                if attempt < max_retries - 1:
-                    # Exponential backoff: 60s, 120s, 240s, 480s
-                    delay = base_delay * (2 ** attempt)
-                    logger.warning(
-                        "⏳ Rate limit hit (attempt %d/%d). Waiting %d seconds before retry...",
-                        attempt + 1, max_retries, delay
-                    )
-                    await asyncio.sleep(delay)
-                else:
-                    logger.error("❌ Rate limit exceeded after %d attempts", max_retries)
-                    raise
-
-        # Log cache statistics from the response
-        usage = response.usage
-        cache_created = getattr(usage, 'cache_creation_input_tokens', 0) or 0
-        cache_read = getattr(usage, 'cache_read_input_tokens', 0) or 0
-        input_tokens = getattr(usage, 'input_tokens', 0) or 0
-        output_tokens = getattr(usage, 'output_tokens', 0) or 0
-
-        if cache_read > 0:
-            cache_hit_pct = (cache_read / (input_tokens + cache_read)) * 100 if input_tokens else 0
-            logger.info(
-                "📦 CACHE HIT: %d tokens read from cache (%.1f%% cached), %d new input tokens",
-                cache_read, cache_hit_pct, input_tokens
-            )
-        elif cache_created > 0:
-            logger.info(
-                "📝 CACHE MISS: %d tokens written to cache for future requests",
-                cache_created
-            )
-        else:
-            logger.info("⚠️ No cache activity detected")
-
-        logger.info(
-            "💰 Token usage - Input: %d, Output: %d, Cache read: %d, Cache created: %d",
-            input_tokens, output_tokens, cache_read, cache_created
-        )
-
-        # Track usage if user context provided
-        await track_llm_usage_from_response(
-            response=response,
-            user_context=user_context,
+        return GenerationRequest(
+            params={
+                "model": "claude-sonnet-4-20250514",
+                "max_tokens": 16000,  # Increased to accommodate thinking + output
+                "thinking": {
+                    "type": "enabled",
+                    "budget_tokens": 5000  # Allow up to 5000 tokens for reasoning
+                },
+                "system": system_blocks,
+                "messages": [{"role": "user", "content": content_blocks}],
+            },
             operation_type="study_guide",
-            model="claude-sonnet-4-20250514",
+            materials_count=len(materials_with_text),
+            course_id=course_id,
+            material_fingerprint=material_fingerprint(materials_with_text),
             request_metadata={
                 "topic": topic,
                 "week_numbers": week_numbers,
@@ -880,18 +1387,45 @@ OUTPUT QUALITY:
             },
         )
 
-        # With extended thinking, response has thinking blocks and text blocks
-        # Extract just the text content (not the thinking)
-        guide = ""
-        for block in response.content:
-            if block.type == "text":
-                guide += block.text
+    async def get_article_passages(
+        self,
+        article: str,
+        code: str = "DCC",
+        course_id: Optional[str] = None,
+        limit: int = MAX_ARTICLE_PASSAGES
+    ) -> List[CitationPassage]:
+        """Get the course material passages that reference a legal article.
 
-        logger.info(
-            "Generated study guide: %d characters from %d materials",
-            len(guide), len(materials_with_text)
-        )
-        return guide
+        Reads the citation index built when material text is indexed, so no
+        document is scanned on the request path. The course's index is synced
+        first (a no-op if it was synced recently).
+
+        Args:
+            article: Article number (e.g., "6:74")
+            code: Legal code or alias (DCC, CCP, GALA, ECHR, Constitution, BW, Awb, ...)
+            course_id: Only this course's materials (None: all indexed courses)
+            limit: Maximum passages to return
+
+        Returns:
+            List of CitationPassage (empty if the article isn't recognized or cited)
+        """
+        key = article_key(article, code)
+        if key is None:
+            logger.warning("Unrecognized article reference: %s %s", article, code)
+            return []
+
+        index = get_material_search_index()
+        if course_id:
+            try:
+                await asyncio.to_thread(index.refresh, course_id)
+            except Exception as e:
+                logger.warning("Citation index sync failed for course %s: %s", course_id, e)
+
+        try:
+            return await asyncio.to_thread(index.article_passages, key, course_id, limit)
+        except Exception as e:
+            logger.warning("Citation lookup failed for %s: %s", key, e)
+            return []
 
     async def explain_article(
         self,
@@ -899,6 +1433,7 @@ OUTPUT QUALITY:
         code: str = "DCC",
         use_reader: bool = True,
         user_context: Optional["UserContext"] = None,
+        course_id: Optional[str] = None,
     ) -> str:
         """
         Explain a legal article using course materials.
@@ -906,8 +1441,9 @@ OUTPUT QUALITY:
         Args:
             article: Article number (e.g., "6:74")
             code: Legal code
-            use_reader: Whether to include LLS Reader
+            use_reader: Whether to ground the explanation in course material passages
             user_context: User context for usage tracking
+            course_id: Only use this course's materials
 
         Returns:
             Detailed explanation
@@ -916,15 +1452,22 @@ OUTPUT QUALITY:
 
         content_blocks = []
 
-        # Add LLS Reader if requested
-        if use_reader and "lls_reader" in self.file_ids:
-            reader_id = self.get_file_id("lls_reader")
-            content_blocks.append({
-                "type": "document",
-                "source": {"type": "file", "file_id": reader_id},
-                "title": "LLS Course Reader",
-                "citations": {"enabled": True}
-            })
+        # Passages that cite the article, from the citation index
+        if use_reader:
+            passages = await self.get_article_passages(article, code, course_id=course_id)
+            for passage in passages:
+                title = passage.title
+                if passage.page_number:
+                    title += f" (page {passage.page_number})"
+                content_blocks.append({
+                    "type": "text",
+                    "text": f"""
+=== DOCUMENT: {title} ===
+{passage.passage}
+=== END OF {title} ===
+"""
+                })
+            logger.info("Grounding Art. %s %s in %d passages", article, code, len(passages))
 
         # Add prompt
         prompt_text = """Explain Art. %s %s in detail.
@@ -947,10 +1490,9 @@ Cite page numbers if available.""" % (article, code)
         })
 
         client = self._get_anthropic_client()
-        response = await client.beta.messages.create(
+        response = await client.messages.create(
             model="claude-sonnet-4-20250514",
             max_tokens=2500,
-            betas=[self.beta_header],
             messages=[{"role": "user", "content": content_blocks}]
         )
 
@@ -960,7 +1502,7 @@ Cite page numbers if available.""" % (article, code)
             user_context=user_context,
             operation_type="article_explanation",
             model="claude-sonnet-4-20250514",
-            request_metadata={"article": article, "code": code},
+            request_metadata={"article": article, "code": code, "course_id": course_id},
         )
 
         return response.content[0].text
@@ -1244,6 +1786,79 @@ Include:
         Returns:
             List of flashcard dictionaries with 'front' and 'back' keys
 
+        Raises:
+            ValueError: If no materials found or invalid parameters
+        """
+        request = await self._flashcards_request(course_id, topic, num_cards, week_number)
+
+        async def generate() -> List[Dict]:
+            # Call API (no Files API beta header needed)
+            client = self._get_anthropic_client()
+            response = await client.messages.create(**request.params)
+            await self._track_generation(response, request, user_context)
+            return self._parse_json(self._response_text(response)).get("flashcards", [])
+
+        # Identical concurrent requests share one generation
+        flashcards = await get_generation_single_flight().do(
+            request.key(), generate, label=request.operation_type
+        )
+
+        logger.info(
+            "Generated %d flashcards from %d materials",
+            len(flashcards),
+            request.materials_count
+        )
+        return flashcards
+
+    async def stream_flashcards_from_course(
+        self,
+        course_id: str,
+        topic: str,
+        num_cards: int = 20,
+        week_number: Optional[int] = None,
+        user_context: Optional[UserContext] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming variant of generate_flashcards_from_course.
+
+        Instead of "delta" events, yields a "flashcard" event for each card
+        as soon as its JSON object is complete, so a viewer can start after
+        the first few cards. Otherwise yields the events described in
+        _stream_generation; the final "result" event carries
+        {"flashcards": [...]}. If the full response is not valid JSON (e.g.
+        cut off at max_tokens), the result holds the cards already sent.
+
+        Raises:
+            ValueError: If no materials found or invalid parameters (before the first event)
+        """
+        request = await self._flashcards_request(course_id, topic, num_cards, week_number)
+        parser = ArrayItemParser()
+
+        def finish(message: Any) -> Dict[str, Any]:
+            try:
+                flashcards = self._parse_json(self._response_text(message)).get("flashcards", [])
+            except ValueError:
+                logger.warning("Streamed flashcards were not valid JSON; using %d complete cards",
+                               len(parser.items))
+                flashcards = [card for card in parser.items if _is_flashcard(card)]
+            return {"flashcards": flashcards}
+
+        async for event in self._stream_generation(request, user_context, finish=finish):
+            if event["event"] != "delta":
+                yield event
+                continue
+            for card in parser.feed(event["data"]["text"]):
+                if _is_flashcard(card):
+                    yield {"event": "flashcard", "data": card}
+
+    async def _flashcards_request(
+        self,
+        course_id: str,
+        topic: str,
+        num_cards: int,
+        week_number: Optional[int],
+    ) -> GenerationRequest:
+        """Validate parameters and build the flashcard generation request.
+
         Raises:
             ValueError: If no materials found or invalid parameters
         """
@@ -1360,23 +1975,19 @@ Make flashcards clear, concise, and exam-focused.""" % (num_cards, topic)
             len(materials_with_text)
         )
 
-        # Call API (no Files API beta header needed)
-        client = self._get_anthropic_client()
-        response = await client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=3000,
-            messages=[{
-                "role": "user",
-                "content": content_blocks
-            }]
-        )
-
-        # Track usage if user context provided
-        await track_llm_usage_from_response(
-            response=response,
-            user_context=user_context,
+        return GenerationRequest(
+            params={
+                "model": "claude-sonnet-4-20250514",
+                "max_tokens": 3000,
+                "messages": [{
+                    "role": "user",
+                    "content": content_blocks
+                }],
+            },
             operation_type="flashcard_course",
-            model="claude-sonnet-4-20250514",
+            materials_count=len(materials_with_text),
+            course_id=course_id,
+            material_fingerprint=material_fingerprint(materials_with_text),
             request_metadata={
                 "course_id": course_id,
                 "topic": topic,
@@ -1385,18 +1996,6 @@ Make flashcards clear, concise, and exam-focused.""" % (num_cards, topic)
             },
         )
 
-        # Parse response
-        text = response.content[0].text
-        data = self._parse_json(text)
-        flashcards = data.get("flashcards", [])
-
-        logger.info(
-            "Generated %d flashcards from %d materials",
-            len(flashcards),
-            len(materials_with_text)
-        )
-        return flashcards
-
     async def list_available_files(self) -> List[Dict]:
         """List all uploaded files from Anthropic API."""
         try:
@@ -1420,6 +2019,103 @@ Make flashcards clear, concise, and exam-focused.""" % (num_cards, topic)
 
     # ========== Helper Methods ==========
 
+    async def _stream_generation(
+        self,
+        request: GenerationRequest,
+        user_context: Optional[UserContext],
+        finish: Callable[[Any], Dict[str, Any]],
+        max_retries: int = 1,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run a generation request with the streaming API.
+
+        Yields {"event": ..., "data": ...} dicts, in order:
+            start: {"materials": n} once the request is built
+            status: {"retry_in": seconds} while rate limited (before any text)
+            delta: {"text": ...} for each chunk of response text
+            result: finish(final_message), after usage is tracked
+
+        Args:
+            request: Prepared generation request
+            user_context: User context for usage tracking
+            finish: Builds the result payload from the final message
+            max_retries: Attempts when rate limited before the first token
+        """
+        yield {"event": "start", "data": {"materials": request.materials_count}}
+
+        client = self._get_anthropic_client()
+        for attempt in range(max_retries):
+            streamed = False
+            try:
+                async with client.messages.stream(**request.params) as stream:
+                    async for text in stream.text_stream:
+                        streamed = True
+                        yield {"event": "delta", "data": {"text": text}}
+                    message = await stream.get_final_message()
+                break
+            except RateLimitError:
+                # Text already sent cannot be retracted, so only retry before the first token
+                if streamed or attempt == max_retries - 1:
+                    raise
+                delay = RATE_LIMIT_BASE_DELAY * (2 ** attempt)
+                logger.warning(
+                    "⏳ Rate limit hit (attempt %d/%d). Waiting %d seconds before retry...",
+                    attempt + 1, max_retries, delay
+                )
+                yield {"event": "status", "data": {"retry_in": delay}}
+                await asyncio.sleep(delay)
+
+        self._log_prompt_cache_usage(message)
+        await self._track_generation(message, request, user_context)
+        yield {"event": "result", "data": finish(message)}
+
+    async def _track_generation(
+        self,
+        response: Any,
+        request: GenerationRequest,
+        user_context: Optional[UserContext],
+    ) -> None:
+        """Track usage of a completed generation if user context provided."""
+        await track_llm_usage_from_response(
+            response=response,
+            user_context=user_context,
+            operation_type=request.operation_type,
+            model=request.params["model"],
+            request_metadata=request.request_metadata,
+        )
+
+    @staticmethod
+    def _response_text(response: Any) -> str:
+        """Join the text blocks of a response (skipping thinking blocks)."""
+        return "".join(block.text for block in response.content if block.type == "text")
+
+    @staticmethod
+    def _log_prompt_cache_usage(response: Any) -> None:
+        """Log prompt cache statistics from a response."""
+        usage = response.usage
+        cache_created = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+        cache_read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+        input_tokens = getattr(usage, 'input_tokens', 0) or 0
+        output_tokens = getattr(usage, 'output_tokens', 0) or 0
+
+        if cache_read > 0:
+            cache_hit_pct = (cache_read / (input_tokens + cache_read)) * 100 if input_tokens else 0
+            logger.info(
+                "📦 CACHE HIT: %d tokens read from cache (%.1f%% cached), %d new input tokens",
+                cache_read, cache_hit_pct, input_tokens
+            )
+        elif cache_created > 0:
+            logger.info(
+                "📝 CACHE MISS: %d tokens written to cache for future requests",
+                cache_created
+            )
+        else:
+            logger.info("⚠️ No cache activity detected")
+
+        logger.info(
+            "💰 Token usage - Input: %d, Output: %d, Cache read: %d, Cache created: %d",
+            input_tokens, output_tokens, cache_read, cache_created
+        )
+
     def _parse_json(self, text: str) -> Dict:
         """Parse JSON from AI response, handling markdown code blocks."""
         # Remove markdown code blocks
@@ -1443,31 +2139,32 @@ Make flashcards clear, concise, and exam-focused.""" % (num_cards, topic)
 
     def get_files_by_tier(self, tier: str) -> List[str]:
         """Get all file keys for a specific tier."""
-        return [key for key, info in self.file_ids.items()
-                if info.get("tier") == tier]
+        return self._file_catalog_index().tier(tier)
 
     def get_files_by_subject(self, subject: str) -> List[str]:
         """Get all file keys for a specific subject."""
-        return [key for key, info in self.file_ids.items()
-                if info.get("subject", "").lower() == subject.lower()]
+        return self._file_catalog_index().subject(subject)
 
     def get_prioritized_files(self, file_keys: List[str]) -> List[str]:
         """
         Sort file keys by tier priority (Syllabus first, then Course_Materials, then Supplementary_Sources).
 
+        Ties are broken by file key so the order is deterministic.
+
         Args:
             file_keys: List of file keys to sort
 
         Returns:
             Sorted list with highest priority (lowest tier_priority number) first
         """
-        def get_priority(key: str) -> int:
-            file_info = self.file_ids.get(key, {})
-            return file_info.get("tier_priority", 999)  # Default to low priority if not found
+        return self._file_catalog_index().rank(file_keys)
 
-        return sorted(file_keys, key=get_priority)
-
-    def get_topic_files(self, topic: str) -> List[str]:
+    def get_topic_files(
+        self,
+        topic: str,
+        course_id: Optional[str] = None,
+        week_number: Optional[int] = None
+    ) -> List[str]:
         """
         Get recommended file keys for a topic, prioritized by tier.
 
@@ -1476,12 +2173,28 @@ Make flashcards clear, concise, and exam-focused.""" % (num_cards, topic)
         - Tier 2 (Course_Materials): Medium priority
         - Tier 3 (Supplementary_Sources): Lowest priority
 
+        With a course_id the topic's keywords are looked up in the course's
+        file index (material titles, filenames and categories, and the titles
+        and topics of their weeks) and material IDs are returned.
+
         Args:
             topic: Topic name (e.g., "Criminal Law", "Administrative Law")
+            course_id: Optional course to look the topic up in
+            week_number: Optional week filter (course lookups only)
 
         Returns:
-            List of file keys sorted by tier priority
+            List of file keys (material IDs with a course_id) sorted by tier priority
+
+        Raises:
+            ValueError: If course_id is given and the course is not found
         """
+        if course_id:
+            week_numbers = [week_number] if week_number is not None else None
+            files = self._course_file_index(course_id).lookup(week_numbers=week_numbers, topic=topic)
+            logger.info("Found %d files for topic '%s' in course %s", len(files), topic, course_id)
+            return files
+
+        catalog = self._file_catalog_index()
 
         # Map topics to subjects in the new structure
         topic_to_subject = {
@@ -1497,20 +2210,15 @@ Make flashcards clear, concise, and exam-focused.""" % (num_cards, topic)
         if not subject:
             # If topic not recognized, return all files sorted by priority
             logger.warning("Topic '%s' not recognized, returning all files", topic)
-            all_keys = list(self.file_ids.keys())
-            return self.get_prioritized_files(all_keys)
+            return list(catalog.all_keys)
 
-        # Get files for this subject
-        subject_files = self.get_files_by_subject(subject)
+        # Get files for this subject (sorted by tier priority)
+        prioritized_files = catalog.subject(subject)
 
-        if not subject_files:
-            # Fallback: try to find files with topic name in key
+        if not prioritized_files:
+            # Fallback: files with the topic's keywords in their key or filename
             logger.warning("No files found for subject '%s', searching by keyword", subject)
-            subject_files = [key for key in self.file_ids.keys()
-                           if topic.lower().replace(" ", "_") in key.lower()]
-
-        # Sort by tier priority (Syllabus first, then Course_Materials, then Supplementary_Sources)
-        prioritized_files = self.get_prioritized_files(subject_files)
+            prioritized_files = catalog.keyword(topic)
 
         if not prioritized_files:
             # No files found for this topic - return empty list with clear logging
@@ -1528,81 +2236,28 @@ Make flashcards clear, concise, and exam-focused.""" % (num_cards, topic)
         week_number: Optional[int] = None
     ) -> List[str]:
         """
-        Get file keys for a course from Firestore, optionally filtered by week.
+        Get material IDs for a course, optionally filtered by week.
 
-        This method looks up the course in Firestore and returns files based on
-        the course's materialSubjects configuration.
+        Materials are looked up in the course's precomputed file index, built
+        from the course's materials collection.
 
         Args:
             course_id: Course ID (e.g., "LLS-2025-2026")
             week_number: Optional week number to filter materials (1-52)
 
         Returns:
-            List of file keys sorted by tier priority
+            List of material IDs sorted by tier priority
 
         Raises:
             ValueError: If course not found
         """
-        course_service = self._get_course_service()
-
-        # Get course from Firestore
-        course = course_service.get_course(course_id, include_weeks=week_number is not None)
-        if course is None:
-            raise ValueError(f"Course not found: {course_id}")
-
-        # Get material subjects from course
-        material_subjects = course.materialSubjects or []
-
-        if not material_subjects:
-            logger.warning("Course %s has no materialSubjects configured", course_id)
-            return []
+        index = self._course_file_index(course_id)
 
-        # Collect all files for the course's material subjects
-        all_files = []
-        for subject in material_subjects:
-            subject_files = self.get_files_by_subject(subject)
-            all_files.extend(subject_files)
-
-        # If week-specific filtering requested
-        if week_number is not None and course.weeks:
-            # Find the week
-            week = next(
-                (w for w in course.weeks if w.weekNumber == week_number),
-                None
-            )
-            if week and week.materials:
-                # Filter to materials listed in the week
-                week_material_files = []
-                for material in week.materials:
-                    if hasattr(material, 'file') and material.file:
-                        # Try to find matching file key
-                        matching_keys = [
-                            key for key in all_files
-                            if material.file in self.file_ids.get(key, {}).get("filename", "")
-                        ]
-                        week_material_files.extend(matching_keys)
-
-                if week_material_files:
-                    all_files = week_material_files
-                    logger.info(
-                        "Filtered to %d week %d materials for course %s",
-                        len(all_files), week_number, course_id
-                    )
-
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_files = []
-        for f in all_files:
-            if f not in seen:
-                seen.add(f)
-                unique_files.append(f)
-
-        # Sort by tier priority
-        prioritized = self.get_prioritized_files(unique_files)
+        week_numbers = [week_number] if week_number is not None else None
+        prioritized = index.lookup(week_numbers=week_numbers)
 
         logger.info(
-            "Found %d files for course %s (subjects: %s)",
-            len(prioritized), course_id, material_subjects
+            "Found %d files for course %s (week=%s)", len(prioritized), course_id, week_number
         )
         return prioritized
 
@@ -1612,75 +2267,24 @@ Make flashcards clear, concise, and exam-focused.""" % (num_cards, topic)
         week_numbers: List[int]
     ) -> List[str]:
         """
-        Get file keys for multiple weeks in a course with a single Firestore read.
+        Get material IDs for multiple weeks in a course.
 
-        This method avoids the N+1 query problem by fetching the course once
-        and filtering by multiple weeks locally.
+        Weeks are merged from the course's precomputed file index, so the
+        materials and weeks are only read when the course changed.
 
         Args:
             course_id: Course ID (e.g., "LLS-2025-2026")
             week_numbers: List of week numbers to get materials for
 
         Returns:
-            List of unique file keys sorted by tier priority
+            List of unique material IDs sorted by tier priority
 
         Raises:
             ValueError: If course not found
         """
-        course_service = self._get_course_service()
-
-        # Single Firestore read - include_weeks=True to get all weeks
-        course = course_service.get_course(course_id, include_weeks=True)
-        if course is None:
-            raise ValueError(f"Course not found: {course_id}")
-
-        # Get material subjects from course
-        material_subjects = course.materialSubjects or []
-
-        if not material_subjects:
-            logger.warning("Course %s has no materialSubjects configured", course_id)
-            return []
+        index = self._course_file_index(course_id)
 
-        # Collect all files for the course's material subjects
-        all_files = []
-        for subject in material_subjects:
-            subject_files = self.get_files_by_subject(subject)
-            all_files.extend(subject_files)
-
-        # Filter by requested weeks
-        if course.weeks and week_numbers:
-            week_material_files = []
-            for week_num in week_numbers:
-                week = next(
-                    (w for w in course.weeks if w.weekNumber == week_num),
-                    None
-                )
-                if week and week.materials:
-                    for material in week.materials:
-                        if hasattr(material, 'file') and material.file:
-                            matching_keys = [
-                                key for key in all_files
-                                if material.file in self.file_ids.get(key, {}).get("filename", "")
-                            ]
-                            week_material_files.extend(matching_keys)
-
-            if week_material_files:
-                all_files = week_material_files
-                logger.info(
-                    "Filtered to %d materials for weeks %s in course %s",
-                    len(all_files), week_numbers, course_id
-                )
-
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_files = []
-        for f in all_files:
-            if f not in seen:
-                seen.add(f)
-                unique_files.append(f)
-
-        # Sort by tier priority
-        prioritized = self.get_prioritized_files(unique_files)
+        prioritized = index.lookup(week_numbers=week_numbers)
 
         logger.info(
             "Found %d files for course %s weeks %s",
@@ -1688,6 +2292,22 @@ Make flashcards clear, concise, and exam-focused.""" % (num_cards, topic)
         )
         return prioritized
 
+    def get_course_file_details(self, course_id: str, material_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get display details for material IDs returned by the course-aware lookups.
+
+        Args:
+            course_id: Course ID
+            material_ids: Material IDs, in the order to return them
+
+        Returns:
+            Dicts with key (material ID), filename, title, tier and week
+
+        Raises:
+            ValueError: If course not found
+        """
+        return self._course_file_index(course_id).describe(material_ids)
+
     def get_course_topics(self, course_id: str) -> List[Dict]:
         """
         Get topics covered in a course from Firestore.
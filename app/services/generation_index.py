@@ -0,0 +1,72 @@
+"""Generation-Parameter Index for Persisted Artifacts.
+
+Quizzes, study guides and essay assessments are stored with a
+``generationKey``: a hash of the parameters they were generated from. The
+persisting generation routes compute the key of each request and look it up
+(one equality query per artifact collection) before calling the LLM, so a
+repeated request returns the stored artifact instead of paying for a
+generation that would only be discarded as a duplicate. Requests that ask
+for a fresh artifact (``allow_duplicate``) skip the lookup; what they
+generate is stored under the same key.
+
+The key covers the artifact kind, course, week set, topic, difficulty,
+count and the fingerprint of the course materials the generation would use
+(FilesAPIService.course_materials_fingerprint), so adding or changing a
+material produces new keys. Artifacts private to one user (essay
+assessments) also key on the user ID, and a prompt version makes keys
+change when the prompt or model behind an artifact kind changes.
+"""
+
+import hashlib
+import json
+from typing import Iterable, Optional
+
+KIND_QUIZ = "quiz"
+KIND_STUDY_GUIDE = "study_guide"
+KIND_ESSAY = "essay"
+
+
+def generation_key(
+    kind: str,
+    course_id: str,
+    week_numbers: Optional[Iterable[int]] = None,
+    topic: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    count: Optional[int] = None,
+    material_fingerprint: str = "",
+    user_id: Optional[str] = None,
+    prompt_version: Optional[str] = None,
+) -> str:
+    """Key of a generation request in the artifact index.
+
+    Topic case and whitespace, difficulty case and week order are ignored.
+
+    Args:
+        kind: KIND_QUIZ, KIND_STUDY_GUIDE or KIND_ESSAY
+        course_id: Course ID
+        week_numbers: Weeks the artifact covers (None: all weeks)
+        topic: Topic
+        difficulty: Difficulty level
+        count: Number of items (e.g. quiz questions)
+        material_fingerprint: Fingerprint of the materials used ("" if none)
+        user_id: Owner of a private artifact (None: shared between users)
+        prompt_version: Version of the prompt and model used (None: unversioned)
+
+    Returns:
+        SHA-256 hex digest
+    """
+    parameters = {
+        "kind": kind,
+        "course": course_id,
+        "weeks": sorted(set(week_numbers or [])),
+        "topic": " ".join((topic or "").lower().split()),
+        "difficulty": (difficulty or "").lower(),
+        "count": count,
+        "materials": material_fingerprint,
+    }
+    # Only present when given, so keys of shared, unversioned artifacts stay stable
+    if user_id is not None:
+        parameters["user"] = user_id
+    if prompt_version is not None:
+        parameters["prompt"] = prompt_version
+    return hashlib.sha256(json.dumps(parameters, sort_keys=True).encode()).hexdigest()
@@ -0,0 +1,84 @@
+"""Incremental JSON Array Parsing for Streamed Responses.
+
+Generation prompts ask for a JSON object holding one array of items, e.g.
+``{"flashcards": [{"front": ..., "back": ...}, ...]}``. ArrayItemParser is
+fed the response text as it streams and returns each item as soon as its
+closing brace arrives, so clients can use the first items while the rest
+are still being generated.
+
+Only objects directly inside an array of the top-level object are returned.
+Text outside the top-level object (such as a Markdown code fence) is
+skipped; strings are tracked so braces and brackets inside them are not
+mistaken for structure.
+"""
+
+import json
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class ArrayItemParser:
+    """Returns the items of a streamed ``{"key": [{...}, ...]}`` response as they close."""
+
+    def __init__(self):
+        self._stack: List[str] = []  # Open containers: "{" or "["
+        self._in_string = False
+        self._escaped = False
+        self._item: List[str] = []  # Characters of the item being read
+        self.items: List[Dict[str, Any]] = []  # Every item returned so far
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume a chunk of response text.
+
+        Args:
+            text: Next chunk of the streamed response
+
+        Returns:
+            Items completed by this chunk, in order
+        """
+        completed = []
+        for char in text:
+            in_item = self._in_item()
+            if in_item:
+                self._item.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                if self._stack:
+                    self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._stack == ["{", "["]:
+                    self._item = [char]
+                self._stack.append(char)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if char == "}" and in_item and self._stack == ["{", "["]:
+                    item = self._parse_item("".join(self._item))
+                    self._item = []
+                    if item is not None:
+                        completed.append(item)
+
+        self.items.extend(completed)
+        return completed
+
+    def _in_item(self) -> bool:
+        return len(self._stack) > 2 and self._stack[:2] == ["{", "["]
+
+    @staticmethod
+    def _parse_item(text: str):
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError as e:
+            logger.warning("Skipping unparseable streamed item: %s", e)
+            return None
+        return item if isinstance(item, dict) else None
@@ -0,0 +1,201 @@
+"""Derived Artifacts for Course Materials.
+
+Uploaded materials are parsed exactly once, when they are uploaded (or when
+the background extraction task runs). That single extraction produces the
+full artifact set that generation needs:
+
+- the extracted text (stored on the material and written through the
+  tiered text cache under its content hash)
+- page spans: ``{pageNumber, start, charCount, tokens}`` offsets into the text
+- per-page and total token estimates
+- the content hash (MD5 of the file bytes, the text cache fingerprint)
+
+Generation endpoints read these artifacts through ``load_material_text``
+instead of re-parsing the file on the request path.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models.course_models import CourseMaterial
+from app.services.text_extractor import (
+    MATERIALS_ROOT,
+    ExtractionResult,
+    PageIndex,
+    estimate_tokens,
+    extract_text,
+)
+from app.services.tiered_text_cache import get_tiered_text_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _relative_path(file_path: Path) -> Optional[str]:
+    try:
+        return str(Path(file_path).resolve().relative_to(MATERIALS_ROOT.resolve()))
+    except ValueError:
+        return None
+
+
+@dataclass
+class MaterialArtifacts:
+    """Artifacts derived from one extraction of a material file."""
+    content_hash: Optional[str]
+    file_type: str
+    text: str
+    page_spans: List[Dict[str, int]] = field(default_factory=list)
+
+    token_estimate: int = 0
+
+    def to_firestore(self) -> Dict[str, Any]:
+        """CourseMaterial fields to store for these artifacts."""
+        return {
+            "textExtracted": True,
+            "extractedText": self.text,
+            "textLength": len(self.text),
+            "extractionError": None,
+            "contentHash": self.content_hash,
+            "pageSpans": self.page_spans,
+            "tokenEstimate": self.token_estimate,
+        }
+
+
+def page_spans(result: ExtractionResult) -> List[Dict[str, int]]:
+    """Compute page offsets and token estimates for an extraction result.
+
+    Results without a PageIndex (single-page types, or plain page lists) are
+    located in the text buffer; anything else is one span over the whole text.
+    """
+    if isinstance(result.pages, PageIndex):
+        spans = result.pages.spans
+    elif result.pages:
+        spans = []
+        cursor = 0
+        for page in result.pages:
+            page_text = page.get("text") or ""
+            start = result.text.find(page_text, cursor) if page_text else cursor
+            if start == -1:
+                # Page text isn't a verbatim slice of the buffer; offsets are unusable
+                spans = []
+                break
+            spans.append((page.get("page_number", len(spans) + 1), start, len(page_text)))
+            cursor = start + len(page_text)
+    else:
+        spans = []
+
+    if not spans:
+        spans = [(1, 0, len(result.text))] if result.text else []
+
+    return [
+        {
+            "pageNumber": int(number),
+            "start": int(start),
+            "charCount": int(length),
+            "tokens": estimate_tokens(length),
+        }
+        for number, start, length in spans
+    ]
+
+
+def build_material_artifacts(file_path: Path, result: ExtractionResult) -> Optional[MaterialArtifacts]:
+    """Build the derived artifacts for a completed extraction of a material.
+
+    The text is written through the tiered text cache under the file's content
+    hash, so lookups by hash (and by path) are served without parsing.
+
+    Args:
+        file_path: Path to a file within Materials/
+        result: Full extraction of that file
+
+    Returns:
+        MaterialArtifacts, or None if the extraction failed
+    """
+    from app.services.text_cache_service import get_hash_index
+
+    if not result.success:
+        return None
+
+    hash_index = get_hash_index()
+    content_hash = hash_index.file_hash(Path(file_path)) or None
+    hash_index.save()
+
+    artifacts = MaterialArtifacts(
+        content_hash=content_hash,
+        file_type=result.file_type,
+        text=result.text,
+        page_spans=page_spans(result),
+        token_estimate=result.metadata.get("token_count", estimate_tokens(len(result.text))),
+    )
+
+    if content_hash:
+        try:
+            get_tiered_text_cache().put(
+                content_hash, result,
+                rel_path=_relative_path(file_path),
+                file_path=Path(file_path),
+            )
+        except Exception as e:
+            # The artifacts are still stored on the material itself
+            logger.warning("Failed to cache extracted text for %s: %s", file_path, e)
+
+    return artifacts
+
+
+def derive_material_artifacts(file_path: Path) -> Tuple[ExtractionResult, Optional[MaterialArtifacts]]:
+    """Extract a material once and build its derived artifacts.
+
+    Args:
+        file_path: Path to a file within Materials/
+
+    Returns:
+        (ExtractionResult, MaterialArtifacts or None if extraction failed)
+    """
+    result = extract_text(file_path)
+    return result, build_material_artifacts(file_path, result)
+
+
+def has_artifacts(material: CourseMaterial) -> bool:
+    """Whether a material carries text derived at upload/extraction time."""
+    return material.textExtracted is True and bool(material.contentHash)
+
+
+def load_material_text(
+    material: CourseMaterial,
+    file_path: Path,
+    max_chars: Optional[int] = None,
+) -> Optional[str]:
+    """Get a material's text from its stored artifacts, without parsing.
+
+    Uploaded files are written once, so their artifacts are trusted as-is.
+    Scanned files can be edited in place; their artifacts are only used while
+    the file's content hash (a stat() via the hash index) still matches.
+
+    Args:
+        material: The course material
+        file_path: Absolute path to the material's local file
+        max_chars: Only the first max_chars characters are needed
+
+    Returns:
+        The stored text, or None if the material has no usable artifacts
+    """
+    if not has_artifacts(material):
+        return None
+
+    if material.source != "uploaded":
+        from app.services.text_cache_service import get_hash_index
+
+        hash_index = get_hash_index()
+        current_hash = hash_index.file_hash(file_path)
+        hash_index.save()
+        if current_hash != material.contentHash:
+            return None
+
+    if material.extractedText:
+        return material.extractedText
+
+    cached = get_tiered_text_cache().get(
+        material.contentHash, rel_path=_relative_path(file_path), max_chars=max_chars
+    )
+    return cached.text if cached is not None and cached.success else None
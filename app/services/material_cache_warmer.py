@@ -0,0 +1,235 @@
+"""Background Material Cache Warmer.
+
+Moves the cold-start cost of a week's study portal off the student request
+path. Ahead of peak hours, the materials of each active course's current and
+next week are extracted into the tiered text cache, which writes through to
+disk and Firestore. The current week comes from the course's ``startDate``
+(the start of week 1) and its weeks from CourseService.get_course_weeks.
+
+Runs once a day at CACHE_WARMER_HOUR (UTC) from the app's startup task when
+CACHE_WARMER_ENABLED is set, or on demand from POST /api/admin/cache/warm,
+which can return a dry-run report instead. Every process with the warmer
+enabled runs its own daily warm of the whole window, so it is off by default
+and meant to be enabled on one instance (and one worker) only. Extractions are rate limited to CACHE_WARMER_FILES_PER_MINUTE so
+warming never crowds live requests out of the extraction pool; materials
+that are already stored or cached cost one stat() and are not rate limited.
+
+The Anthropic prompt cache is not warmed: its entries expire within minutes,
+so a warm-up request hours before peak would only add cost.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Warmer Configuration
+CACHE_WARMER_ENABLED = os.getenv("CACHE_WARMER_ENABLED", "false").lower() == "true"  # One instance only
+CACHE_WARMER_HOUR = int(os.getenv("CACHE_WARMER_HOUR", "5"))  # UTC hour of the daily run
+CACHE_WARMER_FILES_PER_MINUTE = float(os.getenv("CACHE_WARMER_FILES_PER_MINUTE", "20"))
+CACHE_WARMER_MAX_FILES = int(os.getenv("CACHE_WARMER_MAX_FILES", "200"))  # Extractions per run
+CACHE_WARMER_WEEKS_AHEAD = 1  # Warm the current week and this many following weeks
+MATERIALS_PER_WEEK = 50
+
+STATUS_STORED = "stored"
+STATUS_CACHED = "cached"
+STATUS_COLD = "cold"
+STATUS_MISSING = "missing"
+STATUS_WARMED = "warmed"
+STATUS_FAILED = "failed"
+STATUS_DEFERRED = "deferred"  # Over the per-run extraction limit
+
+
+@dataclass(slots=True)
+class WarmItem:
+    """One material considered by a warmer run."""
+    course_id: str
+    week_number: int
+    material_id: str
+    filename: str
+    status: str
+
+
+@dataclass
+class WarmReport:
+    """What a warmer run found and did."""
+    dry_run: bool
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    weeks: Dict[str, List[int]] = field(default_factory=dict)  # course_id -> warmed weeks
+    skipped: Dict[str, str] = field(default_factory=dict)      # course_id -> reason
+    items: List[WarmItem] = field(default_factory=list)
+
+    def counts(self) -> Dict[str, int]:
+        """Number of materials per status."""
+        counts: Dict[str, int] = {}
+        for item in self.items:
+            counts[item.status] = counts.get(item.status, 0) + 1
+        return counts
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable report."""
+        report = asdict(self)
+        report["started_at"] = self.started_at.isoformat()
+        report["finished_at"] = self.finished_at.isoformat() if self.finished_at else None
+        report["counts"] = self.counts()
+        return report
+
+
+def calendar_week(start_date: datetime, now: datetime) -> int:
+    """Teaching week containing now (week 1 starts on start_date; 0 is the week before)."""
+    return (now.date() - start_date.date()).days // 7 + 1
+
+
+def weeks_to_warm(start_date: Optional[datetime], week_numbers: List[int], now: datetime) -> List[int]:
+    """The current and upcoming weeks of a course that have week content.
+
+    Args:
+        start_date: Start of the course's week 1 (None: no calendar)
+        week_numbers: Week numbers the course defines
+        now: Current time
+
+    Returns:
+        Week numbers in order (empty before the term's run-up or after it ends)
+    """
+    if start_date is None:
+        return []
+    current = calendar_week(start_date, now)
+    window = range(current, current + CACHE_WARMER_WEEKS_AHEAD + 1)
+    return sorted(set(window) & set(week_numbers))
+
+
+class MaterialCacheWarmer:
+    """Pre-extracts the materials of each course's current and next week."""
+
+    def __init__(
+        self,
+        files_per_minute: float = CACHE_WARMER_FILES_PER_MINUTE,
+        max_files: int = CACHE_WARMER_MAX_FILES,
+    ):
+        """Initialize the warmer.
+
+        Args:
+            files_per_minute: Maximum extractions per minute
+            max_files: Maximum extractions per run (the rest are reported as deferred)
+        """
+        self.min_interval = 60.0 / files_per_minute if files_per_minute > 0 else 0.0
+        self.max_files = max_files
+        self._last_extraction = 0.0
+        self._lock = asyncio.Lock()
+
+    async def run(
+        self,
+        dry_run: bool = False,
+        course_ids: Optional[List[str]] = None,
+        now: Optional[datetime] = None,
+    ) -> WarmReport:
+        """Warm (or with dry_run, report on) the current and next week's materials.
+
+        Runs are serialized; a second caller waits for the first to finish.
+
+        Args:
+            dry_run: Only report each material's cache status
+            course_ids: Courses to warm (default: all active courses)
+            now: Current time (default: now, UTC)
+
+        Returns:
+            WarmReport
+        """
+        from app.services.course_service import get_course_service
+        from app.services.files_api_service import get_files_api_service
+
+        now = now or datetime.now(timezone.utc)
+        report = WarmReport(dry_run=dry_run, started_at=datetime.now(timezone.utc))
+        course_service = get_course_service()
+        files_service = get_files_api_service()
+
+        async with self._lock:
+            if course_ids is None:
+                summaries, _ = await asyncio.to_thread(course_service.get_all_courses, limit=100)
+                course_ids = [summary.id for summary in summaries]
+
+            extractions = 0
+            for course_id in course_ids:
+                course = await asyncio.to_thread(course_service.get_course, course_id, False)
+                if course is None:
+                    report.skipped[course_id] = "course not found"
+                    continue
+                if course.startDate is None:
+                    report.skipped[course_id] = "no startDate"
+                    continue
+
+                weeks = await asyncio.to_thread(course_service.get_course_weeks, course_id)
+                week_numbers = weeks_to_warm(course.startDate, [week.weekNumber for week in weeks], now)
+                if not week_numbers:
+                    report.skipped[course_id] = "no weeks in the current window"
+                    continue
+                report.weeks[course_id] = week_numbers
+
+                for week_number in week_numbers:
+                    materials = await asyncio.to_thread(
+                        files_service.get_course_materials,
+                        course_id=course_id, week_number=week_number, limit=MATERIALS_PER_WEEK,
+                    )
+                    for material in materials:
+                        status = await asyncio.to_thread(files_service.material_cache_status, material)
+                        if status == STATUS_COLD and not dry_run:
+                            if extractions >= self.max_files:
+                                status = STATUS_DEFERRED
+                            else:
+                                extractions += 1
+                                await self._throttle()
+                                warmed = await asyncio.to_thread(files_service.warm_material, material)
+                                status = STATUS_WARMED if warmed else STATUS_FAILED
+                        report.items.append(WarmItem(
+                            course_id=course_id, week_number=week_number,
+                            material_id=material.id, filename=material.filename, status=status,
+                        ))
+
+        report.finished_at = datetime.now(timezone.utc)
+        logger.info(
+            "Material cache warmer %s: %s (skipped %d course(s))",
+            "dry run" if dry_run else "run", report.counts(), len(report.skipped),
+        )
+        return report
+
+    async def _throttle(self) -> None:
+        """Wait until the next extraction is allowed."""
+        wait = self._last_extraction + self.min_interval - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._last_extraction = time.monotonic()
+
+
+def seconds_until_next_run(now: datetime, hour: int = CACHE_WARMER_HOUR) -> float:
+    """Seconds from now until the next daily run at hour:00 UTC."""
+    next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+_warmer: Optional[MaterialCacheWarmer] = None  # pylint: disable=invalid-name
+
+
+def get_material_cache_warmer() -> MaterialCacheWarmer:
+    """Get the shared MaterialCacheWarmer instance."""
+    global _warmer  # pylint: disable=global-statement
+    if _warmer is None:
+        _warmer = MaterialCacheWarmer()
+    return _warmer
+
+
+async def run_material_cache_warmer() -> None:
+    """Warm the material cache once a day ahead of peak hours until cancelled."""
+    while True:
+        await asyncio.sleep(seconds_until_next_run(datetime.now(timezone.utc)))
+        try:
+            await get_material_cache_warmer().run()
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Material cache warmer run failed: %s", e)
@@ -0,0 +1,681 @@
+"""Full-Text Search over Course Materials (SQLite FTS5).
+
+Students search course readers and slides without an LLM call. Extracted
+material text (served by the tiered text cache, i.e. text_cache_service
+output) is split into passages per page and stored in a local SQLite FTS5
+index, partitioned by course, week and tier.
+
+The same pass records every legal article reference (see citation_index) in
+a citations table: article -> (material, page, offset, surrounding passage),
+so explain_article and the tutor can fetch the passages discussing an
+article with one indexed lookup.
+
+The index is updated incrementally: each material is stored with the
+fingerprint of the text it was built from (content hash), and a course sync
+only re-indexes materials whose fingerprint changed and drops materials that
+were removed. Materials whose text is unchanged but whose title, week or
+tier changed have those columns updated in place. Courses are synced on
+search at most every MATERIAL_SEARCH_SYNC_SECONDS, and immediately after a
+material's text is re-extracted or the material is deleted (``mark_stale``).
+
+One sync runs per course at a time. A course that has never been indexed
+is built on a background thread (``refresh``), so the first search of a
+course doesn't extract every one of its materials inside the request.
+"""
+
+import html
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.models.course_models import CourseMaterial
+from app.services.chunk_index import split_chunks
+from app.services.citation_index import extract_citations
+from app.services.material_artifacts import has_artifacts, load_material_text
+from app.services.text_extractor import MATERIALS_ROOT
+from app.services.tiered_text_cache import get_tiered_text_cache
+
+logger = logging.getLogger(__name__)
+
+# Index Configuration
+SEARCH_DB_PATH = Path(os.getenv("MATERIAL_SEARCH_DB", "data/search/materials_fts.db"))
+MATERIAL_SEARCH_SYNC_SECONDS = int(os.getenv("MATERIAL_SEARCH_SYNC_SECONDS", "300"))
+PASSAGE_CHARS = 1500
+PASSAGE_OVERLAP_CHARS = 150
+MAX_SYNC_MATERIALS = 500
+# Bump when the schema or indexing changes; older indexes are rebuilt
+INDEX_SCHEMA_VERSION = 2
+
+# Citation Configuration
+CITATION_CONTEXT_BEFORE = 400  # Characters kept before an article reference
+CITATION_CONTEXT_AFTER = 1000  # Characters kept from the reference onwards
+
+# Snippet Configuration
+SNIPPET_TOKENS = 24
+# Control characters can't occur in extracted text after HTML escaping, so
+# they mark highlights until the snippet is escaped
+_HIGHLIGHT_OPEN = "\x02"
+_HIGHLIGHT_CLOSE = "\x03"
+
+_QUERY_TERM_RE = re.compile(r"\w+(?::\w+)*")
+MAX_QUERY_TERMS = 12
+
+
+class MaterialSearchError(Exception):
+    """Raised when the search index cannot be read or updated."""
+
+
+@dataclass
+class CitationPassage:
+    """A passage of a material that references a legal article."""
+    material_id: str
+    course_id: str
+    title: str
+    page_number: Optional[int]
+    offset: int
+    passage: str
+
+
+@dataclass
+class SearchHit:
+    """A ranked passage matching a search query."""
+    material_id: str
+    title: str
+    week_number: Optional[int]
+    tier: str
+    page_number: Optional[int]
+    snippet: str
+    score: float
+
+
+def build_match_query(query: str, match_all: bool = True) -> Optional[str]:
+    """Turn free text into a safe FTS5 MATCH expression.
+
+    Every term is quoted so FTS5 operators and punctuation in user input are
+    never interpreted; the last term is a prefix match for search-as-you-type.
+    Article references like "6:74" become phrase queries.
+    """
+    terms = _QUERY_TERM_RE.findall(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return (" " if match_all else " OR ").join(quoted)
+
+
+def _highlight(snippet: str) -> str:
+    """HTML-escape an FTS5 snippet and wrap matches in <mark>."""
+    return (
+        html.escape(snippet)
+        .replace(_HIGHLIGHT_OPEN, "<mark>")
+        .replace(_HIGHLIGHT_CLOSE, "</mark>")
+    )
+
+
+def _material_path(material: CourseMaterial) -> Path:
+    storage_path = material.storagePath
+    if storage_path.startswith("Materials/"):
+        storage_path = storage_path[len("Materials/"):]
+    return (MATERIALS_ROOT / storage_path).resolve()
+
+
+def _index_metadata(material: CourseMaterial) -> Tuple[str, Optional[int], str]:
+    """Title, week number and tier stored with a material's passages."""
+    return material.title or material.filename, material.weekNumber, material.tier
+
+
+def _material_fingerprint(material: CourseMaterial) -> Optional[str]:
+    """Fingerprint of the text a material's passages would be built from."""
+    from app.services.text_cache_service import get_hash_index
+
+    if has_artifacts(material) and material.source == "uploaded":
+        return material.contentHash
+    path = _material_path(material)
+    if not path.exists():
+        return material.contentHash if has_artifacts(material) else None
+    return get_hash_index().file_hash(path) or None
+
+
+def _material_text(material: CourseMaterial) -> Optional[str]:
+    """Full extracted text of a material (stored artifacts, then the text cache)."""
+    path = _material_path(material)
+    text = load_material_text(material, path)
+    if text:
+        return text
+    if not path.exists():
+        return None
+    result = get_tiered_text_cache().get_or_extract(path)
+    return result.text if result.success else None
+
+
+def _page_at(spans: List[Dict[str, int]], offset: int) -> Optional[int]:
+    """Page number of the span containing a text offset."""
+    for span in spans:
+        if span["start"] <= offset < span["start"] + span["charCount"]:
+            return span["pageNumber"]
+    return None
+
+
+def citation_context(text: str, offset: int) -> str:
+    """Passage around an article reference, cut at whitespace."""
+    start = max(0, offset - CITATION_CONTEXT_BEFORE)
+    end = min(len(text), offset + CITATION_CONTEXT_AFTER)
+    if start > 0:
+        space = text.find(" ", start, offset)
+        start = space + 1 if space != -1 else start
+    if end < len(text):
+        space = text.rfind(" ", offset, end)
+        end = space if space != -1 else end
+    return text[start:end].strip()
+
+
+def material_citations(
+    material: CourseMaterial, text: str
+) -> List[Tuple[str, Optional[int], int, str]]:
+    """Article references in a material as (article, page, offset, passage).
+
+    Repeated references to the same article within one passage are kept once.
+    """
+    spans = material.pageSpans or []
+    rows = []
+    last_offset: Dict[str, int] = {}
+    for citation in extract_citations(text):
+        previous = last_offset.get(citation.article)
+        if previous is not None and citation.start - previous < CITATION_CONTEXT_AFTER:
+            continue
+        last_offset[citation.article] = citation.start
+        rows.append((
+            citation.article,
+            _page_at(spans, citation.start),
+            citation.start,
+            citation_context(text, citation.start),
+        ))
+    return rows
+
+
+def material_passages(material: CourseMaterial, text: str) -> Iterator[Tuple[Optional[int], str]]:
+    """Split a material's text into (page number, passage) pairs.
+
+    Page numbers come from the material's stored page spans; text without
+    spans (or spans that don't fit the text) is indexed without page numbers.
+    """
+    spans = material.pageSpans or []
+    if spans and all(span["start"] + span["charCount"] <= len(text) for span in spans):
+        for span in spans:
+            page_text = text[span["start"]:span["start"] + span["charCount"]]
+            for _, passage in split_chunks(page_text, PASSAGE_CHARS, PASSAGE_OVERLAP_CHARS):
+                yield span["pageNumber"], passage
+        return
+    for _, passage in split_chunks(text, PASSAGE_CHARS, PASSAGE_OVERLAP_CHARS):
+        yield None, passage
+
+
+class MaterialSearchIndex:
+    """Persisted FTS5 index of course material passages."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        """Initialize the index, creating the database on first use.
+
+        Args:
+            db_path: SQLite database file (default: data/search/materials_fts.db)
+        """
+        self.db_path = db_path or SEARCH_DB_PATH
+        self._write_lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        # course_id -> monotonic time of the last sync
+        self._synced_at: Dict[str, float] = {}
+        # course_id -> lock held while the course syncs
+        self._sync_locks: Dict[str, threading.Lock] = {}
+        self._sync_locks_lock = threading.Lock()
+        self._db_initialized = False
+
+    def _init_db(self) -> None:
+        """Create the tables if they don't exist."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            schema_version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if schema_version < INDEX_SCHEMA_VERSION:
+                # Re-index everything on the next sync of each course
+                conn.execute("DROP TABLE IF EXISTS materials")
+                conn.execute("DROP TABLE IF EXISTS passages")
+                conn.execute("DROP TABLE IF EXISTS citations")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS materials (
+                    course_id TEXT NOT NULL,
+                    material_id TEXT NOT NULL,
+                    fingerprint TEXT,
+                    title TEXT,
+                    week_number INTEGER,
+                    tier TEXT,
+                    passage_count INTEGER,
+                    indexed_at REAL,
+                    PRIMARY KEY (course_id, material_id)
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5(
+                    text,
+                    title,
+                    course_id UNINDEXED,
+                    material_id UNINDEXED,
+                    week_number UNINDEXED,
+                    tier UNINDEXED,
+                    page_number UNINDEXED,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS citations (
+                    article TEXT NOT NULL,
+                    course_id TEXT NOT NULL,
+                    material_id TEXT NOT NULL,
+                    title TEXT,
+                    page_number INTEGER,
+                    char_offset INTEGER,
+                    passage TEXT
+                )
+            """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_citations_article ON citations(article, course_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_citations_material ON citations(course_id, material_id)")
+            conn.execute(f"PRAGMA user_version = {INDEX_SCHEMA_VERSION}")
+            conn.commit()
+        finally:
+            conn.close()
+        self._db_initialized = True
+        logger.info("Material search index initialized at %s", self.db_path)
+
+    @contextmanager
+    def _get_db_connection(self):
+        """Get a database connection context manager."""
+        if not self._db_initialized:
+            with self._init_lock:
+                if not self._db_initialized:
+                    self._init_db()
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ========================================================================
+    # Updates
+    # ========================================================================
+
+    def indexed_fingerprints(self, course_id: str) -> Dict[str, Optional[str]]:
+        """Get material_id -> fingerprint for every indexed material of a course."""
+        with self._get_db_connection() as conn:
+            rows = conn.execute(
+                "SELECT material_id, fingerprint FROM materials WHERE course_id = ?",
+                (course_id,),
+            ).fetchall()
+        return {row["material_id"]: row["fingerprint"] for row in rows}
+
+    def indexed_materials(self, course_id: str) -> Dict[str, Tuple[Optional[str], Tuple[str, Optional[int], str]]]:
+        """Get material_id -> (fingerprint, (title, week number, tier)) for a course."""
+        with self._get_db_connection() as conn:
+            rows = conn.execute(
+                "SELECT material_id, fingerprint, title, week_number, tier FROM materials WHERE course_id = ?",
+                (course_id,),
+            ).fetchall()
+        return {
+            row["material_id"]: (row["fingerprint"], (row["title"], row["week_number"], row["tier"]))
+            for row in rows
+        }
+
+    def is_indexed(self, course_id: str) -> bool:
+        """Whether any of a course's materials are in the index."""
+        with self._get_db_connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM materials WHERE course_id = ? LIMIT 1", (course_id,)
+            ).fetchone()
+        return row is not None
+
+    def index_material(
+        self, course_id: str, material: CourseMaterial, text: str, fingerprint: Optional[str]
+    ) -> int:
+        """Replace a material's passages and article citations in the index.
+
+        Returns:
+            Number of passages indexed
+        """
+        title, week_number, tier = _index_metadata(material)
+        rows = [
+            (passage, title, course_id, material.id, week_number, tier, page_number)
+            for page_number, passage in material_passages(material, text)
+        ]
+        citation_rows = [
+            (article, course_id, material.id, title, page_number, offset, passage)
+            for article, page_number, offset, passage in material_citations(material, text)
+        ]
+        with self._write_lock, self._get_db_connection() as conn:
+            conn.execute(
+                "DELETE FROM passages WHERE course_id = ? AND material_id = ?",
+                (course_id, material.id),
+            )
+            conn.execute(
+                "DELETE FROM citations WHERE course_id = ? AND material_id = ?",
+                (course_id, material.id),
+            )
+            conn.executemany(
+                """
+                INSERT INTO passages
+                (text, title, course_id, material_id, week_number, tier, page_number)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                rows,
+            )
+            conn.executemany(
+                """
+                INSERT INTO citations
+                (article, course_id, material_id, title, page_number, char_offset, passage)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                citation_rows,
+            )
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO materials
+                (course_id, material_id, fingerprint, title, week_number, tier, passage_count, indexed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                (course_id, material.id, fingerprint, title, week_number, tier, len(rows), time.time()),
+            )
+            conn.commit()
+        return len(rows)
+
+    def update_material_metadata(self, course_id: str, material: CourseMaterial) -> None:
+        """Rewrite a material's title, week and tier without re-indexing its text."""
+        title, week_number, tier = _index_metadata(material)
+        with self._write_lock, self._get_db_connection() as conn:
+            conn.execute(
+                "UPDATE passages SET title = ?, week_number = ?, tier = ? WHERE course_id = ? AND material_id = ?",
+                (title, week_number, tier, course_id, material.id),
+            )
+            conn.execute(
+                "UPDATE citations SET title = ? WHERE course_id = ? AND material_id = ?",
+                (title, course_id, material.id),
+            )
+            conn.execute(
+                "UPDATE materials SET title = ?, week_number = ?, tier = ? WHERE course_id = ? AND material_id = ?",
+                (title, week_number, tier, course_id, material.id),
+            )
+            conn.commit()
+
+    def remove_material(self, course_id: str, material_id: str) -> None:
+        """Drop a material's passages and citations from the index."""
+        with self._write_lock, self._get_db_connection() as conn:
+            conn.execute(
+                "DELETE FROM passages WHERE course_id = ? AND material_id = ?",
+                (course_id, material_id),
+            )
+            conn.execute(
+                "DELETE FROM citations WHERE course_id = ? AND material_id = ?",
+                (course_id, material_id),
+            )
+            conn.execute(
+                "DELETE FROM materials WHERE course_id = ? AND material_id = ?",
+                (course_id, material_id),
+            )
+            conn.commit()
+
+    def mark_stale(self, course_id: str) -> None:
+        """Sync a course on its next search (its materials changed)."""
+        self._synced_at.pop(course_id, None)
+
+    def _sync_lock(self, course_id: str) -> threading.Lock:
+        """Lock held while a course syncs."""
+        with self._sync_locks_lock:
+            lock = self._sync_locks.get(course_id)
+            if lock is None:
+                lock = self._sync_locks[course_id] = threading.Lock()
+            return lock
+
+    def sync_course(self, course_id: str, force: bool = False, wait: bool = True) -> Dict[str, int]:
+        """Bring a course's passages up to date with its materials.
+
+        Only materials whose text fingerprint changed are re-indexed; changed
+        titles, weeks and tiers are updated in place. Skipped entirely if the
+        course was synced within MATERIAL_SEARCH_SYNC_SECONDS (unless forced
+        or marked stale).
+
+        Args:
+            course_id: Course to sync
+            force: Sync even if the course was synced recently
+            wait: Wait for a sync of the course that is already running
+                (False: return immediately and leave it to that sync)
+
+        Returns:
+            Counts of indexed, updated, removed and unchanged materials
+        """
+        counts = {"indexed": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        lock = self._sync_lock(course_id)
+        if not lock.acquire(blocking=wait):
+            return counts
+        try:
+            synced_at = self._synced_at.get(course_id)
+            if not force and synced_at is not None and time.monotonic() - synced_at < MATERIAL_SEARCH_SYNC_SECONDS:
+                return counts
+            self._sync(course_id, counts)
+        finally:
+            lock.release()
+        return counts
+
+    def _sync(self, course_id: str, counts: Dict[str, int]) -> None:
+        from app.services.course_materials_service import get_course_materials_service
+
+        start = time.perf_counter()
+        materials = get_course_materials_service().list_materials(course_id, limit=MAX_SYNC_MATERIALS)
+        indexed = self.indexed_materials(course_id)
+
+        for material in materials:
+            try:
+                fingerprint = _material_fingerprint(material)
+                indexed_fingerprint, indexed_metadata = indexed.get(material.id, (None, None))
+                if fingerprint and indexed_fingerprint == fingerprint:
+                    if indexed_metadata == _index_metadata(material):
+                        counts["unchanged"] += 1
+                    else:
+                        self.update_material_metadata(course_id, material)
+                        counts["updated"] += 1
+                    continue
+                text = _material_text(material)
+                if not text:
+                    continue
+                self.index_material(course_id, material, text, fingerprint)
+                counts["indexed"] += 1
+            except Exception as e:
+                logger.warning("Failed to index material %s for search: %s", material.filename, e)
+
+        current_ids = {material.id for material in materials}
+        for material_id in indexed.keys() - current_ids:
+            self.remove_material(course_id, material_id)
+            counts["removed"] += 1
+
+        self._synced_at[course_id] = time.monotonic()
+        logger.info(
+            "Synced search index for course %s in %.1f ms: %s",
+            course_id, (time.perf_counter() - start) * 1000, counts
+        )
+
+    def _sync_in_background(self, course_id: str) -> None:
+        try:
+            self.sync_course(course_id, wait=False)
+        except Exception as e:
+            logger.warning("Background search index build failed for course %s: %s", course_id, e)
+
+    def refresh(self, course_id: str) -> bool:
+        """Bring a course's index up to date before serving a request from it.
+
+        Courses that were indexed or synced before are synced inline (without
+        waiting for a sync that is already running). A course with nothing
+        indexed is built on a background thread; until it finishes the
+        request is served from the (empty) index.
+
+        Returns:
+            True if the course's index is being built in the background
+        """
+        if course_id in self._synced_at or self.is_indexed(course_id):
+            self.sync_course(course_id, wait=False)
+            return False
+        if not self._sync_lock(course_id).locked():
+            threading.Thread(
+                target=self._sync_in_background, args=(course_id,),
+                name=f"search-index-{course_id}", daemon=True,
+            ).start()
+        return True
+
+    # ========================================================================
+    # Search
+    # ========================================================================
+
+    def search(
+        self,
+        course_id: str,
+        query: str,
+        week_number: Optional[int] = None,
+        tier: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[SearchHit]:
+        """Rank a course's passages against a query.
+
+        All terms must match; if nothing does, any term may match.
+
+        Args:
+            course_id: Course to search
+            query: Free-text query
+            week_number: Only passages from this week's materials
+            tier: Only passages from materials in this tier
+            limit: Maximum hits to return
+
+        Returns:
+            Hits ordered by BM25 relevance (best first)
+
+        Raises:
+            MaterialSearchError: If the index can't be queried
+        """
+        for match_all in (True, False):
+            match = build_match_query(query, match_all=match_all)
+            if match is None:
+                return []
+            hits = self._query(course_id, match, week_number, tier, limit)
+            if hits:
+                return hits
+        return []
+
+    def article_passages(
+        self, article: str, course_id: Optional[str] = None, limit: int = 5
+    ) -> List[CitationPassage]:
+        """Get the passages that reference a legal article.
+
+        Args:
+            article: Canonical article key (see citation_index.article_key)
+            course_id: Only this course's materials (None: every indexed course)
+            limit: Maximum passages to return
+
+        Returns:
+            Passages in material reading order
+
+        Raises:
+            MaterialSearchError: If the index can't be queried
+        """
+        sql = "SELECT * FROM citations WHERE article = ?"
+        params: List[object] = [article]
+        if course_id:
+            sql += " AND course_id = ?"
+            params.append(course_id)
+        sql += " ORDER BY course_id, material_id, char_offset LIMIT ?"
+        params.append(limit)
+
+        try:
+            with self._get_db_connection() as conn:
+                rows = conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            raise MaterialSearchError(f"Citation lookup failed: {e}") from e
+
+        return [
+            CitationPassage(
+                material_id=row["material_id"],
+                course_id=row["course_id"],
+                title=row["title"],
+                page_number=row["page_number"],
+                offset=row["char_offset"],
+                passage=row["passage"],
+            )
+            for row in rows
+        ]
+
+    def _query(
+        self,
+        course_id: str,
+        match: str,
+        week_number: Optional[int],
+        tier: Optional[str],
+        limit: int,
+    ) -> List[SearchHit]:
+        sql = f"""
+            SELECT material_id, title, week_number, tier, page_number,
+                   snippet(passages, 0, '{_HIGHLIGHT_OPEN}', '{_HIGHLIGHT_CLOSE}', '…', {SNIPPET_TOKENS}) AS snippet,
+                   bm25(passages, 1.0, 2.0) AS rank
+            FROM passages
+            WHERE passages MATCH ? AND course_id = ?
+        """
+        params: List[object] = [match, course_id]
+        if week_number is not None:
+            sql += " AND week_number = ?"
+            params.append(week_number)
+        if tier:
+            sql += " AND tier = ?"
+            params.append(tier)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        try:
+            with self._get_db_connection() as conn:
+                rows = conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            raise MaterialSearchError(f"Search query failed: {e}") from e
+
+        return [
+            SearchHit(
+                material_id=row["material_id"],
+                title=row["title"],
+                week_number=row["week_number"],
+                tier=row["tier"],
+                page_number=row["page_number"],
+                snippet=_highlight(row["snippet"]),
+                # bm25() is lower-is-better; expose higher-is-better scores
+                score=round(-row["rank"], 4),
+            )
+            for row in rows
+        ]
+
+
+# Singleton
+_material_search_index: Optional[MaterialSearchIndex] = None  # pylint: disable=invalid-name
+_singleton_lock = threading.Lock()
+
+
+def get_material_search_index() -> MaterialSearchIndex:
+    """Get or create the material search index singleton."""
+    global _material_search_index  # pylint: disable=global-statement
+    if _material_search_index is None:
+        with _singleton_lock:
+            if _material_search_index is None:
+                _material_search_index = MaterialSearchIndex()
+    return _material_search_index
@@ -0,0 +1,461 @@
+"""Persistent Materials Catalog and Change Journal.
+
+Keeps a catalog of every file under Materials/ (path, size, mtime, content
+hash and detected type) together with the mtime and listing of every
+directory, so a rescan lists only the directories whose mtime changed and
+stats only the files in them. Creating, renaming or deleting a file changes
+its directory's mtime; rewriting a file in place does not, so
+``rescan(full=True)`` re-stats every file to catch those (the text cache
+still validates each file's stat fingerprint when it reads it).
+
+Each rescan appends its differences to a change journal as numbered
+``added``, ``modified`` and ``deleted`` events. Consumers (the text cache,
+the Firestore materials registry) keep a named cursor and process only the
+events after it (see ``consume``).
+
+The server and scripts/populate_firestore_materials.py share these files.
+Rescans and cursor updates hold an exclusive lock on catalog.lock and
+reload the catalog if another process saved it since it was last read, so
+neither process overwrites the other's cursors or reuses sequence numbers.
+
+Files:
+- data/materials_catalog/catalog.json: directories, files and cursors
+- data/materials_catalog/journal.jsonl: one event per line
+- data/materials_catalog/catalog.lock: cross-process write lock
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: the catalog is only shared between threads
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Catalog Configuration
+MATERIALS_ROOT = Path("Materials")
+CATALOG_DIR = Path(os.getenv("MATERIALS_CATALOG_DIR", "data/materials_catalog"))
+JOURNAL_MAX_EVENTS = int(os.getenv("MATERIALS_JOURNAL_MAX_EVENTS", "10000"))
+CATALOG_FORMAT_VERSION = 1
+
+# Directory and file names never cataloged
+SKIP_DIRS = {"__pycache__", ".git"}
+SKIP_PREFIXES = (".", "~")
+
+EVENT_ADDED = "added"
+EVENT_MODIFIED = "modified"
+EVENT_DELETED = "deleted"
+
+# Catalog file entry layout: [size, mtime_ns, inode, file_hash, file_type]
+_SIZE, _MTIME, _INODE, _HASH, _TYPE = range(5)
+
+
+@dataclass(slots=True)
+class CatalogEntry:
+    """One cataloged file."""
+    path: str  # Relative to the Materials root, POSIX separators
+    size: int
+    mtime_ns: int
+    file_hash: str
+    file_type: str
+
+    @property
+    def name(self) -> str:
+        """File name without its directory."""
+        return self.path.rsplit("/", 1)[-1]
+
+
+@dataclass(slots=True)
+class ChangeEvent:
+    """One change to the Materials tree recorded in the journal."""
+    seq: int
+    kind: str  # EVENT_ADDED, EVENT_MODIFIED or EVENT_DELETED
+    path: str
+    file_hash: Optional[str] = None      # New content hash (None when deleted)
+    previous_hash: Optional[str] = None  # Content hash before the change (None when added)
+    file_type: Optional[str] = None
+    size: Optional[int] = None
+    at: float = 0.0
+
+
+def _join(rel_dir: str, name: str) -> str:
+    return f"{rel_dir}/{name}" if rel_dir else name
+
+
+def _skipped(name: str) -> bool:
+    return name in SKIP_DIRS or name.startswith(SKIP_PREFIXES)
+
+
+def _file_hash(file_path: Path, stat: os.stat_result) -> str:
+    """Content hash shared with the text cache's hash index."""
+    from app.services.text_cache_service import get_hash_index
+    return get_hash_index().file_hash(file_path, stat)
+
+
+def _save_hashes() -> None:
+    from app.services.text_cache_service import get_hash_index
+    get_hash_index().save()
+
+
+def _file_type(file_path: Path) -> str:
+    from app.services.file_sniffer import sniff_file
+    descriptor = sniff_file(file_path)
+    return descriptor.file_type if descriptor else "unknown"
+
+
+class MaterialsCatalog:
+    """Incrementally rescanned catalog of the Materials tree."""
+
+    def __init__(self, root: Optional[Path] = None, catalog_dir: Optional[Path] = None):
+        """Initialize the catalog (loaded lazily from catalog_dir).
+
+        Args:
+            root: Directory to catalog (default: Materials/)
+            catalog_dir: Directory holding the catalog and journal files
+        """
+        self.root = (root or MATERIALS_ROOT).resolve()
+        self.catalog_dir = catalog_dir or CATALOG_DIR
+        self.catalog_path = self.catalog_dir / "catalog.json"
+        self.journal_path = self.catalog_dir / "journal.jsonl"
+        self.lock_path = self.catalog_dir / "catalog.lock"
+        self._state: Optional[Dict[str, Any]] = None
+        # Stat of catalog.json when _state was read or written (None: not on disk)
+        self._state_stat: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.RLock()
+
+    # ========================================================================
+    # Public API
+    # ========================================================================
+
+    def rescan(self, full: bool = False) -> List[ChangeEvent]:
+        """Bring the catalog up to date and journal what changed.
+
+        Args:
+            full: Re-stat files in unchanged directories too (catches files
+                rewritten in place)
+
+        Returns:
+            The new events, in journal order
+        """
+        with self._exclusive():
+            state = self._load()
+            dirs: Dict[str, List[Any]] = state["dirs"]
+            files: Dict[str, List[Any]] = state["files"]
+            events: List[ChangeEvent] = []
+            seen_dirs = set()
+            hashed = False
+            relisted = False
+
+            pending = [""]
+            while pending:
+                rel_dir = pending.pop()
+                dir_path = self.root / rel_dir if rel_dir else self.root
+                try:
+                    mtime_ns = dir_path.stat().st_mtime_ns
+                except OSError:
+                    continue
+                seen_dirs.add(rel_dir)
+
+                listing = dirs.get(rel_dir)
+                changed = listing is None or listing[0] != mtime_ns
+                if changed:
+                    listing = self._list_dir(dir_path, mtime_ns)
+                    if listing is None:
+                        continue
+                    dirs[rel_dir] = listing
+                    relisted = True
+                if changed or full:
+                    for name in listing[2]:
+                        hashed |= self._check_file(files, _join(rel_dir, name), events)
+                # Walk depth-first in path order so events come out sorted
+                pending.extend(_join(rel_dir, name) for name in reversed(listing[1]))
+
+            for rel_dir in set(dirs) - seen_dirs:
+                del dirs[rel_dir]
+                relisted = True
+            listed = {_join(rel_dir, name) for rel_dir, listing in dirs.items() for name in listing[2]}
+            for rel_path in sorted(set(files) - listed):
+                entry = files.pop(rel_path)
+                events.append(ChangeEvent(
+                    seq=0, kind=EVENT_DELETED, path=rel_path,
+                    previous_hash=entry[_HASH], file_type=entry[_TYPE],
+                ))
+
+            self._journal(events)
+            if relisted or hashed or events:
+                self._save()
+            if hashed:
+                _save_hashes()
+        if events:
+            logger.info("Materials catalog rescan: %d change(s)", len(events))
+        return events
+
+    def entries(self, under: Optional[Path] = None) -> List[CatalogEntry]:
+        """Cataloged files, optionally only those under a directory.
+
+        Args:
+            under: Directory within the root (absolute, or relative to the
+                working directory like MATERIALS_ROOT)
+
+        Returns:
+            Entries sorted by path (empty if under is outside the root)
+        """
+        prefix = ""
+        if under is not None:
+            try:
+                prefix = under.resolve().relative_to(self.root).as_posix()
+            except ValueError:
+                return []
+            prefix = "" if prefix == "." else f"{prefix}/"
+        with self._lock:
+            files = self._load()["files"]
+            return [
+                CatalogEntry(
+                    path=rel_path, size=entry[_SIZE], mtime_ns=entry[_MTIME],
+                    file_hash=entry[_HASH], file_type=entry[_TYPE],
+                )
+                for rel_path, entry in sorted(files.items())
+                if rel_path.startswith(prefix)
+            ]
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the newest journaled event (0 if none)."""
+        with self._lock:
+            return self._load()["seq"]
+
+    def cursor(self, consumer: str) -> int:
+        """Sequence number of the last event a consumer handled (0 if none)."""
+        with self._lock:
+            return self._load()["cursors"].get(consumer, 0)
+
+    def changes_since(self, seq: int) -> Optional[List[ChangeEvent]]:
+        """Journaled events after a sequence number.
+
+        Returns:
+            Events in order, or None if the journal no longer holds every
+            event after seq (the caller must resync from ``entries``)
+        """
+        with self._lock:
+            state = self._load()
+            if seq >= state["seq"]:
+                return []
+            if seq < state["first_seq"] - 1:
+                return None
+            return [event for event in self._read_journal() if event.seq > seq]
+
+    def consume(self, consumer: str, handler: Callable[[List[ChangeEvent]], None]) -> int:
+        """Hand a consumer the events after its cursor, then advance the cursor.
+
+        The cursor only advances if the handler returns normally, so a failed
+        batch is retried on the next call. A consumer whose cursor predates
+        the retained journal is moved to the newest event with a warning.
+
+        Args:
+            consumer: Cursor name (e.g. "text_cache")
+            handler: Called with the pending events (not called if none)
+
+        Returns:
+            Number of events handled
+        """
+        with self._lock:
+            state = self._load()
+            cursor = state["cursors"].get(consumer, 0)
+            events = self.changes_since(cursor)
+            latest = state["seq"]
+        if events is None:
+            logger.warning(
+                "Materials journal consumer %s missed events %d-%d; resetting its cursor",
+                consumer, cursor + 1, state["first_seq"] - 1,
+            )
+            events = []
+        if events:
+            handler(events)
+            latest = events[-1].seq
+        with self._exclusive():
+            # Reloaded, so cursors another process saved meanwhile are kept
+            self._load()["cursors"][consumer] = latest
+            self._save()
+        return len(events)
+
+    # ========================================================================
+    # Scanning
+    # ========================================================================
+
+    @staticmethod
+    def _list_dir(dir_path: Path, mtime_ns: int) -> Optional[List[Any]]:
+        """Directory listing entry: [mtime_ns, subdirectories, files]."""
+        subdirs: List[str] = []
+        filenames: List[str] = []
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    if _skipped(entry.name):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.is_file():
+                        filenames.append(entry.name)
+        except OSError as e:
+            logger.warning("Cannot list %s: %s", dir_path, e)
+            return None
+        return [mtime_ns, sorted(subdirs), sorted(filenames)]
+
+    def _check_file(self, files: Dict[str, List[Any]], rel_path: str, events: List[ChangeEvent]) -> bool:
+        """Record a listed file, journaling it if it is new or its content changed.
+
+        Returns:
+            Whether the file's stat fingerprint changed (so it was hashed)
+        """
+        file_path = self.root / rel_path
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return False
+        previous = files.get(rel_path)
+        if previous and previous[:_HASH] == [stat.st_size, stat.st_mtime_ns, stat.st_ino]:
+            return False
+
+        file_hash = _file_hash(file_path, stat)
+        file_type = _file_type(file_path)
+        files[rel_path] = [stat.st_size, stat.st_mtime_ns, stat.st_ino, file_hash, file_type]
+        if previous and previous[_HASH] == file_hash:
+            return True  # Touched or copied over with identical content
+
+        events.append(ChangeEvent(
+            seq=0, kind=EVENT_MODIFIED if previous else EVENT_ADDED, path=rel_path,
+            file_hash=file_hash, previous_hash=previous[_HASH] if previous else None,
+            file_type=file_type, size=stat.st_size,
+        ))
+        return True
+
+    # ========================================================================
+    # Persistence
+    # ========================================================================
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Hold the catalog against other threads and (where supported) other processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            self.catalog_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a", encoding="utf-8") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _catalog_stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = self.catalog_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _load(self) -> Dict[str, Any]:
+        """Catalog state, re-read if catalog.json changed since it was last read or written."""
+        stat = self._catalog_stat()
+        if self._state is not None and stat != self._state_stat:
+            self._state = None
+        if self._state is None:
+            self._state_stat = stat
+            try:
+                with open(self.catalog_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                if state.get("version") != CATALOG_FORMAT_VERSION:
+                    raise ValueError(f"unsupported catalog version {state.get('version')}")
+                self._state = state
+            except FileNotFoundError:
+                self._state = None
+            except Exception as e:
+                logger.warning("Rebuilding unreadable materials catalog %s: %s", self.catalog_path, e)
+                self._state = None
+            if self._state is None:
+                self._state = {
+                    "version": CATALOG_FORMAT_VERSION, "seq": 0, "first_seq": 1,
+                    "dirs": {}, "files": {}, "cursors": {},
+                }
+                self.journal_path.unlink(missing_ok=True)
+        return self._state
+
+    def _save(self) -> None:
+        try:
+            self.catalog_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.catalog_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._state, f)
+            os.replace(tmp_path, self.catalog_path)
+            self._state_stat = self._catalog_stat()
+        except Exception as e:
+            logger.warning("Failed to save materials catalog %s: %s", self.catalog_path, e)
+
+    def _read_journal(self) -> List[ChangeEvent]:
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                return [ChangeEvent(**json.loads(line)) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _journal(self, events: List[ChangeEvent]) -> None:
+        """Number the events and append them, trimming the journal to JOURNAL_MAX_EVENTS."""
+        if not events:
+            return
+        state = self._state
+        now = time.time()
+        for event in events:
+            state["seq"] += 1
+            event.seq = state["seq"]
+            event.at = now
+
+        self.catalog_dir.mkdir(parents=True, exist_ok=True)
+        if state["seq"] - state["first_seq"] + 1 > JOURNAL_MAX_EVENTS:
+            kept = [event for event in self._read_journal() + events
+                    if event.seq > state["seq"] - JOURNAL_MAX_EVENTS]
+            state["first_seq"] = kept[0].seq
+            tmp_path = self.journal_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(asdict(event)) + "\n" for event in kept)
+            os.replace(tmp_path, self.journal_path)
+        else:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(asdict(event)) + "\n" for event in events)
+
+
+_catalog: Optional[MaterialsCatalog] = None  # pylint: disable=invalid-name
+_catalog_lock = threading.Lock()
+
+
+def get_materials_catalog() -> MaterialsCatalog:
+    """Get the shared MaterialsCatalog instance."""
+    global _catalog  # pylint: disable=global-statement
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = MaterialsCatalog()
+        return _catalog
+
+
+def refresh_materials_catalog(full: bool = False) -> List[ChangeEvent]:
+    """Rescan the Materials tree and feed the changes to the text cache.
+
+    The Firestore materials registry consumes the journal separately (see
+    CourseMaterialsService.apply_catalog_changes), since mapping a path to
+    its course is up to the caller.
+    """
+    from app.services.tiered_text_cache import get_tiered_text_cache
+
+    catalog = get_materials_catalog()
+    events = catalog.rescan(full=full)
+    catalog.consume("text_cache", get_tiered_text_cache().apply_catalog_changes)
+    return events
@@ -14,6 +14,7 @@ from anthropic import AsyncAnthropic
 from pydantic import BaseModel
 
 from app.services.gcp_service import get_anthropic_api_key
+from app.services.materials_catalog import get_materials_catalog, refresh_materials_catalog
 from app.services.usage_tracking_service import get_usage_tracking_service
 
 logger = logging.getLogger(__name__)
@@ -143,46 +144,34 @@ def scan_materials_folder(subject: str) -> ScanResult:
     
     materials: List[ScannedMaterial] = []
     categories: Dict[str, int] = {}
-    
-    # Walk through all subdirectories
-    for root, dirs, files in os.walk(subject_path):
-        # Skip folders in SKIP_FOLDERS
-        dirs[:] = [d for d in dirs if d not in SKIP_FOLDERS]
-        
-        root_path = Path(root)
-        category = root_path.relative_to(subject_path).parts[0] if root_path != subject_path else "Root"
-        
-        # Skip if we're in a skip folder
-        if any(skip in str(root_path) for skip in SKIP_FOLDERS):
+
+    # The catalog only re-lists directories that changed since the last scan
+    refresh_materials_catalog()
+    catalog = get_materials_catalog()
+
+    for entry in catalog.entries(subject_path):
+        relative_path = (catalog.root / entry.path).relative_to(subject_path.resolve())
+        filename = relative_path.name
+
+        # Skip folders in SKIP_FOLDERS and unsupported extensions
+        if SKIP_FOLDERS.intersection(relative_path.parts[:-1]):
             continue
-            
-        for filename in files:
-            # Check extension
-            ext = os.path.splitext(filename)[1].lower()
-            if ext not in VALID_EXTENSIONS:
-                continue
-                
-            file_path = root_path / filename
-            relative_path = file_path.relative_to(subject_path)
-            
-            # Get file size
-            try:
-                size = file_path.stat().st_size
-            except OSError:
-                size = 0
-            
-            material = ScannedMaterial(
-                file=str(relative_path),
-                filename=filename,
-                category=category,
-                size_bytes=size,
-                title=_clean_filename_to_title(filename),
-                week=_extract_week_from_filename(filename),
-                material_type=_guess_material_type(category, filename)
-            )
-            materials.append(material)
-            categories[category] = categories.get(category, 0) + 1
-    
+        if relative_path.suffix.lower() not in VALID_EXTENSIONS:
+            continue
+
+        category = relative_path.parts[0] if len(relative_path.parts) > 1 else "Root"
+        material = ScannedMaterial(
+            file=str(relative_path),
+            filename=filename,
+            category=category,
+            size_bytes=entry.size,
+            title=_clean_filename_to_title(filename),
+            week=_extract_week_from_filename(filename),
+            material_type=_guess_material_type(category, filename)
+        )
+        materials.append(material)
+        categories[category] = categories.get(category, 0) + 1
+
     return ScanResult(
         subject=subject,
         total_files=len(materials),
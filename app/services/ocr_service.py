@@ -0,0 +1,323 @@
+"""OCR Pipeline for images and scanned PDF pages.
+
+Runs pytesseract over many images at once:
+
+1. Preprocessing: grayscale, downscale to OCR_MAX_DIMENSION, Otsu binarization
+   (tesseract is faster and usually more accurate on clean, bounded input)
+2. Caching: results are keyed by a hash of the image bytes (plus OCR settings)
+   in an in-process LRU backed by one text file per image under OCR_CACHE_DIR
+3. Parallelism: cache misses are OCR'd in one shared, bounded process pool;
+   a pool with a hung tesseract worker is replaced for new calls and killed
+   once the calls still using it have finished
+
+Inside an extraction worker process (see extraction_pool) images are OCR'd
+inline, so nested pools never oversubscribe the CPU.
+"""
+
+import atexit
+import functools
+import hashlib
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+# OCR Configuration
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", "120"))  # Per image per worker
+OCR_MAX_DIMENSION = int(os.getenv("OCR_MAX_DIMENSION", "2000"))  # Longest side in pixels
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+OCR_CACHE_DIR = Path(os.getenv("OCR_CACHE_DIR", "data/ocr_cache"))
+OCR_MEMORY_CACHE_ENTRIES = int(os.getenv("OCR_MEMORY_CACHE_ENTRIES", "512"))
+# "spawn" avoids forking a process that holds gRPC (Firestore) threads
+OCR_START_METHOD = os.getenv("OCR_START_METHOD", "spawn")
+
+# OCR scanned PDF pages (pages without a text layer) during extraction
+PDF_OCR_FALLBACK = os.getenv("PDF_OCR_FALLBACK", "true").lower() == "true"
+PDF_OCR_RENDER_DPI = int(os.getenv("PDF_OCR_RENDER_DPI", "200"))
+
+_memory_cache: "OrderedDict[str, str]" = OrderedDict()
+_memory_lock = threading.Lock()
+
+_pool: Optional[ProcessPoolExecutor] = None  # pylint: disable=invalid-name
+_pool_lock = threading.Lock()
+# Calls with OCR in flight per pool, and broken pools to kill once those calls finish
+_pool_users: Dict[ProcessPoolExecutor, int] = {}
+_retired_pools: Set[ProcessPoolExecutor] = set()
+
+
+@functools.lru_cache(maxsize=1)
+def is_ocr_available() -> bool:
+    """Whether pytesseract, Pillow and the tesseract binary are all present."""
+    try:
+        import pytesseract
+        from PIL import Image  # noqa: F401 - availability check
+
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception as e:
+        logger.info("OCR unavailable: %s", e)
+        return False
+
+
+def _otsu_threshold(histogram: Sequence[int]) -> int:
+    """Threshold that maximizes between-class variance of a 256-bin histogram."""
+    total = sum(histogram)
+    if not total:
+        return 128
+    sum_all = sum(i * count for i, count in enumerate(histogram))
+    sum_below = weight_below = 0
+    best_threshold, best_variance = 128, -1.0
+    for level, count in enumerate(histogram):
+        weight_below += count
+        if not weight_below:
+            continue
+        weight_above = total - weight_below
+        if not weight_above:
+            break
+        sum_below += level * count
+        mean_below = sum_below / weight_below
+        mean_above = (sum_all - sum_below) / weight_above
+        variance = weight_below * weight_above * (mean_below - mean_above) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = level, variance
+    return best_threshold
+
+
+def preprocess_image(image, max_dimension: int = OCR_MAX_DIMENSION):
+    """Grayscale, downscale and binarize a PIL image for OCR.
+
+    Args:
+        image: PIL image
+        max_dimension: Longest side after downscaling (images are never upscaled)
+
+    Returns:
+        A new 1-bit PIL image
+    """
+    from PIL import Image
+
+    gray = image.convert("L")
+    if max(gray.size) > max_dimension:
+        gray.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    threshold = _otsu_threshold(gray.histogram())
+    return gray.point(lambda p: 255 if p > threshold else 0, mode="1")
+
+
+def _ocr_worker(image_bytes: bytes, lang: str, max_dimension: int) -> Optional[str]:
+    """OCR one encoded image (runs inside a pool worker or inline).
+
+    Returns:
+        Extracted text, or None if the image could not be OCR'd
+    """
+    try:
+        import pytesseract
+        from PIL import Image
+
+        with Image.open(BytesIO(image_bytes)) as image:
+            prepared = preprocess_image(image, max_dimension)
+        return pytesseract.image_to_string(prepared, lang=lang).strip()
+    except Exception as e:
+        logger.warning("OCR failed for image (%d bytes): %s", len(image_bytes), e)
+        return None
+
+
+def image_cache_key(image_bytes: bytes) -> str:
+    """Cache key for an image: content hash plus the settings that affect output."""
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    return f"{digest}-{OCR_LANG}-{OCR_MAX_DIMENSION}"
+
+
+def _cache_get(key: str) -> Optional[str]:
+    with _memory_lock:
+        text = _memory_cache.get(key)
+        if text is not None:
+            _memory_cache.move_to_end(key)
+            return text
+    try:
+        text = (OCR_CACHE_DIR / f"{key}.txt").read_text(encoding="utf-8")
+    except OSError:
+        return None
+    _memory_put(key, text)
+    return text
+
+
+def _memory_put(key: str, text: str) -> None:
+    with _memory_lock:
+        _memory_cache[key] = text
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > OCR_MEMORY_CACHE_ENTRIES:
+            _memory_cache.popitem(last=False)
+
+
+def _cache_put(key: str, text: str) -> None:
+    _memory_put(key, text)
+    try:
+        OCR_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = OCR_CACHE_DIR / f"{key}.tmp"
+        tmp_path.write_text(text, encoding="utf-8")
+        tmp_path.replace(OCR_CACHE_DIR / f"{key}.txt")
+    except OSError as e:
+        logger.warning("Failed to write OCR cache entry %s: %s", key, e)
+
+
+def clear_memory_cache() -> None:
+    """Drop the in-process OCR cache (the disk cache is kept)."""
+    with _memory_lock:
+        _memory_cache.clear()
+
+
+def ocr_images(images: Sequence[bytes], max_workers: Optional[int] = None) -> List[Optional[str]]:
+    """OCR encoded images (PNG/JPEG/...) in parallel, serving repeats from cache.
+
+    Args:
+        images: Encoded image bytes
+        max_workers: Worker processes to use (default: OCR_MAX_WORKERS); 1 OCRs
+            inline, more use the shared pool (see _acquire_pool)
+
+    Returns:
+        Text per image in input order; None for images that failed
+    """
+    results: List[Optional[str]] = [None] * len(images)
+    misses: "OrderedDict[str, List[int]]" = OrderedDict()  # key -> positions (duplicates OCR'd once)
+    for position, image_bytes in enumerate(images):
+        key = image_cache_key(image_bytes)
+        cached = _cache_get(key)
+        if cached is not None:
+            results[position] = cached
+        else:
+            misses.setdefault(key, []).append(position)
+
+    if not misses:
+        return results
+
+    pending = [(key, images[positions[0]]) for key, positions in misses.items()]
+    workers = max(1, min(max_workers or OCR_MAX_WORKERS, len(pending)))
+    # Already in a pool worker (bulk extraction): OCR inline rather than nest pools
+    if workers == 1 or multiprocessing.parent_process() is not None:
+        texts = [_ocr_worker(image_bytes, OCR_LANG, OCR_MAX_DIMENSION) for _, image_bytes in pending]
+    else:
+        texts = _ocr_in_pool(pending, workers)
+
+    for (key, _), text in zip(pending, texts):
+        if text is None:
+            continue
+        _cache_put(key, text)
+        for position in misses[key]:
+            results[position] = text
+
+    logger.info(
+        "OCR: %d images, %d cached, %d processed with %d worker(s)",
+        len(images), len(images) - sum(len(p) for p in misses.values()), len(pending), workers,
+    )
+    return results
+
+
+def _acquire_pool(workers: int) -> ProcessPoolExecutor:
+    """Get the shared OCR pool, starting it on first use; pair with _release_pool.
+
+    The pool has max(OCR_MAX_WORKERS, workers) processes and is reused across
+    calls, so worker start-up (a fresh interpreter under "spawn") is paid once.
+    """
+    global _pool  # pylint: disable=global-statement
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context(OCR_START_METHOD)
+            _pool = ProcessPoolExecutor(max_workers=max(OCR_MAX_WORKERS, workers), mp_context=context)
+        _pool_users[_pool] = _pool_users.get(_pool, 0) + 1
+        return _pool
+
+
+def _release_pool(executor: ProcessPoolExecutor, broken: bool = False) -> None:
+    """Stop using a pool; a broken one is replaced, and killed once no call uses it.
+
+    Killing a pool fails every image in flight in it, so a pool whose workers
+    hung or died keeps running until the other calls using it have finished
+    (or given up at their own deadline); new calls get a fresh pool.
+    """
+    from app.services.extraction_pool import _kill_executor
+
+    global _pool  # pylint: disable=global-statement
+    with _pool_lock:
+        _pool_users[executor] -= 1
+        if broken:
+            if _pool is executor:
+                _pool = None
+            _retired_pools.add(executor)
+        kill = executor in _retired_pools and _pool_users[executor] == 0
+        if kill:
+            _retired_pools.discard(executor)
+        if _pool_users[executor] == 0 and executor is not _pool:
+            del _pool_users[executor]
+    if kill:
+        _kill_executor(executor)
+
+
+def shutdown_pool() -> None:
+    """Stop the shared OCR pool (e.g. at process exit or between tests)."""
+    from app.services.extraction_pool import _kill_executor
+
+    global _pool  # pylint: disable=global-statement
+    with _pool_lock:
+        executor, _pool = _pool, None
+        retired = list(_retired_pools)
+        _retired_pools.clear()
+        _pool_users.clear()
+    for old in retired:
+        _kill_executor(old)
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _ocr_in_pool(pending: List[tuple], workers: int) -> List[Optional[str]]:
+    """OCR (key, image bytes) pairs in the shared process pool, preserving order.
+
+    The call waits at most OCR_TIMEOUT_SECONDS per image a worker has to
+    process (the images split over `workers`), then fails whatever is unfinished.
+    """
+    executor = _acquire_pool(workers)
+    broken = False
+    try:
+        try:
+            futures = [
+                executor.submit(_ocr_worker, image_bytes, OCR_LANG, OCR_MAX_DIMENSION)
+                for _, image_bytes in pending
+            ]
+        except BrokenProcessPool as e:
+            logger.warning("OCR pool is broken, restarting it: %s", e)
+            broken = True
+            return [None] * len(pending)
+
+        _, not_done = wait(futures, timeout=OCR_TIMEOUT_SECONDS * math.ceil(len(pending) / workers))
+        texts: List[Optional[str]] = []
+        for (key, _), future in zip(pending, futures):
+            if future in not_done:
+                # A hung tesseract process keeps its worker busy; replace the pool
+                future.cancel()
+                broken = True
+                logger.warning("OCR timed out for image %s", key[:12])
+                texts.append(None)
+                continue
+            try:
+                texts.append(future.result())
+            except BrokenProcessPool as e:
+                broken = True
+                logger.warning("OCR worker died for image %s: %s", key[:12], e)
+                texts.append(None)
+            except Exception as e:
+                logger.warning("OCR worker failed for image %s: %s", key[:12], e)
+                texts.append(None)
+        return texts
+    finally:
+        _release_pool(executor, broken)
+
+
+atexit.register(shutdown_pool)
@@ -2,7 +2,8 @@
 
 This service manages:
 1. Storing generated quizzes in Firestore for reuse
-2. Detecting duplicate quizzes via content hashing
+2. Detecting duplicate quizzes via content hashing, and finding quizzes
+   generated with the same parameters (see generation_index)
 3. Storing user quiz attempt results
 4. Retrieving quiz history for users
 
@@ -108,7 +109,8 @@ class QuizPersistenceService:
         difficulty: str,
         questions: List[Dict],
         week_number: Optional[int] = None,
-        title: Optional[str] = None
+        title: Optional[str] = None,
+        generation_key: Optional[str] = None
     ) -> Dict:
         """Save a generated quiz to Firestore.
 
@@ -119,6 +121,7 @@ class QuizPersistenceService:
             questions: List of question dictionaries
             week_number: Optional week filter used
             title: Optional quiz title (auto-generated if not provided)
+            generation_key: Key of the generation parameters (see generation_index)
 
         Returns:
             Dictionary with saved quiz data including ID
@@ -154,6 +157,7 @@ class QuizPersistenceService:
             "numQuestions": len(questions),
             "questions": questions,
             "contentHash": content_hash,
+            "generationKey": generation_key,
             "createdAt": now,
             "title": title
         }
@@ -206,6 +210,32 @@ class QuizPersistenceService:
 
         return None
 
+    async def find_by_generation_key(
+        self,
+        course_id: str,
+        generation_key: str
+    ) -> Optional[Dict]:
+        """Find a quiz generated with the same parameters.
+
+        Args:
+            course_id: Course ID
+            generation_key: Key of the generation parameters (see generation_index)
+
+        Returns:
+            Stored quiz data if found, None otherwise
+        """
+        if not self._firestore:
+            return None
+
+        quizzes_ref = self._firestore.collection("courses").document(course_id) \
+            .collection("quizzes")
+        docs = quizzes_ref.where("generationKey", "==", generation_key).limit(1).stream()
+        for doc in docs:
+            logger.info("Found quiz %s generated with the same parameters", doc.id)
+            return doc.to_dict()
+
+        return None
+
     async def list_quizzes(
         self,
         course_id: str,
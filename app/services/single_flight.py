@@ -0,0 +1,90 @@
+"""Single-Flight Coalescing of Identical Generation Requests.
+
+At the start of a seminar many students request the same quiz or study
+guide within seconds. SingleFlight runs one generation per key at a time:
+callers arriving while a generation for their key is in flight await that
+generation and share its result (or its exception) instead of issuing
+another LLM call.
+
+Keys come from GenerationRequest.key(): the normalized generation
+parameters plus a fingerprint of the material contents, so requests only
+coalesce when they would send the same prompt.
+
+The generation runs as its own task, so a caller that disconnects does not
+cancel it for the others. Results are not kept once the generation finishes;
+persisting them is the job of the artifact stores.
+"""
+
+import asyncio
+import copy
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution."""
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}  # label -> counters
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], label: str = "default") -> Any:
+        """Run fn, or wait for the in-flight call with the same key.
+
+        Args:
+            key: Identity of the call; equal keys must produce equal results
+            fn: Starts the call (only invoked if none is in flight for key)
+            label: Counter group for stats (e.g. the operation type)
+
+        Returns:
+            The result of the shared call (a deep copy for coalesced callers,
+            so callers can modify their result)
+        """
+        counts = self._counts.setdefault(label, {"calls": 0, "executed": 0, "coalesced": 0})
+        counts["calls"] += 1
+
+        task = self._in_flight.get(key)
+        leader = task is None
+        if not leader:
+            counts["coalesced"] += 1
+            logger.info("Coalesced %s request onto in-flight generation %s", label, key[:12])
+        else:
+            counts["executed"] += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+
+        # Shielded so one caller's cancellation does not cancel the shared call
+        result = await asyncio.shield(task)
+        return result if leader else copy.deepcopy(result)
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved when every caller has gone away
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters per label plus the number of calls in flight."""
+        totals = {"calls": 0, "executed": 0, "coalesced": 0}
+        for counts in self._counts.values():
+            for name, value in counts.items():
+                totals[name] += value
+        return {
+            "in_flight": len(self._in_flight),
+            "totals": totals,
+            "operations": {label: dict(counts) for label, counts in self._counts.items()},
+        }
+
+
+_generation_single_flight: Optional[SingleFlight] = None  # pylint: disable=invalid-name
+
+
+def get_generation_single_flight() -> SingleFlight:
+    """Get the shared SingleFlight for LLM generation requests."""
+    global _generation_single_flight  # pylint: disable=global-statement
+    if _generation_single_flight is None:
+        _generation_single_flight = SingleFlight()
+    return _generation_single_flight
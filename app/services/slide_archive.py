@@ -9,14 +9,25 @@ This service provides:
 - Detection of slide archives vs real PDFs
 - Extraction of slide content (images, text, metadata)
 - Caching of extracted content for performance
+
+Open archives are kept in a small pool of ZipFile handles, each with its
+parsed manifest indexed by page number, so serving a slide is a dictionary
+lookup plus one member read. Reads that span several members pin their
+handle, so one evicted by another thread is closed only when they finish.
+Extracted archive data is kept in an LRU
+bounded by an approximate byte budget.
 """
 
 import json
 import logging
+import os
+import threading
 import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
 from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
 
 from pydantic import BaseModel
 
@@ -26,8 +37,15 @@ logger = logging.getLogger(__name__)
 
 # Base path for materials (using validated MATERIALS_BASE from syllabus_parser)
 
-# Cache for extracted archives (in-memory for now)
-_archive_cache: Dict[str, "SlideArchiveData"] = {}
+# Cache Configuration
+ARCHIVE_CACHE_MAX_BYTES = int(os.getenv("SLIDE_ARCHIVE_CACHE_MAX_BYTES", "67108864"))  # 64 MiB
+ZIP_HANDLE_POOL_SIZE = int(os.getenv("SLIDE_ARCHIVE_HANDLE_POOL_SIZE", "8"))
+
+# Approximate per-slide overhead of a cached SlideInfo, on top of its text
+SLIDE_OVERHEAD_BYTES = 512
+
+# Stat fingerprint of an archive file: (mtime_ns, size, inode)
+Fingerprint = Tuple[int, int, int]
 
 
 class SlideInfo(BaseModel):
@@ -49,6 +67,313 @@ class SlideArchiveData(BaseModel):
     is_valid: bool = True
 
 
+def _archive_size(archive_data: SlideArchiveData) -> int:
+    """Approximate in-memory size of extracted archive data in bytes."""
+    return sum(
+        len(slide.text_content or '') + SLIDE_OVERHEAD_BYTES for slide in archive_data.slides
+    )
+
+
+class ArchiveCache:
+    """LRU of extracted archive data bounded by an approximate byte budget.
+
+    Entries carry the stat fingerprint of the archive they were extracted
+    from, so data for a replaced file is never served, even if its pooled
+    handle was evicted (and the replacement opened) in between.
+    """
+
+    def __init__(self, max_bytes: int = ARCHIVE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[SlideArchiveData, int, Optional[Fingerprint]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        """Approximate bytes currently held."""
+        return self._bytes
+
+    def get(self, key: str, fingerprint: Optional[Fingerprint] = None) -> Optional[SlideArchiveData]:
+        """Get cached data and mark it most recently used.
+
+        Data extracted from a different version of the file than fingerprint
+        is dropped instead of returned.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if fingerprint is not None and entry[2] != fingerprint:
+                self._pop_locked(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(
+        self, key: str, archive_data: SlideArchiveData, fingerprint: Optional[Fingerprint] = None
+    ) -> None:
+        """Cache data, evicting least recently used entries over the budget."""
+        size = _archive_size(archive_data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._pop_locked(key)
+            self._entries[key] = (archive_data, size, fingerprint)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._pop_locked(next(iter(self._entries)))
+
+    def pop(self, key: str) -> None:
+        """Drop a cached entry if present."""
+        with self._lock:
+            self._pop_locked(key)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _pop_locked(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+
+def _fingerprint(stat: os.stat_result) -> Fingerprint:
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class _ArchiveHandle:
+    """An open slide archive with its manifest indexed by page number."""
+
+    def __init__(self, source: Union[Path, BinaryIO], fingerprint: Fingerprint):
+        """Open an archive from a validated path or an already-open binary file.
+
+        A passed-in file object is owned (and closed) by the handle.
+        """
+        self.fingerprint = fingerprint
+        self._lock = threading.Lock()
+        self._pins = 0
+        self._closing = False
+        self._file = None if isinstance(source, Path) else source
+        try:
+            # lgtm[py/path-injection] - source is validated by the callers of ZipHandlePool
+            self._zf = zipfile.ZipFile(source, 'r')
+            self.names = set(self._zf.namelist())
+            self.manifest: Dict[str, Any] = json.loads(self._zf.read('manifest.json'))
+        except Exception:
+            self._close_files()
+            raise
+        self.pages = self.manifest.get('pages', [])
+        self.pages_by_number = {page.get('page_number'): page for page in self.pages}
+
+    def read(self, member: str) -> Optional[bytes]:
+        """Read an archive member, or None if it is not in the archive."""
+        # lgtm[py/path-injection] - member is from within the ZIP archive, not filesystem
+        if not member or member not in self.names:
+            return None
+        with self._lock:
+            return self._zf.read(member)
+
+    def read_text(self, member: str) -> Optional[str]:
+        """Read a UTF-8 text member, or None if missing or undecodable.
+
+        Raises:
+            ValueError: If the handle was closed (e.g. evicted by another thread)
+        """
+        try:
+            data = self.read(member)
+            return data.decode('utf-8') if data is not None else None
+        except (KeyError, UnicodeDecodeError):
+            return None
+
+    def pin(self) -> bool:
+        """Keep the handle open until unpin(), even if the pool evicts it.
+
+        Returns:
+            False if the handle was already closed
+        """
+        with self._lock:
+            if self._closing:
+                return False
+            self._pins += 1
+            return True
+
+    def unpin(self) -> None:
+        """Release a pin; closes the handle if it was closed while pinned."""
+        with self._lock:
+            self._pins -= 1
+            close_now = self._closing and self._pins == 0
+        if close_now:
+            self._close_files()
+
+    def close(self) -> None:
+        """Close the handle now, or when the last pin is released."""
+        with self._lock:
+            self._closing = True
+            if self._pins:
+                return
+        self._close_files()
+
+    def _close_files(self) -> None:
+        with self._lock:
+            if getattr(self, '_zf', None) is not None:
+                self._zf.close()
+            if self._file is not None:
+                self._file.close()
+
+
+class ZipHandlePool:
+    """Small LRU pool of open slide archives.
+
+    Handles are revalidated against the file's stat fingerprint on every
+    lookup, so a replaced archive is reopened (and its cached data dropped).
+    """
+
+    def __init__(self, max_handles: int = ZIP_HANDLE_POOL_SIZE):
+        self.max_handles = max_handles
+        self._handles: "OrderedDict[str, _ArchiveHandle]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def get(self, validated_path: Path) -> Optional[_ArchiveHandle]:
+        """Get an open handle for a validated path.
+
+        Returns:
+            The handle, or None if the file is missing, not a ZIP, or has no manifest
+        """
+        key = str(validated_path)
+        try:
+            # codeql[py/path-injection] - validated_path is sanitized by validate_path_within_base()
+            stat = validated_path.stat()
+        except OSError:
+            self.discard(key)
+            return None
+
+        handle = self.peek(validated_path, stat)
+        if handle is not None:
+            return handle
+
+        # Open outside the pool lock; a racing open of the same file is harmless
+        try:
+            handle = _ArchiveHandle(validated_path, _fingerprint(stat))
+        except Exception:
+            return None
+        return self._install(key, handle)
+
+    def peek(self, validated_path: Path, stat: os.stat_result) -> Optional[_ArchiveHandle]:
+        """Get a pooled handle if one is open for this exact file version (never opens)."""
+        key = str(validated_path)
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None and handle.fingerprint == _fingerprint(stat):
+                self._handles.move_to_end(key)
+                return handle
+        if handle is not None:
+            self.discard(key)
+        return None
+
+    def adopt(self, validated_path: Path, fileobj: BinaryIO, stat: os.stat_result) -> bool:
+        """Pool an archive from a file the caller already opened (e.g. to sniff its header).
+
+        The pool takes ownership of fileobj either way.
+
+        Returns:
+            True if the file is a slide archive (and is now pooled)
+        """
+        try:
+            handle = _ArchiveHandle(fileobj, _fingerprint(stat))
+        except Exception:
+            return False
+        self._install(str(validated_path), handle)
+        return True
+
+    def _install(self, key: str, handle: _ArchiveHandle) -> _ArchiveHandle:
+        evicted = []
+        with self._lock:
+            previous = self._handles.pop(key, None)
+            if previous is not None:
+                evicted.append(previous)
+            self._handles[key] = handle
+            while len(self._handles) > self.max_handles:
+                evicted.append(self._handles.popitem(last=False)[1])
+        for old in evicted:
+            old.close()
+        return handle
+
+    @contextmanager
+    def pinned(self, validated_path: Path) -> Iterator[Optional[_ArchiveHandle]]:
+        """Get a handle for a validated path that stays open until the block exits.
+
+        Used for reads that span several members, which another thread could
+        otherwise interrupt by evicting the handle. Retries once with a fresh
+        handle if the pooled one was closed before it could be pinned.
+
+        Yields:
+            The pinned handle, or None (see get)
+        """
+        handle = None
+        for _ in range(2):
+            candidate = self.get(validated_path)
+            if candidate is None:
+                break
+            if candidate.pin():
+                handle = candidate
+                break
+        try:
+            yield handle
+        finally:
+            if handle is not None:
+                handle.unpin()
+
+    def discard(self, key: str) -> None:
+        """Close and drop the handle for a path, along with its cached data."""
+        with self._lock:
+            handle = self._handles.pop(key, None)
+        if handle is not None:
+            handle.close()
+        _archive_cache.pop(key)
+
+    def close_all(self) -> None:
+        """Close every pooled handle."""
+        with self._lock:
+            handles = list(self._handles.values())
+            self._handles.clear()
+        for handle in handles:
+            handle.close()
+
+
+# Cache for extracted archives and pool of open archive handles
+_archive_cache = ArchiveCache()
+_zip_pool = ZipHandlePool()
+
+
+def _read_member(validated_path: Path, member: str) -> Optional[bytes]:
+    """Read one archive member through the handle pool.
+
+    Retries once with a fresh handle if the pooled one was evicted (closed)
+    by another thread mid-read.
+    """
+    for _ in range(2):
+        handle = _zip_pool.get(validated_path)
+        if handle is None:
+            return None
+        try:
+            return handle.read(member)
+        except ValueError:
+            continue
+    return None
+
+
 def is_slide_archive(file_path: Path) -> bool:
     """Check if a file is a slide archive (ZIP with manifest.json)."""
     # Security: Validate path to prevent path traversal attacks (CWE-22/23/36)
@@ -58,17 +383,10 @@ def is_slide_archive(file_path: Path) -> bool:
         logger.warning("Path validation failed for path=%s: %s", file_path, e)
         return False
 
-    # codeql[py/path-injection] - validated_path is sanitized by validate_path_within_base()
-    if not validated_path.exists():
-        return False
-
-    try:
-        # SECURITY: Use validated_path, not original file_path
-        # codeql[py/path-injection] - validated_path is sanitized by validate_path_within_base()
-        with zipfile.ZipFile(validated_path, 'r') as zf:
-            return 'manifest.json' in zf.namelist()
-    except (zipfile.BadZipFile, Exception):
-        return False
+    # SECURITY: Use validated_path, not original file_path
+    # The handle stays pooled, so the extraction that usually follows
+    # detection does not reopen the archive
+    return _zip_pool.get(validated_path) is not None
 
 
 def get_file_type(file_path: Path) -> str:
@@ -83,25 +401,40 @@ def get_file_type(file_path: Path) -> str:
         logger.warning("Path validation failed for path=%s: %s", file_path, e)
         return 'unknown'
 
-    # codeql[py/path-injection] - validated_path is sanitized by validate_path_within_base()
-    if not validated_path.exists():
+    try:
+        # codeql[py/path-injection] - validated_path is sanitized by validate_path_within_base()
+        stat = validated_path.stat()
+    except OSError:
         return 'unknown'
 
-    # Check if it's a real PDF by reading magic bytes
+    # Already pooled (e.g. type detection earlier in the request): no I/O
+    if _zip_pool.peek(validated_path, stat) is not None:
+        return 'slide_archive'
+
+    # Read the magic bytes and, for a ZIP, the manifest from a single open
     try:
         # SECURITY: Use validated_path, not original file_path
         # codeql[py/path-injection] - validated_path is sanitized by validate_path_within_base()
-        with open(validated_path, 'rb') as f:
-            header = f.read(8)
-            if header.startswith(b'%PDF'):
-                return 'pdf'
+        f = open(validated_path, 'rb')
+    except OSError:
+        return 'unknown'
+    try:
+        header = f.read(8)
     except Exception:
-        pass
+        f.close()
+        return 'unknown'
 
-    # Check if it's a slide archive (is_slide_archive already validates)
-    if is_slide_archive(file_path):
-        return 'slide_archive'
+    if header.startswith(b'%PDF'):
+        f.close()
+        return 'pdf'
+    if header.startswith(b'PK'):
+        f.seek(0)
+        # The pool owns f from here, so the extraction that follows reuses it
+        if _zip_pool.adopt(validated_path, f, stat):
+            return 'slide_archive'
+        return 'unknown'
 
+    f.close()
     return 'unknown'
 
 
@@ -122,55 +455,50 @@ def extract_slide_archive(file_path: Path, use_cache: bool = True) -> Optional[S
         logger.warning("Path validation failed for path=%s: %s", file_path, e)
         return None
 
-    cache_key = str(validated_path)
+    # SECURITY: Use validated_path, not original file_path
+    # lgtm[py/path-injection] - validated_path is already validated by validate_path_within_base
+    with _zip_pool.pinned(validated_path) as handle:
+        if handle is None:
+            return None
+        return _extract_pinned(handle, validated_path, use_cache)
 
-    if use_cache and cache_key in _archive_cache:
-        return _archive_cache[cache_key]
 
-    # lgtm[py/path-injection] - validated_path is already validated by validate_path_within_base
-    if not is_slide_archive(validated_path):
-        return None
+def _extract_pinned(handle: _ArchiveHandle, validated_path: Path, use_cache: bool) -> Optional[SlideArchiveData]:
+    """Extract every slide of an archive through a handle pinned by the caller."""
+    cache_key = str(validated_path)
+    if use_cache:
+        cached = _archive_cache.get(cache_key, handle.fingerprint)
+        if cached is not None:
+            return cached
 
     try:
-        # SECURITY: Use validated_path, not original file_path
-        # lgtm[py/path-injection] - validated_path is already validated by validate_path_within_base
-        with zipfile.ZipFile(validated_path, 'r') as zf:
-            # Read manifest
-            manifest_data = json.loads(zf.read('manifest.json'))
-
-            slides = []
-            for page in manifest_data.get('pages', []):
-                # Read text content
-                text_content = None
-                text_path = page.get('text', {}).get('path', '')
-                # lgtm[py/path-injection] - text_path is from within the ZIP archive, not filesystem
-                if text_path and text_path in zf.namelist():
-                    try:
-                        # lgtm[py/path-injection] - reading from within validated ZIP archive
-                        text_content = zf.read(text_path).decode('utf-8')
-                    except Exception:
-                        pass
-                
-                slide = SlideInfo(
-                    page_number=page.get('page_number', 0),
-                    image_path=page.get('image', {}).get('path', ''),
-                    text_path=text_path,
-                    width=page.get('image', {}).get('dimensions', {}).get('width', 0),
-                    height=page.get('image', {}).get('dimensions', {}).get('height', 0),
-                    has_visual_content=page.get('has_visual_content', True),
-                    text_content=text_content
-                )
-                slides.append(slide)
-            
-            archive_data = SlideArchiveData(
-                file_path=str(validated_path),
-                num_pages=manifest_data.get('num_pages', len(slides)),
-                slides=slides
+        slides = []
+        for page in handle.pages:
+            # Read text content
+            text_path = page.get('text', {}).get('path', '')
+            # lgtm[py/path-injection] - reading from within validated ZIP archive
+            text_content = handle.read_text(text_path)
+
+            slide = SlideInfo(
+                page_number=page.get('page_number', 0),
+                image_path=page.get('image', {}).get('path', ''),
+                text_path=text_path,
+                width=page.get('image', {}).get('dimensions', {}).get('width', 0),
+                height=page.get('image', {}).get('dimensions', {}).get('height', 0),
+                has_visual_content=page.get('has_visual_content', True),
+                text_content=text_content
             )
+            slides.append(slide)
+
+        archive_data = SlideArchiveData(
+            file_path=str(validated_path),
+            num_pages=handle.manifest.get('num_pages', len(slides)),
+            slides=slides
+        )
 
-            # Cache the result
-            _archive_cache[cache_key] = archive_data
-            return archive_data
+        # Cache the result
+        _archive_cache.put(cache_key, archive_data, handle.fingerprint)
+        return archive_data
 
     except Exception as e:
         logger.error("Failed to extract slide archive %s: %s", validated_path, e)
@@ -196,19 +524,15 @@ def get_slide_image(file_path: Path, page_number: int) -> Optional[Tuple[bytes,
 
     try:
         # SECURITY: Use validated_path, not original file_path
-        with zipfile.ZipFile(validated_path, 'r') as zf:
-            # Read manifest to find the image path
-            manifest_data = json.loads(zf.read('manifest.json'))
-
-            for page in manifest_data.get('pages', []):
-                if page.get('page_number') == page_number:
-                    image_path = page.get('image', {}).get('path', '')
-                    media_type = page.get('image', {}).get('media_type', 'image/jpeg')
-
-                    if image_path and image_path in zf.namelist():
-                        return zf.read(image_path), media_type
-
+        handle = _zip_pool.get(validated_path)
+        page = handle.pages_by_number.get(page_number) if handle else None
+        if page is None:
             return None
+
+        image_path = page.get('image', {}).get('path', '')
+        media_type = page.get('image', {}).get('media_type', 'image/jpeg')
+        image_bytes = _read_member(validated_path, image_path)
+        return (image_bytes, media_type) if image_bytes is not None else None
     except Exception as e:
         logger.error("Failed to get slide image from %s page %d: %s", validated_path, page_number, e)
         return None
@@ -238,6 +562,45 @@ def get_all_text(file_path: Path) -> str:
     return "\n".join(texts)
 
 
+def iter_slide_texts(file_path: Path) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, text) for each slide, reading text members lazily.
+
+    Uses the archive cache when the archive has already been extracted;
+    otherwise reads one text member per slide as the iterator is advanced,
+    so a caller that stops early never reads the rest of the archive.
+
+    Args:
+        file_path: Path to the slide archive
+
+    Yields:
+        (page_number, text) tuples; text is '' for slides without text
+    """
+    # Security: Validate path to prevent path traversal attacks (CWE-22/23/36)
+    try:
+        validated_path = validate_path_within_base(str(file_path), MATERIALS_BASE)
+    except ValueError as e:
+        logger.warning("Path validation failed for path=%s: %s", file_path, e)
+        return
+
+    # SECURITY: Use validated_path, not original file_path
+    # lgtm[py/path-injection] - validated_path is already validated by validate_path_within_base
+    # The handle stays pinned until the iterator is exhausted or closed
+    with _zip_pool.pinned(validated_path) as handle:
+        if handle is None:
+            raise ValueError(f"Not a slide archive: {validated_path.name}")
+
+        cached = _archive_cache.get(str(validated_path), handle.fingerprint)
+        if cached is not None:
+            for slide in cached.slides:
+                yield slide.page_number, slide.text_content or ''
+            return
+
+        for page in handle.pages:
+            # lgtm[py/path-injection] - text_path is from within the ZIP archive, not filesystem
+            text_content = handle.read_text(page.get('text', {}).get('path', ''))
+            yield page.get('page_number', 0), text_content or ''
+
+
 def get_slide_text(file_path: Path, page_number: int) -> Optional[str]:
     """Get text content for a specific slide.
 
@@ -248,28 +611,44 @@ def get_slide_text(file_path: Path, page_number: int) -> Optional[str]:
     Returns:
         Text content or None if not found
     """
-    archive_data = extract_slide_archive(file_path)
-    if not archive_data:
+    # Security: Validate path to prevent path traversal attacks (CWE-22/23/36)
+    try:
+        validated_path = validate_path_within_base(str(file_path), MATERIALS_BASE)
+    except ValueError as e:
+        logger.warning("Path validation failed for path=%s: %s", file_path, e)
         return None
 
-    for slide in archive_data.slides:
-        if slide.page_number == page_number:
-            return slide.text_content
+    handle = _zip_pool.get(validated_path)
+    page = handle.pages_by_number.get(page_number) if handle else None
+    if page is None:
+        return None
 
-    return None
+    cached = _archive_cache.get(str(validated_path), handle.fingerprint)
+    if cached is not None:
+        for slide in cached.slides:
+            if slide.page_number == page_number:
+                return slide.text_content
+        return None
+
+    # One member read instead of extracting the whole archive
+    data = _read_member(validated_path, page.get('text', {}).get('path', ''))
+    if data is None:
+        return None
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
 
 
 def clear_cache(file_path: Optional[Path] = None):
-    """Clear the archive cache.
+    """Clear the archive cache and close pooled archive handles.
 
     Args:
         file_path: Specific file to clear, or None to clear all
     """
-    global _archive_cache
     if file_path:
-        cache_key = str(file_path)
-        if cache_key in _archive_cache:
-            del _archive_cache[cache_key]
+        _zip_pool.discard(str(file_path))
     else:
-        _archive_cache = {}
+        _archive_cache.clear()
+        _zip_pool.close_all()
 
@@ -2,7 +2,8 @@
 
 This service manages:
 1. Storing generated study guides in Firestore for reuse
-2. Detecting duplicate study guides via content hashing
+2. Detecting duplicate study guides via content hashing, and finding guides
+   generated with the same parameters (see generation_index)
 3. Retrieving study guide history
 
 Firestore Collections:
@@ -105,7 +106,8 @@ class StudyGuidePersistenceService:
         course_id: str,
         content: str,
         week_numbers: Optional[List[int]] = None,
-        title: Optional[str] = None
+        title: Optional[str] = None,
+        generation_key: Optional[str] = None
     ) -> Dict:
         """Save a generated study guide to Firestore.
 
@@ -114,6 +116,7 @@ class StudyGuidePersistenceService:
             content: Markdown content of the study guide
             week_numbers: Week numbers covered
             title: Optional title (auto-generated if not provided)
+            generation_key: Key of the generation parameters (see generation_index)
 
         Returns:
             Dictionary with saved guide data including ID
@@ -140,6 +143,7 @@ class StudyGuidePersistenceService:
             "content": content,
             "weekNumbers": week_numbers,
             "contentHash": content_hash,
+            "generationKey": generation_key,
             "createdAt": now,
             "wordCount": word_count
         }
@@ -181,6 +185,33 @@ class StudyGuidePersistenceService:
 
         return None
 
+    async def find_by_generation_key(
+        self,
+        course_id: str,
+        generation_key: str
+    ) -> Optional[Dict]:
+        """Find a study guide generated with the same parameters.
+
+        Args:
+            course_id: Course ID
+            generation_key: Key of the generation parameters (see generation_index)
+
+        Returns:
+            Stored guide data if found, None otherwise
+        """
+        if not self._firestore:
+            return None
+
+        guides_ref = self._firestore.collection("courses").document(course_id) \
+            .collection("studyGuides")
+        query = guides_ref.where("generationKey", "==", generation_key).limit(1)
+
+        for doc in query.stream():
+            logger.info("Found study guide %s generated with the same parameters", doc.id)
+            return self._firestore_to_dict(doc.to_dict())
+
+        return None
+
     def _firestore_to_dict(self, data: Dict) -> Dict:
         """Convert Firestore document to dictionary with snake_case keys.
 
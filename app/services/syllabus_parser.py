@@ -7,10 +7,12 @@ Extracts text from PDF syllabi for AI-based course data extraction.
 import logging
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 import fitz  # PyMuPDF
 
+from app.services.materials_catalog import get_materials_catalog, refresh_materials_catalog
+
 logger = logging.getLogger(__name__)
 
 # Base path for materials (same as materials_scanner.py)
@@ -61,6 +63,25 @@ def get_syllabus_directory() -> Path:
     return MATERIALS_BASE / "Syllabus"
 
 
+# Page counts of scanned syllabi by content hash (a PDF is opened once per version)
+_page_counts: Dict[str, int] = {}
+
+
+def _page_count(pdf_file: Path, file_hash: str) -> Optional[int]:
+    """Page count of a PDF, or None if it can't be opened."""
+    if file_hash and file_hash in _page_counts:
+        return _page_counts[file_hash]
+    try:
+        doc = fitz.open(pdf_file)
+        page_count = len(doc)
+        doc.close()
+    except Exception:
+        return None
+    if file_hash:
+        _page_counts[file_hash] = page_count
+    return page_count
+
+
 def scan_syllabi(subject: Optional[str] = None) -> list[dict]:
     """
     Scan for syllabus folders in the Materials/Syllabus directory.
@@ -76,54 +97,48 @@ def scan_syllabi(subject: Optional[str] = None) -> list[dict]:
     if not syllabus_dir.exists():
         return []
 
-    results = []
-
-    # Get subjects to scan
+    # Validate subject to prevent path traversal
+    # Subject should be a simple folder name, not a path
     if subject:
-        # Validate subject to prevent path traversal
-        # Subject should be a simple folder name, not a path
         if "/" in subject or "\\" in subject or ".." in subject:
             logger.warning("Invalid subject name rejected: %s", subject)
             return []
         try:
-            # Validate the full path is within syllabus directory
-            subj_dir = validate_path_within_base(subject, syllabus_dir)
-            subjects = [subject]
+            validate_path_within_base(subject, syllabus_dir)
         except ValueError:
             logger.warning("Subject path validation failed: %s", subject)
             return []
-    else:
-        subjects = [d.name for d in syllabus_dir.iterdir() if d.is_dir()]
-
-    for subj in subjects:
-        # For user-provided subjects, we already validated above
-        # For auto-discovered subjects, they come from iterdir() so are safe
-        if subject:
-            subj_dir = syllabus_dir / subj  # Already validated
-        else:
-            subj_dir = syllabus_dir / subj
-        if not subj_dir.exists():
+
+    # The catalog only re-lists directories that changed since the last scan
+    refresh_materials_catalog()
+    catalog = get_materials_catalog()
+
+    by_subject: dict[str, list] = {}
+    for entry in catalog.entries(syllabus_dir):
+        # Only PDFs directly inside a subject folder: Syllabus/{subject}/{file}.pdf
+        parts = (catalog.root / entry.path).relative_to(syllabus_dir.resolve()).parts
+        if len(parts) != 2 or not parts[1].lower().endswith(".pdf"):
             continue
+        if subject and parts[0] != subject:
+            continue
+        by_subject.setdefault(parts[0], []).append(entry)
 
-        # Find all PDFs in this folder
+    results = []
+    for subj, entries in sorted(by_subject.items()):
         pdf_files = []
         total_pages = 0
 
-        for pdf_file in subj_dir.glob("*.pdf"):
-            try:
-                doc = fitz.open(pdf_file)
-                page_count = len(doc)
-                doc.close()
-
-                pdf_files.append({
-                    "filename": pdf_file.name,
-                    "path": str(pdf_file.relative_to(MATERIALS_BASE)),
-                    "pages": page_count
-                })
-                total_pages += page_count
-            except Exception as e:
+        for entry in entries:
+            page_count = _page_count(catalog.root / entry.path, entry.file_hash)
+            if page_count is None:
                 # Skip files that can't be opened
                 continue
+            pdf_files.append({
+                "filename": entry.name,
+                "path": entry.path,
+                "pages": page_count
+            })
+            total_pages += page_count
 
         if pdf_files:  # Only include folders with PDFs
             results.append({
@@ -2,14 +2,47 @@
 
 Caches extracted text from course materials in Firestore for faster access.
 Provides cache management, invalidation, and bulk population.
+
+Entries are validated against a (size, mtime_ns, inode) stat fingerprint; the
+MD5 content hash is only consulted when the fingerprint differs, and computed
+hashes are remembered in a local sidecar index so unchanged files are never
+re-read.
+
+Reads for many files go through ``get_cached_many`` (one multi-document read),
+and access statistics are buffered in memory and written back in batches by
+``flush_access_stats``. Newly computed hashes are likewise kept in memory and
+written to the sidecar index by ``flush_pending_writes`` (periodically, and
+on shutdown) rather than on every lookup.
+
+The cache is content-addressed: extracted text lives in one blob document per
+file hash (``material_text_blobs``), and each path entry in
+``material_text_cache`` is a lightweight pointer to its blob. Identical files
+under different courses, tiers or uploads share one extraction and one copy.
+
+Small texts are stored inline in the blob document. Larger texts are
+zlib-compressed and split across ordered documents in a ``chunks``
+subcollection; the blob then acts as a manifest (chunk count, compressed size,
+SHA-256 of the text) and the text is reassembled and verified on read, so
+texts of any size are cached without truncation.
+
+Blobs no path entry points at are deleted by ``delete_orphan_blobs``. Writers
+create a blob before its pointer and ``link_blob`` stamps the blob before
+pointing at it, so blobs written or linked within ORPHAN_BLOB_GRACE_SECONDS
+are never collected, and each candidate's references are re-checked right
+before it is deleted.
 """
 
+import asyncio
 import hashlib
+import json
 import logging
 import os
-from datetime import datetime, timezone
+import tempfile
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from google.cloud.firestore_v1 import Increment
 
@@ -18,25 +51,64 @@ from app.models.text_cache_models import (
     CacheStats,
     CachePopulateResponse,
 )
+from app.services.file_sniffer import sniff_file
 from app.services.gcp_service import get_firestore_client, is_firestore_available
 from app.services.text_extractor import (
     extract_text,
     ExtractionResult,
+    estimate_tokens,
     MATERIALS_ROOT,
 )
 
 logger = logging.getLogger(__name__)
 
-# Firestore collection name
-TEXT_CACHE_COLLECTION = "material_text_cache"
-
-# Maximum text bytes to store (to avoid Firestore document size limits)
-# Firestore max doc size is 1MB, we use 850KB to be safe (accounts for metadata)
-MAX_TEXT_BYTES = 850_000
+# Firestore collection names
+TEXT_CACHE_COLLECTION = "material_text_cache"  # Path entries (pointers to blobs)
+TEXT_BLOB_COLLECTION = "material_text_blobs"  # Extracted text keyed by file hash
+
+# Entry storage layouts: pointer to a blob, or legacy text held on the path entry
+STORAGE_BLOB = "blob"
+STORAGE_INLINE = "inline"
+STORAGE_CHUNKED = "chunked"
+
+# Fields that describe the extracted content (stored on the blob)
+BLOB_FIELDS = [
+    "file_type", "text", "text_length", "token_count", "page_count", "storage", "chunk_count",
+    "compressed_size", "text_sha256", "metadata", "extraction_success", "extraction_error",
+]
+# Blob fields needed to link a new path entry without downloading text
+BLOB_SUMMARY_FIELDS = [
+    "file_type", "text_length", "token_count", "page_count", "extraction_success", "extraction_error",
+]
+
+# Texts up to this many UTF-8 bytes are stored inline; larger ones are compressed
+# into chunk documents (Firestore max doc size is 1MB)
+MAX_INLINE_TEXT_BYTES = 32_000
+CHUNK_BYTES = 800_000  # Compressed bytes per chunk document
+CHUNKS_SUBCOLLECTION = "chunks"
+COMPRESSION_LEVEL = 6
+MAX_BATCH_BYTES = 8_000_000  # Firestore rejects write requests over ~10MB
+# Unreferenced blobs written or linked more recently than this are kept (a pointer may be on its way)
+ORPHAN_BLOB_GRACE_SECONDS = int(os.getenv("TEXT_CACHE_ORPHAN_GRACE_SECONDS", "3600"))
 
 # Chunk size for file hashing
 HASH_CHUNK_SIZE = 8192
 
+# Local sidecar index of computed file hashes, keyed by path + stat fingerprint
+HASH_INDEX_PATH = Path(os.getenv("TEXT_CACHE_HASH_INDEX", "data/text_cache/hash_index.json"))
+
+# Fields needed to decide staleness (avoids downloading cached text)
+STALENESS_FIELDS = ["file_path", "file_hash", "file_size", "file_mtime_ns", "file_inode"]
+STATS_FIELDS = [
+    "text_length", "file_size", "access_count", "extraction_success",
+    "file_type", "subject", "cached_at",
+]
+
+# Write-behind access stats
+ACCESS_STATS_FLUSH_SECONDS = float(os.getenv("TEXT_CACHE_STATS_FLUSH_SECONDS", "30"))
+ACCESS_STATS_MAX_PENDING = 400  # Flush early once this many documents are pending
+FIRESTORE_BATCH_LIMIT = 500  # Max writes per Firestore batch
+
 
 def _validate_path_within_materials(file_path: Path) -> bool:
     """Validate that a path is within the MATERIALS_ROOT directory.
@@ -81,6 +153,325 @@ def _compute_file_hash(file_path: Path) -> str:
         return ""
 
 
+def _stat_fingerprint(stat: os.stat_result) -> Tuple[int, int, int]:
+    """Cheap change-detection fingerprint: (size, mtime_ns, inode)."""
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def _file_stat_fields(stat: os.stat_result) -> Dict[str, Any]:
+    """Stat-derived TextCacheEntry fields for cache_extraction."""
+    return {
+        "file_size": stat.st_size,
+        "file_modified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+        "file_mtime_ns": stat.st_mtime_ns,
+        "file_inode": stat.st_ino,
+    }
+
+
+class FileHashIndex:
+    """Local sidecar index of file hashes keyed by stat fingerprint.
+
+    A file whose (size, mtime_ns, inode) matches its indexed fingerprint gets
+    its hash without being read, so validating the whole Materials tree costs
+    one stat() per file. The index is a JSON file shared by every worker:
+    save() merges this process's new hashes into the file's current contents
+    and replaces it atomically. A save racing another process's may drop the
+    other's new hashes, which are then just recomputed.
+    """
+
+    def __init__(self, index_path: Optional[Path] = None):
+        """Initialize the index (loaded lazily from index_path)."""
+        self.index_path = index_path or HASH_INDEX_PATH
+        self._entries: Optional[Dict[str, List[Any]]] = None
+        self._updated: Dict[str, List[Any]] = {}  # Entries hashed since the last save
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, List[Any]]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning("Ignoring unreadable hash index %s: %s", self.index_path, e)
+            return {}
+
+    def _load(self) -> Dict[str, List[Any]]:
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def file_hash(self, file_path: Path, stat: Optional[os.stat_result] = None) -> str:
+        """Get the MD5 of a file, reading it only if its stat fingerprint changed.
+
+        Args:
+            file_path: Path to file within Materials/
+            stat: Pre-fetched stat result (saves a syscall for bulk callers)
+
+        Returns:
+            MD5 hex digest or empty string on error
+        """
+        # Security: Validate path is within MATERIALS_ROOT
+        if not _validate_path_within_materials(file_path):
+            logger.warning("Attempted to hash file outside Materials: %s", file_path)
+            return ""
+
+        key = str(file_path.resolve())
+        try:
+            fingerprint = list(_stat_fingerprint(stat or file_path.stat()))
+        except OSError:
+            return ""
+
+        with self._lock:
+            indexed = self._load().get(key)
+        if indexed and indexed[:3] == fingerprint:
+            return indexed[3]
+
+        file_hash = _compute_file_hash(file_path)
+        if file_hash:
+            with self._lock:
+                self._load()[key] = self._updated[key] = fingerprint + [file_hash]
+        return file_hash
+
+    def known_hash(self, file_path: Path, stat: os.stat_result) -> Optional[str]:
+        """Get the indexed hash if the file is unchanged, without ever reading it."""
+        with self._lock:
+            indexed = self._load().get(str(file_path.resolve()))
+        if indexed and indexed[:3] == list(_stat_fingerprint(stat)):
+            return indexed[3]
+        return None
+
+    def save(self) -> None:
+        """Merge new hashes into the index file, dropping entries for deleted files."""
+        with self._lock:
+            if not self._updated:
+                return
+            entries = self._read()
+            entries.update(self._updated)
+            entries = {path: entry for path, entry in entries.items() if os.path.exists(path)}
+            tmp_path = None
+            try:
+                self.index_path.parent.mkdir(parents=True, exist_ok=True)
+                with tempfile.NamedTemporaryFile(
+                    "w", encoding="utf-8", dir=self.index_path.parent,
+                    prefix=f"{self.index_path.name}.", suffix=".tmp", delete=False,
+                ) as f:
+                    tmp_path = f.name
+                    json.dump(entries, f)
+                os.replace(tmp_path, self.index_path)
+                self._entries = entries
+                self._updated = {}
+            except Exception as e:
+                logger.warning("Failed to save hash index %s: %s", self.index_path, e)
+                if tmp_path is not None:
+                    Path(tmp_path).unlink(missing_ok=True)
+
+
+_hash_index: Optional[FileHashIndex] = None  # pylint: disable=invalid-name
+_hash_index_lock = threading.Lock()
+
+
+def get_hash_index() -> FileHashIndex:
+    """Get the shared FileHashIndex instance."""
+    global _hash_index  # pylint: disable=global-statement
+    with _hash_index_lock:
+        if _hash_index is None:
+            _hash_index = FileHashIndex()
+        return _hash_index
+
+
+def _file_matches(
+    full_path: Path,
+    cached_hash: str,
+    cached_fingerprint: Tuple[Optional[int], Optional[int], Optional[int]],
+    hash_index: FileHashIndex,
+) -> Optional[bool]:
+    """Check whether a file still matches a cache entry.
+
+    Returns True/False, or None if the file is missing. The stat fingerprint
+    decides when it matches; otherwise the (indexed) content hash decides, so
+    a touched-but-unchanged file is still valid.
+    """
+    try:
+        stat = full_path.stat()
+    except OSError:
+        return None
+    if _stat_fingerprint(stat) == cached_fingerprint:
+        return True
+    return hash_index.file_hash(full_path, stat) == cached_hash
+
+
+class AccessStatsBuffer:
+    """In-memory buffer of cache hits, written back as batched increments.
+
+    Cache reads only record a hit here; ``flush`` turns the pending hits into
+    one ``update`` per document (``Increment(n)`` + latest ``last_accessed``)
+    grouped into Firestore write batches.
+    """
+
+    def __init__(self):
+        """Initialize an empty buffer."""
+        self._pending: Dict[str, Tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, doc_id: str) -> None:
+        """Record a cache hit for a document."""
+        with self._lock:
+            count, _ = self._pending.get(doc_id, (0, None))
+            self._pending[doc_id] = (count + 1, datetime.now(timezone.utc))
+            full = len(self._pending) >= ACCESS_STATS_MAX_PENDING
+        if full:
+            self.flush()
+
+    @property
+    def pending(self) -> int:
+        """Number of documents with unwritten hits."""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Write pending hits to Firestore in batches.
+
+        Returns:
+            Number of documents updated
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        db = get_firestore_client()
+        if db is None:
+            return 0
+
+        collection = db.collection(TEXT_CACHE_COLLECTION)
+        items = list(pending.items())
+        written = 0
+        for start in range(0, len(items), FIRESTORE_BATCH_LIMIT):
+            chunk = items[start:start + FIRESTORE_BATCH_LIMIT]
+            try:
+                batch = db.batch()
+                for doc_id, (count, last_accessed) in chunk:
+                    batch.update(collection.document(doc_id), {
+                        "last_accessed": last_accessed,
+                        "access_count": Increment(count),  # Atomic server-side increment
+                    })
+                batch.commit()
+                written += len(chunk)
+            except Exception as e:
+                # Stats are best-effort; drop the chunk rather than retry forever
+                # (a batch fails as a whole, e.g. if one entry was invalidated)
+                logger.warning("Failed to flush access stats for %d entries: %s", len(chunk), e)
+        return written
+
+
+_access_stats = AccessStatsBuffer()
+
+
+def flush_access_stats() -> int:
+    """Flush buffered cache access stats to Firestore."""
+    return _access_stats.flush()
+
+
+def flush_pending_writes() -> int:
+    """Flush buffered access stats, then save new file hashes to the hash index.
+
+    Returns:
+        Number of access stats documents written
+    """
+    written = flush_access_stats()
+    get_hash_index().save()
+    return written
+
+
+async def run_access_stats_flusher(interval: float = ACCESS_STATS_FLUSH_SECONDS) -> None:
+    """Flush access stats and new file hashes every interval seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(flush_pending_writes)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Access stats flush failed: %s", e)
+
+
+def _chunk_id(index: int) -> str:
+    """Document ID of a chunk (zero-padded so IDs sort in chunk order)."""
+    return f"{index:05d}"
+
+
+def _compress_text(text: str) -> Tuple[List[bytes], int, str]:
+    """Compress text and split it into chunk-sized pieces.
+
+    Returns:
+        (chunks, compressed_size, sha256 of the UTF-8 text)
+    """
+    data = text.encode("utf-8")
+    checksum = hashlib.sha256(data).hexdigest()
+    compressed = zlib.compress(data, COMPRESSION_LEVEL)
+    chunks = [compressed[i:i + CHUNK_BYTES] for i in range(0, len(compressed), CHUNK_BYTES)]
+    return chunks, len(compressed), checksum
+
+
+def _decompress_text(chunks: List[bytes], checksum: Optional[str]) -> str:
+    """Reassemble chunked text, raising ValueError if it fails verification."""
+    data = zlib.decompress(b"".join(chunks))
+    if checksum and hashlib.sha256(data).hexdigest() != checksum:
+        raise ValueError("checksum mismatch")
+    return data.decode("utf-8")
+
+
+def _blob_document(
+    text: str,
+    file_type: str,
+    page_count: Optional[int],
+    metadata: Dict[str, Any],
+    success: bool,
+    error: Optional[str],
+) -> Tuple[Dict[str, Any], List[bytes]]:
+    """Build a blob document (and its chunks) for extracted text.
+
+    Returns:
+        (blob fields, compressed chunks; empty when the text is stored inline)
+    """
+    chunks: List[bytes] = []
+    compressed_size = None
+    checksum = None
+    # A UTF-8 char is at most 4 bytes, so short texts skip the encoded copy
+    if len(text) * 4 > MAX_INLINE_TEXT_BYTES and len(text.encode("utf-8")) > MAX_INLINE_TEXT_BYTES:
+        chunks, compressed_size, checksum = _compress_text(text)
+    blob = {
+        "file_type": file_type,
+        "text": "" if chunks else text,
+        "text_length": len(text),
+        "token_count": metadata.get("token_count", estimate_tokens(len(text))),
+        "page_count": page_count,
+        "storage": STORAGE_CHUNKED if chunks else STORAGE_INLINE,
+        "chunk_count": len(chunks),
+        "compressed_size": compressed_size,
+        "text_sha256": checksum,
+        "metadata": metadata,
+        "extraction_success": success,
+        "extraction_error": error,
+        "cached_at": datetime.now(timezone.utc),
+    }
+    return blob, chunks
+
+
+def _pointer_entry(
+    file_path: str, file_hash: str, blob: Dict[str, Any], **stat_fields: Any
+) -> TextCacheEntry:
+    """Build a path entry pointing at a blob (summary fields copied for stats)."""
+    subject, tier = _extract_subject_and_tier(file_path)
+    return TextCacheEntry(
+        file_path=file_path, file_hash=file_hash, **stat_fields,
+        file_type=blob.get("file_type", "unknown"), text="",
+        text_length=blob.get("text_length", 0), token_count=blob.get("token_count"),
+        page_count=blob.get("page_count"),
+        storage=STORAGE_BLOB, extraction_success=blob.get("extraction_success", True),
+        extraction_error=blob.get("extraction_error"), subject=subject, tier=tier,
+    )
+
+
 def _path_to_doc_id(file_path: str) -> str:
     """Convert file path to a valid Firestore document ID.
 
@@ -119,11 +510,12 @@ class TextCacheService:
         """Check if cache is available."""
         return self.db is not None
 
-    def get_cached(self, file_path: str) -> Optional[TextCacheEntry]:
+    def get_cached(self, file_path: str, include_text: bool = True) -> Optional[TextCacheEntry]:
         """Get cached text for a file.
 
         Args:
             file_path: Path relative to Materials/
+            include_text: Load the text from the blob (False returns just the path entry)
 
         Returns:
             Cached entry if exists and valid, None otherwise
@@ -132,31 +524,203 @@ class TextCacheService:
             return None
 
         doc_id = _path_to_doc_id(file_path)
-        doc_ref = self._collection.document(doc_id)
 
         try:
-            doc = doc_ref.get()
+            doc = self._collection.document(doc_id).get()
             if not doc.exists:
                 return None
 
-            data = doc.to_dict()
-            entry = TextCacheEntry(**data)
+            entry = TextCacheEntry(**doc.to_dict())
+            if include_text:
+                entry = self._resolve_text({doc_id: entry}).get(doc_id)
+                if entry is None:
+                    return None
+            # Access stats are written back in batches (see AccessStatsBuffer)
+            _access_stats.record(doc_id)
+            return entry
+        except Exception as e:
+            logger.error("Error getting cached text for %s: %s", file_path, e)
+            return None
+
+    def get_cached_many(
+        self, file_paths: List[str], include_text: bool = True
+    ) -> Dict[str, TextCacheEntry]:
+        """Get cached text for many files with a single multi-document read.
+
+        Resolving blobs and chunked text costs at most two more batched reads.
 
-            # Update access stats using atomic increment to prevent race conditions
+        Args:
+            file_paths: Paths relative to Materials/
+            include_text: Load the text from the blobs (False returns just the path entries)
+
+        Returns:
+            Mapping of file path -> cached entry (missing files are omitted)
+        """
+        if not self.is_available or not file_paths:
+            return {}
+
+        path_by_doc_id = {_path_to_doc_id(path): path for path in file_paths}
+        refs = [self._collection.document(doc_id) for doc_id in path_by_doc_id]
+
+        entries: Dict[str, TextCacheEntry] = {}
+        try:
+            for doc in self.db.get_all(refs):
+                if not doc.exists or doc.id not in path_by_doc_id:
+                    continue
+                try:
+                    entries[doc.id] = TextCacheEntry(**doc.to_dict())
+                except Exception as e:
+                    logger.warning("Skipping malformed cache entry for %s: %s", path_by_doc_id[doc.id], e)
+            if include_text:
+                entries = self._resolve_text(entries)
+        except Exception as e:
+            logger.error("Error batch-reading %d cache entries: %s", len(refs), e)
+            return {}
+
+        for doc_id in entries:
+            _access_stats.record(doc_id)
+        return {path_by_doc_id[doc_id]: entry for doc_id, entry in entries.items()}
+
+    def get_by_hash(self, file_hash: str, file_path: str) -> Optional[TextCacheEntry]:
+        """Get cached text by content hash, whichever path it was cached under.
+
+        Lets a duplicate file (another course, tier or upload) reuse an existing
+        extraction before it has a path entry of its own.
+
+        Args:
+            file_hash: MD5 of the file content
+            file_path: Path relative to Materials/ to report on the entry
+
+        Returns:
+            Entry with text, or None if no blob exists for the hash
+        """
+        if not self.is_available or not file_hash:
+            return None
+        pointer = TextCacheEntry(
+            file_path=file_path, file_hash=file_hash, file_size=0,
+            file_modified=datetime.now(timezone.utc), file_type="unknown", text="",
+            text_length=0, extraction_success=True, storage=STORAGE_BLOB,
+        )
+        try:
+            return self._resolve_text({file_hash: pointer}, log_missing=False).get(file_hash)
+        except Exception as e:
+            logger.error("Error getting cached text for hash %s: %s", file_hash, e)
+            return None
+
+    def get_blob_summaries(self, file_hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get blob summaries (no text) for content hashes with one batched read.
+
+        Returns:
+            Mapping of file hash -> summary fields, for hashes that have a blob
+        """
+        hashes = [h for h in dict.fromkeys(file_hashes) if h]
+        if not self.is_available or not hashes:
+            return {}
+        summaries: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(hashes), FIRESTORE_BATCH_LIMIT):
+            refs = [self._blobs.document(h) for h in hashes[start:start + FIRESTORE_BATCH_LIMIT]]
             try:
-                doc_ref.update({
-                    "last_accessed": datetime.now(timezone.utc),
-                    "access_count": Increment(1),  # Atomic server-side increment
-                })
-            except Exception as update_err:
-                # Stats update failure shouldn't block cache read
-                logger.warning("Failed to update access stats for %s: %s", file_path, update_err)
+                for doc in self.db.get_all(refs, field_paths=BLOB_SUMMARY_FIELDS):
+                    if doc.exists:
+                        summaries[doc.id] = doc.to_dict()
+            except Exception as e:
+                logger.error("Error batch-reading %d blob summaries: %s", len(refs), e)
+        return summaries
 
-            return entry
+    def load_text(self, entry: TextCacheEntry) -> Optional[TextCacheEntry]:
+        """Load the text of an entry fetched with include_text=False.
+
+        Returns:
+            The entry with text filled in, or None if its blob/chunks are missing or corrupt
+        """
+        doc_id = _path_to_doc_id(entry.file_path)
+        try:
+            return self._resolve_text({doc_id: entry}).get(doc_id)
         except Exception as e:
-            logger.error("Error getting cached text for %s: %s", file_path, e)
+            logger.error("Error loading cached text for %s: %s", entry.file_path, e)
             return None
 
+    @property
+    def _blobs(self):
+        return self.db.collection(TEXT_BLOB_COLLECTION)
+
+    @staticmethod
+    def _chunks(owner_ref):
+        return owner_ref.collection(CHUNKS_SUBCOLLECTION)
+
+    def _resolve_text(
+        self, entries: Dict[str, TextCacheEntry], log_missing: bool = True
+    ) -> Dict[str, TextCacheEntry]:
+        """Fill in text for pointer and chunked entries with batched reads.
+
+        Pointer entries are merged with their blob (one read for all blobs),
+        then chunked text is reassembled and verified (one read for all chunks).
+        Entries whose blob or chunks are missing or corrupt are dropped, so
+        callers treat them as cache misses.
+
+        Args:
+            entries: key -> entry (the key is the path document ID for legacy entries)
+            log_missing: Warn about pointers whose blob is missing
+        """
+        loaded = dict(entries)
+        owners = {}  # key -> document holding the entry's chunks
+
+        pointers = {key: entry for key, entry in entries.items() if entry.storage == STORAGE_BLOB}
+        if pointers:
+            blob_refs = {entry.file_hash: self._blobs.document(entry.file_hash) for entry in pointers.values()}
+            blobs = {doc.id: doc.to_dict() for doc in self.db.get_all(list(blob_refs.values())) if doc.exists}
+            for key, entry in pointers.items():
+                blob = blobs.get(entry.file_hash)
+                if blob is None:
+                    if log_missing:
+                        logger.warning("Cache entry %s points at missing blob %s", entry.file_path, entry.file_hash)
+                    del loaded[key]
+                    continue
+                loaded[key] = entry.model_copy(update={f: blob[f] for f in BLOB_FIELDS if f in blob})
+                owners[key] = blob_refs[entry.file_hash]
+
+        chunked = {
+            key: entry for key, entry in loaded.items()
+            if entry.storage == STORAGE_CHUNKED and not entry.text
+        }
+        if not chunked:
+            return loaded
+
+        # Legacy chunked entries own their chunks; blobs may be shared by several keys
+        owner_ids: Dict[str, str] = {}
+        refs = []
+        for key, entry in chunked.items():
+            owner = owners.get(key) or self._collection.document(key)
+            if owner.id not in owner_ids.values():
+                refs.extend(self._chunks(owner).document(_chunk_id(i)) for i in range(entry.chunk_count))
+            owner_ids[key] = owner.id
+
+        parts: Dict[str, Dict[int, bytes]] = {}
+        for doc in self.db.get_all(refs):
+            if doc.exists:
+                data = doc.to_dict()
+                parts.setdefault(data["entry"], {})[data["index"]] = data["data"]
+
+        texts: Dict[str, Optional[str]] = {}
+        for key, entry in chunked.items():
+            owner_id = owner_ids[key]
+            if owner_id not in texts:
+                chunks = parts.get(owner_id, {})
+                try:
+                    if len(chunks) != entry.chunk_count:
+                        raise ValueError(f"{len(chunks)} of {entry.chunk_count} chunks present")
+                    texts[owner_id] = _decompress_text(
+                        [chunks[index] for index in range(entry.chunk_count)], entry.text_sha256
+                    )
+                except Exception as e:
+                    logger.warning("Discarding unreadable chunked cache entry %s: %s", entry.file_path, e)
+                    texts[owner_id] = None
+            if texts[owner_id] is None:
+                del loaded[key]
+            else:
+                entry.text = texts[owner_id]
+        return loaded
+
     def is_cache_valid(self, file_path: str, entry: TextCacheEntry) -> bool:
         """Check if cached entry is still valid (file hasn't changed).
 
@@ -174,12 +738,33 @@ class TextCacheService:
             logger.warning("Attempted to validate cache for path outside Materials: %s", file_path)
             return False
 
-        if not full_path.exists():
+        try:
+            stat = full_path.stat()
+        except OSError:
             return False
 
-        # Check file hash
-        current_hash = _compute_file_hash(full_path)
-        return current_hash == entry.file_hash
+        # Fast path: unchanged stat fingerprint means unchanged content
+        if _stat_fingerprint(stat) == (entry.file_size, entry.file_mtime_ns, entry.file_inode):
+            return True
+
+        # Check file hash (served from the sidecar index if already computed)
+        hash_index = get_hash_index()
+        current_hash = hash_index.file_hash(full_path, stat)
+        hash_index.save()
+        if current_hash != entry.file_hash:
+            return False
+
+        # Content unchanged but fingerprint stale (touched, copied, legacy entry):
+        # record the new fingerprint so the next check skips the hash
+        self._refresh_fingerprint(file_path, stat)
+        return True
+
+    def _refresh_fingerprint(self, file_path: str, stat: os.stat_result) -> None:
+        """Update an entry's stat fingerprint after its content hash was confirmed."""
+        try:
+            self._collection.document(_path_to_doc_id(file_path)).update(_file_stat_fields(stat))
+        except Exception as e:
+            logger.warning("Failed to refresh fingerprint for %s: %s", file_path, e)
 
     def cache_extraction(
         self,
@@ -188,48 +773,206 @@ class TextCacheService:
         file_hash: str,
         file_size: int,
         file_modified: datetime,
+        file_mtime_ns: Optional[int] = None,
+        file_inode: Optional[int] = None,
     ) -> bool:
-        """Cache an extraction result."""
+        """Cache an extraction result: write the content blob, then the path pointer.
+
+        Pass the stat taken *before* hashing (see _file_stat_fields) so a file
+        edited mid-hash fails the fingerprint check instead of passing it.
+        """
         if not self.is_available:
             return False
+        if not file_hash:
+            logger.warning("Not caching %s: no content hash", file_path)
+            return False
 
-        # Truncate text if too long (use byte-based truncation for UTF-8 safety)
-        text = result.text
-        text_bytes = text.encode('utf-8')
-        if len(text_bytes) > MAX_TEXT_BYTES:
-            logger.warning(
-                "Truncating cached text for %s: %d bytes exceeds limit of %d bytes",
-                file_path, len(text_bytes), MAX_TEXT_BYTES
-            )
-            # Truncate safely on character boundaries
-            text = text_bytes[:MAX_TEXT_BYTES].decode('utf-8', errors='ignore')
-            text = text + "\n\n[Text truncated for storage...]"
-
-        subject, tier = _extract_subject_and_tier(file_path)
-
-        entry = TextCacheEntry(
-            file_path=file_path, file_hash=file_hash, file_size=file_size,
-            file_modified=file_modified, file_type=result.file_type, text=text,
-            text_length=len(result.text), page_count=result.metadata.get("num_pages"),
-            metadata=result.metadata, extraction_success=result.success,
-            extraction_error=result.error, subject=subject, tier=tier,
+        blob, chunks = _blob_document(
+            text=result.text, file_type=result.file_type,
+            page_count=result.metadata.get("num_pages", len(result.pages) if result.pages else None),
+            metadata=result.metadata, success=result.success, error=result.error,
+        )
+        entry = _pointer_entry(
+            file_path, file_hash, blob,
+            file_size=file_size, file_modified=file_modified,
+            file_mtime_ns=file_mtime_ns, file_inode=file_inode,
         )
 
-        doc_id = _path_to_doc_id(file_path)
         try:
-            self._collection.document(doc_id).set(entry.model_dump())
+            self._write_document(self._blobs.document(file_hash), blob, chunks)
+            self._write_document(self._collection.document(_path_to_doc_id(file_path)), entry.model_dump(), [])
+            if chunks:
+                logger.debug(
+                    "Cached %s as %d chunk(s): %d chars -> %d compressed bytes",
+                    file_path, len(chunks), len(result.text), blob["compressed_size"],
+                )
             return True
         except Exception as e:
             logger.error("Failed to cache extraction for %s: %s", file_path, e)
             return False
 
+    def link_blob(
+        self, file_path: str, file_hash: str, blob_summary: Dict[str, Any], stat: os.stat_result
+    ) -> bool:
+        """Point a path entry at an existing blob (a duplicate of a cached file).
+
+        Args:
+            file_path: Path relative to Materials/
+            file_hash: Content hash (the blob's ID)
+            blob_summary: Blob fields from get_blob_summaries or get_by_hash
+            stat: Stat of the file taken before hashing
+        """
+        if not self.is_available:
+            return False
+        entry = _pointer_entry(file_path, file_hash, blob_summary, **_file_stat_fields(stat))
+        try:
+            # Fails if the blob was collected; stamps it so it isn't while the pointer is written
+            self._blobs.document(file_hash).update({"linked_at": datetime.now(timezone.utc)})
+            self._write_document(self._collection.document(_path_to_doc_id(file_path)), entry.model_dump(), [])
+            return True
+        except Exception as e:
+            logger.error("Failed to link %s to cached blob %s: %s", file_path, file_hash, e)
+            return False
+
+    def _write_document(self, doc_ref, data: Dict[str, Any], chunks: List[bytes]) -> None:
+        """Write chunk documents, then the document itself, then drop leftover chunks.
+
+        Chunks and document share a batch when they fit; if a multi-batch write
+        is interrupted, the checksum makes readers reject the mixed state.
+        """
+        chunks_ref = self._chunks(doc_ref)
+        leftover = [ref for ref in chunks_ref.list_documents() if ref.id >= _chunk_id(len(chunks))]
+
+        batch = self.db.batch()
+        batch_writes = 0
+        batch_bytes = 0
+        for index, chunk in enumerate(chunks):
+            if batch_writes and (
+                batch_bytes + len(chunk) > MAX_BATCH_BYTES or batch_writes >= FIRESTORE_BATCH_LIMIT - 1
+            ):
+                batch.commit()
+                batch = self.db.batch()
+                batch_writes = batch_bytes = 0
+            batch.set(chunks_ref.document(_chunk_id(index)), {"entry": doc_ref.id, "index": index, "data": chunk})
+            batch_writes += 1
+            batch_bytes += len(chunk)
+        batch.set(doc_ref, data)
+        batch.commit()
+
+        self._delete_refs(leftover)
+
+    def _delete_refs(self, refs: List[Any]) -> None:
+        """Delete documents in batches."""
+        for start in range(0, len(refs), FIRESTORE_BATCH_LIMIT):
+            batch = self.db.batch()
+            for ref in refs[start:start + FIRESTORE_BATCH_LIMIT]:
+                batch.delete(ref)
+            batch.commit()
+
+    def _delete_entry(self, doc_ref) -> None:
+        """Delete a document and any chunk documents under it."""
+        self._delete_refs(list(self._chunks(doc_ref).list_documents()))
+        doc_ref.delete()
+
+    def delete_orphan_blobs(self, min_age_seconds: int = ORPHAN_BLOB_GRACE_SECONDS) -> int:
+        """Delete blobs that no path entry points at any more.
+
+        Path invalidation only removes pointers (a blob may be shared), so this
+        runs after bulk invalidation to reclaim storage.
+
+        Args:
+            min_age_seconds: Keep blobs written or linked more recently than
+                this, since their pointer may not be written yet
+        """
+        if not self.is_available:
+            return 0
+        removed = 0
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=min_age_seconds)
+        try:
+            referenced = {
+                data.get("file_hash")
+                for data in (doc.to_dict() for doc in self._collection.select(["file_hash", "storage"]).stream())
+                if data.get("storage") == STORAGE_BLOB
+            }
+            for doc in self._blobs.select(["cached_at", "linked_at"]).stream():
+                if doc.id in referenced:
+                    continue
+                data = doc.to_dict()
+                if any(data.get(field) and data[field] > cutoff for field in ("cached_at", "linked_at")):
+                    continue
+                # A pointer may have been written since the entries were listed
+                if any(True for _ in self._collection.where("file_hash", "==", doc.id).limit(1).stream()):
+                    continue
+                self._delete_entry(doc.reference)
+                removed += 1
+        except Exception as e:
+            logger.error("Error deleting orphaned text blobs: %s", e)
+        return removed
+
+    def migrate_to_content_addressed(self, dry_run: bool = True) -> Dict[str, int]:
+        """Convert legacy path entries (text on the entry) into blob pointers.
+
+        Each distinct file hash gets one blob; duplicates just become pointers.
+
+        Args:
+            dry_run: Only count what would change
+
+        Returns:
+            Migration statistics
+        """
+        stats = {"total": 0, "already_migrated": 0, "migrated": 0, "blobs_created": 0,
+                 "deduplicated": 0, "errors": 0}
+        if not self.is_available:
+            return stats
+
+        existing_blobs = {doc.id for doc in self._blobs.select([]).stream()}
+
+        for doc in self._collection.stream():
+            stats["total"] += 1
+            try:
+                entry = TextCacheEntry(**doc.to_dict())
+                if entry.storage == STORAGE_BLOB:
+                    stats["already_migrated"] += 1
+                    continue
+
+                if entry.file_hash in existing_blobs:
+                    stats["deduplicated"] += 1
+                else:
+                    stats["blobs_created"] += 1
+                    if not dry_run:
+                        entry = self._resolve_text({doc.id: entry}).get(doc.id)
+                        if entry is None:
+                            raise ValueError("legacy text unreadable")
+                        blob, chunks = _blob_document(
+                            text=entry.text, file_type=entry.file_type, page_count=entry.page_count,
+                            metadata=entry.metadata, success=entry.extraction_success,
+                            error=entry.extraction_error,
+                        )
+                        self._write_document(self._blobs.document(entry.file_hash), blob, chunks)
+                existing_blobs.add(entry.file_hash)
+
+                if not dry_run:
+                    pointer = entry.model_copy(update={
+                        "text": "", "storage": STORAGE_BLOB, "chunk_count": 0,
+                        "compressed_size": None, "text_sha256": None, "metadata": {},
+                    })
+                    # Also deletes the legacy chunks held under the path entry
+                    self._write_document(doc.reference, pointer.model_dump(), [])
+                stats["migrated"] += 1
+            except Exception as e:
+                stats["errors"] += 1
+                logger.error("Failed to migrate cache entry %s: %s", doc.id, e)
+
+        logger.info("Text cache migration (dry_run=%s): %s", dry_run, stats)
+        return stats
+
     def invalidate(self, file_path: str) -> bool:
         """Invalidate (delete) a cached entry."""
         if not self.is_available:
             return False
         doc_id = _path_to_doc_id(file_path)
         try:
-            self._collection.document(doc_id).delete()
+            self._delete_entry(self._collection.document(doc_id))
             return True
         except Exception as e:
             logger.error("Failed to invalidate cache for %s: %s", file_path, e)
@@ -241,11 +984,11 @@ class TextCacheService:
             return 0
         count = 0
         try:
-            docs = self._collection.stream()
+            docs = self._collection.select(["file_path"]).stream()
             for doc in docs:
                 data = doc.to_dict()
                 if data.get("file_path", "").startswith(folder_path):
-                    doc.reference.delete()
+                    self._delete_entry(doc.reference)
                     count += 1
         except Exception as e:
             logger.error("Error invalidating folder cache %s: %s", folder_path, e)
@@ -263,7 +1006,7 @@ class TextCacheService:
         newest: Optional[datetime] = None
 
         try:
-            docs = self._collection.stream()
+            docs = self._collection.select(STATS_FIELDS).stream()
             for doc in docs:
                 data = doc.to_dict()
                 stats.total_entries += 1
@@ -300,26 +1043,30 @@ class TextCacheService:
 
         return stats
 
+    def _is_stale(self, data: Dict[str, Any], hash_index: FileHashIndex) -> bool:
+        """Whether a cached document's source file is missing or changed."""
+        full_path = MATERIALS_ROOT / data.get("file_path", "")
+        matches = _file_matches(
+            full_path, data.get("file_hash", ""),
+            (data.get("file_size"), data.get("file_mtime_ns"), data.get("file_inode")),
+            hash_index,
+        )
+        return not matches
+
     def count_stale_entries(self) -> int:
         """Count entries where the source file has changed."""
         if not self.is_available:
             return 0
         stale_count = 0
+        hash_index = get_hash_index()
         try:
-            docs = self._collection.stream()
+            docs = self._collection.select(STALENESS_FIELDS).stream()
             for doc in docs:
-                data = doc.to_dict()
-                file_path = data.get("file_path", "")
-                full_path = MATERIALS_ROOT / file_path
-                if not full_path.exists():
-                    stale_count += 1
-                    continue
-                cached_hash = data.get("file_hash", "")
-                current_hash = _compute_file_hash(full_path)
-                if cached_hash != current_hash:
+                if self._is_stale(doc.to_dict(), hash_index):
                     stale_count += 1
         except Exception as e:
             logger.error("Error counting stale entries: %s", e)
+        hash_index.save()
         return stale_count
 
     def invalidate_stale(self) -> int:
@@ -327,23 +1074,18 @@ class TextCacheService:
         if not self.is_available:
             return 0
         removed = 0
+        hash_index = get_hash_index()
         try:
-            docs = self._collection.stream()
+            docs = self._collection.select(STALENESS_FIELDS).stream()
             for doc in docs:
-                data = doc.to_dict()
-                file_path = data.get("file_path", "")
-                full_path = MATERIALS_ROOT / file_path
-                is_stale = not full_path.exists()
-                if not is_stale:
-                    cached_hash = data.get("file_hash", "")
-                    current_hash = _compute_file_hash(full_path)
-                    if cached_hash != current_hash:
-                        is_stale = True
-                if is_stale:
-                    doc.reference.delete()
+                if self._is_stale(doc.to_dict(), hash_index):
+                    self._delete_entry(doc.reference)
                     removed += 1
         except Exception as e:
             logger.error("Error invalidating stale entries: %s", e)
+        hash_index.save()
+        if removed:
+            self.delete_orphan_blobs()
         return removed
 
 
@@ -356,15 +1098,19 @@ def extract_text_cached(
     file_path: Path,
     use_cache: bool = True,
     *,
+    force_refresh: bool = False,
     _skip_path_validation: bool = False
 ) -> ExtractionResult:
     """Extract text with caching support.
 
     This is the main entry point that wraps extract_text with caching.
+    A file without a path entry reuses the cached text of identical content
+    cached under another path before falling back to extraction.
     
     Args:
         file_path: Path to the file
         use_cache: Whether to use the cache
+        force_refresh: Re-extract and overwrite the cached text
         _skip_path_validation: Internal flag for testing only. DO NOT use in production.
     """
     # Normalize path to be relative to Materials
@@ -385,44 +1131,67 @@ def extract_text_cached(
     cache = get_text_cache_service()
 
     # Try to get from cache
-    if use_cache and cache.is_available:
+    if use_cache and cache.is_available and not force_refresh:
         cached = cache.get_cached(rel_path)
         if cached and cache.is_cache_valid(rel_path, cached):
             logger.debug("Cache hit for %s", rel_path)
-            return ExtractionResult(
-                file_path=cached.file_path, file_type=cached.file_type,
-                text=cached.text, success=cached.extraction_success,
-                error=cached.extraction_error, metadata=cached.metadata, pages=None,
-            )
+            return _entry_to_result(cached)
 
-    # Extract fresh
+    # Extract fresh; the descriptor is reused by extract_text (no second sniff)
     full_path = MATERIALS_ROOT / rel_path
-    if not full_path.exists():
+    hash_index = get_hash_index()
+    descriptor = sniff_file(full_path, hash_index)
+    if descriptor is None:
         return ExtractionResult(
             file_path=rel_path, file_type="unknown", text="", success=False,
             error=f"File not found: {rel_path}",
         )
 
+    if not (use_cache and cache.is_available):
+        return extract_text(full_path, _skip_path_validation=_skip_path_validation)
+
+    stat = descriptor.stat
+    file_hash = descriptor.file_hash or hash_index.file_hash(full_path, stat)
+    hash_index.save()
+
+    # Identical content cached under another path: link instead of extracting
+    if not force_refresh:
+        duplicate = cache.get_by_hash(file_hash, rel_path)
+        if duplicate is not None:
+            logger.debug("Content hit for %s (blob %s)", rel_path, file_hash)
+            cache.link_blob(rel_path, file_hash, duplicate.model_dump(include=set(BLOB_SUMMARY_FIELDS)), stat)
+            return _entry_to_result(duplicate)
+
     result = extract_text(full_path, _skip_path_validation=_skip_path_validation)
 
     # Cache the result
-    if use_cache and cache.is_available and result.success:
-        stat = full_path.stat()
-        file_hash = _compute_file_hash(full_path)
-        file_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+    if result.success:
         cache.cache_extraction(
-            file_path=rel_path, result=result, file_hash=file_hash,
-            file_size=stat.st_size, file_modified=file_modified,
+            file_path=rel_path, result=result, file_hash=file_hash, **_file_stat_fields(stat),
         )
 
     return result
 
 
+def _entry_to_result(entry: TextCacheEntry) -> ExtractionResult:
+    """Convert a cache entry (with text loaded) to an ExtractionResult."""
+    return ExtractionResult(
+        file_path=entry.file_path, file_type=entry.file_type,
+        text=entry.text, success=entry.extraction_success,
+        error=entry.extraction_error, metadata=entry.metadata, pages=None,
+    )
+
+
 def populate_cache_for_folder(
     folder_path: str, recursive: bool = True, force_refresh: bool = False,
 ) -> CachePopulateResponse:
-    """Populate cache for all files in a folder."""
-    from app.services.text_extractor import extract_all_from_folder
+    """Populate cache for all files in a folder.
+
+    Cache validity is checked in the calling thread; files that need
+    (re-)extraction are handed to the process-pool extraction engine and the
+    results are written to the cache as they come back.
+    """
+    from app.services.extraction_pool import extract_many
 
     full_path = MATERIALS_ROOT / folder_path
 
@@ -452,34 +1221,103 @@ def populate_cache_for_folder(
     failed = 0
     errors: List[Dict[str, str]] = []
 
+    # Check which files are already cached and valid (stat fingerprint, no reads)
+    hash_index = get_hash_index()
+    existing_entries: Dict[str, TextCacheEntry] = {}
+    if not force_refresh and cache.is_available:
+        rel_paths = [str(f.relative_to(MATERIALS_ROOT)) for f in files]
+        for start in range(0, len(rel_paths), FIRESTORE_BATCH_LIMIT):
+            # Manifests only: validity never needs the (possibly chunked) text
+            existing_entries.update(cache.get_cached_many(
+                rel_paths[start:start + FIRESTORE_BATCH_LIMIT], include_text=False
+            ))
+
+    to_extract: List[Path] = []
     for file_path in files:
         try:
             rel_path = str(file_path.relative_to(MATERIALS_ROOT))
-
-            # Check if already cached and valid
-            if not force_refresh and cache.is_available:
-                existing = cache.get_cached(rel_path)
-                if existing and cache.is_cache_valid(rel_path, existing):
-                    skipped += 1
-                    continue
-
-            result = extract_text_cached(file_path, use_cache=True)
-
-            if result.success:
-                cached += 1
-            else:
-                failed += 1
-                errors.append({"file": rel_path, "error": result.error or "Unknown error"})
+            existing = existing_entries.get(rel_path)
+            if existing and cache.is_cache_valid(rel_path, existing):
+                skipped += 1
+                continue
+            to_extract.append(file_path)
         except Exception as e:
             failed += 1
             errors.append({"file": str(file_path), "error": str(e)})
 
+    # Group by content so identical files are extracted once; content that
+    # already has a blob (cached under another path) is only linked
+    stats: Dict[Path, os.stat_result] = {}
+    groups: Dict[str, List[Path]] = {}
+    for file_path in to_extract:
+        try:
+            stats[file_path] = file_path.stat()
+        except OSError as e:
+            # Deleted or moved since the folder was listed
+            failed += 1
+            errors.append({"file": str(file_path.relative_to(MATERIALS_ROOT)), "error": str(e)})
+            continue
+        file_hash = hash_index.file_hash(file_path, stats[file_path])
+        groups.setdefault(file_hash or str(file_path), []).append(file_path)
+    hash_index.save()
+
+    deduplicated = 0
+    blobs = {} if force_refresh else cache.get_blob_summaries(list(groups))
+    representatives: List[Path] = []
+    for file_hash, group in groups.items():
+        if file_hash in blobs:
+            for file_path in group:
+                rel_path = str(file_path.relative_to(MATERIALS_ROOT))
+                if cache.link_blob(rel_path, file_hash, blobs[file_hash], stats[file_path]):
+                    deduplicated += 1
+                else:
+                    failed += 1
+                    errors.append({"file": rel_path, "error": "Failed to link cached text"})
+        else:
+            representatives.append(group[0])
+
+    # Extract one file per distinct content in parallel; results come back in input order
+    results = extract_many(representatives)
+
+    for representative, result in zip(representatives, results):
+        file_hash = hash_index.file_hash(representative, stats[representative])
+        group = groups[file_hash or str(representative)]
+        rel_paths = [str(f.relative_to(MATERIALS_ROOT)) for f in group]
+        if not result.success:
+            failed += len(group)
+            errors.extend({"file": rel_path, "error": result.error or "Unknown error"} for rel_path in rel_paths)
+            continue
+        try:
+            if not cache.cache_extraction(
+                file_path=rel_paths[0], result=result,
+                file_hash=file_hash, **_file_stat_fields(stats[representative]),
+            ):
+                failed += len(group)
+                errors.extend({"file": rel_path, "error": "Failed to cache extraction"} for rel_path in rel_paths)
+                continue
+            cached += 1
+            summary = {
+                "file_type": result.file_type, "text_length": len(result.text),
+                "token_count": result.metadata.get("token_count"),
+                "page_count": result.metadata.get("num_pages"),
+                "extraction_success": True, "extraction_error": None,
+            }
+            for file_path, rel_path in zip(group[1:], rel_paths[1:]):
+                if cache.link_blob(rel_path, file_hash, summary, stats[file_path]):
+                    deduplicated += 1
+                else:
+                    failed += 1
+                    errors.append({"file": rel_path, "error": "Failed to link cached text"})
+        except Exception as e:
+            failed += len(group)
+            errors.extend({"file": rel_path, "error": str(e)} for rel_path in rel_paths)
+
     logger.info(
-        "Cache population complete for %s: %d cached, %d skipped, %d failed",
-        folder_path, cached, skipped, failed
+        "Cache population complete for %s: %d cached, %d deduplicated, %d skipped, %d failed",
+        folder_path, cached, deduplicated, skipped, failed
     )
 
     return CachePopulateResponse(
-        total_files=total_files, cached=cached, skipped=skipped,
+        total_files=total_files, cached=cached, deduplicated=deduplicated, skipped=skipped,
         failed=failed, errors=errors[:100],
     )
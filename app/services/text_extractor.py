@@ -15,10 +15,15 @@ file, enabling future LLM functionality for quizzes, summaries, etc.
 import json
 import logging
 import mimetypes
+import threading
+from array import array
+from io import BytesIO
+from collections.abc import Sequence
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple, Union
 from dataclasses import dataclass, field
 
+from app.services.file_sniffer import sniff_file
 from app.services.syllabus_parser import validate_path_within_base, MATERIALS_BASE
 
 # Alias for backward compatibility - MATERIALS_ROOT is used by text_cache_service
@@ -26,8 +31,105 @@ MATERIALS_ROOT = MATERIALS_BASE
 
 logger = logging.getLogger(__name__)
 
+# PyMuPDF is not thread-safe, so PDF parsing is serialized when extraction
+# runs on executor threads (see FilesAPIService.get_course_materials_with_text)
+PYMUPDF_LOCK = threading.RLock()
 
-@dataclass
+# Rough estimation: ~4 characters per token for English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(char_count: int) -> int:
+    """Estimate the token count of a text from its length (CHARS_PER_TOKEN chars each)."""
+    return -(-char_count // CHARS_PER_TOKEN)
+
+
+class PageIndex(Sequence):
+    """Per-page views over the single text buffer of an extraction.
+
+    Stores only page numbers, start offsets and char counts (packed arrays)
+    and slices page text out of the shared buffer on access, so a multi-page
+    document holds its text once instead of once in ``text`` and again in
+    every page dict. Items are the same dicts the old ``pages`` list held:
+    ``{'page_number', 'text', 'char_count'}``.
+    """
+    __slots__ = ('_text', '_numbers', '_starts', '_lengths')
+
+    def __init__(self, text: str, numbers: array, starts: array, lengths: array):
+        self._text = text
+        self._numbers = numbers
+        self._starts = starts
+        self._lengths = lengths
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return {
+            'page_number': self._numbers[index],
+            'text': self.page_text(index),
+            'char_count': self._lengths[index],
+        }
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (PageIndex, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PageIndex({len(self)} pages)"
+
+    def page_text(self, index: int) -> str:
+        """Text of the page at a 0-based position."""
+        start = self._starts[index]
+        return self._text[start:start + self._lengths[index]]
+
+    @property
+    def char_counts(self) -> List[int]:
+        """Char count of every page, without materializing page text."""
+        return self._lengths.tolist()
+
+    @property
+    def spans(self) -> List[Tuple[int, int, int]]:
+        """(page_number, start, char_count) of every page within the text buffer."""
+        return list(zip(self._numbers, self._starts, self._lengths))
+
+
+def join_pages(
+    pages: Iterable[Tuple[int, str]], skip_empty: bool = False
+) -> Tuple[str, PageIndex]:
+    """Join pages into one '--- Page N ---' text buffer and index the page spans.
+
+    Args:
+        pages: (page_number, page_text) pairs
+        skip_empty: Leave pages without text out of the buffer (they are
+            still indexed, as zero-length spans)
+
+    Returns:
+        (text, PageIndex over that text)
+    """
+    numbers, starts, lengths = array('l'), array('q'), array('q')
+    parts: List[str] = []
+    offset = 0
+    for page_number, page_text in pages:
+        numbers.append(page_number)
+        lengths.append(len(page_text))
+        if skip_empty and not page_text:
+            starts.append(offset)
+            continue
+        header = f"--- Page {page_number} ---\n"
+        if parts:
+            offset += 1  # '\n' separator
+        starts.append(offset + len(header))
+        parts.append(header + page_text)
+        offset += len(header) + len(page_text)
+    text = '\n'.join(parts)
+    return text, PageIndex(text, numbers, starts, lengths)
+
+
+@dataclass(slots=True)
 class ExtractionResult:
     """Result of text extraction from a file."""
     file_path: str
@@ -36,7 +138,8 @@ class ExtractionResult:
     success: bool
     error: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
-    pages: Optional[List[Dict[str, Any]]] = None  # For multi-page documents
+    # For multi-page documents: a PageIndex over ``text`` (or a plain list of page dicts)
+    pages: Optional[Union[PageIndex, List[Dict[str, Any]]]] = None
 
 
 def get_file_extension(file_path: Path) -> str:
@@ -47,96 +150,31 @@ def get_file_extension(file_path: Path) -> str:
 def detect_file_type(file_path: Path) -> str:
     """Detect the actual file type, not just by extension.
 
-    Returns one of: 'pdf', 'slide_archive', 'image', 'docx', 'markdown',
-                    'text', 'html', 'json', 'unknown'
-    """
-    if not file_path.exists():
-        return 'unknown'
-
-    ext = get_file_extension(file_path)
-
-    # Check for slide archive (ZIP with manifest.json disguised as PDF)
-    if ext == 'pdf':
-        from app.services.slide_archive import is_slide_archive, get_file_type as get_pdf_type
-        pdf_type = get_pdf_type(file_path)
-        if pdf_type == 'slide_archive':
-            return 'slide_archive'
-        elif pdf_type == 'pdf':
-            return 'pdf'
-        return 'unknown'
-
-    # Image types
-    if ext in ('png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp'):
-        return 'image'
-
-    # Office documents
-    if ext == 'docx':
-        return 'docx'
-    if ext == 'pptx':
-        return 'pptx'
-
-    # Text-based formats
-    if ext == 'md':
-        return 'markdown'
-    if ext == 'txt':
-        return 'text'
-    if ext == 'html' or ext == 'htm':
-        return 'html'
-    if ext == 'json':
-        return 'json'
-
-    return 'unknown'
+    Uses the cached single-pass sniffer (see file_sniffer), so repeat
+    detection for an unchanged file does no reads.
 
+    Returns one of: 'pdf', 'slide_archive', 'image', 'docx', 'pptx',
+                    'markdown', 'text', 'html', 'json', 'unknown'
+    """
+    descriptor = sniff_file(file_path)
+    return descriptor.file_type if descriptor else 'unknown'
 
-def extract_text(file_path: Path | str, *, _skip_path_validation: bool = False) -> ExtractionResult:
-    """Extract text from any supported file type.
 
-    This is the main entry point for text extraction.
+def _validate_extraction_path(file_path: Path | str, skip_validation: bool) -> Path:
+    """Resolve a path for extraction, ensuring it is within MATERIALS_BASE.
 
     Args:
         file_path: Path to the file (absolute or relative to project root)
-        _skip_path_validation: Internal flag for testing only. DO NOT use in production code.
-            When True, skips the path validation check. This is only for unit tests
-            that need to test extraction from temporary directories.
+        skip_validation: Internal testing flag (see extract_text)
 
     Returns:
-        ExtractionResult with extracted text and metadata
+        Resolved absolute path
+
+    Raises:
+        ValueError: If the path is outside the Materials directory
+        RuntimeError: If skip_validation is used outside of tests
     """
-    # Security: Validate path to prevent path traversal attacks (CWE-22/23/36)
-    # Path validation can be skipped for testing only (underscore prefix indicates internal use)
-    if not _skip_path_validation:
-        try:
-            # Convert to Path object
-            path_obj = Path(file_path)
-
-            # If path is already absolute and within MATERIALS_BASE, use it directly
-            if path_obj.is_absolute():
-                resolved_path = path_obj.resolve()
-                try:
-                    resolved_path.relative_to(MATERIALS_BASE.resolve())
-                    # Path is already within MATERIALS_BASE
-                    validated_path = resolved_path
-                except ValueError:
-                    # Path is absolute but not within MATERIALS_BASE - reject it
-                    raise ValueError(f"Absolute path outside Materials directory: {file_path}")
-            else:
-                # Path is relative - validate it's within MATERIALS_BASE
-                validated_path = validate_path_within_base(str(file_path), MATERIALS_BASE)
-        except ValueError as e:
-            logger.error(
-                "Path validation failed - file_path=%s, MATERIALS_BASE=%s, error=%s",
-                file_path,
-                MATERIALS_BASE,
-                e
-            )
-            return ExtractionResult(
-                file_path=str(file_path),
-                file_type='unknown',
-                text='',
-                success=False,
-                error=f'Path validation failed: {e}'
-            )
-    else:
+    if skip_validation:
         # SECURITY: Enforce that _skip_path_validation is only used in test environment
         import os
         if os.getenv('PYTEST_CURRENT_TEST') is None and os.getenv('TESTING') != 'true':
@@ -147,20 +185,44 @@ def extract_text(file_path: Path | str, *, _skip_path_validation: bool = False)
             )
         logger.debug("Path validation SKIPPED for testing: %s", file_path)
         # codeql[py/path-injection] - _skip_path_validation is internal testing flag only (enforced above)
-        validated_path = Path(file_path).resolve()
+        return Path(file_path).resolve()
 
-    # codeql[py/path-injection] - validated_path is sanitized above (or testing-only path)
-    if not validated_path.exists():
-        return ExtractionResult(
-            file_path=str(validated_path),
-            file_type='unknown',
-            text='',
-            success=False,
-            error=f'File not found: {validated_path}'
-        )
+    # Convert to Path object
+    path_obj = Path(file_path)
 
-    file_type = detect_file_type(validated_path)
+    # If path is already absolute and within MATERIALS_BASE, use it directly
+    if path_obj.is_absolute():
+        resolved_path = path_obj.resolve()
+        try:
+            resolved_path.relative_to(MATERIALS_BASE.resolve())
+            # Path is already within MATERIALS_BASE
+            return resolved_path
+        except ValueError:
+            # Path is absolute but not within MATERIALS_BASE - reject it
+            raise ValueError(f"Absolute path outside Materials directory: {file_path}")
+
+    # Path is relative - validate it's within MATERIALS_BASE
+    return validate_path_within_base(str(file_path), MATERIALS_BASE)
+
+
+def _path_validation_failure(file_path: Path | str, error: ValueError) -> ExtractionResult:
+    logger.error(
+        "Path validation failed - file_path=%s, MATERIALS_BASE=%s, error=%s",
+        file_path,
+        MATERIALS_BASE,
+        error
+    )
+    return ExtractionResult(
+        file_path=str(file_path),
+        file_type='unknown',
+        text='',
+        success=False,
+        error=f'Path validation failed: {error}'
+    )
 
+
+def _run_extractor(validated_path: Path, file_type: str) -> ExtractionResult:
+    """Run the full (non-streaming) extractor for a detected file type."""
     extractors = {
         'pdf': extract_from_pdf,
         'slide_archive': extract_from_slide_archive,
@@ -183,7 +245,7 @@ def extract_text(file_path: Path | str, *, _skip_path_validation: bool = False)
         )
 
     try:
-        return extractor(validated_path)
+        return _add_token_counts(extractor(validated_path))
     except Exception as e:
         logger.error("Text extraction failed for %s: %s", validated_path, e)
         return ExtractionResult(
@@ -195,6 +257,313 @@ def extract_text(file_path: Path | str, *, _skip_path_validation: bool = False)
         )
 
 
+def _add_token_counts(result: ExtractionResult) -> ExtractionResult:
+    """Record token estimates for the text (and each page) in the result metadata.
+
+    They travel with the result into every cache tier, so token budgeting
+    never needs the text itself.
+    """
+    if not result.success:
+        return result
+    result.metadata['token_count'] = estimate_tokens(len(result.text))
+    if isinstance(result.pages, PageIndex):
+        result.metadata['page_token_counts'] = [estimate_tokens(n) for n in result.pages.char_counts]
+    elif result.pages:
+        result.metadata['page_token_counts'] = [
+            estimate_tokens(page.get('char_count', len(page.get('text') or ''))) for page in result.pages
+        ]
+    return result
+
+
+def extract_text(file_path: Path | str, *, _skip_path_validation: bool = False) -> ExtractionResult:
+    """Extract text from any supported file type.
+
+    This is the main entry point for text extraction.
+
+    Args:
+        file_path: Path to the file (absolute or relative to project root)
+        _skip_path_validation: Internal flag for testing only. DO NOT use in production code.
+            When True, skips the path validation check. This is only for unit tests
+            that need to test extraction from temporary directories.
+
+    Returns:
+        ExtractionResult with extracted text and metadata
+    """
+    # Security: Validate path to prevent path traversal attacks (CWE-22/23/36)
+    # Path validation can be skipped for testing only (underscore prefix indicates internal use)
+    try:
+        validated_path = _validate_extraction_path(file_path, _skip_path_validation)
+    except ValueError as e:
+        return _path_validation_failure(file_path, e)
+
+    # codeql[py/path-injection] - validated_path is sanitized above (or testing-only path)
+    descriptor = sniff_file(validated_path)
+    if descriptor is None:
+        return ExtractionResult(
+            file_path=str(validated_path),
+            file_type='unknown',
+            text='',
+            success=False,
+            error=f'File not found: {validated_path}'
+        )
+
+    return _run_extractor(validated_path, descriptor.file_type)
+
+
+# ============================================================================
+# Streaming Extraction
+# ============================================================================
+
+def _char_budget(max_chars: Optional[int], max_tokens: Optional[int]) -> Optional[int]:
+    """Combine a character and token budget into a single character budget."""
+    budgets = []
+    if max_chars is not None:
+        budgets.append(max_chars)
+    if max_tokens is not None:
+        budgets.append(max_tokens * CHARS_PER_TOKEN)
+    return min(budgets) if budgets else None
+
+
+def iter_pages(file_path: Path, file_type: str) -> Optional[Iterator[Tuple[int, str]]]:
+    """Get a lazy page iterator for file types that support streaming.
+
+    Pages are parsed only as the iterator is advanced, so a caller that stops
+    early never pays for the rest of the document.
+
+    Args:
+        file_path: Validated absolute path to the file
+        file_type: Type returned by detect_file_type
+
+    Returns:
+        Iterator of (page_number, page_text), or None if the type can't be streamed
+    """
+    if file_type == 'pdf':
+        return _iter_pdf_pages(file_path)
+    if file_type == 'slide_archive':
+        from app.services.slide_archive import iter_slide_texts
+        return iter_slide_texts(file_path)
+    if file_type == 'docx':
+        return _iter_docx_blocks(file_path)
+    return None
+
+
+def extract_text_streaming(
+    file_path: Path | str,
+    *,
+    max_chars: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    _skip_path_validation: bool = False,
+) -> ExtractionResult:
+    """Extract text page by page, stopping once a character/token budget is met.
+
+    PDFs, slide archives and DOCX files are parsed lazily; other types fall back
+    to full extraction and are cut to the budget. The text format matches
+    extract_text (including OCR of scanned PDF pages), so the result is a
+    prefix of the full extraction.
+
+    Args:
+        file_path: Path to the file (absolute or relative to project root)
+        max_chars: Stop after this many characters
+        max_tokens: Stop after roughly this many tokens (CHARS_PER_TOKEN chars each)
+        _skip_path_validation: Internal flag for testing only. DO NOT use in production code.
+
+    Returns:
+        ExtractionResult; metadata['truncated'] is True if the budget cut the text
+    """
+    try:
+        validated_path = _validate_extraction_path(file_path, _skip_path_validation)
+    except ValueError as e:
+        return _path_validation_failure(file_path, e)
+
+    # codeql[py/path-injection] - validated_path is sanitized above (or testing-only path)
+    if not validated_path.exists():
+        return ExtractionResult(
+            file_path=str(validated_path),
+            file_type='unknown',
+            text='',
+            success=False,
+            error=f'File not found: {validated_path}'
+        )
+
+    budget = _char_budget(max_chars, max_tokens)
+    file_type = detect_file_type(validated_path)
+    pages = iter_pages(validated_path, file_type)
+    ocr_pages: List[int] = []
+    if pages is not None and file_type == 'pdf':
+        pages = _ocr_pdf_page_stream(validated_path, pages, ocr_pages)
+
+    if pages is None or budget is None:
+        result = _run_extractor(validated_path, file_type)
+        if budget is not None and result.success:
+            truncated = len(result.text) > budget
+            result.text = result.text[:budget]
+            result.pages = None
+            result.metadata.pop('page_token_counts', None)
+            result.metadata.update({
+                'truncated': truncated,
+                'char_budget': budget,
+                'token_count': estimate_tokens(len(result.text)),
+            })
+        return result
+
+    # DOCX blocks are paragraphs; PDFs and slides get page markers
+    separator = '\n\n' if file_type == 'docx' else '\n'
+    parts: List[str] = []
+    total = 0
+    pages_read = 0
+    truncated = False
+
+    try:
+        for page_number, page_text in pages:
+            if total >= budget:
+                # There is more content past the budget
+                truncated = True
+                break
+            pages_read += 1
+            if file_type == 'docx':
+                part = page_text
+            elif file_type == 'slide_archive' and not page_text:
+                continue  # Slides without text are omitted, as in get_all_text
+            else:
+                part = f"--- Page {page_number} ---\n{page_text}"
+            total += len(part) + (len(separator) if parts else 0)
+            parts.append(part)
+    except Exception as e:
+        logger.error("Streaming extraction failed for %s: %s", validated_path, e)
+        return ExtractionResult(
+            file_path=str(validated_path),
+            file_type=file_type,
+            text='',
+            success=False,
+            error=f'Streaming extraction failed: {e}'
+        )
+    finally:
+        pages.close()
+
+    text = separator.join(parts)
+    if len(text) > budget:
+        text = text[:budget]
+        truncated = True
+
+    metadata: Dict[str, Any] = {
+        'pages_read': pages_read,
+        'truncated': truncated,
+        'char_budget': budget,
+        'token_count': estimate_tokens(len(text)),
+    }
+    if not truncated and file_type != 'docx':
+        metadata['num_pages'] = pages_read
+    if ocr_pages:
+        metadata['ocr_pages'] = ocr_pages
+
+    return ExtractionResult(
+        file_path=str(validated_path),
+        file_type=file_type,
+        text=text,
+        success=True,
+        metadata=metadata,
+    )
+
+
+def _iter_pdf_pages(file_path: Path) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, text) for each page of a real PDF."""
+    import fitz  # PyMuPDF
+
+    with PYMUPDF_LOCK:
+        doc = fitz.open(str(file_path))
+    try:
+        for page_index in range(doc.page_count):
+            # Lock per page so other threads can interleave between pages
+            with PYMUPDF_LOCK:
+                text = doc.load_page(page_index).get_text()
+            yield page_index + 1, text
+    finally:
+        with PYMUPDF_LOCK:
+            doc.close()
+
+
+def _ocr_pdf_page_stream(
+    file_path: Path, pages: Iterator[Tuple[int, str]], ocr_pages: List[int]
+) -> Iterator[Tuple[int, str]]:
+    """OCR the scanned pages of a streamed PDF, as extract_from_pdf does.
+
+    Runs of pages without a text layer are held back until a page with text
+    (or OCR_MAX_WORKERS empty pages) arrives and are then OCR'd as one batch,
+    so a budgeted reader stops at most one batch past its budget. Numbers of
+    pages that got OCR text are appended to ocr_pages.
+    """
+    from app.services import ocr_service
+
+    batch: List[Tuple[int, str]] = []
+
+    def flush() -> Iterator[Tuple[int, str]]:
+        ocr_texts = _ocr_empty_pdf_pages(file_path, batch)
+        ocr_pages.extend(sorted(ocr_texts))
+        for number, text in batch:
+            yield number, ocr_texts.get(number, text)
+        batch.clear()
+
+    try:
+        for page_number, text in pages:
+            if text.strip():
+                yield from flush()
+                yield page_number, text
+                continue
+            batch.append((page_number, text))
+            if len(batch) >= ocr_service.OCR_MAX_WORKERS:
+                yield from flush()
+        yield from flush()
+    finally:
+        pages.close()
+
+
+def _iter_docx_blocks(file_path: Path) -> Iterator[Tuple[int, str]]:
+    """Yield paragraphs and table rows of a DOCX without loading the whole tree.
+
+    Parses word/document.xml incrementally. Table rows are emitted as
+    ' | '-joined cells. Files that aren't real DOCX archives are yielded as a
+    single text block (matching extract_from_docx's fallback).
+    """
+    import zipfile
+    from xml.etree.ElementTree import iterparse
+
+    with open(file_path, 'rb') as f:
+        header = f.read(4)
+    if header[:2] != b'PK':
+        result = extract_from_text(file_path)
+        if result.text:
+            yield 1, result.text
+        return
+
+    word_ns = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+    block_number = 0
+    table_depth = 0
+
+    with zipfile.ZipFile(file_path) as zf, zf.open('word/document.xml') as xml_file:
+        for event, elem in iterparse(xml_file, events=('start', 'end')):
+            if elem.tag == f'{word_ns}tbl':
+                table_depth += 1 if event == 'start' else -1
+                continue
+            if event != 'end':
+                continue
+
+            text = None
+            if elem.tag == f'{word_ns}p' and table_depth == 0:
+                text = ''.join(t.text or '' for t in elem.iter(f'{word_ns}t'))
+                elem.clear()
+            elif elem.tag == f'{word_ns}tr' and table_depth == 1:
+                cells = (
+                    ''.join(t.text or '' for t in cell.iter(f'{word_ns}t')).strip()
+                    for cell in elem.iter(f'{word_ns}tc')
+                )
+                text = ' | '.join(cell for cell in cells if cell)
+                elem.clear()
+
+            if text and text.strip():
+                block_number += 1
+                yield block_number, text
+
+
 # ============================================================================
 # Individual Extractors
 # ============================================================================
@@ -202,7 +571,7 @@ def extract_text(file_path: Path | str, *, _skip_path_validation: bool = False)
 def extract_from_pdf(file_path: Path) -> ExtractionResult:
     """Extract text from a real PDF using PyMuPDF."""
     try:
-        import fitz  # PyMuPDF
+        import fitz  # noqa: F401 - PyMuPDF availability check
     except ImportError:
         return ExtractionResult(
             file_path=str(file_path),
@@ -213,27 +582,23 @@ def extract_from_pdf(file_path: Path) -> ExtractionResult:
         )
 
     try:
-        doc = fitz.open(str(file_path))
-        pages = []
-        all_text = []
-
-        for page_num, page in enumerate(doc, 1):
-            text = page.get_text()
-            pages.append({
-                'page_number': page_num,
-                'text': text,
-                'char_count': len(text)
-            })
-            all_text.append(f"--- Page {page_num} ---\n{text}")
+        page_texts = list(_iter_pdf_pages(file_path))
+        metadata: Dict[str, Any] = {'num_pages': len(page_texts)}
 
-        doc.close()
+        # Scanned pages have no text layer; OCR just those pages
+        ocr_texts = _ocr_empty_pdf_pages(file_path, page_texts)
+        if ocr_texts:
+            page_texts = [(number, ocr_texts.get(number, text)) for number, text in page_texts]
+            metadata['ocr_pages'] = sorted(ocr_texts)
+
+        text, pages = join_pages(page_texts)
 
         return ExtractionResult(
             file_path=str(file_path),
             file_type='pdf',
-            text='\n'.join(all_text),
+            text=text,
             success=True,
-            metadata={'num_pages': len(pages)},
+            metadata=metadata,
             pages=pages
         )
     except Exception as e:
@@ -246,9 +611,50 @@ def extract_from_pdf(file_path: Path) -> ExtractionResult:
         )
 
 
+def _render_pdf_pages(file_path: Path, page_numbers: List[int], dpi: int) -> List[bytes]:
+    """Render PDF pages (1-based numbers) to PNG bytes."""
+    import fitz  # PyMuPDF
+
+    images = []
+    with PYMUPDF_LOCK:
+        doc = fitz.open(str(file_path))
+    try:
+        for page_number in page_numbers:
+            with PYMUPDF_LOCK:
+                pixmap = doc.load_page(page_number - 1).get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+                images.append(pixmap.tobytes("png"))
+    finally:
+        with PYMUPDF_LOCK:
+            doc.close()
+    return images
+
+
+def _ocr_empty_pdf_pages(file_path: Path, page_texts: List[Tuple[int, str]]) -> Dict[int, str]:
+    """OCR the pages of a PDF whose text layer is empty.
+
+    Returns:
+        page_number -> OCR text, for pages that produced text
+    """
+    from app.services import ocr_service
+
+    empty = [number for number, text in page_texts if not text.strip()]
+    if not empty or not ocr_service.PDF_OCR_FALLBACK or not ocr_service.is_ocr_available():
+        return {}
+
+    try:
+        images = _render_pdf_pages(file_path, empty, ocr_service.PDF_OCR_RENDER_DPI)
+        texts = ocr_service.ocr_images(images)
+    except Exception as e:
+        logger.warning("OCR fallback failed for %s: %s", file_path, e)
+        return {}
+
+    logger.info("OCR'd %d scanned page(s) of %s", len(empty), file_path.name)
+    return {number: text for number, text in zip(empty, texts) if text}
+
+
 def extract_from_slide_archive(file_path: Path) -> ExtractionResult:
     """Extract text from a slide archive (ZIP with JPEG slides + text files)."""
-    from app.services.slide_archive import extract_slide_archive, get_all_text
+    from app.services.slide_archive import extract_slide_archive
 
     archive_data = extract_slide_archive(file_path)
     if not archive_data:
@@ -260,37 +666,33 @@ def extract_from_slide_archive(file_path: Path) -> ExtractionResult:
             error='Failed to extract slide archive'
         )
 
-    # Build pages list
-    pages = []
-    for slide in archive_data.slides:
-        pages.append({
-            'page_number': slide.page_number,
-            'text': slide.text_content or '',
-            'char_count': len(slide.text_content or '')
-        })
-
-    all_text = get_all_text(file_path)
+    # Same text as get_all_text; slides without text are indexed but not joined
+    text, pages = join_pages(
+        ((slide.page_number, slide.text_content or '') for slide in archive_data.slides),
+        skip_empty=True,
+    )
 
     return ExtractionResult(
         file_path=str(file_path),
         file_type='slide_archive',
-        text=all_text,
+        text=text,
         success=True,
         metadata={'num_pages': archive_data.num_pages},
         pages=pages
     )
 
 
-
 def extract_from_image(file_path: Path) -> ExtractionResult:
     """Extract text from an image using OCR.
 
     Uses pytesseract if available, falls back to basic error message.
+    The image is downscaled and binarized first, and the result is cached
+    by image hash (see ocr_service).
     For production, consider Google Cloud Vision API for better accuracy.
     """
     try:
         from PIL import Image
-        import pytesseract
+        import pytesseract  # noqa: F401 - availability check
     except ImportError as e:
         return ExtractionResult(
             file_path=str(file_path),
@@ -300,11 +702,16 @@ def extract_from_image(file_path: Path) -> ExtractionResult:
             error=f'OCR dependencies not installed: {e}. Install with: pip install pytesseract Pillow'
         )
 
+    from app.services.ocr_service import ocr_images
+
     try:
-        image = Image.open(file_path)
+        image_bytes = file_path.read_bytes()
+        image = Image.open(BytesIO(image_bytes))
 
         # Run OCR
-        text = pytesseract.image_to_string(image)
+        text = ocr_images([image_bytes], max_workers=1)[0]
+        if text is None:
+            raise RuntimeError('tesseract could not process the image')
 
         # Get image metadata
         width, height = image.size
@@ -312,7 +719,7 @@ def extract_from_image(file_path: Path) -> ExtractionResult:
         return ExtractionResult(
             file_path=str(file_path),
             file_type='image',
-            text=text.strip(),
+            text=text,
             success=True,
             metadata={
                 'width': width,
@@ -553,6 +960,9 @@ def extract_all_from_folder(
 ) -> List[ExtractionResult]:
     """Extract text from all supported files in a folder.
 
+    Files are extracted in parallel by the process-pool extraction engine
+    (see extraction_pool.extract_many) with per-file timeouts and crash isolation.
+
     Args:
         folder_path: Path to the folder
         recursive: Whether to search subdirectories
@@ -561,22 +971,20 @@ def extract_all_from_folder(
     Returns:
         List of ExtractionResult for each file
     """
-    results = []
+    from app.services.extraction_pool import extract_many
 
     if not folder_path.exists():
-        return results
+        return []
 
     pattern = '**/*' if recursive else '*'
 
-    for file_path in folder_path.glob(pattern):
-        if file_path.is_file():
-            # Check if it's a supported type
-            file_type = detect_file_type(file_path)
-            if file_type != 'unknown':
-                result = extract_text(file_path, _skip_path_validation=_skip_path_validation)
-                results.append(result)
+    # Only supported types are sent to the workers
+    file_paths = [
+        file_path for file_path in sorted(folder_path.glob(pattern))
+        if file_path.is_file() and detect_file_type(file_path) != 'unknown'
+    ]
 
-    return results
+    return extract_many(file_paths, _skip_path_validation=_skip_path_validation)
 
 
 def get_extraction_summary(results: List[ExtractionResult]) -> Dict[str, Any]:
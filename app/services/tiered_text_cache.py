@@ -0,0 +1,537 @@
+"""Tiered Extracted-Text Cache for the generation path.
+
+Sits in front of text extraction so repeat quiz, study guide, flashcard and
+tutor requests for the same materials never touch the parser:
+
+1. In-process LRU (bounded by entry count and total characters)
+2. Local on-disk store (one JSON file per fingerprint under TEXT_CACHE_DIR)
+3. Firestore ``material_text_cache`` collection (via TextCacheService)
+
+All tiers are keyed by the file's content fingerprint (MD5 of the bytes), so
+an edited file can never be served from a stale entry. Lookups fall through
+the tiers in order and promote hits into the faster tiers.
+
+Callers that only need a prefix of the text pass ``max_chars``; misses are
+then extracted with the streaming extractor, which stops parsing once the
+budget is met. Such partial entries are only served to callers whose budget
+they cover, and are never written to Firestore.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from app.services.text_extractor import (
+    ExtractionResult,
+    MATERIALS_ROOT,
+    estimate_tokens,
+    extract_text,
+    extract_text_streaming,
+)
+
+logger = logging.getLogger(__name__)
+
+# Cache Configuration
+DISK_CACHE_DIR = Path(os.getenv("TEXT_CACHE_DIR", "data/text_cache"))
+MEMORY_CACHE_MAX_ENTRIES = int(os.getenv("TEXT_CACHE_MEMORY_MAX_ENTRIES", "256"))
+MEMORY_CACHE_MAX_CHARS = int(os.getenv("TEXT_CACHE_MEMORY_MAX_CHARS", "20000000"))  # ~20M chars
+CHANGE_LOG_MAX_ENTRIES = int(os.getenv("TEXT_CACHE_CHANGE_LOG_MAX_ENTRIES", "4096"))  # Fingerprints tracked by changed_since
+
+TIER_MEMORY = "memory"
+TIER_DISK = "disk"
+TIER_FIRESTORE = "firestore"
+
+
+@dataclass
+class TierCounters:
+    """Hit/miss counters for a single cache tier."""
+    hits: int = 0
+    misses: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return counters with a derived hit rate."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+
+def _covers(result: ExtractionResult, max_chars: Optional[int]) -> bool:
+    """Whether a cached result holds enough text for a caller's budget."""
+    if not result.metadata.get("truncated"):
+        return True
+    return max_chars is not None and result.metadata.get("char_budget", 0) >= max_chars
+
+
+def _strip_pages(result: ExtractionResult) -> ExtractionResult:
+    """Return a copy of a result without the per-page list (saves memory)."""
+    return ExtractionResult(
+        file_path=result.file_path, file_type=result.file_type, text=result.text,
+        success=result.success, error=result.error, metadata=dict(result.metadata),
+        pages=None,
+    )
+
+
+class TieredTextCache:
+    """Memory -> disk -> Firestore cache of extraction results keyed by fingerprint."""
+
+    def __init__(
+        self,
+        disk_dir: Optional[Path] = None,
+        max_entries: int = MEMORY_CACHE_MAX_ENTRIES,
+        max_chars: int = MEMORY_CACHE_MAX_CHARS,
+        use_firestore: bool = True,
+        max_changes: int = CHANGE_LOG_MAX_ENTRIES,
+    ):
+        """Initialize the tiered cache.
+
+        Args:
+            disk_dir: Directory for the on-disk tier (default: data/text_cache)
+            max_entries: Maximum number of results kept in memory
+            max_chars: Maximum total characters kept in memory
+            use_firestore: Whether to consult the Firestore tier
+            max_changes: Maximum number of fingerprints whose change version is kept
+        """
+        self.disk_dir = disk_dir or DISK_CACHE_DIR
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.use_firestore = use_firestore
+        self.max_changes = max_changes
+
+        self._memory: "OrderedDict[str, ExtractionResult]" = OrderedDict()
+        self._memory_chars = 0
+        self._lock = threading.Lock()
+        self._firestore_cache = None
+
+        self.counters: Dict[str, TierCounters] = {
+            TIER_MEMORY: TierCounters(),
+            TIER_DISK: TierCounters(),
+            TIER_FIRESTORE: TierCounters(),
+        }
+        self.extractions = 0
+        # Bumped on every write or invalidation; _changed_at records the version
+        # at which each fingerprint last changed, so a derived index can tell
+        # whether the text it was built from changed (see changed_since). It is
+        # an LRU of max_changes fingerprints; _pruned_version is the latest
+        # change version that was dropped from it
+        self.version = 0
+        self._changed_at: "OrderedDict[str, int]" = OrderedDict()
+        self._pruned_version = 0
+
+    # ========================================================================
+    # Public API
+    # ========================================================================
+
+    def get_or_extract(self, file_path: Path, max_chars: Optional[int] = None) -> ExtractionResult:
+        """Return the extraction result for a file, extracting only on a full miss.
+
+        Args:
+            file_path: Absolute path to a file within Materials/
+            max_chars: Only the first max_chars characters are needed; misses
+                stop parsing once the budget is met
+
+        Returns:
+            ExtractionResult (``pages`` is not populated on cache hits)
+        """
+        from app.services.text_cache_service import get_hash_index
+
+        # Served from the sidecar hash index unless the file's stat changed (new
+        # hashes are written back by the periodic flush, see flush_pending_writes)
+        fingerprint = get_hash_index().file_hash(file_path)
+        if not fingerprint:
+            # Could not fingerprint (outside Materials or unreadable) - don't cache
+            return self._extract(file_path, max_chars)
+
+        rel_path = self._relative_path(file_path)
+
+        cached = self.get(fingerprint, rel_path, max_chars=max_chars)
+        if cached is not None:
+            return cached
+
+        result = self._extract(file_path, max_chars)
+        with self._lock:
+            self.extractions += 1
+
+        if result.success:
+            self.put(fingerprint, result, rel_path=rel_path, file_path=file_path)
+
+        return result
+
+    def is_cached(self, file_path: Path, max_chars: Optional[int] = None) -> bool:
+        """Whether a lookup for the file would be served without extracting.
+
+        A hit in a slower tier is promoted, as with any lookup.
+        """
+        from app.services.text_cache_service import get_hash_index
+
+        fingerprint = get_hash_index().file_hash(file_path)
+        if not fingerprint:
+            return False
+        return self.get(fingerprint, self._relative_path(file_path), max_chars=max_chars) is not None
+
+    def get(
+        self,
+        fingerprint: str,
+        rel_path: Optional[str] = None,
+        max_chars: Optional[int] = None,
+    ) -> Optional[ExtractionResult]:
+        """Look up a fingerprint in each tier, promoting hits into faster tiers.
+
+        Args:
+            fingerprint: Content fingerprint of the file
+            rel_path: Path relative to Materials/ (needed for the Firestore tier)
+            max_chars: Budget the caller needs; partial entries below it are misses
+
+        Returns:
+            Cached ExtractionResult or None on a full miss
+        """
+        result = self._memory_get(fingerprint)
+        if result is not None and _covers(result, max_chars):
+            self._count(TIER_MEMORY, hit=True)
+            return result
+        self._count(TIER_MEMORY, hit=False)
+
+        result = self._disk_get(fingerprint)
+        if result is not None and _covers(result, max_chars):
+            self._count(TIER_DISK, hit=True)
+            self._memory_put(fingerprint, result)
+            return result
+        self._count(TIER_DISK, hit=False)
+
+        if self.use_firestore and rel_path:
+            result = self._firestore_get(fingerprint, rel_path)
+            if result is not None:
+                self._count(TIER_FIRESTORE, hit=True)
+                self._disk_put(fingerprint, result)
+                self._memory_put(fingerprint, result)
+                return result
+            self._count(TIER_FIRESTORE, hit=False)
+
+        return None
+
+    def token_count(self, file_path: Path) -> Optional[int]:
+        """Get the stored token estimate of a file's cached text, without extracting.
+
+        Args:
+            file_path: Absolute path to a file within Materials/
+
+        Returns:
+            Estimated tokens, or None if the file has no cached extraction
+        """
+        from app.services.text_cache_service import get_hash_index
+
+        fingerprint = get_hash_index().file_hash(file_path)
+        if not fingerprint:
+            return None
+
+        cached = self.get(fingerprint, self._relative_path(file_path))
+        if cached is None:
+            return None
+        return cached.metadata.get("token_count", estimate_tokens(len(cached.text)))
+
+    def prefetch(self, file_paths: Iterable[Path]) -> int:
+        """Warm the memory tier for many files with one Firestore batch read.
+
+        Files already held in memory or on disk are left alone; the rest are
+        fetched with a single multi-document read instead of one RPC each.
+
+        Args:
+            file_paths: Absolute paths to files within Materials/
+
+        Returns:
+            Number of entries loaded from Firestore
+        """
+        if not self.use_firestore:
+            return 0
+
+        from app.services.text_cache_service import get_hash_index
+
+        hash_index = get_hash_index()
+        wanted: Dict[str, str] = {}  # rel_path -> fingerprint
+        for file_path in file_paths:
+            rel_path = self._relative_path(file_path)
+            fingerprint = hash_index.file_hash(file_path) if rel_path else ""
+            if not fingerprint:
+                continue
+            with self._lock:
+                in_memory = fingerprint in self._memory
+            if not in_memory and not self._disk_path(fingerprint).exists():
+                wanted[rel_path] = fingerprint
+
+        cache = self._get_firestore_cache()
+        if not wanted or not cache.is_available:
+            return 0
+
+        loaded = 0
+        for rel_path, entry in cache.get_cached_many(list(wanted)).items():
+            fingerprint = wanted[rel_path]
+            result = self._entry_result(entry, fingerprint)
+            if result is not None:
+                self._disk_put(fingerprint, result)
+                self._memory_put(fingerprint, result)
+                loaded += 1
+        return loaded
+
+    def put(
+        self,
+        fingerprint: str,
+        result: ExtractionResult,
+        rel_path: Optional[str] = None,
+        file_path: Optional[Path] = None,
+    ) -> None:
+        """Write a successful extraction result through every tier.
+
+        Partial (budget-truncated) results are kept locally only, so the
+        Firestore cache always holds complete extractions.
+        """
+        result = _strip_pages(result)
+        with self._lock:
+            self._mark_changed_locked(fingerprint)
+        self._memory_put(fingerprint, result)
+        self._disk_put(fingerprint, result)
+        if (
+            self.use_firestore and rel_path and file_path is not None
+            and not result.metadata.get("truncated")
+        ):
+            self._firestore_put(fingerprint, result, rel_path, file_path)
+
+    def invalidate(self, fingerprint: str) -> None:
+        """Remove a fingerprint from the memory and disk tiers."""
+        with self._lock:
+            self._mark_changed_locked(fingerprint)
+            cached = self._memory.pop(fingerprint, None)
+            if cached is not None:
+                self._memory_chars -= len(cached.text)
+        try:
+            self._disk_path(fingerprint).unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning("Failed to remove disk cache entry %s: %s", fingerprint, e)
+
+    def changed_since(self, version: int, fingerprints: Iterable[str]) -> bool:
+        """Whether any of the fingerprints was written or invalidated after version.
+
+        A fingerprint no longer tracked counts as changed if anything dropped
+        from the change log changed after version.
+        """
+        with self._lock:
+            return any(
+                self._changed_at.get(fingerprint, self._pruned_version) > version
+                for fingerprint in fingerprints
+            )
+
+    def _mark_changed_locked(self, fingerprint: str) -> None:
+        self.version += 1
+        self._changed_at.pop(fingerprint, None)
+        self._changed_at[fingerprint] = self.version
+        while len(self._changed_at) > self.max_changes:
+            _, pruned = self._changed_at.popitem(last=False)
+            self._pruned_version = pruned
+
+    def _count(self, tier: str, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.counters[tier].hits += 1
+            else:
+                self.counters[tier].misses += 1
+
+    def apply_catalog_changes(self, events: Iterable[Any]) -> int:
+        """Drop entries for the old content of modified and deleted files.
+
+        Consumes materials catalog ChangeEvents; added files need nothing
+        since entries are keyed by content.
+
+        Returns:
+            Number of fingerprints invalidated
+        """
+        stale = {event.previous_hash for event in events if event.previous_hash}
+        for fingerprint in stale:
+            self.invalidate(fingerprint)
+        return len(stale)
+
+    def clear_memory(self) -> None:
+        """Drop every entry from the in-process tier."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_chars = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-tier counters and memory tier occupancy."""
+        with self._lock:
+            tiers = {name: counters.as_dict() for name, counters in self.counters.items()}
+            extractions = self.extractions
+            memory_entries = len(self._memory)
+            memory_chars = self._memory_chars
+        return {
+            "tiers": tiers,
+            "extractions": extractions,
+            "memory_entries": memory_entries,
+            "memory_chars": memory_chars,
+            "memory_max_entries": self.max_entries,
+            "memory_max_chars": self.max_chars,
+            "disk_dir": str(self.disk_dir),
+        }
+
+    # ========================================================================
+    # Memory Tier
+    # ========================================================================
+
+    def _memory_get(self, fingerprint: str) -> Optional[ExtractionResult]:
+        with self._lock:
+            result = self._memory.get(fingerprint)
+            if result is not None:
+                # Move to end to mark as recently used (LRU)
+                self._memory.move_to_end(fingerprint)
+            return result
+
+    def _memory_put(self, fingerprint: str, result: ExtractionResult) -> None:
+        size = len(result.text)
+        if size > self.max_chars:
+            return  # Never let one document evict the whole tier
+
+        with self._lock:
+            previous = self._memory.pop(fingerprint, None)
+            if previous is not None:
+                self._memory_chars -= len(previous.text)
+
+            self._memory[fingerprint] = result
+            self._memory_chars += size
+
+            # Evict least recently used entries until within both bounds
+            while self._memory and (
+                len(self._memory) > self.max_entries or self._memory_chars > self.max_chars
+            ):
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_chars -= len(evicted.text)
+
+    # ========================================================================
+    # Disk Tier
+    # ========================================================================
+
+    def _disk_path(self, fingerprint: str) -> Path:
+        return self.disk_dir / f"{fingerprint}.json"
+
+    def _disk_get(self, fingerprint: str) -> Optional[ExtractionResult]:
+        path = self._disk_path(fingerprint)
+        if not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return ExtractionResult(
+                file_path=data["file_path"], file_type=data["file_type"],
+                text=data["text"], success=data.get("success", True),
+                error=data.get("error"), metadata=data.get("metadata", {}),
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Discarding unreadable disk cache entry %s: %s", path, e)
+            return None
+
+    def _disk_put(self, fingerprint: str, result: ExtractionResult) -> None:
+        path = self._disk_path(fingerprint)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps({
+                "file_path": result.file_path,
+                "file_type": result.file_type,
+                "text": result.text,
+                "success": result.success,
+                "error": result.error,
+                "metadata": result.metadata,
+                "cached_at": datetime.now(timezone.utc).isoformat(),
+            }, default=str), encoding="utf-8")
+            # Atomic rename so concurrent readers never see a partial file
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Failed to write disk cache entry %s: %s", path, e)
+            tmp_path.unlink(missing_ok=True)
+
+    # ========================================================================
+    # Firestore Tier
+    # ========================================================================
+
+    def _get_firestore_cache(self):
+        """Get TextCacheService instance (lazy loading to avoid circular imports)."""
+        if self._firestore_cache is None:
+            from app.services.text_cache_service import get_text_cache_service
+            self._firestore_cache = get_text_cache_service()
+        return self._firestore_cache
+
+    def _firestore_get(self, fingerprint: str, rel_path: str) -> Optional[ExtractionResult]:
+        cache = self._get_firestore_cache()
+        if not cache.is_available:
+            return None
+
+        entry = cache.get_cached(rel_path)
+        result = self._entry_result(entry, fingerprint) if entry is not None else None
+        if result is None:
+            # Identical content may already be cached under another path
+            entry = cache.get_by_hash(fingerprint, rel_path)
+            result = self._entry_result(entry, fingerprint) if entry is not None else None
+        return result
+
+    @staticmethod
+    def _entry_result(entry, fingerprint: str) -> Optional[ExtractionResult]:
+        """Convert a TextCacheEntry to a result if it matches the fingerprint."""
+        if entry.file_hash != fingerprint or not entry.extraction_success:
+            return None
+        return ExtractionResult(
+            file_path=entry.file_path, file_type=entry.file_type, text=entry.text,
+            success=True, error=None, metadata=entry.metadata,
+        )
+
+    def _firestore_put(
+        self, fingerprint: str, result: ExtractionResult, rel_path: str, file_path: Path
+    ) -> None:
+        cache = self._get_firestore_cache()
+        if not cache.is_available:
+            return
+        from app.services.text_cache_service import _file_stat_fields
+
+        try:
+            cache.cache_extraction(
+                file_path=rel_path, result=result, file_hash=fingerprint,
+                **_file_stat_fields(file_path.stat()),
+            )
+        except Exception as e:
+            # Firestore write failure must never break generation
+            logger.warning("Failed to write Firestore cache entry for %s: %s", rel_path, e)
+
+    # ========================================================================
+    # Helpers
+    # ========================================================================
+
+    @staticmethod
+    def _extract(file_path: Path, max_chars: Optional[int]) -> ExtractionResult:
+        if max_chars is None:
+            return extract_text(file_path)
+        return extract_text_streaming(file_path, max_chars=max_chars)
+
+    @staticmethod
+    def _relative_path(file_path: Path) -> Optional[str]:
+        try:
+            return str(file_path.resolve().relative_to(MATERIALS_ROOT.resolve()))
+        except ValueError:
+            return None
+
+
+# Singleton
+_tiered_text_cache: Optional[TieredTextCache] = None  # pylint: disable=invalid-name
+_singleton_lock = threading.Lock()
+
+
+def get_tiered_text_cache() -> TieredTextCache:
+    """Get or create the tiered text cache singleton."""
+    global _tiered_text_cache  # pylint: disable=global-statement
+    if _tiered_text_cache is None:
+        with _singleton_lock:
+            if _tiered_text_cache is None:
+                _tiered_text_cache = TieredTextCache()
+    return _tiered_text_cache
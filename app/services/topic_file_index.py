@@ -0,0 +1,244 @@
+"""Topic-to-File Inverted Indexes.
+
+Precomputed lookups behind FilesAPIService.get_topic_files,
+get_files_for_course and get_files_for_course_weeks, replacing per-call
+keyword and priority matching over the file catalog.
+
+- FileCatalogIndex: subject, tier and keyword postings over the file catalog
+  (file key -> {filename, subject, tier, tier_priority})
+- CourseFileIndex: one course's materials (courses/{id}/materials) by week,
+  tier and topic keyword (titles, filenames, categories and the titles and
+  topics of the week each material belongs to)
+
+All results use one deterministic ranking: tier priority (Syllabus first),
+then file key (storage path for course materials). Keyword lookups rank
+files matching more of the query's terms first.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_TIER_PRIORITY = 999  # Files without a priority rank last
+# Priority of CourseMaterial.tier values
+MATERIAL_TIER_PRIORITY = {"syllabus": 1, "course_materials": 2, "supplementary": 3}
+
+# Seconds a course index is trusted; bounds staleness from writes made by other processes
+COURSE_FILE_INDEX_TTL_SECONDS = int(os.getenv("COURSE_FILE_INDEX_TTL_SECONDS", "600"))
+COURSE_FILE_INDEX_MAX_COURSES = int(os.getenv("COURSE_FILE_INDEX_MAX_COURSES", "64"))
+
+_KEYWORD_RE = re.compile(r"[a-z0-9]+")
+KEYWORD_STOPWORDS = frozenset({"and", "the", "of", "in", "to", "a", "an", "for", "on", "with"})
+
+
+def keywords(text: str) -> Set[str]:
+    """Lowercase keyword set of a topic, file key, filename or subject."""
+    return {
+        term for term in _KEYWORD_RE.findall(text.lower().replace("_", " "))
+        if term not in KEYWORD_STOPWORDS
+    }
+
+
+class FileCatalogIndex:
+    """Inverted indexes over the file catalog."""
+
+    def __init__(self, file_ids: Dict[str, Dict[str, Any]]):
+        """Build subject, tier and keyword postings for every file key."""
+        self.file_ids = file_ids
+        self._by_subject: Dict[str, Set[str]] = defaultdict(set)
+        self._by_tier: Dict[str, Set[str]] = defaultdict(set)
+        self._by_keyword: Dict[str, Set[str]] = defaultdict(set)
+
+        for key, info in file_ids.items():
+            subject = info.get("subject") or ""
+            if subject:
+                self._by_subject[subject.lower()].add(key)
+            if info.get("tier"):
+                self._by_tier[info["tier"]].add(key)
+            for term in keywords(f"{key} {info.get('filename', '')} {subject}"):
+                self._by_keyword[term].add(key)
+
+        self.all_keys = self.rank(file_ids)
+
+    def rank_key(self, key: str) -> Tuple[int, str]:
+        """Sort key: tier priority, then file key."""
+        return (self.file_ids.get(key, {}).get("tier_priority", DEFAULT_TIER_PRIORITY), key)
+
+    def rank(self, keys: Iterable[str]) -> List[str]:
+        """Distinct keys in ranking order."""
+        return sorted(set(keys), key=self.rank_key)
+
+    def subject(self, subject: str) -> List[str]:
+        """Files of a subject (case-insensitive)."""
+        return self.rank(self._by_subject.get(subject.lower(), ()))
+
+    def tier(self, tier: str) -> List[str]:
+        """Files of a tier."""
+        return self.rank(self._by_tier.get(tier, ()))
+
+    def keyword(self, query: str) -> List[str]:
+        """Files whose key, filename or subject contain every keyword of a query."""
+        terms = keywords(query)
+        if not terms:
+            return []
+        matches = set.intersection(*(self._by_keyword.get(term, set()) for term in terms))
+        return self.rank(matches)
+
+
+class CourseFileIndex:
+    """One course's materials by week, tier and topic keyword."""
+
+    def __init__(self, materials: Iterable[Any], weeks: Iterable[Any] = ()):
+        """Build the course's postings.
+
+        Args:
+            materials: The course's CourseMaterial records
+            weeks: The course's weeks; their titles and topics point at the
+                materials of the same week number
+        """
+        self.materials: Dict[str, Any] = {material.id: material for material in materials}
+
+        self._by_week: Dict[int, Set[str]] = defaultdict(set)
+        self._by_tier: Dict[str, Set[str]] = defaultdict(set)
+        self._by_keyword: Dict[str, Set[str]] = defaultdict(set)
+
+        for material_id, material in self.materials.items():
+            if material.weekNumber is not None:
+                self._by_week[material.weekNumber].add(material_id)
+            self._by_tier[material.tier].add(material_id)
+            for term in keywords(f"{material.title} {material.filename} {material.category or ''}"):
+                self._by_keyword[term].add(material_id)
+
+        for week in weeks:
+            week_files = self._by_week.get(week.weekNumber)
+            if not week_files:
+                continue
+            for text in [week.title or "", *(week.topics or [])]:
+                for term in keywords(text):
+                    self._by_keyword[term].update(week_files)
+
+        self.all_files = self.rank(self.materials)
+
+    def rank_key(self, material_id: str) -> Tuple[int, str]:
+        """Sort key: tier priority, then storage path."""
+        material = self.materials.get(material_id)
+        if material is None:
+            return (DEFAULT_TIER_PRIORITY, material_id)
+        return (MATERIAL_TIER_PRIORITY.get(material.tier, DEFAULT_TIER_PRIORITY), material.storagePath)
+
+    def rank(self, material_ids: Iterable[str]) -> List[str]:
+        """Distinct material IDs in ranking order."""
+        return sorted(set(material_ids), key=self.rank_key)
+
+    def week(self, week_numbers: Iterable[int]) -> List[str]:
+        """Materials of the given weeks (empty if none of them has materials)."""
+        files: Set[str] = set()
+        for week_number in week_numbers:
+            files.update(self._by_week.get(week_number, ()))
+        return self.rank(files)
+
+    def lookup(
+        self,
+        week_numbers: Optional[List[int]] = None,
+        tier: Optional[str] = None,
+        topic: Optional[str] = None,
+    ) -> List[str]:
+        """Course material IDs filtered by weeks, tier and topic.
+
+        Weeks without materials fall back to all course materials. Topic
+        matches are ranked by the number of topic keywords each material
+        matches.
+        """
+        files = self.week(week_numbers) if week_numbers else []
+        if not files:
+            files = self.all_files
+        if tier:
+            files = [key for key in files if key in self._by_tier.get(tier, ())]
+        if not topic:
+            return files
+
+        hits: Dict[str, int] = defaultdict(int)
+        for term in keywords(topic):
+            for key in self._by_keyword.get(term, ()):
+                hits[key] += 1
+        return sorted(
+            (key for key in files if hits.get(key)),
+            key=lambda key: (-hits[key], *self.rank_key(key)),
+        )
+
+    def describe(self, material_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Display details of indexed materials, in the given order."""
+        details = []
+        for material_id in material_ids:
+            material = self.materials.get(material_id)
+            if material is None:
+                continue
+            details.append({
+                "key": material_id,
+                "filename": material.filename,
+                "title": material.title,
+                "tier": material.tier,
+                "week": material.weekNumber,
+            })
+        return details
+
+
+class CourseFileIndexRegistry:
+    """Per-course file indexes, rebuilt when the course or its materials change."""
+
+    def __init__(
+        self,
+        ttl_seconds: int = COURSE_FILE_INDEX_TTL_SECONDS,
+        max_courses: int = COURSE_FILE_INDEX_MAX_COURSES,
+    ):
+        """Initialize an empty registry."""
+        self.ttl_seconds = ttl_seconds
+        self.max_courses = max_courses
+        # course_id -> (index, course updatedAt, built_at monotonic)
+        self._entries: Dict[str, Tuple[CourseFileIndex, Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, course_id: str, updated_at: Any) -> Optional[CourseFileIndex]:
+        """Get a course's index if the course is unchanged and the index has not expired."""
+        with self._lock:
+            entry = self._entries.get(course_id)
+        if entry is None:
+            return None
+        index, built_for, built_at = entry
+        if built_for != updated_at or time.monotonic() - built_at > self.ttl_seconds:
+            return None
+        return index
+
+    def put(self, course_id: str, index: CourseFileIndex, updated_at: Any) -> None:
+        """Store a freshly built index, evicting the oldest course if full."""
+        with self._lock:
+            self._entries.pop(course_id, None)
+            self._entries[course_id] = (index, updated_at, time.monotonic())
+            while len(self._entries) > self.max_courses:
+                self._entries.pop(next(iter(self._entries)))
+
+    def invalidate(self, course_id: Optional[str] = None) -> None:
+        """Drop one course's index, or all of them."""
+        with self._lock:
+            if course_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(course_id, None)
+
+
+# Singleton
+_course_file_index_registry: Optional[CourseFileIndexRegistry] = None  # pylint: disable=invalid-name
+_singleton_lock = threading.Lock()
+
+
+def get_course_file_index_registry() -> CourseFileIndexRegistry:
+    """Get or create the course file index registry singleton."""
+    global _course_file_index_registry  # pylint: disable=global-statement
+    if _course_file_index_registry is None:
+        with _singleton_lock:
+            if _course_file_index_registry is None:
+                _course_file_index_registry = CourseFileIndexRegistry()
+    return _course_file_index_registry
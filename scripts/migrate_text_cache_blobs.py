@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Migration script to move the text cache to content-addressed storage.
+
+Legacy text cache entries store the extracted text on each path entry
+(inline or as compressed chunks). This script moves the text into
+material_text_blobs/{file_hash}, so identical files share one blob, and
+rewrites each path entry as a pointer to its blob.
+
+Usage:
+    # Dry run (no changes):
+    python scripts/migrate_text_cache_blobs.py --dry-run
+
+    # Apply changes:
+    python scripts/migrate_text_cache_blobs.py
+"""
+
+import argparse
+import logging
+import sys
+
+# Add project root to path
+sys.path.insert(0, ".")
+
+from app.services.text_cache_service import get_text_cache_service
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move cached material text into content-addressed blobs"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Log changes without applying them"
+    )
+
+    args = parser.parse_args()
+
+    cache = get_text_cache_service()
+    if not cache.is_available:
+        logger.error("Firestore client not available")
+        sys.exit(1)
+
+    try:
+        stats = cache.migrate_to_content_addressed(dry_run=args.dry_run)
+        logger.info("Migration complete: %s", stats)
+        if stats["errors"] > 0:
+            sys.exit(1)
+    except Exception as e:
+        logger.error("Migration failed: %s", e)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,15 @@ This script scans the Materials directory and creates Firestore documents
 in the courses/{course_id}/materials collection so materials appear in the UI.
 
 Usage:
-    python scripts/populate_firestore_materials.py [--dry-run]
+    python scripts/populate_firestore_materials.py [--dry-run] [--incremental]
+
+With --incremental only files added, modified or deleted since the previous
+incremental run (per the materials catalog change journal) are written.
 """
 
 import argparse
 import logging
 import sys
-import uuid
 from pathlib import Path
 from datetime import datetime
 
@@ -23,6 +25,9 @@ sys.path.insert(0, str(project_root))
 # Import Firestore directly to avoid Anthropic client initialization
 from google.cloud import firestore
 
+from app.services.course_materials_service import CourseMaterialsService, generate_material_id
+from app.services.materials_catalog import EVENT_ADDED, get_materials_catalog
+
 def get_firestore_client():
     """Get Firestore client without initializing Anthropic."""
     return firestore.Client()
@@ -37,6 +42,12 @@ COURSE_MAPPING = {
     "LH": "Legal-History-2025-2026",
 }
 
+# Cursor name in the materials catalog change journal
+JOURNAL_CONSUMER = "populate_firestore_materials"
+
+SUPPORTED_EXTENSIONS = {'.pdf', '.docx', '.txt', '.md', '.html'}
+
+
 # Tier mapping
 TIER_MAPPING = {
     "Syllabus": "syllabus",
@@ -59,77 +70,112 @@ def get_week_number_from_path(file_path: Path) -> int:
     return 1
 
 
+def material_from_entry(entry):
+    """Build a material document for a cataloged file, or None if it isn't one."""
+    parts = entry.path.split("/")
+    if len(parts) < 3 or parts[0] not in TIER_MAPPING:
+        return None
+    if Path(entry.name).suffix.lower() not in SUPPORTED_EXTENSIONS:
+        return None
+
+    course_id = COURSE_MAPPING.get(parts[1])
+    if not course_id:
+        logger.warning(f"No course mapping for: {parts[1]}")
+        return None
+
+    # Determine category from subdirectory
+    category = parts[2] if len(parts) > 3 else "General"
+
+    return {
+        "id": generate_material_id(entry.path),
+        "filename": entry.name,
+        "title": Path(entry.name).stem,
+        "storagePath": entry.path,
+        "fileSize": entry.size,
+        "fileType": entry.file_type,
+        "weekNumber": get_week_number_from_path(Path(entry.path)),
+        "tier": TIER_MAPPING[parts[0]],
+        "category": category,
+        "source": "local",
+        "uploadedAt": datetime.utcnow(),
+        "textExtracted": False,
+        "summaryGenerated": False,
+        "course_id": course_id
+    }
+
+
 def discover_materials(materials_dir: Path = Path("Materials")):
     """Discover all materials from the Materials directory."""
     if not materials_dir.exists():
         logger.error(f"Materials directory not found: {materials_dir}")
         return []
-    
+
+    # The catalog only re-lists directories that changed since the last run
+    catalog = get_materials_catalog()
+    catalog.rescan()
+
     materials = []
-    supported_extensions = {'.pdf', '.docx', '.txt', '.md', '.html'}
-    
-    # Scan each tier
-    for tier_dir in materials_dir.iterdir():
-        if not tier_dir.is_dir():
-            continue
-        
-        tier_name = tier_dir.name
-        if tier_name not in TIER_MAPPING:
-            logger.debug(f"Skipping non-tier directory: {tier_name}")
-            continue
-        
-        tier = TIER_MAPPING[tier_name]
-        
-        # Scan for course directories
-        for course_dir in tier_dir.iterdir():
-            if not course_dir.is_dir():
-                continue
-            
-            course_name = course_dir.name
-            course_id = COURSE_MAPPING.get(course_name)
-            
-            if not course_id:
-                logger.warning(f"No course mapping for: {course_name}")
-                continue
-            
-            # Find all files recursively
-            for ext in supported_extensions:
-                for file_path in course_dir.rglob(f"*{ext}"):
-                    # Skip hidden files and system files
-                    if file_path.name.startswith('.') or file_path.name.startswith('~'):
-                        continue
-                    
-                    # Get relative path from course directory
-                    rel_path = file_path.relative_to(materials_dir)
-                    storage_path = str(rel_path)
-                    
-                    # Extract week number
-                    week_number = get_week_number_from_path(file_path)
-                    
-                    # Determine category from subdirectory
-                    parts = list(file_path.relative_to(course_dir).parts)
-                    category = parts[0] if len(parts) > 1 else "General"
-                    
-                    material = {
-                        "id": str(uuid.uuid4()),
-                        "filename": file_path.name,
-                        "title": file_path.stem,
-                        "storagePath": storage_path,
-                        "weekNumber": week_number,
-                        "tier": tier,
-                        "category": category,
-                        "source": "local",
-                        "uploadedAt": datetime.utcnow(),
-                        "textExtracted": False,
-                        "summaryGenerated": False,
-                        "course_id": course_id
-                    }
-                    
-                    materials.append(material)
-    
+    for entry in catalog.entries(materials_dir):
+        material = material_from_entry(entry)
+        if material:
+            materials.append(material)
+
     return materials
 
 
+def apply_changes(dry_run=False):
+    """Apply Materials changes since the last incremental run to Firestore.
+
+    Reads the materials catalog change journal from this script's cursor:
+    added files are registered, modified files have their extracted text
+    reset and deleted files are removed.
+    """
+    catalog = get_materials_catalog()
+    catalog.rescan()
+    counts = {"added": 0, "modified": 0, "deleted": 0}
+
+    def handle(events):
+        entries = {entry.path: entry for entry in catalog.entries()}
+        by_course = {}
+        for event in events:
+            parts = event.path.split("/")
+            course_id = COURSE_MAPPING.get(parts[1]) if len(parts) > 2 else None
+            if course_id:
+                by_course.setdefault(course_id, []).append(event)
+
+        for course_id, course_events in by_course.items():
+            logger.info(f"\nCourse: {course_id} ({len(course_events)} changes)")
+            if dry_run:
+                for event in course_events:
+                    logger.info(f"    {event.kind}: {event.path}")
+                continue
+
+            added = [
+                material_from_entry(entries[event.path]) for event in course_events
+                if event.kind == EVENT_ADDED and event.path in entries
+            ]
+            materials = [material for material in added if material]
+            if materials:
+                populate_firestore(materials)
+            course_counts = CourseMaterialsService().apply_catalog_changes(course_id, course_events)
+            counts["added"] += len(materials)
+            counts["modified"] += course_counts["modified"]
+            counts["deleted"] += course_counts["deleted"]
+
+    if dry_run:
+        # Preview without advancing the cursor
+        events = catalog.changes_since(catalog.cursor(JOURNAL_CONSUMER))
+        if events is None:
+            logger.warning("Change journal was trimmed past the last run; run a full populate")
+        else:
+            handle(events)
+        return counts
+
+    handled = catalog.consume(JOURNAL_CONSUMER, handle)
+    logger.info(f"\n✅ Applied {handled} changes: {counts}")
+    return counts
+
+
 def populate_firestore(materials, dry_run=False):
     """Populate Firestore with materials."""
     if dry_run:
@@ -196,11 +242,19 @@ def populate_firestore(materials, dry_run=False):
 def main():
     parser = argparse.ArgumentParser(description="Populate Firestore with course materials")
     parser.add_argument("--dry-run", action="store_true", help="Preview without making changes")
+    parser.add_argument(
+        "--incremental", action="store_true", help="Only apply changes since the last incremental run"
+    )
     args = parser.parse_args()
     
     logger.info("=" * 60)
     logger.info("Populate Firestore Materials")
     logger.info("=" * 60)
+
+    if args.incremental:
+        logger.info("\n🔍 Rescanning materials catalog...")
+        apply_changes(dry_run=args.dry_run)
+        return 0
     
     # Discover materials
     logger.info("\n🔍 Discovering materials...")
@@ -225,6 +279,11 @@ def main():
     # Populate Firestore
     logger.info("\n📤 Uploading to Firestore...")
     populate_firestore(materials, dry_run=args.dry_run)
+
+    if not args.dry_run:
+        # Everything cataloged so far is uploaded; the next incremental run
+        # starts after it
+        get_materials_catalog().consume(JOURNAL_CONSUMER, lambda events: None)
     
     if args.dry_run:
         logger.info("\n✅ Dry run complete - no changes made")
@@ -82,6 +82,7 @@ get_auth_config.cache_clear()
 # pylint: disable=wrong-import-position
 from app.main import app  # noqa: E402
 from app.models.auth_models import User  # noqa: E402
+from app.models.course_models import CourseMaterial  # noqa: E402
 
 
 @pytest.fixture
@@ -353,3 +354,17 @@ def mock_firestore():
         mock_get_client.return_value = mock_client
 
         yield mock_client
+
+
+# =============================================================================
+# Course Material Factory
+# =============================================================================
+
+def make_material(material_id="m1", week=1, tier="course_materials", source="uploaded", **kwargs) -> CourseMaterial:
+    """Build a CourseMaterial record; keyword arguments override any field."""
+    fields = {
+        "id": material_id, "filename": f"{material_id}.pdf", "storagePath": f"uploads/c/{material_id}.pdf",
+        "tier": tier, "title": material_id.title(), "weekNumber": week, "source": source,
+    }
+    fields.update(kwargs)
+    return CourseMaterial(**fields)
@@ -361,13 +361,10 @@ class TestMaterialsLoading:
             with patch('app.services.files_api_service.get_files_api_service') as mock_service:
                 # Mock the service instance and its method
                 mock_instance = Mock()
-                mock_material = Mock()
-                mock_material.title = "Lecture Week 1"
-                mock_material.filename = "lecture_week_1.pdf"
 
-                # get_course_materials_with_text returns list of (material, text) tuples
-                mock_instance.get_course_materials_with_text = AsyncMock(
-                    return_value=[(mock_material, "This is lecture content")]
+                # search_course_passages returns passages grouped per material
+                mock_instance.search_course_passages = AsyncMock(
+                    return_value=[{"title": "Lecture Week 1", "text": "This is lecture content"}]
                 )
                 mock_service.return_value = mock_instance
 
@@ -379,6 +376,10 @@ class TestMaterialsLoading:
                 assert response.status_code == 200
                 data = response.json()
                 assert data["status"] == "success"
+                search_kwargs = mock_instance.search_course_passages.call_args.kwargs
+                assert search_kwargs["query"] == "Explain this week's topic"
+                sent = mock_client.messages.create.call_args.kwargs["messages"][-1]["content"]
+                assert "This is lecture content" in sent
 
     def test_chat_materials_loading_error(self, client, mock_tutor_response):
         """Test chat when materials loading fails gracefully."""
@@ -388,7 +389,7 @@ class TestMaterialsLoading:
             with patch('app.services.files_api_service.get_files_api_service') as mock_service:
                 # Mock the service to raise an exception
                 mock_instance = Mock()
-                mock_instance.get_course_materials_with_text = AsyncMock(
+                mock_instance.search_course_passages = AsyncMock(
                     side_effect=Exception("Materials loading failed")
                 )
                 mock_service.return_value = mock_instance
@@ -784,3 +785,79 @@ class TestConcurrentRequests:
             for index, response in results:
                 assert response.status_code == 200, \
                     f"Request {index} failed with status {response.status_code}"
+
+
+def _sse_events(body):
+    """Parse (event, data) pairs from an SSE response body."""
+    import json
+
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+
+def _stream_manager(chunks):
+    """Mock messages.stream() context manager yielding text chunks."""
+    async def text_stream():
+        for chunk in chunks:
+            yield chunk
+
+    final = Mock()
+    final.usage = Mock(input_tokens=100, output_tokens=50)
+    stream = Mock()
+    stream.text_stream = text_stream()
+    stream.get_final_message = AsyncMock(return_value=final)
+    manager = Mock()
+    manager.__aenter__ = AsyncMock(return_value=stream)
+    manager.__aexit__ = AsyncMock(return_value=False)
+    return manager
+
+
+class TestStreamingChat:
+    """Tests for the /api/tutor/chat/stream endpoint."""
+
+    def test_stream_sends_tokens_and_caches_answer(self, client):
+        """Tokens are sent as they arrive and the full answer is cached at the end."""
+        with patch('app.services.anthropic_client.client') as mock_client, \
+                patch('app.routes.ai_tutor._get_cached_response', return_value=None), \
+                patch('app.routes.ai_tutor._cache_response') as mock_cache, \
+                patch('app.services.files_api_service.get_files_api_service') as mock_service:
+            mock_client.messages.stream = Mock(return_value=_stream_manager(["## Art. 6:74", " DCC"]))
+            mock_service.return_value.search_course_passages = AsyncMock(return_value=[])
+
+            response = client.post(
+                "/api/tutor/chat/stream",
+                json={"message": "Explain Art. 6:74", "context": "Private Law", "course_id": "LLS-2025-2026"},
+            )
+
+        assert response.status_code == 200
+        events = _sse_events(response.text)
+        assert events[0] == ("start", {"cached": False})
+        assert [data["text"] for name, data in events if name == "delta"] == ["## Art. 6:74", " DCC"]
+        assert events[-1][0] == "result"
+        assert events[-1][1]["content"] == "## Art. 6:74 DCC"
+        assert events[-1][1]["course_id"] == "LLS-2025-2026"
+        assert mock_cache.call_args[0][1] == "## Art. 6:74 DCC"
+
+    def test_cache_hit_replays_through_stream(self, client):
+        """Cached answers use the same events without calling the API."""
+        cached = "## Cached answer\n\n" + "x" * 500
+
+        with patch('app.services.anthropic_client.client') as mock_client, \
+                patch('app.routes.ai_tutor._get_cached_response', return_value=cached):
+            mock_client.messages.stream = Mock()
+
+            response = client.post(
+                "/api/tutor/chat/stream",
+                json={"message": "Explain Art. 6:74", "context": "Private Law", "course_id": "LLS-2025-2026"},
+            )
+
+        events = _sse_events(response.text)
+        deltas = [data["text"] for name, data in events if name == "delta"]
+        assert events[0] == ("start", {"cached": True})
+        assert len(deltas) > 1
+        assert "".join(deltas) == cached
+        assert events[-1][1]["content"] == cached
+        mock_client.messages.stream.assert_not_called()
@@ -452,7 +452,7 @@ class TestGenerateQuizFromCourse:
 
             # Mock Anthropic API response (must be async)
             mock_response = MagicMock()
-            mock_response.content = [MagicMock(text='{"questions": [{"question": "What is a contract?"}]}')]
+            mock_response.content = [MagicMock(type="text", text='{"questions": [{"question": "What is a contract?"}]}')]
 
             # Create a mock client with async messages.create (no beta header needed)
             mock_client = MagicMock()
@@ -1,6 +1,6 @@
 """Tests for Assessment endpoints."""
 
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from app.routes.assessment import extract_grade
 
@@ -146,6 +146,30 @@ class TestAssessEndpoint:
             assert response.status_code == 500
 
 
+class TestEssayGenerateEndpoint:
+    """Tests for reuse of stored questions by /api/assessment/essay/generate."""
+
+    def test_stored_question_lookup_is_per_user(self, client):
+        """Each user's lookup uses their own generation key and a userId filter."""
+        persistence = MagicMock()
+        persistence.find_by_generation_key = AsyncMock(return_value={"id": "a1", "question": "Q?"})
+        files_service = MagicMock()
+        files_service.course_materials_fingerprint.return_value = "fp"
+        with patch("app.routes.assessment.get_assessment_persistence_service", return_value=persistence), \
+                patch("app.routes.assessment.get_files_api_service", return_value=files_service):
+            for user_id in ["alice", "bob"]:
+                response = client.post(
+                    "/api/assessment/essay/generate",
+                    json={"course_id": "LLS", "topic": "Tort"},
+                    headers={"X-User-ID": user_id},
+                )
+                assert response.json()["is_new"] is False
+
+        calls = persistence.find_by_generation_key.call_args_list
+        assert [call.kwargs["user_id"] for call in calls] == ["alice", "bob"]
+        assert calls[0].args[1] != calls[1].args[1]
+
+
 class TestRubricEndpoint:
     """Tests for the /api/assessment/rubric endpoint."""
 
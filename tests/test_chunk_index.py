@@ -0,0 +1,106 @@
+"""Tests for the per-course BM25 chunk index."""
+
+from app.services.chunk_index import (
+    ChunkIndexRegistry,
+    CourseChunkIndex,
+    split_chunks,
+    tokenize,
+)
+from tests.conftest import make_material
+
+
+def _index():
+    return CourseChunkIndex.from_materials([
+        (make_material("contracts", 1), "Offer and acceptance form a contract. Consideration is not required."),
+        (make_material("damages", 2), "Art. 6:74 DCC governs damages for failure in performance of an obligation."),
+        (make_material("tort", 2), "Art. 6:162 DCC covers unlawful acts and liability in tort."),
+    ])
+
+
+class TestChunking:
+    """Tests for splitting text into passages."""
+
+    def test_chunks_overlap_and_cover_text(self):
+        """Every word lands in a chunk and consecutive chunks overlap."""
+        text = " ".join(f"word{i}" for i in range(500))
+
+        chunks = list(split_chunks(text, size=200, overlap=50))
+
+        assert len(chunks) > 1
+        assert all(len(passage) <= 200 for _, passage in chunks)
+        covered = set(" ".join(passage for _, passage in chunks).split())
+        assert covered == set(text.split())
+        first_end = chunks[0][0] + len(chunks[0][1])
+        assert chunks[1][0] < first_end
+
+    def test_short_text_is_one_chunk(self):
+        """Text under the chunk size is a single passage."""
+        assert list(split_chunks("short text", size=200, overlap=50)) == [(0, "short text")]
+
+    def test_article_references_are_single_terms(self):
+        """Article numbers are kept whole and stopwords dropped."""
+        assert tokenize("What does Art. 6:74 say?") == ["art", "6:74", "say"]
+
+
+class TestSearch:
+    """Tests for BM25 ranking."""
+
+    def test_best_matching_passage_ranks_first(self):
+        """The passage sharing the question's rare terms wins."""
+        results = _index().search("damages under 6:74")
+
+        assert results[0][0].material_id == "damages"
+
+    def test_week_filter_prefers_week_passages(self):
+        """Week matches are returned ahead of better matches from other weeks."""
+        results = _index().search("contract damages", week_number=1)
+
+        assert [chunk.material_id for chunk, _ in results] == ["contracts"]
+
+    def test_unmatched_week_query_returns_week_material(self):
+        """A question with no matching terms still gets the week's materials."""
+        results = _index().search("xyzzy", week_number=2)
+
+        assert {chunk.material_id for chunk, _ in results} == {"damages", "tort"}
+
+    def test_top_k_limits_results(self):
+        """No more than top_k passages are returned."""
+        assert len(_index().search("dcc art", top_k=1)) == 1
+
+
+def _unchanged(version, fingerprints):
+    return False
+
+
+class TestRegistry:
+    """Tests for index reuse and rebuilding."""
+
+    def test_index_is_reused_until_its_materials_change(self):
+        """Only a change to one of the index's own fingerprints makes it stale."""
+        registry = ChunkIndexRegistry()
+        index = _index()
+        registry.put("course", index, {"h1", "h2"}, cache_version=3)
+        changed = {"h2": 4, "other": 9}  # fingerprint -> version it changed at
+
+        def changed_since(version, fingerprints):
+            return any(changed.get(f, 0) > version for f in fingerprints)
+
+        assert registry.get("course", changed_since) is None
+        registry.put("course", index, {"h1"}, cache_version=3)
+        assert registry.get("course", changed_since) is index
+
+    def test_expired_index_is_rebuilt(self):
+        """Indexes older than the TTL are not served."""
+        registry = ChunkIndexRegistry(ttl_seconds=-1)
+        registry.put("course", _index(), set(), cache_version=0)
+
+        assert registry.get("course", _unchanged) is None
+
+    def test_oldest_course_is_evicted(self):
+        """The registry holds at most max_courses indexes."""
+        registry = ChunkIndexRegistry(max_courses=1)
+        registry.put("a", _index(), set(), cache_version=0)
+        registry.put("b", _index(), set(), cache_version=0)
+
+        assert registry.get("a", _unchanged) is None
+        assert registry.get("b", _unchanged) is not None
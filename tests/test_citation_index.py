@@ -0,0 +1,50 @@
+"""Tests for legal article citation parsing."""
+
+from app.services.citation_index import article_key, extract_article_keys, extract_citations
+
+
+class TestArticleKey:
+    """Tests for normalizing article references to index keys."""
+
+    def test_aliases_share_a_key(self):
+        """Every spelling of a code maps to the same key."""
+        assert article_key("6:74", "DCC") == "DCC 6:74"
+        assert article_key("Art. 6:74", "BW") == "DCC 6:74"
+        assert article_key("1:3", "awb") == "GALA 1:3"
+        assert article_key("94", "Grondwet") == "Constitution 94"
+
+    def test_paragraphs_are_dropped(self):
+        """A paragraph reference points at the article itself."""
+        assert article_key("6:162(2)", "DCC") == "DCC 6:162"
+
+    def test_unknown_code(self):
+        """Unknown codes have no key."""
+        assert article_key("6:74", "XYZ") is None
+
+
+class TestExtractCitations:
+    """Tests for finding article references in text."""
+
+    def test_common_forms(self):
+        """Abbreviated, spelled-out and Dutch references are all found."""
+        text = (
+            "Under Art. 6:74 DCC the debtor is liable. See art 8 ECHR, "
+            "Article 94 of the Constitution, art. 150 Rv and Artikel 3:40 van het Burgerlijk Wetboek."
+        )
+
+        assert extract_article_keys(text) == [
+            "DCC 6:74", "ECHR 8", "Constitution 94", "CCP 150", "DCC 3:40",
+        ]
+
+    def test_article_lists(self):
+        """Each article of a list is cited at the reference's offset."""
+        text = "Intro. Articles 6:162(2) and 6:163 BW apply."
+
+        citations = extract_citations(text)
+
+        assert [c.article for c in citations] == ["DCC 6:162", "DCC 6:163"]
+        assert {c.start for c in citations} == {text.index("Articles")}
+
+    def test_reference_without_code_is_ignored(self):
+        """Bare article numbers are ambiguous and not indexed."""
+        assert extract_citations("Art. 6:74 says the debtor is liable.") == []
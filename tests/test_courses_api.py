@@ -384,3 +384,103 @@ class TestMaterialCountsByWeek:
             data = response.json()
             assert "detail" in data
             assert "fail" in data["detail"].lower()
+
+
+class TestSearchCourseMaterials:
+    """Tests for GET /api/courses/{course_id}/search."""
+
+    def _active_course(self, mock_course_service):
+        from app.models.course_models import Course
+
+        mock_course = MagicMock(spec=Course)
+        mock_course.active = True
+        mock_course_service.get_course.return_value = mock_course
+
+    def test_search_returns_ranked_hits(self, client, mock_course_service, override_auth_dependency):
+        """Should sync the index and return hits with snippets and page numbers."""
+        from app.services.material_search_service import SearchHit
+
+        self._active_course(mock_course_service)
+
+        with patch("app.routes.courses.get_material_search_index") as mock_get_index:
+            mock_index = MagicMock()
+            mock_index.search.return_value = [
+                SearchHit(
+                    material_id="m1", title="Reader", week_number=2, tier="course_materials",
+                    page_number=14, snippet="…under <mark>6:74</mark> DCC…", score=3.2
+                )
+            ]
+            mock_get_index.return_value = mock_index
+
+            response = client.get("/api/courses/LLS-2025-2026/search?q=6:74&week=2")
+
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] == 1
+            assert data["hits"][0]["page_number"] == 14
+            assert "<mark>" in data["hits"][0]["snippet"]
+            mock_index.refresh.assert_called_once_with("LLS-2025-2026")
+            mock_index.search.assert_called_once_with("LLS-2025-2026", "6:74", 2, None, 20)
+
+    def test_search_serves_index_when_sync_fails(self, client, mock_course_service, override_auth_dependency):
+        """A failed sync should not block searching what is already indexed."""
+        self._active_course(mock_course_service)
+
+        with patch("app.routes.courses.get_material_search_index") as mock_get_index:
+            mock_index = MagicMock()
+            mock_index.refresh.side_effect = Exception("Firestore unavailable")
+            mock_index.search.return_value = []
+            mock_get_index.return_value = mock_index
+
+            response = client.get("/api/courses/LLS-2025-2026/search?q=damages")
+
+            assert response.status_code == 200
+            assert response.json()["hits"] == []
+
+    def test_search_reports_cold_build(self, client, mock_course_service, override_auth_dependency):
+        """A course indexed in the background is marked as indexing."""
+        self._active_course(mock_course_service)
+
+        with patch("app.routes.courses.get_material_search_index") as mock_get_index:
+            mock_index = MagicMock()
+            mock_index.refresh.return_value = True
+            mock_index.search.return_value = []
+            mock_get_index.return_value = mock_index
+
+            response = client.get("/api/courses/LLS-2025-2026/search?q=damages")
+
+            assert response.status_code == 200
+            assert response.json()["indexing"] is True
+
+    def test_search_index_error(self, client, mock_course_service, override_auth_dependency):
+        """Should return 503 when the index can't be queried."""
+        from app.services.material_search_service import MaterialSearchError
+
+        self._active_course(mock_course_service)
+
+        with patch("app.routes.courses.get_material_search_index") as mock_get_index:
+            mock_index = MagicMock()
+            mock_index.search.side_effect = MaterialSearchError("database is locked")
+            mock_get_index.return_value = mock_index
+
+            response = client.get("/api/courses/LLS-2025-2026/search?q=damages")
+
+            assert response.status_code == 503
+
+    def test_search_inactive_course(self, client, mock_course_service, override_auth_dependency):
+        """Should return 404 for inactive course."""
+        from app.models.course_models import Course
+
+        mock_course = MagicMock(spec=Course)
+        mock_course.active = False
+        mock_course_service.get_course.return_value = mock_course
+
+        response = client.get("/api/courses/LLS-2025-2026/search?q=damages")
+
+        assert response.status_code == 404
+
+    def test_search_query_too_short(self, client, override_auth_dependency):
+        """Should reject single-character queries."""
+        response = client.get("/api/courses/LLS-2025-2026/search?q=a")
+
+        assert response.status_code == 422
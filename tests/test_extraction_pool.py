@@ -0,0 +1,119 @@
+"""Tests for the process-pool extraction engine."""
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app.services import extraction_pool
+from app.services.extraction_pool import extract_many, get_extraction_progress
+from app.services.text_extractor import ExtractionResult
+
+
+def _misbehaving_worker(path_str: str, skip_validation: bool) -> ExtractionResult:
+    """Worker that crashes or hangs on specially named files."""
+    name = Path(path_str).name
+    if name.startswith("crash"):
+        os._exit(1)  # Simulate a segfault in the PDF parser
+    if name.startswith("hang"):
+        time.sleep(60)
+    return ExtractionResult(
+        file_path=path_str, file_type="text", text=Path(path_str).read_text(), success=True
+    )
+
+
+@pytest.fixture
+def text_files(tmp_path):
+    """Create a handful of small text files."""
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"file{i}.txt"
+        path.write_text(f"content {i}")
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def forked_misbehaving_worker(monkeypatch):
+    """Use fork so the patched worker is visible inside the pool processes."""
+    monkeypatch.setattr(extraction_pool, "EXTRACTION_START_METHOD", "fork")
+    monkeypatch.setattr(extraction_pool, "_extract_worker", _misbehaving_worker)
+
+
+class TestExtractMany:
+    """Tests for extract_many."""
+
+    def test_results_preserve_input_order(self, text_files):
+        """Results line up with the input paths."""
+        results = extract_many(text_files, max_workers=2, _skip_path_validation=True)
+
+        assert [r.text for r in results] == [f"content {i}" for i in range(5)]
+        assert all(r.success for r in results)
+
+    def test_single_worker_runs_inline(self, text_files):
+        """max_workers=1 extracts in the calling process."""
+        results = extract_many(text_files, max_workers=1, _skip_path_validation=True)
+
+        assert len(results) == 5
+        assert get_extraction_progress()["workers"] == 1
+
+    def test_progress_callback_and_snapshot(self, text_files):
+        """Progress is reported per file and as a final snapshot."""
+        seen = []
+        extract_many(
+            text_files, max_workers=1, _skip_path_validation=True,
+            progress_callback=lambda progress, result: seen.append(progress.completed),
+        )
+
+        assert seen == [1, 2, 3, 4, 5]
+        snapshot = get_extraction_progress()
+        assert snapshot["completed"] == 5
+        assert snapshot["succeeded"] == 5
+        assert snapshot["finished_at"] is not None
+
+    def test_empty_input(self):
+        """No paths means no work and no pool."""
+        assert extract_many([]) == []
+
+    def test_worker_crash_is_isolated(self, tmp_path, text_files, forked_misbehaving_worker):
+        """A crashing file fails alone; its neighbours still succeed."""
+        crash = tmp_path / "crash.txt"
+        crash.write_text("corrupt")
+        paths = text_files[:2] + [crash] + text_files[2:]
+
+        results = extract_many(paths, max_workers=2, _skip_path_validation=True)
+
+        assert len(results) == 6
+        assert results[2].success is False
+        assert "crashed" in results[2].error
+        assert [r.success for i, r in enumerate(results) if i != 2] == [True] * 5
+        assert get_extraction_progress()["crashed"] == 1
+
+    def test_per_file_timeout(self, tmp_path, text_files, forked_misbehaving_worker):
+        """A hung file is failed after the timeout without losing other files."""
+        hang = tmp_path / "hang.txt"
+        hang.write_text("never finishes")
+        paths = [hang] + text_files
+
+        results = extract_many(paths, max_workers=2, timeout=1, _skip_path_validation=True)
+
+        assert results[0].success is False
+        assert "timed out" in results[0].error
+        assert all(r.success for r in results[1:])
+        assert get_extraction_progress()["timed_out"] == 1
+
+
+class TestPopulateProgressEndpoint:
+    """Tests for the populate progress endpoint."""
+
+    def test_progress_endpoint(self, client, text_files):
+        """Endpoint reports the most recent job."""
+        extract_many(text_files, max_workers=1, _skip_path_validation=True)
+
+        response = client.get("/api/admin/cache/populate/progress")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["running"] is False
+        assert data["progress"]["total"] == 5
@@ -0,0 +1,109 @@
+"""Tests for single-pass file sniffing and cached file descriptors."""
+
+import builtins
+import json
+import zipfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services import file_sniffer, slide_archive
+from app.services.file_sniffer import clear_descriptor_cache, sniff_file
+from app.services.slide_archive import ArchiveCache, ZipHandlePool, extract_slide_archive
+
+
+@pytest.fixture
+def materials(tmp_path, monkeypatch):
+    """Empty descriptor cache and slide archive pool rooted at tmp_path."""
+    monkeypatch.setattr(slide_archive, "MATERIALS_BASE", tmp_path)
+    monkeypatch.setattr(slide_archive, "_archive_cache", ArchiveCache())
+    monkeypatch.setattr(slide_archive, "_zip_pool", ZipHandlePool())
+    clear_descriptor_cache()
+    yield tmp_path
+    slide_archive._zip_pool.close_all()
+    clear_descriptor_cache()
+
+
+def _slide_archive(path):
+    manifest = {"num_pages": 1, "pages": [{"page_number": 1, "text": {"path": "p1.txt"}}]}
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("manifest.json", json.dumps(manifest))
+        zf.writestr("p1.txt", "Slide text")
+    return path
+
+
+class TestSniffFile:
+    """Tests for sniff_file."""
+
+    def test_descriptor_fields(self, materials):
+        """Type, size and mtime come from one stat."""
+        path = materials / "notes.md"
+        path.write_text("# Notes")
+
+        descriptor = sniff_file(path)
+
+        assert descriptor.file_type == "markdown"
+        assert descriptor.size == 7
+        assert descriptor.modified.timestamp() == pytest.approx(path.stat().st_mtime)
+        assert descriptor.file_hash is None
+
+    def test_missing_file(self, materials):
+        """A missing file has no descriptor."""
+        assert sniff_file(materials / "missing.pdf") is None
+
+    def test_pdf_header_read_once(self, materials):
+        """Repeat sniffs of an unchanged PDF do not reopen it."""
+        path = materials / "reader.pdf"
+        path.write_bytes(b"%PDF-1.4\n")
+
+        with patch.object(builtins, "open", wraps=builtins.open) as opened:
+            assert sniff_file(path).file_type == "pdf"
+            assert sniff_file(path).file_type == "pdf"
+
+        assert opened.call_count == 1
+
+    def test_changed_file_is_resniffed(self, materials):
+        """A rewritten file gets a fresh descriptor."""
+        path = materials / "reader.pdf"
+        path.write_bytes(b"%PDF-1.4\n")
+        assert sniff_file(path).file_type == "pdf"
+
+        _slide_archive(path)
+
+        assert sniff_file(path).file_type == "slide_archive"
+
+    def test_slide_archive_opened_once_per_request(self, materials):
+        """Detection hands its open file to the pool; extraction reuses it."""
+        path = _slide_archive(materials / "deck.pdf")
+
+        with patch.object(builtins, "open", wraps=builtins.open) as opened, \
+                patch.object(zipfile, "ZipFile", wraps=zipfile.ZipFile) as zipped:
+            assert sniff_file(path).file_type == "slide_archive"
+            assert extract_slide_archive(path).slides[0].text_content == "Slide text"
+
+        assert opened.call_count == 1
+        assert zipped.call_count == 1
+
+    def test_known_hash_filled_in(self, materials):
+        """An indexed hash is attached without hashing the file."""
+        path = materials / "notes.txt"
+        path.write_text("text")
+        hash_index = MagicMock()
+        hash_index.known_hash.return_value = "abc123"
+
+        descriptor = sniff_file(path, hash_index)
+
+        assert descriptor.file_hash == "abc123"
+        hash_index.file_hash.assert_not_called()
+
+    def test_cache_is_bounded(self, materials, monkeypatch):
+        """Least recently sniffed descriptors are dropped past the limit."""
+        monkeypatch.setattr(file_sniffer, "SNIFF_CACHE_MAX_ENTRIES", 2)
+        for i in range(3):
+            path = materials / f"n{i}.txt"
+            path.write_text(str(i))
+            sniff_file(path)
+
+        assert list(file_sniffer._descriptors) == [
+            str(materials / "n1.txt"), str(materials / "n2.txt"),
+        ]
@@ -4,6 +4,8 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from app.services.files_api_service import FilesAPIService
+from app.services.topic_file_index import CourseFileIndexRegistry
+from tests.conftest import make_material
 
 
 class TestFilesContentQuizEndpoint:
@@ -1256,7 +1258,7 @@ class TestCourseAwareFlashcardsEndpoint:
         with patch.object(service, '_get_anthropic_client') as mock_get_client:
             mock_client = MagicMock()
             mock_response = MagicMock()
-            mock_response.content = [MagicMock(text='{"flashcards": [{"front": "Q", "back": "A"}]}')]
+            mock_response.content = [MagicMock(type="text", text='{"flashcards": [{"front": "Q", "back": "A"}]}')]
             mock_response.usage = MagicMock(input_tokens=100, output_tokens=50)
             mock_client.messages.create = AsyncMock(return_value=mock_response)
             mock_get_client.return_value = mock_client
@@ -1298,7 +1300,7 @@ class TestCourseAwareFlashcardsEndpoint:
         with patch.object(service, '_get_anthropic_client') as mock_get_client:
             mock_client = MagicMock()
             mock_response = MagicMock()
-            mock_response.content = [MagicMock(text='{"flashcards": [{"front": "Q", "back": "A"}]}')]
+            mock_response.content = [MagicMock(type="text", text='{"flashcards": [{"front": "Q", "back": "A"}]}')]
             mock_response.usage = MagicMock(input_tokens=100, output_tokens=50)
             mock_client.messages.create = AsyncMock(return_value=mock_response)
             mock_get_client.return_value = mock_client
@@ -1358,11 +1360,10 @@ class TestCourseFilesEndpoint:
         """Test getting files for a course."""
         mock_service = MagicMock()
         mock_service.get_files_for_course.return_value = ["file1", "file2"]
-        mock_service.get_file_id.return_value = "file-id-123"
-        mock_service.file_ids = {
-            "file1": {"filename": "test.pdf", "tier": "Syllabus"},
-            "file2": {"filename": "test2.pdf", "tier": "Course_Materials"}
-        }
+        mock_service.get_course_file_details.return_value = [
+            {"key": "file1", "filename": "test.pdf", "title": "Syllabus", "tier": "syllabus", "week": None},
+            {"key": "file2", "filename": "test2.pdf", "title": "Reader", "tier": "course_materials", "week": 1},
+        ]
 
         with patch(
             'app.routes.files_content.get_files_api_service',
@@ -1380,10 +1381,9 @@ class TestCourseFilesEndpoint:
         """Test getting files for a course filtered by week."""
         mock_service = MagicMock()
         mock_service.get_files_for_course.return_value = ["lecture_week_3"]
-        mock_service.get_file_id.return_value = "file-id-456"
-        mock_service.file_ids = {
-            "lecture_week_3": {"filename": "week3.pdf", "tier": "Course_Materials"}
-        }
+        mock_service.get_course_file_details.return_value = [
+            {"key": "lecture_week_3", "filename": "week3.pdf", "title": "Week 3", "tier": "course_materials", "week": 3}
+        ]
 
         with patch(
             'app.routes.files_content.get_files_api_service',
@@ -1502,3 +1502,487 @@ class TestWeekValidation:
             })
 
             assert response.status_code == 422
+
+
+class TestConcurrentMaterialExtraction:
+    """Tests for executor-backed extraction in get_course_materials_with_text."""
+
+    @pytest.mark.asyncio
+    async def test_preserves_order_and_skips_failures(self):
+        """Results keep Firestore order even when extraction finishes out of order."""
+        import time
+
+        service = FilesAPIService()
+        materials = [MagicMock(filename=f"m{i}.pdf") for i in range(4)]
+
+        def slow_extract(material):
+            # Earlier materials finish last
+            time.sleep(0.05 * (4 - int(material.filename[1])))
+            return None if material.filename == "m2.pdf" else f"text of {material.filename}"
+
+        with patch.object(service, 'get_course_materials', return_value=materials), \
+                patch.object(service, '_extract_text_from_material', side_effect=slow_extract):
+            results = await service.get_course_materials_with_text(course_id="LLS-2025-2026")
+
+        assert [m.filename for m, _ in results] == ["m0.pdf", "m1.pdf", "m3.pdf"]
+        assert results[0][1] == "text of m0.pdf"
+
+    @pytest.mark.asyncio
+    async def test_extraction_does_not_block_event_loop(self):
+        """The event loop keeps running while a material is being extracted."""
+        import asyncio
+        import threading
+
+        service = FilesAPIService()
+        loop_thread = threading.get_ident()
+        extract_threads = []
+
+        def extract(material):
+            extract_threads.append(threading.get_ident())
+            return "text"
+
+        with patch.object(service, 'get_course_materials', return_value=[MagicMock(filename="a.pdf")]), \
+                patch.object(service, '_extract_text_from_material', side_effect=extract):
+            results, _ = await asyncio.gather(
+                service.get_course_materials_with_text(course_id="LLS-2025-2026"),
+                asyncio.sleep(0),
+            )
+
+        assert len(results) == 1
+        assert extract_threads and extract_threads[0] != loop_thread
+
+    @pytest.mark.asyncio
+    async def test_extraction_exception_is_isolated(self):
+        """One material raising does not fail the whole request."""
+        service = FilesAPIService()
+        materials = [MagicMock(filename="bad.pdf"), MagicMock(filename="good.pdf")]
+
+        def extract(material):
+            if material.filename == "bad.pdf":
+                raise RuntimeError("corrupt")
+            return "ok"
+
+        with patch.object(service, 'get_course_materials', return_value=materials), \
+                patch.object(service, '_extract_text_from_material', side_effect=extract):
+            results = await service.get_course_materials_with_text(course_id="LLS-2025-2026")
+
+        assert [m.filename for m, _ in results] == ["good.pdf"]
+
+
+class TestTokenBudget:
+    """Tests for token estimation and budget packing from stored counts."""
+
+    def test_fit_token_budget_keeps_order_and_unknowns(self):
+        """Items that overflow are skipped; unknown counts are kept."""
+        counts = {"a": 60, "b": 50, "c": None, "d": 40}
+
+        kept = FilesAPIService._fit_token_budget(list(counts), counts.get, 100)
+
+        assert kept == ["a", "c", "d"]
+
+    @pytest.mark.asyncio
+    async def test_materials_over_budget_are_never_extracted(self):
+        """Stored token counts drop materials before their text is loaded."""
+        service = FilesAPIService()
+        materials = [MagicMock(filename="big.pdf"), MagicMock(filename="small.pdf")]
+        stored = {"big.pdf": 900, "small.pdf": 50}
+
+        with patch.object(service, 'get_course_materials', return_value=materials), \
+                patch.object(service, '_stored_token_count', side_effect=lambda m: stored[m.filename]), \
+                patch.object(service, '_extract_text_from_material', return_value="text") as extract:
+            results = await service.get_course_materials_with_text(
+                course_id="LLS-2025-2026", token_budget=100
+            )
+
+        assert [m.filename for m, _ in results] == ["small.pdf"]
+        extract.assert_called_once_with(materials[1])
+
+    @pytest.mark.asyncio
+    async def test_estimate_sums_stored_counts_without_extracting(self):
+        """Estimation is arithmetic over stored counts; only unknowns are extracted."""
+        service = FilesAPIService()
+        materials = [MagicMock(filename="a.pdf"), MagicMock(filename="b.pdf")]
+        stored = {"a.pdf": 1200, "b.pdf": None}
+
+        with patch.object(service, 'get_course_materials', return_value=materials), \
+                patch.object(service, '_material_token_count', side_effect=lambda m: stored[m.filename]), \
+                patch.object(service, '_extract_text_from_material', return_value="x" * 400) as extract:
+            results = await service.estimate_materials_tokens(course_id="LLS-2025-2026")
+
+        assert [(m.filename, tokens) for m, tokens in results] == [("a.pdf", 1200), ("b.pdf", 100)]
+        extract.assert_called_once_with(materials[1])
+
+
+class TestArticleGrounding:
+    """Tests for grounding article explanations in the citation index."""
+
+    @pytest.mark.asyncio
+    async def test_explain_article_sends_citing_passages(self):
+        """Passages citing the article are sent as documents with page numbers."""
+        from app.services.material_search_service import CitationPassage
+
+        service = FilesAPIService()
+        mock_index = MagicMock()
+        mock_index.article_passages.return_value = [
+            CitationPassage(
+                material_id="m1", course_id="LLS-2025-2026", title="Reader",
+                page_number=12, offset=300, passage="Art. 6:74 DCC: every failure..."
+            )
+        ]
+        mock_client = MagicMock()
+        mock_client.messages.create = AsyncMock(
+            return_value=MagicMock(content=[MagicMock(text="Explanation")])
+        )
+
+        with patch('app.services.files_api_service.get_material_search_index', return_value=mock_index), \
+                patch.object(service, '_get_anthropic_client', return_value=mock_client), \
+                patch('app.services.files_api_service.track_llm_usage_from_response', new=AsyncMock()):
+            result = await service.explain_article("6:74", "BW", course_id="LLS-2025-2026")
+
+        assert result == "Explanation"
+        mock_index.article_passages.assert_called_once_with("DCC 6:74", "LLS-2025-2026", 5)
+        blocks = mock_client.messages.create.call_args.kwargs["messages"][0]["content"]
+        assert "Reader (page 12)" in blocks[0]["text"]
+        assert "every failure" in blocks[0]["text"]
+
+    @pytest.mark.asyncio
+    async def test_unrecognized_code_skips_lookup(self):
+        """Unknown codes have no citation index entry."""
+        service = FilesAPIService()
+
+        with patch('app.services.files_api_service.get_material_search_index') as mock_get_index:
+            passages = await service.get_article_passages("12", "XYZ")
+
+        assert passages == []
+        mock_get_index.assert_not_called()
+
+
+class TestCourseFileIndexLookups:
+    """Tests for course file lookups served from the precomputed index."""
+
+    @pytest.fixture(autouse=True)
+    def registry(self):
+        """Isolate the course file index registry."""
+        registry = CourseFileIndexRegistry()
+        with patch("app.services.files_api_service.get_course_file_index_registry", return_value=registry):
+            yield registry
+
+    def _service(self, course):
+        service = FilesAPIService()
+        service.get_course_materials = MagicMock(return_value=[
+            make_material("syllabus", week=None, tier="syllabus"),
+            make_material("lecture", week=3, title="Lecture 3"),
+        ])
+        course_service = MagicMock()
+        course_service.get_course.return_value = course
+        service._course_service = course_service
+        return service, course_service
+
+    def _course(self, updated_at):
+        week = MagicMock(weekNumber=3, title="Mens rea", topics=[])
+        return MagicMock(weeks=[week], updatedAt=updated_at)
+
+    def test_index_reused_until_course_changes(self):
+        """Materials and weeks are read only to rebuild after the course's updatedAt moves."""
+        course = self._course("2026-01-01")
+        service, course_service = self._service(course)
+
+        assert service.get_files_for_course("LLS-2025-2026", week_number=3) == ["lecture"]
+        assert service.get_files_for_course_weeks("LLS-2025-2026", [3, 4]) == ["lecture"]
+        weeks_reads = [c for c in course_service.get_course.call_args_list if c.kwargs["include_weeks"]]
+        assert len(weeks_reads) == 1
+        assert service.get_course_materials.call_count == 1
+
+        course.updatedAt = "2026-02-01"
+        assert service.get_files_for_course("LLS-2025-2026") == ["syllabus", "lecture"]
+        weeks_reads = [c for c in course_service.get_course.call_args_list if c.kwargs["include_weeks"]]
+        assert len(weeks_reads) == 2
+
+    def test_material_change_rebuilds_index(self, registry):
+        """Material writes invalidate the course's index."""
+        from app.services.course_materials_service import _materials_changed
+
+        service, _ = self._service(self._course("2026-01-01"))
+        service.get_files_for_course("LLS-2025-2026")
+
+        with patch(
+            "app.services.course_materials_service.get_course_file_index_registry", return_value=registry
+        ):
+            _materials_changed("LLS-2025-2026")
+        service.get_course_materials.return_value = []
+
+        assert service.get_files_for_course("LLS-2025-2026") == []
+
+    def test_catalog_index_follows_file_ids(self):
+        """Replacing the legacy file catalog rebuilds its index."""
+        service, _ = self._service(self._course("2026-01-01"))
+        service.file_ids = {"reader": {"filename": "reader.pdf", "subject": "Private_Law", "tier_priority": 2}}
+        assert service.get_files_by_subject("Private_Law") == ["reader"]
+
+        service.file_ids = {}
+
+        assert service.get_files_by_subject("Private_Law") == []
+
+    def test_course_topic_lookup(self):
+        """Topics are matched against week titles in the course index."""
+        service, _ = self._service(self._course("2026-01-01"))
+
+        assert service.get_topic_files("mens rea", course_id="LLS-2025-2026") == ["lecture"]
+
+    def test_course_not_found(self):
+        """Unknown courses raise ValueError."""
+        service, course_service = self._service(None)
+
+        with pytest.raises(ValueError):
+            service.get_files_for_course("INVALID")
+
+    def test_topic_files_route_with_course(self, client):
+        """The topic-files route looks topics up in the course index."""
+        mock_service = MagicMock()
+        mock_service.get_topic_files.return_value = ["lecture"]
+        mock_service.get_course_file_details.return_value = [{"key": "lecture", "filename": "lecture.pdf"}]
+
+        with patch('app.routes.files_content.get_files_api_service', return_value=mock_service):
+            response = client.get("/api/files-content/topic-files/mens rea?course_id=LLS-2025-2026&week=3")
+
+        assert response.status_code == 200
+        assert response.json()["course_id"] == "LLS-2025-2026"
+        assert response.json()["files"] == [{"key": "lecture", "filename": "lecture.pdf"}]
+        mock_service.get_course_file_details.assert_called_once_with("LLS-2025-2026", ["lecture"])
+        mock_service.get_topic_files.assert_called_once_with(
+            "mens rea", course_id="LLS-2025-2026", week_number=3
+        )
+
+
+def _events(*events, error=None):
+    """Async generator of service stream events (optionally raising first)."""
+    async def stream(**kwargs):
+        if error:
+            raise error
+        for event in events:
+            yield event
+    return stream
+
+
+def _sse_events(body):
+    """Parse (event, data) pairs from an SSE response body."""
+    import json
+
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+
+def _mock_stream_client(chunks):
+    """Mock Anthropic client whose messages.stream() yields the text chunks."""
+    final = MagicMock()
+    final.content = [MagicMock(type="thinking"), MagicMock(type="text", text="".join(chunks))]
+    final.usage = MagicMock(input_tokens=100, output_tokens=50,
+                            cache_read_input_tokens=0, cache_creation_input_tokens=0)
+
+    async def text_stream():
+        for chunk in chunks:
+            yield chunk
+
+    stream = MagicMock()
+    stream.text_stream = text_stream()
+    stream.get_final_message = AsyncMock(return_value=final)
+    manager = MagicMock()
+    manager.__aenter__ = AsyncMock(return_value=stream)
+    manager.__aexit__ = AsyncMock(return_value=False)
+    mock_client = MagicMock()
+    mock_client.messages.stream.return_value = manager
+    return mock_client
+
+
+class TestStreamingGeneration:
+    """Tests for the Server-Sent Events generation routes."""
+
+    def test_quiz_stream_sends_events(self, client):
+        """Deltas are forwarded and the result carries the usual body."""
+        mock_service = MagicMock()
+        mock_service.stream_quiz_from_course = _events(
+            {"event": "start", "data": {"materials": 2}},
+            {"event": "delta", "data": {"text": '{"questions": '}},
+            {"event": "delta", "data": {"text": "[]}"}},
+            {"event": "result", "data": {"quiz": {"questions": []}}},
+        )
+
+        with patch('app.routes.files_content.get_files_api_service', return_value=mock_service):
+            response = client.post("/api/files-content/quiz/stream", json={
+                "course_id": "LLS-2025-2026", "week": 3
+            })
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _sse_events(response.text)
+        assert [name for name, _ in events] == ["start", "delta", "delta", "result"]
+        assert events[-1][1] == {
+            "quiz": {"questions": []}, "course_id": "LLS-2025-2026", "week": 3, "cached": True
+        }
+
+    def test_stream_request_errors_return_400(self, client):
+        """Errors before the first event are still HTTP errors."""
+        mock_service = MagicMock()
+        mock_service.stream_flashcards_from_course = _events(error=ValueError("No materials found"))
+
+        with patch('app.routes.files_content.get_files_api_service', return_value=mock_service):
+            response = client.post("/api/files-content/flashcards/stream", json={
+                "course_id": "LLS-2025-2026"
+            })
+
+        assert response.status_code == 400
+        assert "No materials found" in response.json()["detail"]
+
+    def test_stream_errors_become_error_events(self, client):
+        """Errors after streaming has started are sent as an error event."""
+        async def failing(**kwargs):
+            yield {"event": "start", "data": {"materials": 1}}
+            raise RuntimeError("connection reset")
+
+        mock_service = MagicMock()
+        mock_service.stream_study_guide_from_course = failing
+
+        with patch('app.routes.files_content.get_files_api_service', return_value=mock_service):
+            response = client.post("/api/files-content/study-guide/stream", json={
+                "course_id": "LLS-2025-2026"
+            })
+
+        assert _sse_events(response.text)[-1] == ("error", {"detail": "connection reset"})
+
+    def test_study_guide_stream_saves_at_end(self, client):
+        """The persisted study guide route saves once generation finishes."""
+        mock_service = MagicMock()
+        mock_service.stream_study_guide_from_course = _events(
+            {"event": "start", "data": {"materials": 1}},
+            {"event": "delta", "data": {"text": "# Guide"}},
+            {"event": "result", "data": {"guide": "# Guide"}},
+        )
+        mock_service.course_materials_fingerprint.return_value = "fp"
+        persistence = MagicMock()
+        persistence.find_by_generation_key = AsyncMock(return_value=None)
+        persistence.find_duplicate_guide = AsyncMock(return_value=None)
+        persistence.save_study_guide = AsyncMock(return_value={"id": "g1", "content": "# Guide"})
+
+        with patch('app.routes.study_guide_routes.get_files_api_service', return_value=mock_service), \
+                patch('app.routes.study_guide_routes.get_study_guide_persistence_service',
+                      return_value=persistence):
+            response = client.post(
+                "/api/study-guides/courses/LLS-2025-2026/stream",
+                json={"course_id": "LLS-2025-2026", "weeks": [1]},
+            )
+
+        result = _sse_events(response.text)[-1]
+        assert result == ("result", {
+            "guide": {"id": "g1", "content": "# Guide"},
+            "is_duplicate": False,
+            "message": "Study guide generated and saved successfully",
+        })
+        persistence.save_study_guide.assert_awaited_once()
+
+    def test_study_guide_stream_returns_stored_guide(self, client):
+        """A guide generated with the same parameters is sent without generating."""
+        mock_service = MagicMock()
+        mock_service.course_materials_fingerprint.return_value = "fp"
+        persistence = MagicMock()
+        persistence.find_by_generation_key = AsyncMock(return_value={"id": "g1", "content": "# Guide"})
+
+        with patch('app.routes.study_guide_routes.get_files_api_service', return_value=mock_service), \
+                patch('app.routes.study_guide_routes.get_study_guide_persistence_service',
+                      return_value=persistence):
+            response = client.post(
+                "/api/study-guides/courses/LLS-2025-2026/stream",
+                json={"course_id": "LLS-2025-2026", "weeks": [1]},
+            )
+
+        events = _sse_events(response.text)
+        assert events[0] == ("start", {"stored": True})
+        assert events[-1][1]["guide"] == {"id": "g1", "content": "# Guide"}
+        mock_service.stream_study_guide_from_course.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_service_stream_tracks_usage_at_end(self):
+        """Text is yielded as it arrives; usage is tracked from the final message."""
+        service = FilesAPIService()
+        mock_client = _mock_stream_client(['{"questions": ', "[]}"])
+
+        with patch.object(service, 'get_course_materials_with_text', new_callable=AsyncMock) as mock_materials, \
+                patch.object(service, '_get_anthropic_client', return_value=mock_client), \
+                patch('app.services.files_api_service.track_llm_usage_from_response',
+                      new_callable=AsyncMock) as mock_track:
+            mock_materials.return_value = [(MagicMock(title="Reader"), "Art. 6:74 DCC")]
+            events = [event async for event in service.stream_quiz_from_course("LLS-2025-2026", "Damages")]
+
+        assert [event["event"] for event in events] == ["start", "delta", "delta", "result"]
+        assert events[-1]["data"] == {"quiz": {"questions": []}}
+        assert mock_client.messages.stream.call_args.kwargs["max_tokens"] == 4000
+        mock_track.assert_awaited_once()
+        assert mock_track.call_args.kwargs["operation_type"] == "quiz"
+
+    @pytest.mark.asyncio
+    async def test_service_streams_flashcards_as_they_close(self):
+        """Each card is sent once complete; a truncated response keeps the sent cards."""
+        service = FilesAPIService()
+        chunks = ['{"flashcards": [{"front": "Q1", "back": "A1"}', ', {"front": "Q2", "ba', 'ck": "A2"}, {"fr']
+        mock_client = _mock_stream_client(chunks)
+
+        with patch.object(service, 'get_course_materials_with_text', new_callable=AsyncMock) as mock_materials, \
+                patch.object(service, 'get_course_materials', return_value=[]), \
+                patch.object(service, '_get_anthropic_client', return_value=mock_client), \
+                patch('app.services.files_api_service.track_llm_usage_from_response', new_callable=AsyncMock):
+            mock_materials.return_value = [(MagicMock(title="Reader"), "Art. 3:33 DCC")]
+            events = [event async for event in service.stream_flashcards_from_course("LLS-2025-2026", "Contracts")]
+
+        assert [event["event"] for event in events] == ["start", "flashcard", "flashcard", "result"]
+        assert events[1]["data"] == {"front": "Q1", "back": "A1"}
+        assert events[-1]["data"]["flashcards"] == [
+            {"front": "Q1", "back": "A1"}, {"front": "Q2", "back": "A2"}
+        ]
+
+
+class TestGenerationCoalescing:
+    """Tests for single-flight coalescing of identical generation requests."""
+
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_quizzes_share_one_call(self):
+        """Concurrent requests with equal parameters and materials make one LLM call."""
+        import asyncio
+
+        service = FilesAPIService()
+        response = MagicMock()
+        response.content = [MagicMock(type="text", text='{"questions": []}')]
+
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0.01)
+            return response
+
+        mock_client = MagicMock()
+        mock_client.messages.create = AsyncMock(side_effect=slow_create)
+
+        with patch.object(service, 'get_course_materials_with_text', new_callable=AsyncMock) as mock_materials, \
+                patch.object(service, '_get_anthropic_client', return_value=mock_client), \
+                patch('app.services.files_api_service.track_llm_usage_from_response', new_callable=AsyncMock):
+            mock_materials.return_value = [(MagicMock(id="m1", title="Reader"), "Art. 6:74 DCC")]
+            results = await asyncio.gather(
+                service.generate_quiz_from_course("LLS-2025-2026", "Damages", week_number=3),
+                service.generate_quiz_from_course("LLS-2025-2026", " damages ", week_number=3),
+            )
+
+        assert results == [{"questions": []}, {"questions": []}]
+        assert mock_client.messages.create.call_count == 1
+
+    def test_key_depends_on_materials(self):
+        """Different material text gives a different key."""
+        from app.services.files_api_service import GenerationRequest, material_fingerprint
+
+        def request(text, weeks):
+            return GenerationRequest(
+                params={"model": "m"}, operation_type="study_guide", materials_count=1,
+                request_metadata={"topic": "All", "week_numbers": weeks}, course_id="LLS",
+                material_fingerprint=material_fingerprint([(MagicMock(id="m1"), text)]),
+            )
+
+        assert request("v1", [2, 1]).key() == request("v1", [1, 2]).key()
+        assert request("v1", [1, 2]).key() != request("v2", [1, 2]).key()
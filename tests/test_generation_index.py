@@ -0,0 +1,70 @@
+"""Tests for generation-parameter index keys."""
+
+import os
+from unittest.mock import MagicMock
+
+from app.services import text_cache_service
+from app.services.files_api_service import FilesAPIService
+from app.services.generation_index import KIND_ESSAY, KIND_QUIZ, KIND_STUDY_GUIDE, generation_key
+from tests.conftest import make_material
+
+
+class TestGenerationKey:
+    """Tests for generation_key."""
+
+    def test_equivalent_parameters_share_a_key(self):
+        """Topic case and whitespace, difficulty case and week order are ignored."""
+        key = generation_key(KIND_QUIZ, "LLS", [2, 1], "Contract  Law", "Medium", 10, "fp")
+
+        assert key == generation_key(KIND_QUIZ, "LLS", [1, 2, 2], "contract law", "medium", 10, "fp")
+
+    def test_each_parameter_changes_the_key(self):
+        """Kind, course, weeks, topic, difficulty, count and materials all distinguish keys."""
+        base = dict(kind=KIND_QUIZ, course_id="LLS", week_numbers=[1], topic="Tort",
+                    difficulty="easy", count=5, material_fingerprint="fp")
+        changes = [
+            {"kind": KIND_STUDY_GUIDE}, {"course_id": "CRIM"}, {"week_numbers": [2]},
+            {"topic": "Contract"}, {"difficulty": "hard"}, {"count": 10},
+            {"material_fingerprint": "fp2"},
+        ]
+        keys = {generation_key(**{**base, **change}) for change in changes}
+
+        assert len(keys | {generation_key(**base)}) == len(changes) + 1
+
+    def test_user_and_prompt_version_change_the_key(self):
+        """Private artifacts key on their owner and on the prompt version."""
+        base = generation_key(KIND_ESSAY, "LLS", topic="Tort", material_fingerprint="fp")
+        keys = {
+            base,
+            generation_key(KIND_ESSAY, "LLS", topic="Tort", material_fingerprint="fp", user_id="alice"),
+            generation_key(KIND_ESSAY, "LLS", topic="Tort", material_fingerprint="fp", user_id="bob"),
+            generation_key(KIND_ESSAY, "LLS", topic="Tort", material_fingerprint="fp", prompt_version="v2"),
+        }
+
+        assert len(keys) == 4
+
+    def test_no_weeks_means_all_weeks(self):
+        """None and an empty week list are the same selection."""
+        assert generation_key(KIND_STUDY_GUIDE, "LLS", None) == generation_key(KIND_STUDY_GUIDE, "LLS", [])
+
+
+class TestCourseMaterialsFingerprint:
+    """Tests for FilesAPIService.course_materials_fingerprint."""
+
+    def test_material_without_content_hash_uses_file_hash(self, tmp_path, monkeypatch):
+        """Same-size edits to a material without a contentHash change the fingerprint."""
+        monkeypatch.setattr(text_cache_service, "_validate_path_within_materials", lambda p: True)
+        monkeypatch.setattr(
+            text_cache_service, "_hash_index", text_cache_service.FileHashIndex(tmp_path / "hash_index.json")
+        )
+        path = tmp_path / "reader.txt"
+        path.write_text("version one")
+        service = FilesAPIService()
+        service.get_course_materials = MagicMock(return_value=[make_material("reader", fileSize=11)])
+        service._get_local_file_path = MagicMock(return_value=path)
+
+        before = service.course_materials_fingerprint("LLS")
+        path.write_text("version two")
+        os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000_000))
+
+        assert service.course_materials_fingerprint("LLS") != before
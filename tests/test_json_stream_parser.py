@@ -0,0 +1,41 @@
+"""Tests for incremental parsing of streamed JSON array items."""
+
+import json
+
+from app.services.json_stream_parser import ArrayItemParser
+
+CARDS = [
+    {"front": "What is consensus?", "back": "Meeting of the minds (Art. 3:33 DCC)."},
+    {"front": "Tricky {braces} and [brackets]", "back": "Quote \" and backslash \\ in text"},
+    {"front": "Nested", "back": "Object", "articles": [{"code": "DCC", "number": "6:74"}]},
+]
+RESPONSE = "```json\n" + json.dumps({"flashcards": CARDS}, indent=2) + "\n```"
+
+
+class TestArrayItemParser:
+    """Tests for ArrayItemParser."""
+
+    def test_items_returned_as_they_close(self):
+        """Each item is returned by the chunk containing its closing brace."""
+        parser = ArrayItemParser()
+        first_close = RESPONSE.index("}") + 1
+
+        assert parser.feed(RESPONSE[:first_close - 1]) == []
+        assert parser.feed(RESPONSE[first_close - 1:first_close]) == [CARDS[0]]
+        assert parser.feed(RESPONSE[first_close:]) == CARDS[1:]
+        assert parser.items == CARDS
+
+    def test_character_by_character(self):
+        """Chunk boundaries inside strings and escapes do not matter."""
+        parser = ArrayItemParser()
+        for char in RESPONSE:
+            parser.feed(char)
+
+        assert parser.items == CARDS
+
+    def test_truncated_response_keeps_complete_items(self):
+        """A response cut off mid-item still yields the items before it."""
+        parser = ArrayItemParser()
+        parser.feed(RESPONSE[:RESPONSE.index("Nested")])
+
+        assert parser.items == CARDS[:2]
@@ -0,0 +1,118 @@
+"""Tests for upload-time derived material artifacts."""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.services import material_artifacts, text_cache_service
+from app.services.material_artifacts import (
+    build_material_artifacts,
+    estimate_tokens,
+    load_material_text,
+    page_spans,
+)
+from app.services.text_extractor import ExtractionResult, join_pages
+from app.services.tiered_text_cache import TieredTextCache
+from tests.conftest import make_material
+
+
+@pytest.fixture
+def material_file(tmp_path, monkeypatch):
+    """Create a file and allow it to be fingerprinted outside Materials."""
+    monkeypatch.setattr(text_cache_service, "_validate_path_within_materials", lambda p: True)
+    monkeypatch.setattr(
+        text_cache_service, "_hash_index", text_cache_service.FileHashIndex(tmp_path / "hash_index.json")
+    )
+    path = tmp_path / "reader.txt"
+    path.write_text("Art. 6:74 DCC governs damages.")
+    return path
+
+
+@pytest.fixture
+def tiered_cache(tmp_path):
+    """Route artifact reads and writes through an isolated tiered cache."""
+    cache = TieredTextCache(disk_dir=tmp_path / "cache", use_firestore=False)
+    with patch.object(material_artifacts, "get_tiered_text_cache", return_value=cache):
+        yield cache
+
+
+class TestPageSpans:
+    """Tests for page offset and token estimate derivation."""
+
+    def test_page_index_spans_slice_the_text(self):
+        """Spans from a PageIndex point at each page's text in the buffer."""
+        text, pages = join_pages([(1, "First page."), (2, "Second page text.")])
+        result = ExtractionResult(file_path="a.pdf", file_type="pdf", text=text, success=True, pages=pages)
+
+        spans = page_spans(result)
+
+        assert [span["pageNumber"] for span in spans] == [1, 2]
+        assert text[spans[1]["start"]:spans[1]["start"] + spans[1]["charCount"]] == "Second page text."
+        assert spans[1]["tokens"] == estimate_tokens(len("Second page text."))
+
+    def test_single_page_types_get_one_span(self):
+        """Results without pages are one span over the whole text."""
+        result = ExtractionResult(file_path="a.txt", file_type="text", text="abcdefghi", success=True)
+
+        assert page_spans(result) == [{"pageNumber": 1, "start": 0, "charCount": 9, "tokens": 3}]
+
+
+class TestBuildMaterialArtifacts:
+    """Tests for building and reading the artifact set."""
+
+    def test_artifacts_include_hash_and_seed_cache(self, material_file, tiered_cache):
+        """The text is cached under the content hash at build time."""
+        result = ExtractionResult(
+            file_path=str(material_file), file_type="text", text=material_file.read_text(), success=True
+        )
+
+        artifacts = build_material_artifacts(material_file, result)
+
+        assert artifacts.content_hash == text_cache_service._compute_file_hash(material_file)
+        assert artifacts.token_estimate == estimate_tokens(len(result.text))
+        assert tiered_cache.get(artifacts.content_hash).text == result.text
+        fields = artifacts.to_firestore()
+        assert fields["contentHash"] == artifacts.content_hash
+        assert fields["pageSpans"][0]["charCount"] == len(result.text)
+
+    def test_failed_extraction_has_no_artifacts(self, material_file, tiered_cache):
+        """A failed extraction produces nothing to persist."""
+        result = ExtractionResult(
+            file_path=str(material_file), file_type="text", text="", success=False, error="boom"
+        )
+
+        assert build_material_artifacts(material_file, result) is None
+
+    def test_uploaded_material_text_is_read_without_parsing(self, material_file, tiered_cache):
+        """Uploaded materials with artifacts never reach the extractor."""
+        material = make_material(textExtracted=True, extractedText="stored text", contentHash="abc")
+
+        with patch.object(material_artifacts, "extract_text") as mock_extract:
+            text = load_material_text(material, material_file)
+
+        assert text == "stored text"
+        mock_extract.assert_not_called()
+
+    def test_text_falls_back_to_cache_by_hash(self, material_file, tiered_cache):
+        """Artifacts without inline text are served from the cache by content hash."""
+        result = ExtractionResult(
+            file_path=str(material_file), file_type="text", text=material_file.read_text(), success=True
+        )
+        artifacts = build_material_artifacts(material_file, result)
+        material = make_material(textExtracted=True, contentHash=artifacts.content_hash)
+
+        assert load_material_text(material, material_file) == result.text
+
+    def test_changed_scanned_file_ignores_stale_artifacts(self, material_file, tiered_cache):
+        """Scanned files edited after extraction are re-extracted, not served stale."""
+        material = make_material(
+            source="scanned", textExtracted=True, extractedText="old text", contentHash="stale-hash"
+        )
+
+        assert load_material_text(material, material_file) is None
+
+    def test_material_without_artifacts(self, material_file, tiered_cache):
+        """Materials extracted before artifacts existed fall back to parsing."""
+        material = make_material(textExtracted=True, extractedText="legacy text")
+
+        assert load_material_text(material, material_file) is None
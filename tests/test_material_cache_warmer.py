@@ -0,0 +1,119 @@
+"""Tests for the calendar-driven material cache warmer."""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.material_cache_warmer import (
+    MaterialCacheWarmer,
+    calendar_week,
+    seconds_until_next_run,
+    weeks_to_warm,
+)
+from tests.conftest import make_material
+
+TERM_START = datetime(2025, 9, 1, tzinfo=timezone.utc)  # A Monday
+
+
+class TestCalendar:
+    """Tests for picking the weeks to warm."""
+
+    def test_calendar_week(self):
+        """Week 1 starts on the start date; the week before is week 0."""
+        assert calendar_week(TERM_START, datetime(2025, 9, 7, tzinfo=timezone.utc)) == 1
+        assert calendar_week(TERM_START, datetime(2025, 9, 8, tzinfo=timezone.utc)) == 2
+        assert calendar_week(TERM_START, datetime(2025, 8, 28, tzinfo=timezone.utc)) == 0
+
+    def test_current_and_next_week(self):
+        """Only weeks the course defines are warmed."""
+        now = datetime(2025, 9, 10, tzinfo=timezone.utc)  # Week 2
+
+        assert weeks_to_warm(TERM_START, [1, 2, 3, 4], now) == [2, 3]
+        assert weeks_to_warm(TERM_START, [1, 2], now) == [2]
+        assert weeks_to_warm(None, [1, 2], now) == []
+
+    def test_run_up_to_term_warms_week_one(self):
+        """The week before the term starts warms week 1."""
+        now = datetime(2025, 8, 28, tzinfo=timezone.utc)
+
+        assert weeks_to_warm(TERM_START, [1, 2], now) == [1]
+
+    def test_next_run(self):
+        """Runs are scheduled daily at the configured hour."""
+        assert seconds_until_next_run(datetime(2025, 9, 1, 4, 30, tzinfo=timezone.utc), hour=5) == 1800
+        assert seconds_until_next_run(datetime(2025, 9, 1, 5, 0, tzinfo=timezone.utc), hour=5) == 86400
+
+
+@pytest.fixture
+def services():
+    """Mock course and files services for one course in week 2."""
+    course_service = MagicMock()
+    course_service.get_all_courses.return_value = (
+        [SimpleNamespace(id="LLS"), SimpleNamespace(id="NO-CAL")], 2
+    )
+    course_service.get_course.side_effect = lambda course_id, include_weeks: SimpleNamespace(
+        startDate=TERM_START if course_id == "LLS" else None
+    )
+    course_service.get_course_weeks.return_value = [SimpleNamespace(weekNumber=n) for n in (1, 2, 3)]
+
+    files_service = MagicMock()
+    files_service.get_course_materials.side_effect = lambda course_id, week_number, limit: (
+        [make_material("reader"), make_material("slides")] if week_number == 2 else [make_material("cases")]
+    )
+    statuses = {"reader": "cold", "slides": "cached", "cases": "cold"}
+    files_service.material_cache_status.side_effect = lambda material: statuses[material.id]
+    files_service.warm_material.return_value = True
+
+    with patch(
+        "app.services.course_service.get_course_service", return_value=course_service
+    ), patch(
+        "app.services.files_api_service.get_files_api_service", return_value=files_service
+    ):
+        yield course_service, files_service
+
+
+class TestWarmerRun:
+    """Tests for warmer runs."""
+
+    NOW = datetime(2025, 9, 10, tzinfo=timezone.utc)
+
+    @pytest.mark.asyncio
+    async def test_dry_run_reports_without_extracting(self, services):
+        """A dry run lists each material's status and never extracts."""
+        _, files_service = services
+
+        report = await MaterialCacheWarmer(files_per_minute=0).run(dry_run=True, now=self.NOW)
+
+        files_service.warm_material.assert_not_called()
+        assert report.weeks == {"LLS": [2, 3]}
+        assert report.skipped == {"NO-CAL": "no startDate"}
+        assert report.counts() == {"cold": 2, "cached": 1}
+        assert report.to_dict()["counts"] == {"cold": 2, "cached": 1}
+
+    @pytest.mark.asyncio
+    async def test_run_warms_cold_materials(self, services):
+        """Cold materials are extracted; cached ones are left alone."""
+        _, files_service = services
+
+        report = await MaterialCacheWarmer(files_per_minute=0).run(now=self.NOW)
+
+        assert files_service.warm_material.call_count == 2
+        assert report.counts() == {"warmed": 2, "cached": 1}
+
+    @pytest.mark.asyncio
+    async def test_extraction_limit_defers_the_rest(self, services):
+        """Extractions over the per-run limit are deferred."""
+        report = await MaterialCacheWarmer(files_per_minute=0, max_files=1).run(now=self.NOW)
+
+        assert report.counts() == {"warmed": 1, "cached": 1, "deferred": 1}
+
+    @pytest.mark.asyncio
+    async def test_extractions_are_rate_limited(self, services):
+        """Consecutive extractions wait for the rate limit."""
+        with patch("app.services.material_cache_warmer.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            await MaterialCacheWarmer(files_per_minute=60).run(now=self.NOW)
+
+        assert mock_sleep.call_count == 1
+        assert 0 < mock_sleep.call_args[0][0] <= 1.0
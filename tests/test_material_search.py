@@ -0,0 +1,211 @@
+"""Tests for the SQLite FTS5 course material search index."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services import material_search_service
+from app.services.material_search_service import (
+    MaterialSearchIndex,
+    build_match_query,
+    material_passages,
+)
+from tests.conftest import make_material
+
+DAMAGES_TEXT = "Damages under Art. 6:74 DCC require a failure in performance."
+TORT_TEXT = "Art. 6:162 DCC: an unlawful act <b>attributable</b> to the tortfeasor."
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Create an index backed by a temporary database."""
+    return MaterialSearchIndex(db_path=tmp_path / "search.db")
+
+
+class TestMatchQuery:
+    """Tests for turning user input into FTS5 queries."""
+
+    def test_terms_are_quoted_and_last_is_prefix(self):
+        """Operators in user input are neutralized."""
+        assert build_match_query('damages NEAR(" 6:74') == '"damages" "NEAR" "6:74"*'
+
+    def test_any_term_mode(self):
+        """The fallback query matches any term."""
+        assert build_match_query("offer acceptance", match_all=False) == '"offer" OR "acceptance"*'
+
+    def test_no_terms(self):
+        """Punctuation-only input has no query."""
+        assert build_match_query("?!") is None
+
+
+class TestPassages:
+    """Tests for splitting material text into page passages."""
+
+    def test_page_spans_give_page_numbers(self):
+        """Passages carry the page they came from."""
+        text = "First page.\n\nSecond page."
+        material = make_material("reader", pageSpans=[
+            {"pageNumber": 1, "start": 0, "charCount": 11, "tokens": 3},
+            {"pageNumber": 2, "start": 13, "charCount": 12, "tokens": 3},
+        ])
+
+        assert list(material_passages(material, text)) == [(1, "First page."), (2, "Second page.")]
+
+    def test_text_without_spans(self):
+        """Text without page spans has no page numbers."""
+        assert list(material_passages(make_material("reader"), "Some text.")) == [(None, "Some text.")]
+
+
+class TestSearch:
+    """Tests for indexing and ranked search."""
+
+    def test_search_ranks_and_highlights(self, index):
+        """Matching passages come back with escaped, highlighted snippets."""
+        index.index_material("c1", make_material("damages"), DAMAGES_TEXT, "h1")
+        index.index_material("c1", make_material("tort", week=2), TORT_TEXT, "h2")
+
+        hits = index.search("c1", "6:162 unlawful")
+
+        assert [hit.material_id for hit in hits] == ["tort"]
+        assert "<mark>unlawful</mark>" in hits[0].snippet
+        assert "&lt;b&gt;" in hits[0].snippet
+
+    def test_filters_partition_by_course_week_and_tier(self, index):
+        """Other courses, weeks and tiers are not returned."""
+        index.index_material("c1", make_material("damages"), DAMAGES_TEXT, "h1")
+        index.index_material("c1", make_material("tort", week=2, tier="supplementary"), TORT_TEXT, "h2")
+        index.index_material("c2", make_material("other"), DAMAGES_TEXT, "h3")
+
+        assert {hit.material_id for hit in index.search("c1", "DCC")} == {"damages", "tort"}
+        assert [hit.material_id for hit in index.search("c1", "DCC", week_number=2)] == ["tort"]
+        assert [hit.material_id for hit in index.search("c1", "DCC", tier="course_materials")] == ["damages"]
+
+    def test_falls_back_to_any_term(self, index):
+        """A query with an unmatched term still finds partial matches."""
+        index.index_material("c1", make_material("damages"), DAMAGES_TEXT, "h1")
+
+        assert [hit.material_id for hit in index.search("c1", "damages xyzzy")] == ["damages"]
+
+    def test_reindex_replaces_passages(self, index):
+        """Re-indexing a material drops its old text."""
+        index.index_material("c1", make_material("damages"), DAMAGES_TEXT, "h1")
+        index.index_material("c1", make_material("damages"), "Completely new reader text.", "h2")
+
+        assert index.search("c1", "performance") == []
+        assert index.indexed_fingerprints("c1") == {"damages": "h2"}
+
+
+class TestSync:
+    """Tests for incremental course syncs."""
+
+    def _sync(self, index, materials, fingerprints):
+        service = MagicMock()
+        service.list_materials.return_value = materials
+        with patch(
+            "app.services.course_materials_service.get_course_materials_service", return_value=service
+        ), patch.object(
+            material_search_service, "_material_fingerprint", side_effect=lambda m: fingerprints[m.id]
+        ), patch.object(
+            material_search_service, "_material_text", return_value=DAMAGES_TEXT
+        ) as mock_text:
+            counts = index.sync_course("c1", force=True)
+        return counts, mock_text
+
+    def test_only_changed_materials_are_reindexed(self, index):
+        """Unchanged fingerprints skip text loading; removed materials are dropped."""
+        self._sync(index, [make_material("a"), make_material("b")], {"a": "h1", "b": "h2"})
+
+        counts, mock_text = self._sync(index, [make_material("a"), make_material("c")], {"a": "h1", "c": "h3"})
+
+        assert counts == {"indexed": 1, "updated": 0, "removed": 1, "unchanged": 1}
+        assert mock_text.call_count == 1
+        assert set(index.indexed_fingerprints("c1")) == {"a", "c"}
+
+    def test_recent_sync_is_skipped_until_marked_stale(self, index):
+        """Syncs are throttled unless the course's materials changed."""
+        index._synced_at["c1"] = float("inf")
+
+        assert index.sync_course("c1") == {"indexed": 0, "updated": 0, "removed": 0, "unchanged": 0}
+
+        index.mark_stale("c1")
+        assert "c1" not in index._synced_at
+
+    def test_metadata_changes_are_updated_in_place(self, index):
+        """A moved or renamed material is refiltered without reloading its text."""
+        self._sync(index, [make_material("a", week=1)], {"a": "h1"})
+
+        counts, mock_text = self._sync(index, [make_material("a", week=2, title="Renamed")], {"a": "h1"})
+
+        assert counts["updated"] == 1
+        mock_text.assert_not_called()
+        hits = index.search("c1", "damages", week_number=2)
+        assert [(hit.material_id, hit.title) for hit in hits] == [("a", "Renamed")]
+        assert index.search("c1", "damages", week_number=1) == []
+
+    def test_running_sync_is_not_waited_for(self, index):
+        """A second sync of a course returns instead of repeating the work."""
+        with index._sync_lock("c1"), patch.object(material_search_service, "_material_text") as mock_text:
+            counts = index.sync_course("c1", force=True, wait=False)
+
+        assert counts == {"indexed": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        mock_text.assert_not_called()
+
+    def test_cold_course_is_built_in_the_background(self, index):
+        """Courses with nothing indexed are not synced inside the request."""
+        with patch.object(
+            material_search_service.threading, "Thread"
+        ) as mock_thread, patch.object(index, "sync_course") as mock_sync:
+            assert index.refresh("c1") is True
+            mock_sync.assert_not_called()
+            mock_thread.return_value.start.assert_called_once()
+
+            index.index_material("c1", make_material("a"), DAMAGES_TEXT, "h1")
+            assert index.refresh("c1") is False
+            mock_sync.assert_called_once_with("c1", wait=False)
+
+
+class TestCitations:
+    """Tests for the article citation index."""
+
+    def test_citations_are_indexed_with_page_and_passage(self, index):
+        """Article lookups return the citing passage and its page."""
+        text = "Introduction page.\n\nDamages follow from Art. 6:74 DCC when performance fails."
+        material = make_material("reader", pageSpans=[
+            {"pageNumber": 1, "start": 0, "charCount": 18, "tokens": 5},
+            {"pageNumber": 2, "start": 20, "charCount": len(text) - 20, "tokens": 15},
+        ])
+
+        index.index_material("c1", material, text, "h1")
+        passages = index.article_passages("DCC 6:74", "c1")
+
+        assert len(passages) == 1
+        assert passages[0].page_number == 2
+        assert passages[0].offset == text.index("Art. 6:74")
+        assert "performance fails" in passages[0].passage
+
+    def test_course_filter_and_removal(self, index):
+        """Lookups can span courses; removed materials lose their citations."""
+        index.index_material("c1", make_material("damages"), DAMAGES_TEXT, "h1")
+        index.index_material("c2", make_material("other"), DAMAGES_TEXT, "h2")
+
+        assert len(index.article_passages("DCC 6:74")) == 2
+        assert [p.course_id for p in index.article_passages("DCC 6:74", "c2")] == ["c2"]
+
+        index.remove_material("c1", "damages")
+        assert [p.course_id for p in index.article_passages("DCC 6:74")] == ["c2"]
+
+    def test_repeated_citation_in_one_passage_is_kept_once(self, index):
+        """Nearby repeats of an article don't produce duplicate passages."""
+        text = "Art. 6:74 DCC applies. The test of Art. 6:74 DCC has three steps."
+
+        index.index_material("c1", make_material("reader"), text, "h1")
+
+        assert len(index.article_passages("DCC 6:74", "c1")) == 1
+
+    def test_scanned_material_citations_without_page_spans(self, index):
+        """Materials without page spans are still cited, without a page number."""
+        index.index_material("c1", make_material("casebook", source="scanned"), TORT_TEXT, "h1")
+
+        passages = index.article_passages("DCC 6:162", "c1")
+
+        assert [(p.material_id, p.page_number, p.offset) for p in passages] == [("casebook", None, 0)]
@@ -0,0 +1,168 @@
+"""Tests for the persistent Materials catalog and change journal."""
+
+import hashlib
+from unittest.mock import patch
+
+import pytest
+
+from app.services import materials_catalog
+from app.services.materials_catalog import MaterialsCatalog
+
+
+@pytest.fixture(autouse=True)
+def plain_hashing(monkeypatch):
+    """Hash file bytes directly instead of through the text cache's hash index."""
+    monkeypatch.setattr(
+        materials_catalog, "_file_hash", lambda path, stat: hashlib.md5(path.read_bytes()).hexdigest()
+    )
+    monkeypatch.setattr(materials_catalog, "_save_hashes", lambda: None)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Create a small Materials tree."""
+    root = tmp_path / "Materials"
+    (root / "Course_Materials" / "LLS" / "Readings").mkdir(parents=True)
+    (root / "Syllabus" / "LLS").mkdir(parents=True)
+    (root / "Course_Materials" / "LLS" / "Readings" / "week_1.txt").write_text("Offer and acceptance.")
+    (root / "Syllabus" / "LLS" / "syllabus.md").write_text("# LLS")
+    (root / "Syllabus" / "LLS" / ".DS_Store").write_text("")
+    return root
+
+
+def _catalog(tree):
+    return MaterialsCatalog(root=tree, catalog_dir=tree.parent / "catalog")
+
+
+def _changes(events):
+    return [(event.kind, event.path) for event in events]
+
+
+class TestRescan:
+    """Tests for incremental rescans."""
+
+    def test_first_scan_catalogs_every_file(self, tree):
+        """Every file is added with its size, hash and type; hidden files are skipped."""
+        catalog = _catalog(tree)
+
+        events = catalog.rescan()
+
+        assert sorted(_changes(events)) == [
+            ("added", "Course_Materials/LLS/Readings/week_1.txt"),
+            ("added", "Syllabus/LLS/syllabus.md"),
+        ]
+        entry = catalog.entries(tree / "Syllabus")[0]
+        assert entry.size == 5
+        assert entry.file_type == "markdown"
+        assert entry.file_hash == hashlib.md5(b"# LLS").hexdigest()
+        assert [event.seq for event in events] == [1, 2]
+
+    def test_unchanged_tree_lists_no_directories(self, tree):
+        """A rescan of an unchanged tree only stats directories."""
+        catalog = _catalog(tree)
+        catalog.rescan()
+
+        with patch.object(MaterialsCatalog, "_list_dir") as mock_list:
+            assert catalog.rescan() == []
+        mock_list.assert_not_called()
+
+    def test_changes_in_one_directory(self, tree):
+        """Only the changed directory is re-listed; adds, deletes and edits are journaled."""
+        catalog = _catalog(tree)
+        catalog.rescan()
+        readings = tree / "Course_Materials" / "LLS" / "Readings"
+        old_hash = catalog.entries(readings)[0].file_hash
+        (readings / "week_1.txt").write_text("Offer, acceptance and consideration.")
+        (readings / "week_2.txt").write_text("Capacity.")
+
+        with patch.object(MaterialsCatalog, "_list_dir", wraps=MaterialsCatalog._list_dir) as mock_list:
+            events = catalog.rescan()
+
+        assert mock_list.call_count == 1
+        assert sorted(_changes(events)) == [
+            ("added", "Course_Materials/LLS/Readings/week_2.txt"),
+            ("modified", "Course_Materials/LLS/Readings/week_1.txt"),
+        ]
+        modified = next(event for event in events if event.kind == "modified")
+        assert modified.previous_hash == old_hash
+
+    def test_removed_directory_deletes_its_files(self, tree):
+        """Files of a deleted directory are journaled as deleted."""
+        catalog = _catalog(tree)
+        catalog.rescan()
+        (tree / "Syllabus" / "LLS" / "syllabus.md").unlink()
+        (tree / "Syllabus" / "LLS" / ".DS_Store").unlink()
+        (tree / "Syllabus" / "LLS").rmdir()
+
+        assert _changes(catalog.rescan()) == [("deleted", "Syllabus/LLS/syllabus.md")]
+        assert catalog.entries(tree / "Syllabus") == []
+
+    def test_full_rescan_catches_in_place_rewrites(self, tree):
+        """Rewriting a file doesn't change its directory's mtime; a full rescan sees it."""
+        catalog = _catalog(tree)
+        catalog.rescan()
+        (tree / "Syllabus" / "LLS" / "syllabus.md").write_text("# LLS 2025")
+
+        assert catalog.rescan() == []
+        assert _changes(catalog.rescan(full=True)) == [("modified", "Syllabus/LLS/syllabus.md")]
+
+    def test_identical_content_is_not_a_change(self, tree):
+        """A touched file with the same content produces no event."""
+        catalog = _catalog(tree)
+        catalog.rescan()
+        (tree / "Syllabus" / "LLS" / "syllabus.md").write_text("# LLS")
+
+        assert catalog.rescan(full=True) == []
+
+
+class TestJournal:
+    """Tests for the persisted change journal and consumer cursors."""
+
+    def test_catalog_and_journal_persist(self, tree):
+        """A new instance resumes from the saved catalog."""
+        _catalog(tree).rescan()
+
+        catalog = _catalog(tree)
+        assert catalog.rescan() == []
+        assert catalog.last_seq == 2
+        assert _changes(catalog.changes_since(1)) == [("added", "Syllabus/LLS/syllabus.md")]
+
+    def test_consume_advances_cursor(self, tree):
+        """Consumers see each event once; a failed handler leaves the cursor."""
+        catalog = _catalog(tree)
+        catalog.rescan()
+        seen = []
+
+        with pytest.raises(RuntimeError):
+            catalog.consume("test", lambda events: (_ for _ in ()).throw(RuntimeError()))
+        assert catalog.consume("test", seen.extend) == 2
+        assert catalog.consume("test", seen.extend) == 0
+        assert len(seen) == 2
+        assert catalog.cursor("test") == 2
+
+    def test_trimmed_journal_requires_resync(self, tree, monkeypatch):
+        """Cursors older than the retained journal get None."""
+        monkeypatch.setattr(materials_catalog, "JOURNAL_MAX_EVENTS", 1)
+        catalog = _catalog(tree)
+        catalog.rescan()
+
+        assert catalog.changes_since(0) is None
+        assert [event.seq for event in catalog.changes_since(1)] == [2]
+
+    def test_instances_sharing_files_see_each_others_writes(self, tree):
+        """A second process's cursors and events are kept, and sequence numbers are not reused."""
+        server, script = _catalog(tree), _catalog(tree)
+        server.rescan()
+        server.consume("text_cache", lambda events: None)
+
+        (tree / "Syllabus" / "LLS" / "schedule.txt").write_text("Week 1")
+        assert [event.seq for event in script.rescan()] == [3]
+        script.consume("firestore", lambda events: None)
+
+        (tree / "Syllabus" / "LLS" / "exam.txt").write_text("Exam")
+        assert [event.seq for event in server.rescan()] == [4]
+        server.consume("text_cache", lambda events: None)
+
+        reloaded = _catalog(tree)
+        assert reloaded.cursor("firestore") == 3
+        assert reloaded.cursor("text_cache") == 4
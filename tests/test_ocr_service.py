@@ -0,0 +1,230 @@
+"""Tests for the OCR pipeline (preprocessing, caching, pool, PDF fallback)."""
+
+import sys
+from io import BytesIO
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services import ocr_service
+from app.services.ocr_service import _otsu_threshold, ocr_images, preprocess_image
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _png(color, size=(40, 20)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _fake_worker(image_bytes, lang, max_dimension):
+    """Stand-in for tesseract: report the image's top-left pixel."""
+    with Image.open(BytesIO(image_bytes)) as image:
+        pixel = image.convert("RGB").getpixel((0, 0))
+    return None if pixel == (0, 0, 0) else f"pixel {pixel}"
+
+
+def _hung_worker(image_bytes, lang, max_dimension):
+    """Stand-in for a tesseract process that never finishes."""
+    import time
+    time.sleep(60)
+
+
+@pytest.fixture
+def ocr_cache(tmp_path, monkeypatch):
+    """Empty OCR cache on a tmp dir, with a worker call counter."""
+    calls = []
+
+    def worker(image_bytes, lang, max_dimension):
+        calls.append(image_bytes)
+        return _fake_worker(image_bytes, lang, max_dimension)
+
+    monkeypatch.setattr(ocr_service, "OCR_CACHE_DIR", tmp_path / "ocr")
+    monkeypatch.setattr(ocr_service, "_ocr_worker", worker)
+    ocr_service.clear_memory_cache()
+    yield calls
+    ocr_service.clear_memory_cache()
+
+
+class TestPreprocessing:
+    """Tests for downscaling and binarization."""
+
+    def test_otsu_splits_bimodal_histogram(self):
+        """The threshold falls between two clusters of levels."""
+        histogram = [0] * 256
+        histogram[40] = 500
+        histogram[210] = 500
+
+        assert 40 <= _otsu_threshold(histogram) < 210
+
+    def test_downscales_and_binarizes(self):
+        """Large images are bounded and reduced to 1-bit."""
+        image = Image.new("RGB", (4000, 1000), (200, 200, 200))
+        image.paste((10, 10, 10), (0, 0, 2000, 1000))
+
+        prepared = preprocess_image(image, max_dimension=1000)
+
+        assert prepared.mode == "1"
+        assert max(prepared.size) == 1000
+        assert set(prepared.convert("L").getdata()) == {0, 255}
+
+    def test_small_images_not_upscaled(self):
+        """Images under the limit keep their size."""
+        assert preprocess_image(Image.new("L", (30, 10)), max_dimension=1000).size == (30, 10)
+
+
+class TestOcrImages:
+    """Tests for cached, deduplicated OCR of image batches."""
+
+    def test_duplicates_processed_once_and_cached(self, ocr_cache):
+        """Identical images are OCR'd once; repeats come from the cache."""
+        red, blue = _png((255, 0, 0)), _png((0, 0, 255))
+
+        assert ocr_images([red, blue, red], max_workers=1) == [
+            "pixel (255, 0, 0)", "pixel (0, 0, 255)", "pixel (255, 0, 0)",
+        ]
+        assert len(ocr_cache) == 2
+
+        assert ocr_images([blue], max_workers=1) == ["pixel (0, 0, 255)"]
+        assert len(ocr_cache) == 2
+
+    def test_disk_cache_survives_memory_clear(self, ocr_cache):
+        """Results persist on disk across processes."""
+        red = _png((255, 0, 0))
+        ocr_images([red], max_workers=1)
+        ocr_service.clear_memory_cache()
+
+        assert ocr_images([red], max_workers=1) == ["pixel (255, 0, 0)"]
+        assert len(ocr_cache) == 1
+
+    def test_failures_not_cached(self, ocr_cache):
+        """An image that fails is retried on the next call."""
+        black = _png((0, 0, 0))
+
+        assert ocr_images([black], max_workers=1) == [None]
+        assert ocr_images([black], max_workers=1) == [None]
+        assert len(ocr_cache) == 2
+
+    def test_process_pool_preserves_order(self, tmp_path, monkeypatch):
+        """Cache misses fan out over worker processes in input order."""
+        monkeypatch.setattr(ocr_service, "OCR_CACHE_DIR", tmp_path / "ocr")
+        monkeypatch.setattr(ocr_service, "OCR_START_METHOD", "fork")
+        monkeypatch.setattr(ocr_service, "_ocr_worker", _fake_worker)
+        ocr_service.clear_memory_cache()
+        colors = [(i * 20, 10, 10) for i in range(1, 6)]
+
+        try:
+            texts = ocr_images([_png(color) for color in colors], max_workers=2)
+            pool = ocr_service._pool
+            ocr_images([_png((250, 10, 10)), _png((240, 10, 10))], max_workers=2)
+
+            assert texts == [f"pixel {color}" for color in colors]
+            assert ocr_service._pool is pool  # Reused, not restarted per call
+        finally:
+            ocr_service.shutdown_pool()
+
+    def test_hung_worker_kills_pool(self, tmp_path, monkeypatch):
+        """Timed-out images fail at one overall deadline and their pool is replaced."""
+        import time
+
+        monkeypatch.setattr(ocr_service, "OCR_CACHE_DIR", tmp_path / "ocr")
+        monkeypatch.setattr(ocr_service, "OCR_START_METHOD", "fork")
+        monkeypatch.setattr(ocr_service, "OCR_TIMEOUT_SECONDS", 0.5)
+        monkeypatch.setattr(ocr_service, "_ocr_worker", _hung_worker)
+        ocr_service.clear_memory_cache()
+
+        try:
+            started = time.monotonic()
+            texts = ocr_images([_png((i * 30, 10, 10)) for i in range(1, 5)], max_workers=2)
+            assert texts == [None] * 4
+            assert time.monotonic() - started < 1.8  # Two images per worker, not 4 x 0.5s
+            assert ocr_service._pool is None
+        finally:
+            ocr_service.shutdown_pool()
+
+    def test_broken_pool_killed_after_last_caller(self, monkeypatch):
+        """A broken pool is not killed while another call still has OCR in flight in it."""
+        killed = []
+        monkeypatch.setattr("app.services.extraction_pool._kill_executor", killed.append)
+
+        first = ocr_service._acquire_pool(2)
+        second = ocr_service._acquire_pool(2)
+        try:
+            assert first is second
+            ocr_service._release_pool(first, broken=True)
+            assert killed == []
+            assert ocr_service._pool is None
+
+            ocr_service._release_pool(second)
+            assert killed == [first]
+        finally:
+            first.shutdown()
+            ocr_service.shutdown_pool()
+
+
+class TestScannedPdfFallback:
+    """Tests for OCR of PDF pages without a text layer."""
+
+    @pytest.fixture
+    def scanned_pdf(self, tmp_path, monkeypatch):
+        """A 3-page PDF whose middle page has no text layer."""
+        if isinstance(sys.modules.get('fitz'), MagicMock):
+            monkeypatch.delitem(sys.modules, 'fitz')
+        fitz = pytest.importorskip("fitz")
+
+        path = tmp_path / "handout.pdf"
+        doc = fitz.open()
+        for i in range(3):
+            page = doc.new_page()
+            if i != 1:
+                page.insert_text((72, 72), f"Typed page {i + 1}")
+        doc.save(str(path))
+        doc.close()
+        return path
+
+    def test_only_empty_pages_are_ocrd(self, scanned_pdf, monkeypatch):
+        """Pages with a text layer are untouched; the blank one is OCR'd."""
+        from app.services.text_extractor import extract_from_pdf
+
+        rendered = []
+
+        def fake_ocr(images):
+            rendered.extend(images)
+            return ["Scanned page text"] * len(images)
+
+        monkeypatch.setattr(ocr_service, "is_ocr_available", lambda: True)
+        monkeypatch.setattr(ocr_service, "ocr_images", fake_ocr)
+
+        result = extract_from_pdf(scanned_pdf)
+
+        assert len(rendered) == 1
+        assert rendered[0].startswith(b"\x89PNG")
+        assert result.metadata["ocr_pages"] == [2]
+        assert result.pages.page_text(1) == "Scanned page text"
+        assert "Typed page 1" in result.text and "Typed page 3" in result.text
+
+    def test_no_ocr_when_unavailable(self, scanned_pdf, monkeypatch):
+        """Without tesseract the blank page stays empty."""
+        from app.services.text_extractor import extract_from_pdf
+
+        monkeypatch.setattr(ocr_service, "is_ocr_available", lambda: False)
+
+        result = extract_from_pdf(scanned_pdf)
+
+        assert "ocr_pages" not in result.metadata
+        assert result.pages.page_text(1).strip() == ""
+
+    def test_streaming_extraction_ocrs_empty_pages(self, scanned_pdf, monkeypatch):
+        """The streaming extractor OCRs scanned pages and matches extract_from_pdf."""
+        from app.services.text_extractor import extract_from_pdf, extract_text_streaming
+
+        monkeypatch.setattr("app.services.text_extractor.detect_file_type", lambda p: "pdf")
+        monkeypatch.setattr(ocr_service, "is_ocr_available", lambda: True)
+        monkeypatch.setattr(ocr_service, "ocr_images", lambda images: ["Scanned page text"] * len(images))
+
+        result = extract_text_streaming(scanned_pdf, max_chars=100_000, _skip_path_validation=True)
+
+        assert result.metadata["ocr_pages"] == [2]
+        assert result.metadata["truncated"] is False
+        assert result.text == extract_from_pdf(scanned_pdf).text
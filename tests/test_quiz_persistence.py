@@ -626,9 +626,11 @@ class TestQuizManagementAPI:
             mock_files_service.generate_quiz_from_course = AsyncMock(return_value={
                 "questions": [{"question": "Q1", "correct_index": 0}]
             })
+            mock_files_service.course_materials_fingerprint.return_value = "fp"
             mock_files.return_value = mock_files_service
 
             mock_persist_service = MagicMock()
+            mock_persist_service.find_by_generation_key = AsyncMock(return_value=None)
             mock_persist_service.find_duplicate_quiz = AsyncMock(return_value=None)
             mock_persist_service.save_quiz = AsyncMock(return_value={
                 "id": "new-quiz",
@@ -651,6 +653,7 @@ class TestQuizManagementAPI:
             data = response.json()
             assert data["is_new"] is True
             assert data["quiz"]["id"] == "new-quiz"
+            assert mock_persist_service.save_quiz.call_args.kwargs["generation_key"]
 
     def test_create_quiz_returns_existing_duplicate(self, client):
         """Test that duplicate quiz returns existing instead of creating new."""
@@ -661,9 +664,11 @@ class TestQuizManagementAPI:
             mock_files_service.generate_quiz_from_course = AsyncMock(return_value={
                 "questions": [{"question": "Q1"}]
             })
+            mock_files_service.course_materials_fingerprint.return_value = "fp"
             mock_files.return_value = mock_files_service
 
             mock_persist_service = MagicMock()
+            mock_persist_service.find_by_generation_key = AsyncMock(return_value=None)
             mock_persist_service.find_duplicate_quiz = AsyncMock(return_value={
                 "id": "existing-quiz",
                 "topic": "Contract Law"
@@ -685,6 +690,102 @@ class TestQuizManagementAPI:
             assert data["is_new"] is False
             assert data["quiz"]["id"] == "existing-quiz"
 
+    def test_create_quiz_returns_stored_without_generating(self, client):
+        """Test that a quiz generated with the same parameters is returned without the AI."""
+        with patch('app.routes.quiz_management.get_quiz_persistence_service') as mock_persistence, \
+             patch('app.routes.quiz_management.get_files_api_service') as mock_files:
+
+            mock_files_service = MagicMock()
+            mock_files_service.generate_quiz_from_course = AsyncMock()
+            mock_files_service.course_materials_fingerprint.return_value = "fp"
+            mock_files.return_value = mock_files_service
+
+            mock_persist_service = MagicMock()
+            mock_persist_service.find_by_generation_key = AsyncMock(return_value={
+                "id": "stored-quiz",
+                "topic": "Contract Law"
+            })
+            mock_persistence.return_value = mock_persist_service
+
+            response = client.post(
+                "/api/quizzes/courses/test-course",
+                json={
+                    "course_id": "test-course",
+                    "topic": "Contract Law",
+                    "num_questions": 5,
+                    "difficulty": "medium"
+                }
+            )
+
+            assert response.status_code == 200
+            data = response.json()
+            assert data["is_new"] is False
+            assert data["quiz"]["id"] == "stored-quiz"
+            mock_files_service.generate_quiz_from_course.assert_not_called()
+
+    def test_create_quiz_fresh_skips_stored_lookup(self, client):
+        """Test that allow_duplicate generates a new quiz without consulting the index."""
+        with patch('app.routes.quiz_management.get_quiz_persistence_service') as mock_persistence, \
+             patch('app.routes.quiz_management.get_files_api_service') as mock_files:
+
+            mock_files_service = MagicMock()
+            mock_files_service.generate_quiz_from_course = AsyncMock(return_value={
+                "questions": [{"question": "Q1", "correct_index": 0}]
+            })
+            mock_files_service.course_materials_fingerprint.return_value = "fp"
+            mock_files.return_value = mock_files_service
+
+            mock_persist_service = MagicMock()
+            mock_persist_service.find_by_generation_key = AsyncMock()
+            mock_persist_service.save_quiz = AsyncMock(return_value={"id": "new-quiz"})
+            mock_persistence.return_value = mock_persist_service
+
+            response = client.post(
+                "/api/quizzes/courses/test-course",
+                json={
+                    "course_id": "test-course",
+                    "num_questions": 5,
+                    "difficulty": "medium",
+                    "allow_duplicate": True
+                }
+            )
+
+            assert response.status_code == 200
+            assert response.json()["is_new"] is True
+            mock_persist_service.find_by_generation_key.assert_not_called()
+
+    async def test_concurrent_identical_requests_save_one_quiz(self):
+        """Coalesced requests share one generation and one saved quiz."""
+        import asyncio
+
+        from app.models.schemas import CreateQuizRequest
+        from app.routes.quiz_management import create_quiz
+
+        async def generate(**kwargs):
+            await asyncio.sleep(0)
+            return {"questions": [{"question": "Q1", "correct_index": 0}]}
+
+        with patch('app.routes.quiz_management.get_quiz_persistence_service') as mock_persistence, \
+             patch('app.routes.quiz_management.get_files_api_service') as mock_files:
+
+            mock_files_service = MagicMock()
+            mock_files_service.generate_quiz_from_course = AsyncMock(side_effect=generate)
+            mock_files_service.course_materials_fingerprint.return_value = "fp"
+            mock_files.return_value = mock_files_service
+
+            mock_persist_service = MagicMock()
+            mock_persist_service.find_by_generation_key = AsyncMock(return_value=None)
+            mock_persist_service.find_duplicate_quiz = AsyncMock(return_value=None)
+            mock_persist_service.save_quiz = AsyncMock(return_value={"id": "new-quiz"})
+            mock_persistence.return_value = mock_persist_service
+
+            request = CreateQuizRequest(course_id="test-course", topic="Tort", num_questions=5)
+            results = await asyncio.gather(*(create_quiz("test-course", request, user=None) for _ in range(3)))
+
+        assert [result["quiz"]["id"] for result in results] == ["new-quiz"] * 3
+        mock_files_service.generate_quiz_from_course.assert_called_once()
+        mock_persist_service.save_quiz.assert_called_once()
+
     def test_get_quiz_history_endpoint(self, client):
         """Test GET /api/quizzes/history/{user_id}."""
         with patch('app.routes.quiz_management.get_quiz_persistence_service') as mock_get_service:
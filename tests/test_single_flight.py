@@ -0,0 +1,75 @@
+"""Tests for single-flight coalescing of identical generation requests."""
+
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+def _slow(result, calls, error=None):
+    """Generation stub that records its calls and yields to other tasks."""
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if error:
+            raise error
+        return result
+    return generate
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_calls_share_one_execution(self):
+        """Callers with the same key await one call and get equal results."""
+        flight, calls = SingleFlight(), []
+
+        results = await asyncio.gather(*[
+            flight.do("quiz-key", _slow({"questions": [1]}, calls), label="quiz") for _ in range(5)
+        ])
+
+        assert len(calls) == 1
+        assert results == [{"questions": [1]}] * 5
+        assert results[0] is not results[1]  # Coalesced callers get their own copy
+        assert flight.stats()["operations"]["quiz"] == {"calls": 5, "executed": 1, "coalesced": 4}
+        assert flight.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_and_later_calls_execute(self):
+        """Only concurrent calls with equal keys are coalesced."""
+        flight, calls = SingleFlight(), []
+
+        await asyncio.gather(flight.do("a", _slow(1, calls)), flight.do("b", _slow(2, calls)))
+        await flight.do("a", _slow(1, calls))
+
+        assert len(calls) == 3
+        assert flight.stats()["totals"]["coalesced"] == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_are_shared(self):
+        """Every waiting caller gets the error of the shared call."""
+        flight, calls = SingleFlight(), []
+
+        results = await asyncio.gather(
+            *[flight.do("k", _slow(None, calls, error=ValueError("bad JSON"))) for _ in range(3)],
+            return_exceptions=True,
+        )
+
+        assert len(calls) == 1
+        assert all(isinstance(result, ValueError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """A disconnecting first caller leaves the call running for the rest."""
+        flight, calls = SingleFlight(), []
+        first = asyncio.ensure_future(flight.do("k", _slow("guide", calls)))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flight.do("k", _slow("guide", calls)))
+        await asyncio.sleep(0)
+
+        first.cancel()
+
+        assert await second == "guide"
+        assert len(calls) == 1
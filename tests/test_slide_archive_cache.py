@@ -0,0 +1,166 @@
+"""Tests for the slide archive data cache and pooled archive handles."""
+
+import json
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from app.services import slide_archive
+from app.services.slide_archive import (
+    ArchiveCache,
+    SlideArchiveData,
+    SlideInfo,
+    ZipHandlePool,
+    extract_slide_archive,
+    get_file_type,
+    get_slide_image,
+    get_slide_text,
+    iter_slide_texts,
+)
+
+
+def _write_archive(path, num_pages=3, prefix="Slide"):
+    """Write a slide archive with one image and one text member per page."""
+    manifest = {
+        "num_pages": num_pages,
+        "pages": [
+            {
+                "page_number": i,
+                "image": {"path": f"img_{i}.jpg", "media_type": "image/jpeg"},
+                "text": {"path": f"text_{i}.txt"},
+            }
+            for i in range(1, num_pages + 1)
+        ],
+    }
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("manifest.json", json.dumps(manifest))
+        for i in range(1, num_pages + 1):
+            zf.writestr(f"img_{i}.jpg", f"image {i}".encode())
+            zf.writestr(f"text_{i}.txt", f"{prefix} {i} text")
+    return path
+
+
+def _archive_data(key, chars):
+    return SlideArchiveData(
+        file_path=key, num_pages=1,
+        slides=[SlideInfo(
+            page_number=1, image_path="", text_path="", width=0, height=0,
+            has_visual_content=False, text_content="x" * chars,
+        )],
+    )
+
+
+@pytest.fixture
+def archives(tmp_path, monkeypatch):
+    """Fresh cache and pool rooted at tmp_path."""
+    monkeypatch.setattr(slide_archive, "MATERIALS_BASE", tmp_path)
+    monkeypatch.setattr(slide_archive, "_archive_cache", ArchiveCache())
+    monkeypatch.setattr(slide_archive, "_zip_pool", ZipHandlePool(max_handles=2))
+    yield tmp_path
+    slide_archive._zip_pool.close_all()
+
+
+class TestArchiveCache:
+    """Tests for the byte-budgeted archive data LRU."""
+
+    def test_evicts_least_recently_used_over_budget(self):
+        """Entries are evicted oldest-first once the byte budget is exceeded."""
+        overhead = slide_archive.SLIDE_OVERHEAD_BYTES
+        cache = ArchiveCache(max_bytes=2 * (1000 + overhead))
+        cache.put("a", _archive_data("a", 1000))
+        cache.put("b", _archive_data("b", 1000))
+        cache.get("a")
+        cache.put("c", _archive_data("c", 1000))
+
+        assert "a" in cache and "c" in cache
+        assert "b" not in cache
+        assert cache.total_bytes == 2 * (1000 + overhead)
+
+    def test_oversized_entry_not_cached(self):
+        """A single archive larger than the budget is never cached."""
+        cache = ArchiveCache(max_bytes=100)
+        cache.put("big", _archive_data("big", 1000))
+
+        assert len(cache) == 0
+        assert cache.total_bytes == 0
+
+
+class TestZipHandlePool:
+    """Tests for pooled archive handles and manifest indexes."""
+
+    def test_viewer_opens_archive_once(self, archives):
+        """Type detection, listing and every slide read share one open handle."""
+        path = _write_archive(archives / "deck.pdf", num_pages=5)
+
+        with patch.object(zipfile, "ZipFile", wraps=zipfile.ZipFile) as opened:
+            assert get_file_type(path) == "slide_archive"
+            assert extract_slide_archive(path).num_pages == 5
+            images = [get_slide_image(path, page) for page in range(1, 6)]
+
+        assert opened.call_count == 1
+        assert images[2] == (b"image 3", "image/jpeg")
+
+    def test_slide_text_reads_one_member(self, archives):
+        """A single slide's text is read without extracting the archive."""
+        path = _write_archive(archives / "deck.pdf")
+
+        assert get_slide_text(path, 2) == "Slide 2 text"
+        assert get_slide_text(path, 99) is None
+        assert len(slide_archive._archive_cache) == 0
+
+    def test_pool_is_bounded(self, archives):
+        """The least recently used handle is closed past the pool size."""
+        paths = [_write_archive(archives / f"deck{i}.pdf") for i in range(3)]
+        for path in paths:
+            get_slide_image(path, 1)
+
+        assert len(slide_archive._zip_pool) == 2
+        assert get_slide_image(paths[0], 1) == (b"image 1", "image/jpeg")
+
+    def test_replaced_archive_is_reopened(self, archives):
+        """Rewriting an archive invalidates its handle and cached data."""
+        path = _write_archive(archives / "deck.pdf", prefix="Old")
+        assert extract_slide_archive(path).slides[0].text_content == "Old 1 text"
+
+        _write_archive(path, num_pages=4, prefix="New")
+
+        data = extract_slide_archive(path)
+        assert data.num_pages == 4
+        assert data.slides[0].text_content == "New 1 text"
+
+    def test_replaced_archive_after_handle_eviction(self, archives):
+        """Cached data is not served for a replaced archive whose handle was evicted."""
+        path = _write_archive(archives / "deck.pdf", prefix="Old")
+        assert extract_slide_archive(path).slides[0].text_content == "Old 1 text"
+        for i in range(2):
+            get_slide_image(_write_archive(archives / f"other{i}.pdf"), 1)
+
+        _write_archive(path, num_pages=4, prefix="New")
+
+        data = extract_slide_archive(path)
+        assert data.num_pages == 4
+        assert data.slides[0].text_content == "New 1 text"
+        assert get_slide_text(path, 1) == "New 1 text"
+
+    def test_eviction_mid_iteration_keeps_pinned_handle_open(self, archives):
+        """A handle evicted while slide texts are streamed is closed only once they finish."""
+        path = _write_archive(archives / "deck.pdf")
+        texts = iter_slide_texts(path)
+        assert next(texts) == (1, "Slide 1 text")
+        handle = slide_archive._zip_pool.get(path)
+
+        for i in range(2):
+            get_slide_image(_write_archive(archives / f"other{i}.pdf"), 1)
+
+        assert list(texts) == [(2, "Slide 2 text"), (3, "Slide 3 text")]
+        with pytest.raises(ValueError):
+            handle.read("text_1.txt")
+
+    def test_closed_handle_fails_extraction_uncached(self, archives):
+        """A handle closed mid-extraction fails it instead of caching missing text."""
+        path = _write_archive(archives / "deck.pdf")
+        slide_archive._zip_pool.get(path).close()
+
+        assert extract_slide_archive(path) is None
+        assert len(slide_archive._archive_cache) == 0
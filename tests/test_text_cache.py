@@ -9,6 +9,7 @@ Tests cover:
 """
 
 import hashlib
+import json
 import pytest
 from datetime import datetime, timezone
 from pathlib import Path
@@ -264,6 +265,564 @@ class TestTextCacheServiceNoFirestore:
             assert stats.total_characters == 0
 
 
+class TestStatFingerprintValidation:
+    """Tests for stat-fingerprint cache validation and the sidecar hash index."""
+
+    @pytest.fixture
+    def materials(self, tmp_path, monkeypatch):
+        """Point MATERIALS_ROOT and the hash index at a temp directory."""
+        from app.services import text_cache_service
+
+        root = tmp_path / "Materials"
+        root.mkdir()
+        monkeypatch.setattr(text_cache_service, "MATERIALS_ROOT", root)
+        monkeypatch.setattr(text_cache_service, "_validate_path_within_materials", lambda p: True)
+        monkeypatch.setattr(
+            text_cache_service, "_hash_index",
+            text_cache_service.FileHashIndex(tmp_path / "hash_index.json"),
+        )
+        return root
+
+    @staticmethod
+    def _service():
+        from app.services.text_cache_service import TextCacheService
+
+        with patch('app.services.text_cache_service.get_firestore_client', return_value=MagicMock()):
+            return TextCacheService()
+
+    @staticmethod
+    def _entry(path, **overrides):
+        from app.services.text_cache_service import _compute_file_hash, _file_stat_fields
+
+        fields = dict(
+            file_path=path.name, file_hash=_compute_file_hash(path), file_type="text",
+            text="x", text_length=1, extraction_success=True, **_file_stat_fields(path.stat()),
+        )
+        fields.update(overrides)
+        return TextCacheEntry(**fields)
+
+    def test_unchanged_file_validates_without_hashing(self, materials):
+        """A matching fingerprint never reads the file."""
+        path = materials / "notes.txt"
+        path.write_text("content")
+        entry = self._entry(path)
+
+        with patch('app.services.text_cache_service._compute_file_hash') as mock_hash:
+            assert self._service().is_cache_valid("notes.txt", entry) is True
+        mock_hash.assert_not_called()
+
+    def test_touched_file_falls_back_to_hash_and_refreshes(self, materials):
+        """Same content with a new mtime is valid and gets its fingerprint updated."""
+        path = materials / "notes.txt"
+        path.write_text("content")
+        entry = self._entry(path, file_mtime_ns=1)
+        service = self._service()
+
+        assert service.is_cache_valid("notes.txt", entry) is True
+        service._collection.document.return_value.update.assert_called_once()
+
+    def test_legacy_entry_without_fingerprint(self, materials):
+        """Entries cached before fingerprints existed validate by hash."""
+        path = materials / "notes.txt"
+        path.write_text("content")
+
+        assert self._service().is_cache_valid("notes.txt", self._entry(path, file_inode=None)) is True
+
+    def test_modified_file_is_invalid(self, materials):
+        """Changed content fails both the fingerprint and the hash."""
+        path = materials / "notes.txt"
+        path.write_text("content")
+        entry = self._entry(path)
+        path.write_text("edited content")
+
+        assert self._service().is_cache_valid("notes.txt", entry) is False
+
+    def test_hash_index_skips_rereads_and_persists(self, materials, tmp_path):
+        """Indexed hashes are reused across index instances until the file changes."""
+        from app.services import text_cache_service
+        from app.services.text_cache_service import FileHashIndex
+
+        path = materials / "notes.txt"
+        path.write_text("content")
+        index = FileHashIndex(tmp_path / "index.json")
+        first = index.file_hash(path)
+        index.save()
+
+        reloaded = FileHashIndex(tmp_path / "index.json")
+        with patch.object(text_cache_service, "_compute_file_hash") as mock_hash:
+            assert reloaded.file_hash(path) == first
+        mock_hash.assert_not_called()
+
+        path.write_text("changed!")
+        assert reloaded.file_hash(path) != first
+
+    def test_hash_index_saves_merge_between_workers(self, materials, tmp_path):
+        """Each worker's save keeps the others' hashes and drops entries for deleted files."""
+        from app.services.text_cache_service import FileHashIndex
+
+        paths = [materials / name for name in ["a.txt", "b.txt", "gone.txt"]]
+        for path in paths:
+            path.write_text(path.name)
+        first, second = FileHashIndex(tmp_path / "index.json"), FileHashIndex(tmp_path / "index.json")
+        first.file_hash(paths[0])
+        first.file_hash(paths[2])
+        second.file_hash(paths[1])
+
+        first.save()
+        paths[2].unlink()
+        second.save()
+
+        saved = json.loads((tmp_path / "index.json").read_text())
+        assert set(saved) == {str(paths[0].resolve()), str(paths[1].resolve())}
+        assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+    def test_count_stale_entries(self, materials):
+        """Bulk staleness uses fingerprints and flags missing/changed files."""
+        fresh = materials / "fresh.txt"
+        fresh.write_text("fresh")
+        changed = materials / "changed.txt"
+        changed.write_text("before")
+        docs = [
+            MagicMock(to_dict=MagicMock(return_value=self._entry(fresh).model_dump())),
+            MagicMock(to_dict=MagicMock(return_value=self._entry(changed).model_dump())),
+            MagicMock(to_dict=MagicMock(return_value={"file_path": "gone.txt", "file_hash": "x"})),
+        ]
+        changed.write_text("after!!")
+        service = self._service()
+        service._collection.select.return_value.stream.return_value = docs
+
+        assert service.count_stale_entries() == 2
+
+
+class TestBatchedReadsAndAccessStats:
+    """Tests for get_cached_many and the write-behind access stats buffer."""
+
+    @staticmethod
+    def _doc(file_path, exists=True):
+        from app.services.text_cache_service import _path_to_doc_id
+
+        doc = MagicMock(exists=exists, id=_path_to_doc_id(file_path))
+        doc.to_dict.return_value = {
+            "file_path": file_path, "file_hash": "abc", "file_size": 1,
+            "file_modified": datetime.now(timezone.utc), "file_type": "text",
+            "text": f"text of {file_path}", "text_length": 10, "extraction_success": True,
+        }
+        return doc
+
+    @pytest.fixture
+    def db(self, monkeypatch):
+        """Mock Firestore client shared by the service and the stats buffer."""
+        from app.services import text_cache_service
+
+        db = MagicMock()
+        monkeypatch.setattr(text_cache_service, "get_firestore_client", lambda: db)
+        monkeypatch.setattr(text_cache_service, "_access_stats", text_cache_service.AccessStatsBuffer())
+        return db
+
+    def test_get_cached_many_single_read(self, db):
+        """All entries come back from one get_all call."""
+        from app.services.text_cache_service import TextCacheService
+
+        db.get_all.return_value = [self._doc("a.txt"), self._doc("b.txt"), self._doc("c.txt", exists=False)]
+
+        entries = TextCacheService().get_cached_many(["a.txt", "b.txt", "c.txt"])
+
+        assert db.get_all.call_count == 1
+        assert len(db.get_all.call_args[0][0]) == 3
+        assert set(entries) == {"a.txt", "b.txt"}
+        assert entries["b.txt"].text == "text of b.txt"
+
+    def test_reads_do_not_write_stats(self, db):
+        """Cache hits are buffered instead of updating each document."""
+        from app.services import text_cache_service
+        from app.services.text_cache_service import TextCacheService
+
+        collection = db.collection.return_value
+        collection.document.return_value.get.return_value = self._doc("a.txt")
+
+        service = TextCacheService()
+        service.get_cached("a.txt")
+        service.get_cached("a.txt")
+
+        collection.document.return_value.update.assert_not_called()
+        assert text_cache_service._access_stats.pending == 1
+
+    def test_flush_batches_increments(self, db):
+        """Pending hits are written as one batched Increment per document."""
+        from app.services import text_cache_service
+        from app.services.text_cache_service import flush_access_stats
+
+        for doc_id in ["d1", "d1", "d1", "d2"]:
+            text_cache_service._access_stats.record(doc_id)
+
+        assert flush_access_stats() == 2
+
+        batch = db.batch.return_value
+        assert batch.update.call_count == 2
+        batch.commit.assert_called_once()
+        increments = [call[0][1]["access_count"] for call in batch.update.call_args_list]
+        assert sorted(i.value for i in increments) == [1, 3]
+        assert flush_access_stats() == 0
+
+    def test_flush_splits_large_batches(self, db, monkeypatch):
+        """More pending documents than the batch limit use several commits."""
+        from app.services import text_cache_service
+
+        monkeypatch.setattr(text_cache_service, "FIRESTORE_BATCH_LIMIT", 2)
+        for doc_id in ["d1", "d2", "d3"]:
+            text_cache_service._access_stats.record(doc_id)
+
+        assert text_cache_service.flush_access_stats() == 3
+        assert db.batch.return_value.commit.call_count == 2
+
+
+class _FakeDoc:
+    """Minimal in-memory Firestore document reference/snapshot."""
+
+    def __init__(self, store, path):
+        self._store, self.path = store, path
+        self.id = path.rsplit("/", 1)[-1]
+
+    @property
+    def reference(self):
+        return self
+
+    @property
+    def exists(self):
+        return self.path in self._store
+
+    def get(self):
+        return self
+
+    def to_dict(self):
+        return dict(self._store[self.path])
+
+    def set(self, data):
+        self._store[self.path] = dict(data)
+
+    def update(self, data):
+        if self.path not in self._store:
+            raise KeyError(f"No document to update: {self.path}")
+        self._store[self.path].update(data)
+
+    def delete(self):
+        self._store.pop(self.path, None)
+
+    def collection(self, name):
+        return _FakeCollection(self._store, f"{self.path}/{name}")
+
+
+class _FakeCollection:
+    def __init__(self, store, path):
+        self._store, self.path = store, path
+
+    def document(self, doc_id):
+        return _FakeDoc(self._store, f"{self.path}/{doc_id}")
+
+    def list_documents(self):
+        prefix = self.path + "/"
+        return [
+            _FakeDoc(self._store, key) for key in list(self._store)
+            if key.startswith(prefix) and "/" not in key[len(prefix):]
+        ]
+
+    def select(self, field_paths):
+        return self
+
+    def where(self, field, op, value):
+        return _FakeQuery(self, lambda data: data.get(field) == value)
+
+    def stream(self):
+        return self.list_documents()
+
+
+class _FakeQuery:
+    def __init__(self, collection, predicate, count=None):
+        self._collection, self._predicate, self._count = collection, predicate, count
+
+    def limit(self, count):
+        return _FakeQuery(self._collection, self._predicate, count)
+
+    def stream(self):
+        docs = [doc for doc in self._collection.list_documents() if self._predicate(doc.to_dict())]
+        return docs[:self._count] if self._count is not None else docs
+
+
+class _FakeBatch:
+    def __init__(self, db):
+        self._db, self._ops = db, []
+
+    def set(self, ref, data):
+        self._ops.append(lambda: ref.set(data))
+
+    def delete(self, ref):
+        self._ops.append(ref.delete)
+
+    def commit(self):
+        self._db.commits += 1
+        for op in self._ops:
+            op()
+
+
+class _FakeFirestore:
+    def __init__(self):
+        self.store = {}
+        self.commits = 0
+
+    def collection(self, name):
+        return _FakeCollection(self.store, name)
+
+    def batch(self):
+        return _FakeBatch(self)
+
+    def get_all(self, refs, field_paths=None):
+        return [_FakeDoc(self.store, ref.path) for ref in refs]
+
+
+class TestChunkedStorage:
+    """Tests for compressed, chunked storage of large cached texts."""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        """TextCacheService over an in-memory Firestore with small chunks."""
+        from app.services import text_cache_service
+        from app.services.text_cache_service import TextCacheService
+
+        db = _FakeFirestore()
+        monkeypatch.setattr(text_cache_service, "MAX_INLINE_TEXT_BYTES", 1_000)
+        monkeypatch.setattr(text_cache_service, "CHUNK_BYTES", 500)
+        with patch('app.services.text_cache_service.get_firestore_client', return_value=db):
+            return TextCacheService()
+
+    @staticmethod
+    def _cache(service, text, file_path="Course_Materials/LLS/reader.pdf", file_hash="abc"):
+        from app.services.text_extractor import ExtractionResult
+
+        return service.cache_extraction(
+            file_path=file_path, result=ExtractionResult(file_path, "pdf", text, True),
+            file_hash=file_hash, file_size=1, file_modified=datetime.now(timezone.utc),
+        )
+
+    @staticmethod
+    def _large_text():
+        import random
+
+        rng = random.Random(0)
+        words = ["article", "damages", "liability", "contract", "tort", "breach", "Hoge Raad"]
+        return " ".join(rng.choice(words) for _ in range(20_000))
+
+    def test_small_text_stays_inline(self, service):
+        """Texts under the inline limit are stored as before."""
+        self._cache(service, "short text")
+
+        entry = service.get_cached("Course_Materials/LLS/reader.pdf")
+        assert entry.storage == "inline"
+        assert entry.text == "short text"
+
+    def test_large_text_round_trips_untruncated(self, service):
+        """Large texts are compressed into chunks and reassembled exactly."""
+        text = self._large_text()
+        assert self._cache(service, text) is True
+
+        manifest = service.get_cached("Course_Materials/LLS/reader.pdf", include_text=False)
+        assert manifest.storage == "blob"
+        assert manifest.text == ""
+        blob = service.db.store["material_text_blobs/abc"]
+        assert blob["storage"] == "chunked"
+        assert blob["chunk_count"] > 1
+        assert blob["compressed_size"] * 3 < len(text)
+
+        entry = service.get_cached("Course_Materials/LLS/reader.pdf")
+        assert entry.text == text
+        assert entry.text_length == len(text)
+        assert service.load_text(manifest).text == text
+
+    def test_corrupt_chunk_is_a_miss(self, service):
+        """A chunk that fails checksum verification invalidates the entry."""
+        self._cache(service, self._large_text())
+        chunk_key = next(k for k in service.db.store if "/chunks/" in k)
+        service.db.store[chunk_key]["data"] = b"garbage"
+
+        assert service.get_cached("Course_Materials/LLS/reader.pdf") is None
+
+    def test_get_cached_many_mixes_layouts(self, service):
+        """Batch reads reassemble chunked entries alongside inline ones."""
+        text = self._large_text()
+        self._cache(service, text, "a.pdf", file_hash="h1")
+        self._cache(service, "inline", "b.pdf", file_hash="h2")
+
+        entries = service.get_cached_many(["a.pdf", "b.pdf"])
+
+        assert entries["a.pdf"].text == text
+        assert entries["b.pdf"].text == "inline"
+
+    def test_rewrite_and_invalidate_remove_chunks(self, service):
+        """Shrinking or deleting an entry leaves no orphaned chunks."""
+        self._cache(service, self._large_text())
+        self._cache(service, "now short")
+        assert not any("/chunks/" in key for key in service.db.store)
+
+        self._cache(service, self._large_text())
+        assert service.invalidate("Course_Materials/LLS/reader.pdf") is True
+        assert service.delete_orphan_blobs(min_age_seconds=0) == 1
+        assert service.db.store == {}
+
+
+class TestContentAddressedStorage:
+    """Tests for path entries pointing at shared, hash-keyed text blobs."""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        """TextCacheService over an in-memory Firestore with small chunks."""
+        from app.services import text_cache_service
+        from app.services.text_cache_service import TextCacheService
+
+        db = _FakeFirestore()
+        monkeypatch.setattr(text_cache_service, "MAX_INLINE_TEXT_BYTES", 1_000)
+        monkeypatch.setattr(text_cache_service, "CHUNK_BYTES", 500)
+        with patch('app.services.text_cache_service.get_firestore_client', return_value=db):
+            return TextCacheService()
+
+    @staticmethod
+    def _blob_keys(service):
+        return [k for k in service.db.store if k.count("/") == 1 and k.startswith("material_text_blobs/")]
+
+    def test_identical_files_share_one_blob(self, service):
+        """Two paths with the same content hash store the text once."""
+        text = TestChunkedStorage._large_text()
+        TestChunkedStorage._cache(service, text, "a.pdf")
+        TestChunkedStorage._cache(service, text, "copy/a.pdf")
+
+        assert self._blob_keys(service) == ["material_text_blobs/abc"]
+        entries = service.get_cached_many(["a.pdf", "copy/a.pdf"])
+        assert entries["a.pdf"].text == entries["copy/a.pdf"].text == text
+        assert service.get_cached("copy/a.pdf", include_text=False).storage == "blob"
+
+    def test_get_by_hash_and_link(self, service):
+        """Content cached under one path can be linked to another without text."""
+        TestChunkedStorage._cache(service, "shared text", "a.pdf")
+
+        entry = service.get_by_hash("abc", "b.pdf")
+        assert entry.file_path == "b.pdf"
+        assert entry.text == "shared text"
+        assert service.get_by_hash("missing", "b.pdf") is None
+
+        summary = service.get_blob_summaries(["abc", "missing"])
+        assert set(summary) == {"abc"}
+        assert service.link_blob("b.pdf", "abc", summary["abc"], Path("README.md").stat()) is True
+        assert service.get_cached("b.pdf").text == "shared text"
+
+    def test_orphans_removed_only_when_unreferenced(self, service):
+        """A blob survives while any path still points at it."""
+        TestChunkedStorage._cache(service, "shared", "a.pdf")
+        TestChunkedStorage._cache(service, "shared", "b.pdf")
+
+        service.invalidate("a.pdf")
+        assert service.delete_orphan_blobs(min_age_seconds=0) == 0
+        service.invalidate("b.pdf")
+        assert service.delete_orphan_blobs(min_age_seconds=0) == 1
+        assert service.db.store == {}
+
+    def test_recent_orphans_are_kept(self, service):
+        """A blob written or linked within the grace period may be about to get a pointer."""
+        TestChunkedStorage._cache(service, "shared", "a.pdf")
+        service.invalidate("a.pdf")
+
+        assert service.delete_orphan_blobs() == 0
+
+        service.db.store["material_text_blobs/abc"]["cached_at"] = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        summary = service.get_blob_summaries(["abc"])["abc"]
+        assert service.link_blob("b.pdf", "abc", summary, Path("README.md").stat()) is True
+        service.invalidate("b.pdf")
+        assert service.delete_orphan_blobs() == 0
+
+        service.db.store["material_text_blobs/abc"]["linked_at"] = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        assert service.delete_orphan_blobs() == 1
+
+    def test_populate_counts_only_written_files(self, service, tmp_path, monkeypatch):
+        """Files deleted mid-run and failed cache writes are reported, not counted as cached."""
+        from app.services import text_cache_service
+        from app.services.text_cache_service import FileHashIndex, populate_cache_for_folder
+        from app.services.text_extractor import ExtractionResult
+
+        folder = tmp_path / "LLS"
+        folder.mkdir()
+        for name in ["kept.txt", "gone.txt", "broken.txt"]:
+            (folder / name).write_text(name)
+        validate = text_cache_service._validate_path_within_materials
+
+        def validate_then_delete(path):
+            valid = validate(path)
+            if path.name == "gone.txt":
+                path.unlink(missing_ok=True)
+            return valid
+
+        cache_extraction = service.cache_extraction
+        monkeypatch.setattr(text_cache_service, "MATERIALS_ROOT", tmp_path)
+        monkeypatch.setattr(text_cache_service, "_hash_index", FileHashIndex(tmp_path / "hash_index.json"))
+        monkeypatch.setattr(text_cache_service, "_validate_path_within_materials", validate_then_delete)
+        monkeypatch.setattr(text_cache_service, "get_text_cache_service", lambda: service)
+        monkeypatch.setattr(
+            service, "cache_extraction",
+            lambda file_path, **kwargs: not file_path.endswith("broken.txt") and cache_extraction(file_path, **kwargs),
+        )
+        monkeypatch.setattr(
+            "app.services.extraction_pool.extract_many",
+            lambda paths: [ExtractionResult(str(p), "text", p.read_text(), True) for p in paths],
+        )
+
+        result = populate_cache_for_folder("LLS", force_refresh=True)
+
+        assert (result.total_files, result.cached, result.failed) == (3, 1, 2)
+        assert sorted(error["file"] for error in result.errors) == ["LLS/broken.txt", "LLS/gone.txt"]
+
+    def test_link_to_collected_blob_fails(self, service):
+        """Linking never leaves a pointer at a blob that is gone."""
+        assert service.link_blob("b.pdf", "gone", {}, Path("README.md").stat()) is False
+        assert service.get_cached("b.pdf", include_text=False) is None
+
+    def test_migrates_legacy_entries(self, service):
+        """Legacy inline and chunked entries become pointers to deduplicated blobs."""
+        from app.services.text_cache_service import (
+            TEXT_CACHE_COLLECTION, _chunk_id, _compress_text, _path_to_doc_id,
+        )
+
+        text = TestChunkedStorage._large_text()
+        chunks, compressed_size, sha = _compress_text(text)
+        now = datetime.now(timezone.utc)
+        base = {"file_size": 1, "file_modified": now, "file_type": "pdf", "extraction_success": True}
+        store = service.db.store
+        legacy_id = _path_to_doc_id("big.pdf")
+        store[f"{TEXT_CACHE_COLLECTION}/{legacy_id}"] = {
+            **base, "file_path": "big.pdf", "file_hash": "h1", "text": "", "text_length": len(text),
+            "storage": "chunked", "chunk_count": len(chunks),
+            "compressed_size": compressed_size, "text_sha256": sha,
+        }
+        for index, data in enumerate(chunks):
+            store[f"{TEXT_CACHE_COLLECTION}/{legacy_id}/chunks/{_chunk_id(index)}"] = {
+                "entry": legacy_id, "index": index, "data": data,
+            }
+        for path in ("one.pdf", "two.pdf"):
+            store[f"{TEXT_CACHE_COLLECTION}/{_path_to_doc_id(path)}"] = {
+                **base, "file_path": path, "file_hash": "h2", "text": "dup", "text_length": 3,
+            }
+        before = dict(store)
+
+        stats = service.migrate_to_content_addressed(dry_run=True)
+        assert stats["migrated"] == 3
+        assert store == before
+
+        stats = service.migrate_to_content_addressed(dry_run=False)
+        assert (stats["blobs_created"], stats["deduplicated"], stats["errors"]) == (2, 1, 0)
+        assert sorted(self._blob_keys(service)) == ["material_text_blobs/h1", "material_text_blobs/h2"]
+        assert not any(k.startswith(f"{TEXT_CACHE_COLLECTION}/{legacy_id}/chunks/") for k in store)
+        entries = service.get_cached_many(["big.pdf", "one.pdf", "two.pdf"])
+        assert entries["big.pdf"].text == text
+        assert entries["two.pdf"].text == "dup"
+
+        assert service.migrate_to_content_addressed(dry_run=False)["already_migrated"] == 3
+
+
 # ============================================================================
 # API Endpoint Tests
 # ============================================================================
@@ -23,7 +23,9 @@ from app.services.text_extractor import (
     extract_from_html,
     extract_from_json,
     extract_from_pdf,  # FIX #259: Import for direct PDF testing
+    extract_text_streaming,
     get_file_extension,
+    join_pages,
     ExtractionResult,
 )
 
@@ -103,6 +105,15 @@ class TestTextExtraction:
         assert result.text == content
         assert result.metadata["line_count"] == 3
 
+    def test_token_count_recorded_at_extraction(self, tmp_path):
+        """Token estimates are stored in the metadata so caches carry them."""
+        txt_file = tmp_path / "test.txt"
+        txt_file.write_text("a" * 10)
+
+        result = extract_text(txt_file, _skip_path_validation=True)
+
+        assert result.metadata["token_count"] == 3
+
     def test_extract_from_html(self, tmp_path):
         """Test extracting text from HTML files."""
         html_file = tmp_path / "test.html"
@@ -199,6 +210,52 @@ class TestExtractionResult:
         assert result.pages[0]["page_number"] == 1
 
 
+class TestPageIndex:
+    """Tests for the compact page index over a single text buffer."""
+
+    def test_join_pages_matches_page_marker_format(self):
+        """Text uses '--- Page N ---' markers and pages slice back out of it."""
+        text, pages = join_pages([(1, "First"), (2, ""), (3, "Third")])
+
+        assert text == "--- Page 1 ---\nFirst\n--- Page 2 ---\n\n--- Page 3 ---\nThird"
+        assert [p["text"] for p in pages] == ["First", "", "Third"]
+        assert pages[2] == {"page_number": 3, "text": "Third", "char_count": 5}
+        assert pages.char_counts == [5, 0, 5]
+
+    def test_skip_empty_pages(self):
+        """Empty pages stay indexed but are left out of the buffer."""
+        text, pages = join_pages([(1, "A"), (2, ""), (3, "C")], skip_empty=True)
+
+        assert text == "--- Page 1 ---\nA\n--- Page 3 ---\nC"
+        assert len(pages) == 3
+        assert pages[1]["text"] == ""
+        assert pages[-1]["text"] == "C"
+
+    def test_slicing_and_list_equality(self):
+        """The index behaves like the list of page dicts it replaces."""
+        _, pages = join_pages([(1, "A"), (2, "B")])
+
+        assert pages[1:] == [{"page_number": 2, "text": "B", "char_count": 1}]
+        assert pages == list(pages)
+
+    def test_pickle_shares_text_buffer(self):
+        """Results crossing process boundaries keep a single copy of the text."""
+        import pickle
+
+        text, pages = join_pages([(1, "x" * 10_000), (2, "y" * 10_000)])
+        result = ExtractionResult("f.pdf", "pdf", text, True, pages=pages)
+
+        restored = pickle.loads(pickle.dumps(result))
+
+        assert len(pickle.dumps(result)) < 2 * len(text)
+        assert restored.pages[1]["text"] == "y" * 10_000
+        assert restored.pages._text is restored.text
+
+    def test_result_is_slotted(self):
+        """ExtractionResult carries no per-instance __dict__."""
+        assert not hasattr(ExtractionResult("f", "text", "", True), "__dict__")
+
+
 class TestDocxExtraction:
     """Tests for DOCX file extraction with fallback behavior."""
 
@@ -264,6 +321,93 @@ class TestBatchExtraction:
         assert len(summary["errors"]) == 1
 
 
+class TestStreamingExtraction:
+    """Tests for budgeted page-by-page extraction."""
+
+    @pytest.fixture
+    def pdf_file(self, tmp_path, monkeypatch):
+        """Create a 10-page PDF (PDF sniffing only runs inside Materials, so force the type)."""
+        import sys
+
+        if isinstance(sys.modules.get('fitz'), MagicMock):
+            monkeypatch.delitem(sys.modules, 'fitz')
+        fitz = pytest.importorskip("fitz")
+        monkeypatch.setattr("app.services.text_extractor.detect_file_type", lambda p: "pdf")
+
+        path = tmp_path / "reader.pdf"
+        doc = fitz.open()
+        for i in range(10):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Page {i + 1} " + "x" * 60)
+        doc.save(str(path))
+        doc.close()
+        return path
+
+    @pytest.fixture
+    def docx_file(self, tmp_path):
+        """Create a minimal DOCX with paragraphs and a table."""
+        import zipfile
+
+        ns = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+        body = "".join(f"<w:p><w:r><w:t>Paragraph {i}</w:t></w:r></w:p>" for i in range(5))
+        table = (
+            "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>A</w:t></w:r></w:p></w:tc>"
+            "<w:tc><w:p><w:r><w:t>B</w:t></w:r></w:p></w:tc></w:tr></w:tbl>"
+        )
+        path = tmp_path / "notes.docx"
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr("word/document.xml", f"<w:document {ns}><w:body>{body}{table}</w:body></w:document>")
+        return path
+
+    def test_unbounded_matches_full_extraction(self, pdf_file):
+        """Without a budget the stream yields the same text as extract_text."""
+        full = extract_from_pdf(pdf_file)
+        streamed = extract_text_streaming(pdf_file, max_chars=10**9, _skip_path_validation=True)
+
+        assert streamed.text == full.text
+        assert streamed.metadata["truncated"] is False
+        assert streamed.metadata["num_pages"] == 10
+
+    def test_stops_early_at_char_budget(self, pdf_file):
+        """Parsing stops once the budget is met and the text is a prefix."""
+        full = extract_from_pdf(pdf_file)
+
+        result = extract_text_streaming(pdf_file, max_chars=150, _skip_path_validation=True)
+
+        assert result.success is True
+        assert result.text == full.text[:150]
+        assert result.metadata["truncated"] is True
+        assert result.metadata["pages_read"] < 10
+
+    def test_token_budget(self, pdf_file):
+        """A token budget is converted to characters."""
+        result = extract_text_streaming(pdf_file, max_tokens=25, _skip_path_validation=True)
+
+        assert len(result.text) == 100
+        assert result.metadata["char_budget"] == 100
+        assert result.metadata["token_count"] == 25
+
+    def test_docx_blocks(self, docx_file):
+        """DOCX paragraphs and table rows are streamed as blocks."""
+        result = extract_text_streaming(docx_file, max_chars=10**6, _skip_path_validation=True)
+
+        assert result.text.split("\n\n") == [f"Paragraph {i}" for i in range(5)] + ["A | B"]
+
+        partial = extract_text_streaming(docx_file, max_chars=20, _skip_path_validation=True)
+        assert partial.metadata["truncated"] is True
+        assert partial.metadata["pages_read"] == 2
+
+    def test_non_streamable_type_is_cut(self, tmp_path):
+        """Other types fall back to full extraction cut to the budget."""
+        txt_file = tmp_path / "notes.txt"
+        txt_file.write_text("abcdefghij")
+
+        result = extract_text_streaming(txt_file, max_chars=4, _skip_path_validation=True)
+
+        assert result.text == "abcd"
+        assert result.metadata["truncated"] is True
+
+
 class TestIntegrationWithRealFiles:
     """Integration tests using actual files from the Materials folder.
 
@@ -0,0 +1,264 @@
+"""Tests for the tiered (memory -> disk -> Firestore) extracted-text cache."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services import text_cache_service, tiered_text_cache
+from app.services.materials_catalog import ChangeEvent
+from app.services.text_extractor import ExtractionResult
+from app.services.tiered_text_cache import TieredTextCache
+
+
+@pytest.fixture
+def material_file(tmp_path, monkeypatch):
+    """Create a file and allow it to be fingerprinted outside Materials."""
+    monkeypatch.setattr(text_cache_service, "_validate_path_within_materials", lambda p: True)
+    monkeypatch.setattr(
+        text_cache_service, "_hash_index", text_cache_service.FileHashIndex(tmp_path / "hash_index.json")
+    )
+    path = tmp_path / "reader.txt"
+    path.write_text("Art. 6:74 DCC governs damages.")
+    return path
+
+
+@pytest.fixture
+def mock_extract():
+    """Patch the extractor used by the tiered cache."""
+    with patch.object(tiered_text_cache, "extract_text") as mock:
+        mock.side_effect = lambda p: ExtractionResult(
+            file_path=str(p), file_type="text", text=p.read_text(), success=True,
+            metadata={"char_count": 30}, pages=[{"page_number": 1}],
+        )
+        yield mock
+
+
+def _cache(tmp_path, **kwargs):
+    return TieredTextCache(disk_dir=tmp_path / "cache", use_firestore=False, **kwargs)
+
+
+class TestTieredTextCache:
+    """Tests for TieredTextCache lookups and counters."""
+
+    def test_second_lookup_served_from_memory(self, tmp_path, material_file, mock_extract):
+        """Repeat lookups never call the extractor again."""
+        cache = _cache(tmp_path)
+
+        first = cache.get_or_extract(material_file)
+        second = cache.get_or_extract(material_file)
+
+        assert first.text == second.text
+        assert mock_extract.call_count == 1
+        assert second.pages is None
+        stats = cache.stats()
+        assert stats["tiers"]["memory"]["hits"] == 1
+        assert stats["tiers"]["memory"]["misses"] == 1
+        assert stats["extractions"] == 1
+
+    def test_hash_index_written_by_flush_not_lookups(self, tmp_path, material_file, mock_extract, monkeypatch):
+        """Lookups leave the hash index file alone; the periodic flush writes it."""
+        monkeypatch.setattr(text_cache_service, "flush_access_stats", lambda: 0)
+        cache = _cache(tmp_path)
+
+        cache.get_or_extract(material_file)
+        cache.get_or_extract(material_file)
+
+        assert not (tmp_path / "hash_index.json").exists()
+        text_cache_service.flush_pending_writes()
+        assert (tmp_path / "hash_index.json").exists()
+
+    def test_disk_tier_survives_memory_clear(self, tmp_path, material_file, mock_extract):
+        """A cleared memory tier falls through to the disk tier."""
+        cache = _cache(tmp_path)
+        cache.get_or_extract(material_file)
+        cache.clear_memory()
+
+        result = cache.get_or_extract(material_file)
+
+        assert result.success is True
+        assert mock_extract.call_count == 1
+        assert cache.stats()["tiers"]["disk"]["hits"] == 1
+
+    def test_disk_tier_shared_between_instances(self, tmp_path, material_file, mock_extract):
+        """A new process (instance) reuses entries written by another."""
+        _cache(tmp_path).get_or_extract(material_file)
+        result = _cache(tmp_path).get_or_extract(material_file)
+
+        assert result.text.startswith("Art. 6:74")
+        assert mock_extract.call_count == 1
+
+    def test_changed_content_is_re_extracted(self, tmp_path, material_file, mock_extract):
+        """Entries are keyed by content, so edits invalidate implicitly."""
+        cache = _cache(tmp_path)
+        cache.get_or_extract(material_file)
+        material_file.write_text("Completely new content")
+
+        result = cache.get_or_extract(material_file)
+
+        assert result.text == "Completely new content"
+        assert mock_extract.call_count == 2
+
+    def test_failed_extraction_not_cached(self, tmp_path, material_file):
+        """Failures are returned but never stored."""
+        cache = _cache(tmp_path)
+        failure = ExtractionResult(
+            file_path=str(material_file), file_type="text", text="", success=False, error="boom"
+        )
+        with patch.object(tiered_text_cache, "extract_text", return_value=failure) as mock:
+            cache.get_or_extract(material_file)
+            cache.get_or_extract(material_file)
+
+        assert mock.call_count == 2
+        assert cache.stats()["memory_entries"] == 0
+
+    def test_partial_entry_only_serves_covered_budgets(self, tmp_path, material_file):
+        """Budget-truncated entries are reused for smaller budgets only."""
+        cache = _cache(tmp_path)
+        partial = ExtractionResult(
+            file_path=str(material_file), file_type="text", text="Art. 6", success=True,
+            metadata={"truncated": True, "char_budget": 6},
+        )
+        with patch.object(tiered_text_cache, "extract_text_streaming", return_value=partial) as stream, \
+                patch.object(tiered_text_cache, "extract_text", side_effect=lambda p: ExtractionResult(
+                    file_path=str(p), file_type="text", text=p.read_text(), success=True,
+                )) as full:
+            assert cache.get_or_extract(material_file, max_chars=6).text == "Art. 6"
+            assert cache.get_or_extract(material_file, max_chars=5).text == "Art. 6"
+            assert cache.get_or_extract(material_file).text.startswith("Art. 6:74")
+
+        assert stream.call_count == 1
+        assert full.call_count == 1
+
+    def test_memory_tier_evicts_by_chars(self, tmp_path):
+        """The memory tier stays within its character budget."""
+        cache = _cache(tmp_path, max_chars=10)
+        for i in range(3):
+            cache._memory_put(f"fp{i}", ExtractionResult(
+                file_path="f", file_type="text", text="12345", success=True
+            ))
+
+        stats = cache.stats()
+        assert stats["memory_entries"] == 2
+        assert stats["memory_chars"] == 10
+        assert cache._memory_get("fp0") is None
+
+    def test_firestore_tier_hit_promotes(self, tmp_path):
+        """A Firestore hit with a matching fingerprint fills memory and disk."""
+        firestore_cache = MagicMock()
+        firestore_cache.is_available = True
+        firestore_cache.get_cached.return_value = MagicMock(
+            file_hash="abc", file_path="Course_Materials/LLS/r.pdf", file_type="pdf",
+            text="cached text", extraction_success=True, metadata={},
+        )
+        cache = TieredTextCache(disk_dir=tmp_path / "cache")
+        cache._firestore_cache = firestore_cache
+
+        assert cache.get("abc", "Course_Materials/LLS/r.pdf").text == "cached text"
+        assert cache.get("abc", "Course_Materials/LLS/r.pdf") is not None
+        assert cache.stats()["tiers"]["firestore"]["hits"] == 1
+        assert (tmp_path / "cache" / "abc.json").exists()
+
+    def test_prefetch_uses_one_batch_read(self, tmp_path, material_file, monkeypatch):
+        """Prefetched entries are then served from memory without per-file reads."""
+        from app.services.text_cache_service import get_hash_index
+
+        fingerprint = get_hash_index().file_hash(material_file)
+        firestore_cache = MagicMock()
+        firestore_cache.is_available = True
+        firestore_cache.get_cached_many.return_value = {
+            "reader.txt": MagicMock(
+                file_hash=fingerprint, file_path="reader.txt", file_type="text",
+                text="cached text", extraction_success=True, metadata={},
+            )
+        }
+        cache = TieredTextCache(disk_dir=tmp_path / "cache")
+        cache._firestore_cache = firestore_cache
+        monkeypatch.setattr(cache, "_relative_path", lambda p: p.name)
+
+        assert cache.prefetch([material_file]) == 1
+        assert cache.get_or_extract(material_file).text == "cached text"
+        firestore_cache.get_cached_many.assert_called_once_with(["reader.txt"])
+        firestore_cache.get_cached.assert_not_called()
+
+    def test_token_count_from_cached_metadata(self, tmp_path, material_file, mock_extract):
+        """Token counts are read from the cached entry without extracting again."""
+        cache = _cache(tmp_path)
+        assert cache.token_count(material_file) is None
+
+        cache.put(
+            text_cache_service.get_hash_index().file_hash(material_file),
+            ExtractionResult(
+                file_path=str(material_file), file_type="text", text="x" * 40,
+                success=True, metadata={"token_count": 12},
+            ),
+        )
+
+        assert cache.token_count(material_file) == 12
+        mock_extract.assert_not_called()
+
+    def test_firestore_tier_rejects_stale_fingerprint(self, tmp_path):
+        """A Firestore entry for different content is treated as a miss."""
+        firestore_cache = MagicMock()
+        firestore_cache.is_available = True
+        firestore_cache.get_cached.return_value = MagicMock(
+            file_hash="old", extraction_success=True
+        )
+        cache = TieredTextCache(disk_dir=tmp_path / "cache")
+        cache._firestore_cache = firestore_cache
+
+        assert cache.get("new", "Course_Materials/LLS/r.pdf") is None
+        assert cache.stats()["tiers"]["firestore"]["misses"] == 1
+
+    def test_catalog_changes_drop_old_content(self, tmp_path):
+        """Modified and deleted files lose the entries for their old content."""
+        cache = _cache(tmp_path)
+        for fingerprint in ("old", "gone", "new"):
+            cache.put(fingerprint, ExtractionResult(
+                file_path="r.txt", file_type="text", text=fingerprint, success=True,
+            ))
+        events = [
+            ChangeEvent(seq=1, kind="modified", path="r.txt", file_hash="new", previous_hash="old"),
+            ChangeEvent(seq=2, kind="deleted", path="g.txt", previous_hash="gone"),
+            ChangeEvent(seq=3, kind="added", path="n.txt", file_hash="new"),
+        ]
+
+        assert cache.apply_catalog_changes(events) == 2
+        assert cache.get("old") is None
+        assert cache.get("gone") is None
+        assert cache.get("new").text == "new"
+
+    def test_changed_since_tracks_each_fingerprint(self, tmp_path):
+        """Writes and invalidations are visible per fingerprint, not cache-wide."""
+        cache = _cache(tmp_path)
+        cache.put("a", ExtractionResult(file_path="a.txt", file_type="text", text="a", success=True))
+        version = cache.version
+
+        cache.put("b", ExtractionResult(file_path="b.txt", file_type="text", text="b", success=True))
+        assert not cache.changed_since(version, ["a"])
+        assert cache.changed_since(version, ["a", "b"])
+
+        cache.invalidate("a")
+        assert cache.changed_since(version, ["a"])
+
+    def test_change_log_is_bounded(self, tmp_path):
+        """Old fingerprints leave the change log but still count as changed after their version."""
+        cache = _cache(tmp_path, max_changes=2)
+        before = cache.version
+        for fingerprint in ["a", "b", "c"]:
+            cache.invalidate(fingerprint)
+        after = cache.version
+
+        assert len(cache._changed_at) == 2
+        assert cache.changed_since(before, ["a"])
+        assert not cache.changed_since(after, ["a", "b", "c"])
+
+
+class TestTierStatsEndpoint:
+    """Tests for the tier stats admin endpoint."""
+
+    def test_tier_stats_endpoint(self, client):
+        """Endpoint returns counters for every tier."""
+        response = client.get("/api/admin/cache/tiers")
+
+        assert response.status_code == 200
+        assert set(response.json()["tiers"]) == {"memory", "disk", "firestore"}
@@ -0,0 +1,136 @@
+"""Tests for the topic-to-file inverted indexes."""
+
+from types import SimpleNamespace
+
+from app.services.topic_file_index import (
+    CourseFileIndex,
+    CourseFileIndexRegistry,
+    FileCatalogIndex,
+    keywords,
+)
+from tests.conftest import make_material
+
+FILE_IDS = {
+    "syllabus_criminal_law": {
+        "filename": "Syllabus/Criminal_Law/syllabus.pdf", "subject": "Criminal_Law",
+        "tier": "Syllabus", "tier_priority": 1,
+    },
+    "criminal_law_lecture_3": {
+        "filename": "Course_Materials/Criminal_Law/lecture_3_mens_rea.pdf", "subject": "Criminal_Law",
+        "tier": "Course_Materials", "tier_priority": 2,
+    },
+    "criminal_law_case_law": {
+        "filename": "Supplementary_Sources/Criminal_Law/echr_cases.pdf", "subject": "Criminal_Law",
+        "tier": "Supplementary_Sources", "tier_priority": 3,
+    },
+    "private_law_reader": {
+        "filename": "Course_Materials/Private_Law/reader.pdf", "subject": "Private_Law",
+        "tier": "Course_Materials", "tier_priority": 2,
+    },
+}
+
+
+def _week(number, title, topics):
+    return SimpleNamespace(weekNumber=number, title=title, topics=topics)
+
+
+class TestFileCatalogIndex:
+    """Tests for subject, tier and keyword lookups over the catalog."""
+
+    def test_subject_lookup_is_ranked_by_tier(self):
+        """Subject files come back Syllabus first, case-insensitively."""
+        catalog = FileCatalogIndex(FILE_IDS)
+
+        assert catalog.subject("criminal_law") == [
+            "syllabus_criminal_law", "criminal_law_lecture_3", "criminal_law_case_law",
+        ]
+
+    def test_ties_are_broken_by_key(self):
+        """Files with equal priority have a stable, key-based order."""
+        catalog = FileCatalogIndex(FILE_IDS)
+
+        assert catalog.tier("Course_Materials") == ["criminal_law_lecture_3", "private_law_reader"]
+        assert catalog.rank(["unknown", "private_law_reader"]) == ["private_law_reader", "unknown"]
+
+    def test_keyword_lookup_requires_every_term(self):
+        """Keyword lookups match keys, filenames and subjects."""
+        catalog = FileCatalogIndex(FILE_IDS)
+
+        assert catalog.keyword("mens rea") == ["criminal_law_lecture_3"]
+        assert catalog.keyword("Private Law") == ["private_law_reader"]
+        assert catalog.keyword("of the") == []
+
+    def test_keywords(self):
+        """Underscores split words and stopwords are dropped."""
+        assert keywords("Law_of the Sea") == {"law", "sea"}
+
+
+class TestCourseFileIndex:
+    """Tests for per-course week, tier and topic lookups over course materials."""
+
+    def _index(self):
+        materials = [
+            make_material("syllabus", week=None, tier="syllabus", title="Criminal Law Syllabus"),
+            make_material("lecture", week=3, title="Lecture 3", category="lecture"),
+            make_material("cases", week=3, tier="supplementary", title="ECHR criminal cases"),
+            make_material("reader", week=5, title="Reader"),
+        ]
+        weeks = [_week(3, "Mens rea", ["Intent and negligence"]), _week(4, "Empty week", [])]
+        return CourseFileIndex(materials, weeks)
+
+    def test_all_materials_ranked_by_tier(self):
+        """Materials come back Syllabus first, then by storage path."""
+        assert self._index().all_files == ["syllabus", "lecture", "reader", "cases"]
+
+    def test_week_lookup_with_fallback(self):
+        """Weeks without materials fall back to every course material."""
+        index = self._index()
+
+        assert index.lookup(week_numbers=[3]) == ["lecture", "cases"]
+        assert index.lookup(week_numbers=[4]) == index.all_files
+
+    def test_tier_filter(self):
+        """Tier filters apply after week selection."""
+        assert self._index().lookup(week_numbers=[3], tier="supplementary") == ["cases"]
+
+    def test_topic_keywords_from_week_topics(self):
+        """A week's topics and title point at that week's materials."""
+        assert self._index().lookup(topic="negligence") == ["lecture", "cases"]
+
+    def test_topic_ranking_prefers_more_matching_terms(self):
+        """Materials matching more topic keywords rank ahead of higher tiers."""
+        results = self._index().lookup(topic="criminal intent")
+
+        assert results == ["cases", "syllabus", "lecture"]
+
+    def test_describe(self):
+        """Details come from the material records, skipping unknown IDs."""
+        details = self._index().describe(["cases", "unknown"])
+
+        assert details == [{
+            "key": "cases", "filename": "cases.pdf", "title": "ECHR criminal cases",
+            "tier": "supplementary", "week": 3,
+        }]
+
+
+class TestCourseFileIndexRegistry:
+    """Tests for reusing course file indexes."""
+
+    def test_index_is_reused_until_the_course_changes(self):
+        """A new course updatedAt or an invalidation drops the index."""
+        registry = CourseFileIndexRegistry()
+        index = CourseFileIndex([make_material("reader")])
+        registry.put("course", index, "2026-01-01")
+
+        assert registry.get("course", "2026-01-01") is index
+        assert registry.get("course", "2026-02-01") is None
+
+        registry.invalidate("course")
+        assert registry.get("course", "2026-01-01") is None
+
+    def test_expired_index_is_rebuilt(self):
+        """Indexes older than the TTL are not served."""
+        registry = CourseFileIndexRegistry(ttl_seconds=-1)
+        registry.put("course", CourseFileIndex([]), "2026-01-01")
+
+        assert registry.get("course", "2026-01-01") is None
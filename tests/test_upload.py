@@ -25,6 +25,7 @@ import io
 
 from app.main import app
 from app.routes.upload import validate_file_content, sanitize_course_id
+from app.services.storage_service import LocalStorageBackend
 from app.models.auth_models import User
 
 client = TestClient(app)
@@ -37,6 +38,15 @@ TEST_HEADERS = {
 }
 
 
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    """Store uploads under tmp_path instead of the repository's Materials/ directory."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("app.routes.upload.UPLOAD_DIR", (tmp_path / "Materials" / "uploads").resolve())
+    monkeypatch.setattr("app.routes.upload.get_storage_backend", LocalStorageBackend)
+    return tmp_path / "Materials" / "uploads"
+
+
 class TestAuthentication:
     """Test authentication integration"""
 
@@ -140,7 +150,7 @@ class TestFileValidation:
 
 class TestUploadEndpoint:
     """Test upload endpoint"""
-    
+
     def test_upload_missing_csrf_headers(self):
         """Test that requests without CSRF headers are rejected"""
         response = client.post(
@@ -187,7 +197,7 @@ class TestUploadEndpoint:
         assert response.status_code == 400
         assert "too large" in response.json()["detail"]
 
-    def test_upload_valid_txt_file(self):
+    def test_upload_valid_txt_file(self, upload_dir):
         """Test that valid TXT file uploads successfully"""
         content = b"This is a test document for ALLMS"
 
@@ -204,6 +214,7 @@ class TestUploadEndpoint:
         assert "material_id" in data
         assert data["filename"] == "test.txt"
         assert data["size_bytes"] == len(content)
+        assert [p.read_bytes() for p in (upload_dir / "test-course").iterdir()] == [content]
     
     def test_upload_malicious_pdf(self):
         """Test that malicious file disguised as PDF is rejected"""